@@ -0,0 +1,5 @@
+"""Upload benchmarks against local stand-ins of Azure Files and Euphrosyne tools.
+
+Run `python -m bench --help` (or `make bench`) to generate the synthetic datasets,
+upload them and write a JSON report comparable between commits.
+"""
@@ -0,0 +1,69 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from bench.datasets import DATASETS
+from bench.runner import (
+    compare_reports,
+    read_report,
+    run_benchmarks,
+    run_upload,
+    write_report,
+)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--child"]:
+        dataset, folder, tools_url, concurrency = argv[1:]
+        print(json.dumps(run_upload(dataset, folder, tools_url, int(concurrency))))
+        return 0
+
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Benchmark uploads against local fake storage and tools API.",
+    )
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        choices=DATASETS,
+        help="Dataset to run; repeat for several. Defaults to all of them.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiply the size of every dataset (e.g. 0.1 for a quick run).",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1, help="Uploads per dataset.")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("bench-report.json"),
+        help="Where to write the JSON report.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        help="A previous report to compare median wall time and peak RSS with.",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.dataset or DATASETS,
+        scale=args.scale,
+        concurrency=args.concurrency,
+        repeat=args.repeat,
+    )
+    write_report(report, args.output)
+    print(f"Report written to {args.output}")
+    if args.compare:
+        for line in compare_reports(read_report(args.compare), report):
+            print(line)
+    return 1 if any(result["return_code"] for result in report["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
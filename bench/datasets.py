@@ -0,0 +1,60 @@
+import os
+import random
+import typing
+from pathlib import Path
+
+DATASETS = ("tiny-files", "huge-files", "deep-tree")
+# Reused pseudo-random block, so generating gigabytes stays cheap but content
+# does not compress to nothing.
+_BLOCK = random.Random(0).randbytes(1024 * 1024)
+
+
+class DatasetSpec(typing.NamedTuple):
+    file_count: int
+    file_size: int
+    depth: int
+    fan_out: int
+
+
+def dataset_spec(name: str, scale: float = 1.0) -> DatasetSpec:
+    """Return the shape of a dataset; `scale` shrinks or grows its total size."""
+    if name == "tiny-files":
+        return DatasetSpec(max(int(5000 * scale), 1), 2 * 1024, depth=1, fan_out=10)
+    if name == "huge-files":
+        return DatasetSpec(4, max(int(256 * 1024 * 1024 * scale), 1), 0, 1)
+    if name == "deep-tree":
+        return DatasetSpec(max(int(2000 * scale), 1), 64 * 1024, depth=8, fan_out=2)
+    raise ValueError(f"Unknown dataset {name!r}, expected one of {DATASETS}.")
+
+
+def generate_dataset(name: str, root: Path, scale: float = 1.0) -> DatasetSpec:
+    """Write a deterministic synthetic run folder under `root`."""
+    spec = dataset_spec(name, scale)
+    directories = _directories(spec.depth, spec.fan_out)
+    for index in range(spec.file_count):
+        folder = root / directories[index % len(directories)]
+        folder.mkdir(parents=True, exist_ok=True)
+        _write_file(folder / f"spectrum-{index:06d}.bin", spec.file_size, index)
+    return spec
+
+
+def _directories(depth: int, fan_out: int) -> list[str]:
+    levels = [""]
+    for _ in range(depth):
+        levels = [
+            os.path.join(parent, f"d{child}")
+            for parent in levels
+            for child in range(fan_out)
+        ]
+    return levels
+
+
+def _write_file(path: Path, size: int, seed: int):
+    offset = seed % len(_BLOCK)
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            chunk = _BLOCK[offset : offset + remaining]
+            f.write(chunk)
+            remaining -= len(chunk)
+            offset = 0
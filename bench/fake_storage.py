@@ -0,0 +1,111 @@
+import threading
+import typing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class FakeFileShare:
+    """In-memory subset of the Azure Files REST API used by the native engine.
+
+    With `keep_content=False` only file sizes are recorded, so benchmarks can
+    upload datasets larger than the available memory.
+    """
+
+    def __init__(self, sas_token: str, keep_content: bool = True):
+        self.sas_token = sas_token
+        self.keep_content = keep_content
+        self.directories: set[str] = {""}
+        self.files: dict[str, bytearray] = {}
+        self.file_sizes: dict[str, int] = {}
+        self.content_md5: dict[str, str] = {}
+        self.bytes_received = 0
+        self.requests: list[tuple[str, str, dict[str, str]]] = []
+        self.fail_next: list[int] = []
+        self.lock = threading.Lock()
+        self.url = ""
+
+    def handle(self, method: str, raw_path: str, headers, body: bytes):
+        url = urlsplit(raw_path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = unquote(url.path).strip("/")
+        with self.lock:
+            if self.keep_content:
+                self.requests.append((method, path, query))
+            if self.fail_next:
+                return self.fail_next.pop(0)
+        if query.get("sig") != self.sas_token or method != "PUT":
+            return 403
+        parent = path.rpartition("/")[0]
+        with self.lock:
+            if parent not in self.directories:
+                return 404
+            if query.get("restype") == "directory":
+                if path in self.directories:
+                    return 409
+                self.directories.add(path)
+                return 201
+            if query.get("comp") == "range":
+                if path not in self.file_sizes:
+                    return 404
+                start, end = map(int, headers["x-ms-range"][6:].split("-"))
+                self.bytes_received += len(body)
+                if self.keep_content:
+                    self.files[path][start : end + 1] = body
+                return 201
+            size = int(headers["x-ms-content-length"])
+            self.file_sizes[path] = size
+            if self.keep_content:
+                self.files[path] = bytearray(size)
+            if headers.get("x-ms-content-md5"):
+                self.content_md5[path] = headers["x-ms-content-md5"]
+            return 201
+
+    def make_directories(self, path: str):
+        """Create `path` and its parents, as the tools API does for run folders."""
+        with self.lock:
+            parts = path.strip("/").split("/")
+            for index in range(1, len(parts) + 1):
+                self.directories.add("/".join(parts[:index]))
+
+
+class _Server(typing.NamedTuple):
+    server: ThreadingHTTPServer
+    thread: threading.Thread
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def serve(handler_class: type[BaseHTTPRequestHandler]) -> tuple[str, _Server]:
+    """Serve `handler_class` on a free local port from a background thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{server.server_port}", _Server(server, thread)
+
+
+def start_fake_storage(
+    sas_token: str = "fake-signature", keep_content: bool = True
+) -> tuple[FakeFileShare, _Server]:
+    share = FakeFileShare(sas_token=sas_token, keep_content=keep_content)
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, like Azure, so connection pooling is measured too.
+        protocol_version = "HTTP/1.1"
+
+        def do_PUT(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            status = share.handle("PUT", self.path, self.headers, body)
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    share.url, server = serve(Handler)
+    return share, server
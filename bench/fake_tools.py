@@ -0,0 +1,71 @@
+import json
+import re
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+from bench.fake_storage import FakeFileShare, _Server, serve
+
+PROJECT_INIT = re.compile(r"^/data/(?P<project>[^/]+)/init$")
+RUN_INIT = re.compile(r"^/data/(?P<project>[^/]+)/runs/(?P<run>[^/]+)/init$")
+SAS = re.compile(
+    r"^/data/(?P<project>[^/]+)/runs/(?P<run>[^/]+)/upload/shared_access_signature$"
+)
+
+
+class FakeToolsAPI:
+    """The Euphrosyne tools endpoints used by an upload, backed by a fake share."""
+
+    def __init__(self, share: FakeFileShare):
+        self.share = share
+        self.requests: list[tuple[str, str]] = []
+
+    def handle(self, method: str, raw_path: str) -> tuple[int, dict | None]:
+        url = urlsplit(raw_path)
+        self.requests.append((method, url.path))
+        if method == "POST" and (match := PROJECT_INIT.match(url.path)):
+            self.share.make_directories(f"projects/{match['project']}")
+            return 204, None
+        if method == "POST" and (match := RUN_INIT.match(url.path)):
+            for data_type in ("raw_data", "processed_data"):
+                self.share.make_directories(
+                    f"projects/{match['project']}/runs/{match['run']}/{data_type}"
+                )
+            return 204, None
+        if method == "GET" and (match := SAS.match(url.path)):
+            data_type = parse_qs(url.query).get("data_type", ["raw_data"])[0]
+            return 200, {
+                "url": f"{self.share.url}/projects/{match['project']}/runs/"
+                f"{match['run']}/{data_type}",
+                "token": f"sv=2021&sig={self.share.sas_token}",
+            }
+        return 404, {"detail": "Not found"}
+
+
+def start_fake_tools(share: FakeFileShare) -> tuple[FakeToolsAPI, str, _Server]:
+    api = FakeToolsAPI(share)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method: str):
+            status, payload = api.handle(method, self.path)
+            body = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            self._respond("POST")
+
+        def log_message(self, *args):
+            pass
+
+    url, server = serve(Handler)
+    return api, url, server
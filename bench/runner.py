@@ -0,0 +1,236 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from bench.datasets import DATASETS, generate_dataset
+from bench.fake_storage import start_fake_storage
+from bench.fake_tools import start_fake_tools
+from data_upload.euphro_tools import EuphrosyneToolsService
+from data_upload.upload_engine import NativeUploadEngine
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_VERSION = 1
+BENCH_PROJECT = "bench-project"
+BENCH_RUN = "bench-run"
+
+
+class BenchmarkResult(typing.TypedDict):
+    dataset: str
+    engine: str
+    files: int
+    bytes: int
+    return_code: int
+    wall_time: float
+    cpu_time: float
+    peak_rss: int | None
+    throughput_mbps: float
+    files_per_second: float
+
+
+class BenchmarkReport(typing.TypedDict):
+    version: int
+    created_at: str
+    commit: str | None
+    python: str
+    platform: str
+    cpu_count: int | None
+    scale: float
+    concurrency: int
+    results: list[BenchmarkResult]
+
+
+def run_benchmarks(
+    datasets: typing.Sequence[str] = DATASETS,
+    scale: float = 1.0,
+    concurrency: int = 8,
+    repeat: int = 1,
+    on_output: typing.Callable[[str], None] = print,
+) -> BenchmarkReport:
+    """Generate each dataset, upload it `repeat` times and collect measurements.
+
+    The fake storage and tools servers run in this process, while each upload runs
+    in a child process so its CPU time and peak RSS are measured on their own.
+    """
+    share, storage_server = start_fake_storage(keep_content=False)
+    _api, tools_url, tools_server = start_fake_tools(share)
+    results: list[BenchmarkResult] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="herma-bench-") as tmp:
+            for dataset in datasets:
+                folder = Path(tmp) / dataset
+                on_output(f"Generating {dataset} dataset (scale {scale})...")
+                generate_dataset(dataset, folder, scale)
+                for _ in range(repeat):
+                    result = _run_in_child(dataset, folder, tools_url, concurrency)
+                    on_output(format_result(result))
+                    results.append(result)
+    finally:
+        tools_server.shutdown()
+        storage_server.shutdown()
+    return BenchmarkReport(
+        version=REPORT_VERSION,
+        created_at=datetime.now(timezone.utc).isoformat(),
+        commit=_git_commit(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        scale=scale,
+        concurrency=concurrency,
+        results=results,
+    )
+
+
+def run_upload(
+    dataset: str, folder: str, tools_url: str, concurrency: int
+) -> BenchmarkResult:
+    """Run the upload path once, as the CLI does, and measure it."""
+    started_wall = time.perf_counter()
+    started_cpu = time.process_time()
+    tools = EuphrosyneToolsService(host=tools_url, auth=httpx.Auth())
+    tools.init_folders(BENCH_PROJECT, BENCH_RUN)
+    credentials = tools.get_run_data_upload_shared_access_signature(
+        BENCH_PROJECT, BENCH_RUN, "raw_data"
+    )
+    counters = {"files": 0, "bytes": 0}
+
+    def on_progress(progress):
+        counters["files"] = progress["files_completed"]
+        counters["bytes"] = progress["bytes_transferred"]
+
+    return_code = NativeUploadEngine(concurrency=concurrency).upload(
+        folder,
+        credentials["url"],
+        credentials["token"],
+        on_output=lambda _line: None,
+        on_progress=on_progress,
+    )
+    wall_time = time.perf_counter() - started_wall
+    return BenchmarkResult(
+        dataset=dataset,
+        engine="native",
+        files=counters["files"],
+        bytes=counters["bytes"],
+        return_code=return_code,
+        wall_time=round(wall_time, 4),
+        cpu_time=round(time.process_time() - started_cpu, 4),
+        peak_rss=_peak_rss(),
+        throughput_mbps=round(counters["bytes"] * 8 / 1_000_000 / wall_time, 3),
+        files_per_second=round(counters["files"] / wall_time, 1),
+    )
+
+
+def compare_reports(baseline: BenchmarkReport, current: BenchmarkReport) -> list[str]:
+    """Return one line per dataset comparing median wall time and peak RSS."""
+    lines = []
+    before = _medians(baseline["results"])
+    for dataset, after in _medians(current["results"]).items():
+        if dataset not in before:
+            lines.append(f"{dataset}: no baseline")
+            continue
+        lines.append(
+            f"{dataset}: wall time {_change(before[dataset][0], after[0])}, "
+            f"peak RSS {_change(before[dataset][1], after[1])}"
+        )
+    return lines
+
+
+def format_result(result: BenchmarkResult) -> str:
+    peak_rss = (
+        f"{result['peak_rss'] / 1024 / 1024:.0f} MiB"
+        if result["peak_rss"] is not None
+        else "n/a"
+    )
+    return (
+        f"{result['dataset']}: {result['files']} files, {result['bytes']} bytes in "
+        f"{result['wall_time']:.2f}s ({result['throughput_mbps']:.1f} Mbps, "
+        f"{result['files_per_second']:.0f} files/s), CPU {result['cpu_time']:.2f}s, "
+        f"peak RSS {peak_rss}"
+    )
+
+
+def write_report(report: BenchmarkReport, path: Path):
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+def read_report(path: Path) -> BenchmarkReport:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _run_in_child(
+    dataset: str, folder: Path, tools_url: str, concurrency: int
+) -> BenchmarkResult:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "bench",
+            "--child",
+            dataset,
+            str(folder),
+            tools_url,
+            str(concurrency),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _medians(
+    results: list[BenchmarkResult],
+) -> dict[str, tuple[float, float | None]]:
+    grouped: dict[str, list[BenchmarkResult]] = {}
+    for result in results:
+        grouped.setdefault(result["dataset"], []).append(result)
+    medians = {}
+    for dataset, items in grouped.items():
+        wall_times = sorted(item["wall_time"] for item in items)
+        peaks = sorted(item["peak_rss"] for item in items if item["peak_rss"])
+        medians[dataset] = (
+            wall_times[len(wall_times) // 2],
+            peaks[len(peaks) // 2] if peaks else None,
+        )
+    return medians
+
+
+def _change(before: float | None, after: float | None) -> str:
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before:+.1%}"
@@ -1,29 +1,149 @@
-import subprocess
+import typing
+from contextlib import nullcontext
 
 from PySide6.QtCore import QObject, Signal, Slot
 
-from data_upload.azcopy import get_copy_command
+from data_upload.azcopy import (
+    get_copy_command,
+    get_resume_command,
+    run_azcopy,
+    write_list_of_files,
+)
+from data_upload.bandwidth import BandwidthLimiter, get_cap_args
+from data_upload.credentials import SASLease, SASRenewalError
+from data_upload.hashing import HashCache
+from data_upload.jobs import new_job_id
+from data_upload.retry import RetryPolicy
+from data_upload.scanner import FolderManifest
+from data_upload.tuning import (
+    AzCopyTuning,
+    get_azcopy_environment,
+    get_azcopy_tuning_args,
+)
+from data_upload.upload_engine import (
+    ENGINE_AZCOPY,
+    DestinationNotFoundError,
+    NativeUploadEngine,
+)
 
 
 class ProcessWorker(QObject):
     output_signal = Signal(str)
+    progress_signal = Signal(object)
+    job_started_signal = Signal(str)
     finished_signal = Signal(int)
 
-    def __init__(self, src: str, dest: str, sas_token: str):
+    def __init__(
+        self,
+        src: str,
+        dest: str,
+        sas_token: str,
+        engine: str = ENGINE_AZCOPY,
+        resume_job_id: str | None = None,
+        only_files: list[str] | None = None,
+        tuning: AzCopyTuning | None = None,
+        manifest: FolderManifest | None = None,
+        cap_mbps: typing.Callable[[], float | None] | None = None,
+        put_md5: bool = False,
+        sas_lease: SASLease | None = None,
+        retry_policy: RetryPolicy = RetryPolicy(),
+    ):
         super().__init__()
-        self.cmd = get_copy_command(src, dest, sas_token)
+        self.src = src
+        self.dest = dest
+        self.sas_token = sas_token
+        self.engine = engine
+        # Files to send for an incremental upload; None uploads the whole folder.
+        self.only_files = only_files
+        self.tuning = tuning
+        self.manifest = manifest
+        self.resume_job_id = resume_job_id
+        self.cap_mbps = cap_mbps
+        self.put_md5 = put_md5
+        # Renews `sas_token` when it is about to expire during the transfer.
+        self.sas_lease = sas_lease
+        self.retry_policy = retry_policy
+        # The files of an incremental upload, listed for AzCopy; removed by `run`.
+        self.list_of_files = None
+        if engine != ENGINE_AZCOPY:
+            self.cmd = None
+        elif resume_job_id:
+            self.cmd = get_resume_command(resume_job_id, sas_token)
+        elif only_files is not None:
+            self.list_of_files = write_list_of_files(only_files)
+            self.cmd = get_copy_command(src, dest, sas_token, self.list_of_files)
+        else:
+            self.cmd = get_copy_command(src, dest, sas_token)
+        if self.cmd is not None and tuning is not None and not resume_job_id:
+            # Block size is fixed in the plan of a resumed job.
+            self.cmd += get_azcopy_tuning_args(tuning)
+        if self.cmd is not None and put_md5 and not resume_job_id:
+            self.cmd.append("--put-md5")
+        # AzCopy cannot change its cap mid-job, so it gets the current one.
+        self.cap_args = (
+            get_cap_args(cap_mbps())
+            if self.cmd is not None and cap_mbps is not None
+            else []
+        )
+        if self.cmd is not None:
+            self.cmd += self.cap_args
 
     @Slot()
     def run(self):
-        process = subprocess.Popen(
-            self.cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-        )
-        for line in process.stdout:
-            self.output_signal.emit(line.rstrip())
-        process.stdout.close()
-        process.wait()
-        self.finished_signal.emit(process.returncode)
+        if self.engine != ENGINE_AZCOPY:
+            self.job_started_signal.emit(new_job_id())
+            try:
+                limiter = BandwidthLimiter(self.cap_mbps) if self.cap_mbps else None
+                with HashCache() if self.put_md5 else nullcontext() as hash_cache:
+                    engine = NativeUploadEngine(
+                        limiter=limiter,
+                        retry_policy=self.retry_policy,
+                        put_md5=self.put_md5,
+                        hash_cache=hash_cache,
+                    )
+                    return_code = engine.upload(
+                        self.src,
+                        self.dest,
+                        self.sas_lease.token if self.sas_lease else self.sas_token,
+                        on_output=self.output_signal.emit,
+                        on_progress=self.progress_signal.emit,
+                        only_files=self.only_files,
+                        manifest=self.manifest,
+                    )
+            except (DestinationNotFoundError, OSError) as error:
+                self.output_signal.emit(f"Upload failed: {error}")
+                return_code = 1
+            self.finished_signal.emit(return_code)
+            return
+
+        try:
+            return_code = run_azcopy(
+                self.cmd,
+                on_output=self.output_signal.emit,
+                on_progress=self.progress_signal.emit,
+                on_job_started=self.job_started_signal.emit,
+                env=get_azcopy_environment(self.tuning) if self.tuning else None,
+                sas_lease=self.sas_lease,
+                resume_args=self.cap_args,
+                **self._expected_totals(),
+            )
+        except SASRenewalError as error:
+            self.output_signal.emit(f"Upload failed: {error}")
+            return_code = 1
+        finally:
+            if self.list_of_files is not None:
+                self.list_of_files.unlink(missing_ok=True)
+        self.finished_signal.emit(return_code)
+
+    def _expected_totals(self) -> dict[str, int]:
+        # A resumed job reports its own totals, which include what was sent before.
+        if self.manifest is None or self.resume_job_id:
+            return {}
+        files = self.manifest.files
+        if self.only_files is not None:
+            selected = set(self.only_files)
+            files = [entry for entry in files if entry.path in selected]
+        return {
+            "expected_bytes": sum(entry.size for entry in files),
+            "expected_files": len(files),
+        }
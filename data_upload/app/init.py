@@ -1,62 +1,70 @@
-import sys
+import typing
 
-from PySide6.QtCore import QSettings
-from PySide6.QtWidgets import QApplication, QMessageBox
+from PySide6.QtCore import QObject, QRunnable, Signal
 
-from data_upload.azcopy import download_azcopy, is_azcopy_installed
-from data_upload.config import Config
-from data_upload.euphrosyne.auth import (
-    EuphrosyneConnectionError,
-    is_token_expired,
-    load_refresh_token,
-    refresh_token,
-)
+from data_upload.azcopy import download_azcopy, get_azcopy_path, is_azcopy_installed
+from data_upload.config import AzCopyRelease, Config
+from data_upload.euphrosyne.auth import is_token_expired, refresh_token
+from data_upload.http_client import get_http_client
 
 
-def init_azcopy(app: QApplication):
+def init_azcopy(
+    release: AzCopyRelease | None = None,
+    on_download: typing.Callable[[], None] | None = None,
+):
     """
     Initialize AzCopy by checking if it is installed and if not, downloading and installing it.
+    With a pinned `release`, another installed version is replaced.
+    Platforms without an AzCopy distribution are skipped: they upload with the native engine.
+    Runs off the GUI thread at startup: `on_download` reports that a download starts.
     """
-    if not is_azcopy_installed():
-        progress_dialog = QMessageBox()
-        progress_dialog.setWindowTitle("Downloading AzCopy")
-        progress_dialog.setText("AzCopy is not installed. Downloading, please wait...")
-        progress_dialog.setStandardButtons(QMessageBox.NoButton)
-        progress_dialog.setModal(True)
-        progress_dialog.show()
-        app.processEvents()
-        download_azcopy()
-        progress_dialog.close()
-
-
-def init_access_token(settings: QSettings, config: Config):
+    if get_azcopy_path() is None:
+        return
+    if not is_azcopy_installed(release):
+        if on_download:
+            on_download()
+        download_azcopy(release)
+
+
+def init_access_token(
+    config: Config,
+    access_token: str | None,
+    load_refresh_token: typing.Callable[[], str | None],
+) -> str | None:
     """
-    Initialize the access token by checking if AzCopy is installed.
-    If not, it will download AzCopy.
+    Refresh the saved `access_token` if it expired, with the refresh token
+    `load_refresh_token` returns.
+    Returns the access token to use, or None when the user must log in, and raises
+    `EuphrosyneConnectionError` when the server cannot be reached.
+    Runs off the GUI thread at startup: it does not touch QSettings.
     """
-    access = settings.value("access_token", None)
-    refresh = load_refresh_token(settings)
-
-    login_required = False
-
-    if access:
-        if is_token_expired(access):
-            try:
-                access = refresh_token(
-                    host=config["euphrosyne"]["url"], refresh_token=refresh
-                )
-            except EuphrosyneConnectionError:
-                QMessageBox.critical(
-                    None,
-                    "Connection Error",
-                    "Failed to connect to Euphrosyne server. Please check your connection and try again.",
-                )
-                sys.exit(1)
-            if access is None:
-                login_required = True
-            else:
-                settings.setValue("access_token", access)
-    else:
-        login_required = True
-
-    return login_required
+    if access_token and is_token_expired(access_token):
+        access_token = refresh_token(
+            host=config["euphrosyne"]["url"],
+            refresh_token=load_refresh_token(),
+            client=get_http_client(config["environment"], config.get("retry")),
+        )
+    return access_token or None
+
+
+class AzCopyInitSignals(QObject):
+    download_signal = Signal()
+    finished_signal = Signal()
+    failed_signal = Signal(str)
+
+
+class AzCopyInitTask(QRunnable):
+    """Run `init_azcopy` on the global thread pool and report when it is done."""
+
+    def __init__(self, release: AzCopyRelease | None = None):
+        super().__init__()
+        self.release = release
+        self.signals = AzCopyInitSignals()
+
+    def run(self):
+        try:
+            init_azcopy(self.release, on_download=self.signals.download_signal.emit)
+        except Exception as error:
+            self.signals.failed_signal.emit(str(error))
+            return
+        self.signals.finished_signal.emit()
@@ -9,7 +9,8 @@ from data_upload.config import (
     ConfigCatalog,
     resolve_config,
 )
-from data_upload.euphrosyne.auth import euphrosyne_login, save_refresh_token
+from data_upload.euphrosyne.auth import euphrosyne_login, get_token_store
+from data_upload.http_client import get_http_client
 from data_upload.widget.login import LoginDialog
 
 
@@ -31,10 +32,12 @@ def login_user(
             host=selected_config["euphrosyne"]["url"],
             email=email,
             password=password,
+            client=get_http_client(
+                selected_config["environment"], selected_config.get("retry")
+            ),
         )
         if tokens is not None:
-            settings.setValue("access_token", tokens[0])
-            save_refresh_token(settings, tokens[1])
+            get_token_store(settings).save(*tokens)
             settings.setValue(ENVIRONMENT_SETTING_KEY, selected_config["environment"])
             return selected_config
 
@@ -0,0 +1,40 @@
+import httpx
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from data_upload.config import Config
+from data_upload.euphrosyne.project import ProjectLoadingError
+from data_upload.project_catalog import revalidate_project_catalog
+
+
+class ProjectRevalidationSignals(QObject):
+    # The new project list, or None when the cached one is current.
+    finished_signal = Signal(object)
+    # A batch of downloaded projects, while the list is read.
+    projects_signal = Signal(object)
+    failed_signal = Signal(str)
+
+
+class ProjectRevalidationTask(QRunnable):
+    """Revalidate the cached project list on the global thread pool."""
+
+    def __init__(
+        self, config: Config, access_token: str, client: httpx.Client | None = None
+    ):
+        super().__init__()
+        self.config = config
+        self.access_token = access_token
+        self.client = client
+        self.signals = ProjectRevalidationSignals()
+
+    def run(self):
+        try:
+            projects = revalidate_project_catalog(
+                self.config,
+                self.access_token,
+                self.client,
+                on_projects=self.signals.projects_signal.emit,
+            )
+        except (ProjectLoadingError, httpx.HTTPError) as error:
+            self.signals.failed_signal.emit(str(error))
+            return
+        self.signals.finished_signal.emit(projects)
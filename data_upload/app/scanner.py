@@ -0,0 +1,25 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from data_upload.scanner import scan_folder
+
+
+class FolderScanSignals(QObject):
+    finished_signal = Signal(str, object)
+    failed_signal = Signal(str, str)
+
+
+class FolderScanTask(QRunnable):
+    """Scan a folder on the global thread pool and report its manifest."""
+
+    def __init__(self, folder: str):
+        super().__init__()
+        self.folder = folder
+        self.signals = FolderScanSignals()
+
+    def run(self):
+        try:
+            manifest = scan_folder(self.folder)
+        except OSError as error:
+            self.signals.failed_signal.emit(self.folder, str(error))
+            return
+        self.signals.finished_signal.emit(self.folder, manifest)
@@ -0,0 +1,138 @@
+import typing
+
+from PySide6.QtCore import QEventLoop, QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class StartupStage(typing.NamedTuple):
+    name: str
+    message: str
+    run: typing.Callable[..., typing.Any]
+    # Stages whose results are passed to `run`, in order.
+    requires: tuple[str, ...] = ()
+
+
+class StartupStageSignals(QObject):
+    finished_signal = Signal(str, object)
+    failed_signal = Signal(str, object)
+
+
+class StartupStageTask(QRunnable):
+    def __init__(self, stage: StartupStage, arguments: list[typing.Any]):
+        super().__init__()
+        self.stage = stage
+        self.arguments = arguments
+        self.signals = StartupStageSignals()
+
+    def run(self):
+        try:
+            result = self.stage.run(*self.arguments)
+        except Exception as error:
+            self.signals.failed_signal.emit(self.stage.name, error)
+            return
+        self.signals.finished_signal.emit(self.stage.name, result)
+
+
+class StartupPipeline(QObject):
+    """Startup stages run on a thread pool, in parallel where possible.
+
+    A stage starts as soon as the stages it requires are done. `run` waits for
+    all of them in a local event loop, so windows stay responsive meanwhile.
+    Stages mostly wait on the disk, the keyring or the network: the pool has a
+    thread per stage, whatever the CPU count.
+    """
+
+    # Stages done, stage count, and the messages of the running stages.
+    progress_signal = Signal(int, int, str)
+    _message_signal = Signal(str, str)
+
+    def __init__(self):
+        super().__init__()
+        self.stages: dict[str, StartupStage] = {}
+        self.results: dict[str, typing.Any] = {}
+        self._messages: dict[str, str] = {}
+        self._tasks: dict[str, StartupStageTask] = {}
+        # Finished tasks are kept: the pool may still hold them after they report.
+        self._done_tasks: list[StartupStageTask] = []
+        self._error: Exception | None = None
+        self._loop: QEventLoop | None = None
+        self._pool = QThreadPool(self)
+        self._message_signal.connect(self._on_message)
+
+    def add_stage(
+        self,
+        name: str,
+        message: str,
+        run: typing.Callable[..., typing.Any],
+        requires: tuple[str, ...] = (),
+    ):
+        unknown = [required for required in requires if required not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name} requires unknown stages: {unknown}")
+        self.stages[name] = StartupStage(name, message, run, requires)
+
+    def report(self, name: str, message: str):
+        """Change the message of a running stage; may be called from any thread."""
+        self._message_signal.emit(name, message)
+
+    def run(self) -> dict[str, typing.Any]:
+        """Run every stage and return their results by name.
+
+        If a stage fails, stages that have not started are skipped, and its
+        exception is raised once the running ones are done.
+        """
+        self._pool.setMaxThreadCount(max(len(self.stages), 1))
+        self._loop = QEventLoop()
+        self._start_ready_stages()
+        if self._tasks:
+            self._loop.exec()
+        self._loop = None
+        if self._error is not None:
+            raise self._error
+        return self.results
+
+    def _start_ready_stages(self):
+        if self._error is not None:
+            return
+        for stage in self.stages.values():
+            if stage.name in self.results or stage.name in self._tasks:
+                continue
+            if not all(required in self.results for required in stage.requires):
+                continue
+            task = StartupStageTask(
+                stage, [self.results[required] for required in stage.requires]
+            )
+            task.signals.finished_signal.connect(self._on_stage_finished)
+            task.signals.failed_signal.connect(self._on_stage_failed)
+            self._tasks[stage.name] = task
+            self._messages[stage.name] = stage.message
+            self._pool.start(task)
+        self._emit_progress()
+
+    @Slot(str, object)
+    def _on_stage_finished(self, name: str, result: typing.Any):
+        self.results[name] = result
+        self._end_stage(name)
+
+    @Slot(str, object)
+    def _on_stage_failed(self, name: str, error: Exception):
+        if self._error is None:
+            self._error = error
+        self._end_stage(name)
+
+    @Slot(str, str)
+    def _on_message(self, name: str, message: str):
+        if name in self._messages:
+            self._messages[name] = message
+            self._emit_progress()
+
+    def _end_stage(self, name: str):
+        self._done_tasks.append(self._tasks.pop(name))
+        del self._messages[name]
+        self._start_ready_stages()
+        if not self._tasks and self._loop is not None:
+            self._loop.quit()
+
+    def _emit_progress(self):
+        self.progress_signal.emit(
+            len(self.results), len(self.stages), "\n".join(self._messages.values())
+        )
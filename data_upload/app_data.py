@@ -0,0 +1,47 @@
+import json
+import os
+import typing
+from pathlib import Path
+
+from PySide6.QtCore import QStandardPaths
+
+DATA_DIR_ENV_VAR = "HERMA_DATA_DIR"
+
+
+def get_app_data_folder() -> Path:
+    """Return the folder holding Herma's local state, creating it if needed.
+
+    `HERMA_DATA_DIR` overrides the platform default, which is also how tests keep
+    their state out of the user's profile.
+    """
+    override = os.environ.get(DATA_DIR_ENV_VAR)
+    if override:
+        folder = Path(override)
+    else:
+        generic_data_location = QStandardPaths.writableLocation(
+            QStandardPaths.GenericDataLocation
+        )
+        if not generic_data_location:
+            raise RuntimeError(
+                "Could not determine a writable application data directory."
+            )
+        folder = Path(generic_data_location) / "Euphrosyne" / "Herma"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def read_json(path: Path, default: typing.Any) -> typing.Any:
+    """Read a JSON state file, returning `default` if it is missing or corrupt."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path: Path, data: typing.Any):
+    """Write a JSON state file atomically so a crash never leaves it half written."""
+    temporary_path = path.with_name(f".{path.name}.tmp")
+    with open(temporary_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temporary_path, path)
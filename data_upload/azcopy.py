@@ -1,12 +1,31 @@
+import hashlib
 import platform
+import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+import typing
 import zipfile
 from pathlib import Path
 
 import httpx
+import yaml
 from PySide6.QtCore import QStandardPaths
 
+from data_upload.app_data import get_app_data_folder, read_json, write_json
+from data_upload.config import AzCopyRelease, ConfigCatalog
+from data_upload.credentials import SASLease
+from data_upload.hashing import hash_file
+from data_upload.progress import (
+    ProgressThrottle,
+    ProgressTracker,
+    TransferProgress,
+    counters_from_azcopy_summary,
+    parse_azcopy_message,
+)
 from data_upload.utils import BUNDLE_DIR, IS_BUNDLED
 
 _is_64bits = sys.maxsize > 2**32
@@ -15,6 +34,58 @@ _os = platform.system()
 _is_windows = _os == "Windows"
 _is_macos = _os == "Darwin"
 
+AZCOPY_METADATA_FILE_NAME = "azcopy.json"
+# Latest AzCopy 10 release, used on platforms without a pinned release.
+LATEST_AZCOPY_URLS = {
+    "macos": "https://aka.ms/downloadazcopy-v10-mac",
+    "windows-64": "https://aka.ms/downloadazcopy-v10-windows",
+    "windows-32": "https://aka.ms/downloadazcopy-v10-windows-32bit",
+}
+
+# Versioned archives end with the version, e.g. "azcopy_darwin_amd64_10.27.1.zip".
+_ARCHIVE_VERSION_PATTERN = re.compile(r"_(\d+\.\d+\.\d+)\.zip$")
+
+
+class AzCopyInstall(typing.TypedDict):
+    path: str
+    version: str | None
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class AzCopyDownloadError(RuntimeError):
+    """Raised when a downloaded AzCopy archive does not match its checksum."""
+
+
+class AzCopyMetadataStore:
+    """What was learnt of the installed AzCopy binary by running it.
+
+    The record holds while the binary keeps the same path, size and modification
+    time, so AzCopy does not have to be started to know it works.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or get_app_data_folder() / AZCOPY_METADATA_FILE_NAME
+
+    def load(self, azcopy_path: Path) -> AzCopyInstall | None:
+        install = read_json(self.path, None)
+        if not isinstance(install, dict) or install.get("path") != str(azcopy_path):
+            return None
+        try:
+            stat = azcopy_path.stat()
+        except OSError:
+            return None
+        if (install.get("size"), install.get("mtime_ns")) != (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return None
+        return install
+
+    def save(self, install: AzCopyInstall):
+        write_json(self.path, install)
+
 
 def _get_bin_folder() -> Path:
     if IS_BUNDLED and _is_macos:
@@ -33,6 +104,20 @@ def _get_bin_folder() -> Path:
     return Path(__file__).resolve().parent.parent / "bin"
 
 
+def get_platform_key() -> str | None:
+    """Return the key of this platform in `LATEST_AZCOPY_URLS` and pinned releases."""
+    if _is_windows:
+        return "windows-64" if _is_64bits else "windows-32"
+    if _is_macos:
+        return "macos"
+    return None
+
+
+def get_azcopy_release(config_catalog: ConfigCatalog) -> AzCopyRelease | None:
+    """Return the AzCopy release pinned for this platform in config.yml, if any."""
+    return (config_catalog.get("azcopy-releases") or {}).get(get_platform_key())
+
+
 def get_azcopy_path() -> Path | None:
     bin_folder = _get_bin_folder()
 
@@ -43,62 +128,272 @@ def get_azcopy_path() -> Path | None:
     return None
 
 
-def get_copy_command(src: str, dest: str, sas_token: str) -> list[str]:
-    """Get the command to copy the contents of a folder to a destination."""
+def get_copy_command(
+    src: str, dest: str, sas_token: str, list_of_files: Path | None = None
+) -> list[str]:
+    """Get the command to copy the contents of a folder to a destination.
+
+    With `list_of_files` (see `write_list_of_files`), only the files it lists are
+    copied, so that the transfer matches an incremental upload plan.
+    """
     if not Path(src).exists():
         raise FileNotFoundError(f"Source folder {src} does not exist.")
     azcopy_path = get_azcopy_path()
     if not is_azcopy_installed():
         raise RuntimeError("AzCopy is not installed. Please install it first.")
-    return [
+    command = [
         str(azcopy_path),
         "copy",
-        src + "/*",
+        # Listed paths are relative to the folder itself.
+        src + "/*" if list_of_files is None else src,
         f"{dest}?{sas_token}",
         "--recursive",
+        "--output-type",
+        "json",
+    ]
+    if list_of_files is not None:
+        command.append(f"--list-of-files={list_of_files}")
+    return command
+
+
+def write_list_of_files(paths: typing.Iterable[str]) -> Path:
+    """Write paths relative to the source folder to a file, one per line.
+
+    The caller removes the file once AzCopy is done with it.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", prefix="azcopy-files-", suffix=".txt", delete=False
+    ) as f:
+        f.writelines(f"{path}\n" for path in paths)
+    return Path(f.name)
+
+
+def get_resume_command(job_id: str, sas_token: str) -> list[str]:
+    """Get the command resuming an interrupted AzCopy job with a fresh SAS token."""
+    if not is_azcopy_installed():
+        raise RuntimeError("AzCopy is not installed. Please install it first.")
+    return [
+        str(get_azcopy_path()),
+        "jobs",
+        "resume",
+        job_id,
+        "--destination-sas",
+        sas_token,
+        "--output-type",
+        "json",
     ]
 
 
-def is_azcopy_installed() -> bool:
-    """Check if AzCopy is installed."""
+def run_azcopy(
+    command: list[str],
+    on_output: typing.Callable[[str], None],
+    on_progress: typing.Callable[[TransferProgress], None],
+    throttle_interval: float = 0.5,
+    on_job_started: typing.Callable[[str], None] | None = None,
+    env: dict[str, str] | None = None,
+    expected_bytes: int | None = None,
+    expected_files: int | None = None,
+    sas_lease: SASLease | None = None,
+    resume_args: list[str] | None = None,
+) -> int:
+    """Run an AzCopy command emitting JSON output and return its exit code.
+
+    Progress and end-of-job summaries are turned into `TransferProgress` events,
+    throttled to one per `throttle_interval` (the final one is always sent).
+    Other messages, and any line that is not AzCopy JSON, go to `on_output`.
+    `on_job_started` receives the AzCopy job ID as soon as the job is created.
+    `env` replaces the process environment, e.g. to pass tuning variables.
+    `expected_bytes` and `expected_files`, usually from a folder scan, stand in
+    for the totals AzCopy only reports once it has enumerated the source.
+
+    With a `sas_lease`, AzCopy is stopped when the token in `command` is due for
+    renewal, and its job resumed with a new token and `resume_args`.
+    """
+    job_ids = []
+
+    def _job_started(job_id: str):
+        job_ids.append(job_id)
+        if on_job_started is not None:
+            on_job_started(job_id)
+
+    while True:
+        return_code, stopped = _run_azcopy_process(
+            command,
+            on_output,
+            on_progress,
+            throttle_interval,
+            _job_started,
+            env,
+            expected_bytes,
+            expected_files,
+            deadline=sas_lease.renew_at() if sas_lease else None,
+        )
+        if not stopped:
+            return return_code
+        if not job_ids:
+            on_output("The SAS token expired before AzCopy created its job.")
+            return return_code
+        on_output(
+            f"The SAS token expires soon; resuming AzCopy job {job_ids[-1]} "
+            "with a new one."
+        )
+        command = get_resume_command(job_ids[-1], sas_lease.renew())
+        command += resume_args or []
+        # A resumed job reports its own totals.
+        expected_bytes = expected_files = None
+
+
+def _run_azcopy_process(
+    command: list[str],
+    on_output: typing.Callable[[str], None],
+    on_progress: typing.Callable[[TransferProgress], None],
+    throttle_interval: float,
+    on_job_started: typing.Callable[[str], None],
+    env: dict[str, str] | None,
+    expected_bytes: int | None,
+    expected_files: int | None,
+    deadline: float | None = None,
+) -> tuple[int, bool]:
+    """Run AzCopy once; return its exit code and whether `deadline` stopped it."""
+    tracker = ProgressTracker()
+    throttle = ProgressThrottle(throttle_interval)
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env=env,
+    )
+    stopped = threading.Event()
+    timer = None
+    if deadline is not None:
+
+        def _stop():
+            stopped.set()
+            process.terminate()
+
+        timer = threading.Timer(max(deadline - time.time(), 0), _stop)
+        timer.daemon = True
+        timer.start()
+    for line in process.stdout:
+        line = line.rstrip()
+        if not line:
+            continue
+        message = parse_azcopy_message(line)
+        if message is None:
+            on_output(line)
+        elif message["type"] in ("Progress", "EndOfJob") and message["data"]:
+            counters = counters_from_azcopy_summary(message["data"])
+            if counters["bytes_total"] is None:
+                counters["bytes_total"] = expected_bytes
+            if not counters["files_total"] and expected_files:
+                counters["files_total"] = expected_files
+            progress = tracker.update(counters, final=message["type"] == "EndOfJob")
+            if throttle.ready(progress["final"]):
+                on_progress(progress)
+        elif message["type"] == "Init" and message["data"]:
+            job_id = message["data"].get("JobID")
+            on_output(f"AzCopy job {job_id} started.")
+            if job_id:
+                on_job_started(job_id)
+        elif message["content"]:
+            on_output(message["content"].rstrip())
+    process.stdout.close()
+    process.wait()
+    if timer is not None:
+        timer.cancel()
+    # A job finishing just as the timer fires has nothing left to resume.
+    return process.returncode, stopped.is_set() and process.returncode != 0
+
+
+def is_azcopy_installed(release: AzCopyRelease | None = None) -> bool:
+    """Check if AzCopy is installed, in the version of `release` if given."""
     azcopy_path = get_azcopy_path()
     if not azcopy_path or not azcopy_path.exists():
         return False
-    try:
-        subprocess.run([azcopy_path, "--version"], check=True)
-        return True
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    install = probe_azcopy(azcopy_path)
+    if install is None:
         return False
+    return release is None or install["version"] == release["version"]
+
+
+def probe_azcopy(
+    azcopy_path: Path, store: AzCopyMetadataStore | None = None
+) -> AzCopyInstall | None:
+    """Return what is known of a working AzCopy binary, or None if it does not run.
 
+    The binary is only run, and hashed, when it changed since the last probe.
+    """
+    store = store or AzCopyMetadataStore()
+    install = store.load(azcopy_path)
+    if install is not None:
+        return install
+    try:
+        result = subprocess.run(
+            [azcopy_path, "--version"], check=True, capture_output=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    stat = azcopy_path.stat()
+    install = AzCopyInstall(
+        path=str(azcopy_path),
+        version=_parse_azcopy_version(result.stdout),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha256=hash_file(azcopy_path, "sha256"),
+    )
+    store.save(install)
+    return install
+
+
+def _parse_azcopy_version(output: str | None) -> str | None:
+    match = re.search(r"\d+\.\d+\.\d+", output or "")
+    return match.group(0) if match else None
 
-def download_azcopy():
-    """Download AzCopy if not installed."""
+
+def download_azcopy(release: AzCopyRelease | None = None):
+    """Download AzCopy if not installed, or not in the version of `release`.
+
+    A `release` archive is checked against its SHA-256 before it is unpacked;
+    without one, the latest AzCopy 10 is downloaded unverified.
+    """
     azcopy_path = get_azcopy_path()
     if azcopy_path is None:
         raise NotImplementedError(f"AzCopy download not implemented for {_os}.")
 
-    if not azcopy_path.exists():
-        print("AzCopy not found, downloading...")
-        bin_folder = _get_bin_folder()
-        bin_folder.mkdir(parents=True, exist_ok=True)
-        zip_path = None
-        if _is_macos:
-            zip_path = _download_mac_azcopy(bin_folder)
-        elif _is_windows:
-            zip_path = _download_windows_azcopy(bin_folder)
-        _unzip_azcopy(zip_path, bin_folder)
-        print(f"AzCopy downloaded to {bin_folder}")
-
-        if _os == "Darwin":
-            # Make the binary executable on macOS
-            print("Making AzCopy executable...")
-            subprocess.run(["chmod", "+x", str(azcopy_path)], check=True)
-
-        if not is_azcopy_installed():
-            raise RuntimeError("AzCopy installation failed. Please check the logs.")
-        print("AzCopy installation successful.")
-    else:
+    if azcopy_path.exists() and is_azcopy_installed(release):
         print("AzCopy is already installed.")
+        return
+
+    bin_folder = _get_bin_folder()
+    bin_folder.mkdir(parents=True, exist_ok=True)
+    if release:
+        print(f"Downloading AzCopy {release['version']}...")
+        url = release["url"]
+    else:
+        print("AzCopy not found, downloading the latest release...")
+        url = LATEST_AZCOPY_URLS[get_platform_key()]
+    zip_path = bin_folder / "azcopy.zip"
+    sha256 = _download_binary(url, zip_path)
+    if release and sha256 != release["sha256"].lower():
+        zip_path.unlink()
+        raise AzCopyDownloadError(
+            f"The AzCopy {release['version']} download does not match its checksum."
+        )
+    # An installed release in another version is replaced.
+    shutil.rmtree(bin_folder / "azcopy", ignore_errors=True)
+    _unzip_azcopy(zip_path, bin_folder)
+    print(f"AzCopy downloaded to {bin_folder}")
+
+    if _os == "Darwin":
+        # Make the binary executable on macOS
+        print("Making AzCopy executable...")
+        subprocess.run(["chmod", "+x", str(azcopy_path)], check=True)
+
+    if not is_azcopy_installed(release):
+        raise RuntimeError("AzCopy installation failed. Please check the logs.")
+    print("AzCopy installation successful.")
 
 
 def _unzip_azcopy(zip_path: Path, bin_folder: Path):
@@ -115,38 +410,40 @@ def _unzip_azcopy(zip_path: Path, bin_folder: Path):
     zip_path.unlink()  # Optionally remove the zip file after extraction
 
 
-def _download_mac_azcopy(bin_folder: Path) -> Path:
-    """Download AzCopy for macOS."""
-    print("Downloading AzCopy for macOS...")
-    url = "https://aka.ms/downloadazcopy-v10-mac"
-    zip_path = (bin_folder / "azcopy").with_suffix(".zip")
-    _download_binary(
-        url,
-        zip_path,
-    )
-    return zip_path
-
-
-def _download_windows_azcopy(bin_folder: Path) -> Path:
-    """Download AzCopy for Windows."""
-    print("Downloading AzCopy for Windows...")
-    url = (
-        "https://aka.ms/downloadazcopy-v10-windows"
-        if _is_64bits
-        else "https://aka.ms/downloadazcopy-v10-windows-32bit"
-    )
-    zip_path = (bin_folder / "azcopy").with_suffix(".zip")
-    _download_binary(
-        url,
-        zip_path,
-    )
-    return zip_path
-
-
-def _download_binary(url, dest_path):
+def _download_binary(url, dest_path) -> str:
+    """Download `url` to `dest_path` and return the SHA-256 of its content."""
+    digest = hashlib.sha256()
     with httpx.stream("GET", url, follow_redirects=True) as response:
         response.raise_for_status()
         with open(dest_path, "wb") as f:
             for chunk in response.iter_bytes(chunk_size=8192):
                 if chunk:
                     f.write(chunk)
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve_latest_azcopy_release(platform_key: str) -> AzCopyRelease:
+    """Download the latest AzCopy 10 for `platform_key` and describe it as a release.
+
+    The latest-release link redirects to a versioned archive, whose URL, version
+    and SHA-256 make an `azcopy-releases` entry of config.yml.
+    """
+    digest = hashlib.sha256()
+    with httpx.stream(
+        "GET", LATEST_AZCOPY_URLS[platform_key], follow_redirects=True
+    ) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes(chunk_size=8192):
+            digest.update(chunk)
+        url = response.url
+    match = _ARCHIVE_VERSION_PATTERN.search(url.path)
+    if match is None:
+        raise AzCopyDownloadError(f"Could not read the AzCopy version from {url}.")
+    return AzCopyRelease(version=match[1], url=str(url), sha256=digest.hexdigest())
+
+
+if __name__ == "__main__":
+    # Print `azcopy-releases` pinning the latest AzCopy 10, to paste in config.yml.
+    releases = {key: resolve_latest_azcopy_release(key) for key in LATEST_AZCOPY_URLS}
+    print(yaml.safe_dump({"azcopy-releases": releases}, sort_keys=False), end="")
@@ -0,0 +1,144 @@
+import datetime
+import threading
+import time
+import typing
+
+from data_upload.config import WEEKDAYS, BandwidthConfig, ScheduleWindow
+
+
+def mbps_to_bytes_per_second(mbps: float) -> float:
+    """Convert megabits per second, AzCopy's `--cap-mbps` unit, to bytes per second."""
+    return mbps * 1_000_000 / 8
+
+
+def _parse_time(value: str) -> datetime.time:
+    try:
+        return datetime.time.fromisoformat(value)
+    except ValueError as error:
+        raise ValueError(f"Invalid schedule time {value!r}, expected HH:MM.") from error
+
+
+def is_in_window(window: ScheduleWindow, now: datetime.datetime) -> bool:
+    """Tell whether `now` falls in a schedule window; windows may span midnight."""
+    start = _parse_time(window["start"])
+    end = _parse_time(window["end"])
+    current = now.time()
+    if start <= end:
+        in_window = start <= current < end
+        day = now
+    else:
+        in_window = current >= start or current < end
+        # After midnight, the window belongs to the day it started on.
+        day = now if current >= start else now - datetime.timedelta(days=1)
+    days = window.get("days")
+    if in_window and days:
+        return WEEKDAYS[day.weekday()] in [name.lower()[:3] for name in days]
+    return in_window
+
+
+def resolve_cap_mbps(
+    config: BandwidthConfig | None,
+    now: datetime.datetime | None = None,
+    override: float | None = None,
+) -> float | None:
+    """Return the bandwidth cap in Mbps that applies at `now`, None for no cap.
+
+    A per-job `override` wins (0 removes the cap). Otherwise the first schedule
+    window containing `now` applies, then the environment's `cap-mbps`.
+    """
+    if override is not None:
+        return override or None
+    config = config or {}
+    now = now or datetime.datetime.now()
+    for window in config.get("schedule") or []:
+        if is_in_window(window, now):
+            return window.get("cap-mbps") or None
+    return config.get("cap-mbps") or None
+
+
+def get_cap_args(cap_mbps: float | None) -> list[str]:
+    if not cap_mbps:
+        return []
+    return ["--cap-mbps", f"{cap_mbps:g}"]
+
+
+class TokenBucket:
+    """Limit a byte rate shared by several threads.
+
+    `consume` reserves bytes immediately and sleeps off any debt outside the
+    lock, so concurrent senders together stay under `rate` bytes per second
+    while bursts of up to one second of traffic go through unhindered.
+    """
+
+    def __init__(
+        self,
+        rate: float | None,
+        clock: typing.Callable[[], float] = time.monotonic,
+        sleep: typing.Callable[[float], None] = time.sleep,
+    ):
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = rate or 0.0
+        self._updated_at = clock()
+
+    @property
+    def rate(self) -> float | None:
+        return self._rate
+
+    def set_rate(self, rate: float | None):
+        with self._lock:
+            self._refill()
+            self._rate = rate
+            if rate:
+                self._tokens = min(self._tokens, rate)
+
+    def consume(self, amount: int):
+        with self._lock:
+            if not self._rate:
+                return
+            self._refill()
+            self._tokens -= amount
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self.sleep(wait)
+
+    def _refill(self):
+        now = self.clock()
+        if self._rate:
+            self._tokens = min(
+                self._tokens + (now - self._updated_at) * self._rate, self._rate
+            )
+        self._updated_at = now
+
+
+class BandwidthLimiter:
+    """A token bucket whose rate follows a cap re-evaluated every `refresh_interval`.
+
+    `cap_mbps` is typically a `resolve_cap_mbps` closure, so a long upload speeds
+    up or slows down as it enters or leaves a schedule window.
+    """
+
+    def __init__(
+        self,
+        cap_mbps: typing.Callable[[], float | None],
+        refresh_interval: float = 60.0,
+        clock: typing.Callable[[], float] = time.monotonic,
+        sleep: typing.Callable[[float], None] = time.sleep,
+    ):
+        self.cap_mbps = cap_mbps
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._bucket = TokenBucket(self._current_rate(), clock=clock, sleep=sleep)
+        self._refreshed_at = clock()
+
+    def _current_rate(self) -> float | None:
+        cap = self.cap_mbps()
+        return mbps_to_bytes_per_second(cap) if cap else None
+
+    def consume(self, amount: int):
+        if self.clock() - self._refreshed_at >= self.refresh_interval:
+            self._refreshed_at = self.clock()
+            self._bucket.set_rate(self._current_rate())
+        self._bucket.consume(amount)
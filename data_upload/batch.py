@@ -0,0 +1,113 @@
+import csv
+import typing
+from pathlib import Path
+
+import yaml
+
+from data_upload.progress import format_bytes, format_duration
+
+REQUEST_FIELDS = ("project", "run", "data_type", "data_path")
+
+
+class UploadRequest(typing.TypedDict):
+    project: str
+    run: str
+    data_type: str
+    data_path: str
+
+
+class UploadResult(typing.TypedDict):
+    request: UploadRequest
+    return_code: int
+    files: int
+    bytes: int
+    elapsed: float
+    error: str | None
+
+
+class ManifestError(ValueError):
+    """Raised when a batch manifest cannot be read or holds an invalid job."""
+
+
+def load_upload_requests(
+    path: str, data_types: typing.Collection[str]
+) -> list[UploadRequest]:
+    """Read upload jobs from a YAML or CSV manifest.
+
+    YAML manifests hold a list of jobs, or a mapping with a `jobs` list; CSV
+    manifests have a header row. Keys may use dashes or underscores
+    (`data-path` or `data_path`). Relative data paths are resolved against the
+    manifest's folder.
+    """
+    manifest_path = Path(path)
+    try:
+        with open(manifest_path, newline="", encoding="utf-8") as f:
+            if manifest_path.suffix.lower() == ".csv":
+                rows = list(csv.DictReader(f))
+            else:
+                rows = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError, csv.Error) as error:
+        raise ManifestError(f"Could not read manifest {path}: {error}") from error
+
+    if isinstance(rows, dict):
+        rows = rows.get("jobs")
+    if not isinstance(rows, list) or not rows:
+        raise ManifestError(f"Manifest {path} does not list any upload job.")
+
+    requests = []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise ManifestError(f"Job {number} of {path} is not a mapping.")
+        row = {str(key).strip().replace("-", "_"): value for key, value in row.items()}
+        missing = [field for field in REQUEST_FIELDS if not row.get(field)]
+        if missing:
+            raise ManifestError(
+                f"Job {number} of {path} is missing {', '.join(missing)}."
+            )
+        if row["data_type"] not in data_types:
+            raise ManifestError(
+                f"Job {number} of {path} has an invalid data type "
+                f"{row['data_type']!r}; expected one of {', '.join(data_types)}."
+            )
+        data_path = Path(str(row["data_path"])).expanduser()
+        if not data_path.is_absolute():
+            data_path = manifest_path.parent / data_path
+        requests.append(
+            UploadRequest(
+                project=str(row["project"]),
+                run=str(row["run"]),
+                data_type=row["data_type"],
+                data_path=str(data_path),
+            )
+        )
+    return requests
+
+
+def format_results_table(results: list[UploadResult]) -> str:
+    headers = ("Project", "Run", "Data type", "Files", "Size", "Time", "Result")
+    rows = [
+        (
+            result["request"]["project"],
+            result["request"]["run"],
+            result["request"]["data_type"],
+            str(result["files"]),
+            format_bytes(result["bytes"]),
+            format_duration(result["elapsed"]),
+            (
+                "OK"
+                if result["return_code"] == 0
+                else f"FAILED: {result['error']}" if result["error"] else "FAILED"
+            ),
+        )
+        for result in results
+    ]
+    widths = [
+        max(len(row[column]) for row in (headers, *rows))
+        for column in range(len(headers))
+    ]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in (headers, *rows)
+    ]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
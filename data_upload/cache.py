@@ -0,0 +1,96 @@
+import functools
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+T = typing.TypeVar("T")
+
+
+class TTLCache:
+    """A bounded mapping whose entries expire `ttl` seconds after being set.
+
+    The least recently used entry is evicted when `maxsize` is reached.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        maxsize: int = 128,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[typing.Hashable, tuple[float, typing.Any]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: typing.Hashable, value: typing.Any):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: typing.Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_MISSING = object()
+
+
+def ttl_cache(
+    ttl: float, maxsize: int = 128
+) -> typing.Callable[[typing.Callable[..., T]], typing.Callable[..., T]]:
+    """Like `functools.lru_cache`, with entries that expire after `ttl` seconds.
+
+    The wrapper keeps `cache_clear()` and adds `cache_invalidate(*args, **kwargs)`
+    to drop the entry of one call. Exceptions are not cached.
+    """
+
+    def decorator(function: typing.Callable[..., T]) -> typing.Callable[..., T]:
+        cache = TTLCache(ttl, maxsize)
+
+        def make_key(args: tuple, kwargs: dict) -> typing.Hashable:
+            return args + tuple(sorted(kwargs.items()))
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs) -> T:
+            key = make_key(args, kwargs)
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = function(*args, **kwargs)
+                cache.set(key, value)
+            return value
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_invalidate = lambda *args, **kwargs: cache.invalidate(
+            make_key(args, kwargs)
+        )
+        return wrapper
+
+    return decorator
@@ -1,24 +1,50 @@
 import argparse
+import asyncio
 import getpass
 import logging
-import subprocess
 import sys
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import httpx
 from PySide6.QtCore import QSettings
 
-from data_upload.azcopy import download_azcopy, get_copy_command, is_azcopy_installed
+from data_upload.azcopy import (
+    download_azcopy,
+    get_azcopy_release,
+    get_copy_command,
+    get_resume_command,
+    is_azcopy_installed,
+    run_azcopy,
+    write_list_of_files,
+)
+from data_upload.bandwidth import BandwidthLimiter, get_cap_args, resolve_cap_mbps
+from data_upload.batch import (
+    UploadRequest,
+    UploadResult,
+    format_results_table,
+    load_upload_requests,
+)
 from data_upload.config import (
+    AzCopyRelease,
+    Config,
     ConfigCatalog,
+    ConfigError,
     list_environment_keys,
     load_config,
     resolve_config,
 )
+from data_upload.credentials import SASCredentialManager, SASLease, SASRenewalError
 from data_upload.euphro_tools import (
+    AsyncEuphrosyneToolsService,
     EuphrosyneToolsConnectionError,
     EuphrosyneToolsService,
     InitFoldersError,
+    RunUploadTarget,
+    SASTokenCredentials,
 )
 from data_upload.euphrosyne.auth import (
     EuphrosyneAuth,
@@ -27,9 +53,45 @@ from data_upload.euphrosyne.auth import (
     euphrosyne_login,
     save_refresh_token,
 )
+from data_upload.folder_init import (
+    FolderInitializer,
+    InitializedFolderStore,
+)
+from data_upload.hashing import HashCache
+from data_upload.http_client import (
+    close_http_clients,
+    create_async_http_client,
+    get_http_client,
+)
+from data_upload.incremental import (
+    IncrementalPlan,
+    UploadManifestStore,
+    plan_incremental_upload,
+)
+from data_upload.jobs import JOB_COMPLETED, JOB_FAILED, UploadJobStore, new_job_id
+from data_upload.progress import format_bytes, format_progress
+from data_upload.retry import RetryPolicy, retry_stats
+from data_upload.scanner import FolderManifest, scan_folder
+from data_upload.tuning import (
+    AzCopyTuning,
+    format_tuning,
+    get_azcopy_environment,
+    get_azcopy_tuning_args,
+    tune_azcopy,
+)
+from data_upload.upload_engine import (
+    ENGINE_AZCOPY,
+    UPLOAD_ENGINES,
+    DestinationNotFoundError,
+    NativeUploadEngine,
+    default_upload_engine,
+)
 
 logger = logging.getLogger(__name__)
 
+# Seconds between two progress lines printed to the terminal.
+CLI_PROGRESS_INTERVAL = 2.0
+
 DATA_TYPES = {
     "raw-data": "raw_data",
     "processed-data": "processed_data",
@@ -40,25 +102,65 @@ def build_parser(config_catalog: ConfigCatalog) -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Upload a data folder to an Euphrosyne run from the terminal."
     )
-    parser.add_argument("--project", required=True, help="Euphrosyne project slug")
-    parser.add_argument("--run", required=True, help="Euphrosyne run label")
+    parser.add_argument("--project", help="Euphrosyne project slug")
+    parser.add_argument("--run", help="Euphrosyne run label")
     parser.add_argument(
         "--data-type",
-        required=True,
         choices=sorted(DATA_TYPES),
         help="Type of run data to upload",
     )
     parser.add_argument(
         "--data-path",
-        required=True,
         help="Existing local data folder to upload",
     )
+    parser.add_argument(
+        "--manifest",
+        help="YAML or CSV file listing several uploads (project, run, data_type, "
+        "data_path), used instead of --project/--run/--data-type/--data-path",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of manifest uploads to run at the same time (default: 1)",
+    )
     parser.add_argument(
         "--environment",
         choices=list_environment_keys(config_catalog),
         help="Target environment (defaults to the configured default environment)",
     )
     parser.add_argument("--email", help="Euphrosyne account email")
+    parser.add_argument(
+        "--engine",
+        choices=UPLOAD_ENGINES,
+        help="Upload engine (defaults to AzCopy where it is available, native otherwise)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the last interrupted AzCopy job for this folder instead of starting over",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only upload files that are new or changed since the last successful upload",
+    )
+    parser.add_argument(
+        "--cap-mbps",
+        type=float,
+        help="Cap the upload bandwidth in megabits per second, 0 for no cap "
+        "(defaults to the environment's bandwidth settings)",
+    )
+    parser.add_argument(
+        "--put-md5",
+        action="store_true",
+        help="Store the MD5 checksum of each file with the uploaded data",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Initialize project and run folders even if earlier uploads already did",
+    )
     parser.add_argument("--log", default="INFO", help="Log level (default: INFO)")
     return parser
 
@@ -77,7 +179,9 @@ def _validate_data_path(data_path: str) -> Path:
     return path
 
 
-def _login(config, settings: QSettings, email: str | None) -> tuple[str, str]:
+def _login(
+    config, settings: QSettings, email: str | None, client: httpx.Client
+) -> tuple[str, str]:
     if not email:
         email = input("Email: ")
     password = getpass.getpass("Password: ")
@@ -86,6 +190,7 @@ def _login(config, settings: QSettings, email: str | None) -> tuple[str, str]:
         host=config["euphrosyne"]["url"],
         email=email,
         password=password,
+        client=client,
     )
     if tokens is None:
         raise EuphrosyneAuthenticationError(
@@ -98,44 +203,506 @@ def _login(config, settings: QSettings, email: str | None) -> tuple[str, str]:
     return access_token, refresh_token
 
 
-def _ensure_azcopy_installed():
-    if not is_azcopy_installed():
+def _ensure_azcopy_installed(release: AzCopyRelease | None):
+    if not is_azcopy_installed(release):
         logger.info("AzCopy not found; downloading...")
-        download_azcopy()
+        download_azcopy(release)
+
+
+def _resolve_engine(engine: str | None) -> str:
+    if engine:
+        return engine
+    if is_azcopy_installed():
+        return ENGINE_AZCOPY
+    return default_upload_engine()
+
+
+class _UploadSession:
+    """State shared by every upload of one CLI invocation.
+
+    One login, one tools service and one AzCopy probe serve all the uploads;
+    folder initialization runs at most once per project and run (never for
+    folders remembered from earlier uploads), and native uploads share one
+    bandwidth limiter.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        config: Config,
+        engine: str,
+        tools_service: EuphrosyneToolsService,
+        job_count: int = 1,
+    ):
+        self.args = args
+        self.config = config
+        self.engine = engine
+        self.tools_service = tools_service
+        self.job_count = job_count
+        self.manifest_store = UploadManifestStore()
+        self.job_store = UploadJobStore()
+        self.hash_cache = HashCache() if args.put_md5 else None
+        self.limiter = BandwidthLimiter(self.cap_mbps)
+        self._lock = threading.Lock()
+        self._folder_locks: dict[tuple[str, ...], threading.Lock] = {}
+        self._initialized_folders: set[tuple[str, ...]] = set()
+        self.credentials = SASCredentialManager(
+            tools_service.get_run_data_upload_shared_access_signature
+        )
+        # With --no-cache, every folder is initialized again, and remembered afresh.
+        self.folders = FolderInitializer(
+            tools_service,
+            config["environment"],
+            InitializedFolderStore(),
+            bypass_cache=args.no_cache,
+        )
+
+    def cap_mbps(self) -> float | None:
+        return resolve_cap_mbps(
+            self.config.get("bandwidth"), override=self.args.cap_mbps
+        )
+
+    def known_folders(self, targets: list[RunUploadTarget]) -> set[tuple[str, ...]]:
+        """Project and run folders of `targets` remembered as already initialized."""
+        known = set()
+        for project, run, _data_type in targets:
+            if self.folders.is_initialized(project):
+                known.add((project,))
+            if self.folders.is_initialized(project, run):
+                known.add((project, run))
+        return known
+
+    def prefetch_credentials(
+        self,
+        targets: list[RunUploadTarget],
+        results: list[SASTokenCredentials | Exception],
+        known_folders: set[tuple[str, ...]] = frozenset(),
+    ):
+        """Keep credentials prepared ahead of time by `AsyncEuphrosyneToolsService`.
+
+        Failed targets are left out: their job prepares again, sequentially, and
+        reports the error itself.
+        """
+        environment = self.folders.environment
+        for target, result in zip(targets, results):
+            if isinstance(result, Exception):
+                continue
+            for key in ((target.project_slug,), (target.project_slug, target.run_name)):
+                with self._lock:
+                    self._initialized_folders.add(key)
+                if key not in known_folders:
+                    self.folders.store.record(environment, *key)
+            self.credentials.put(target, result)
+
+    def sas_lease(self, project: str, run: str, data_type: str) -> SASLease:
+        """Initialize the folders of a run and lease its cached SAS token."""
+        self.init_folders(project, run)
+        lease = self.credentials.lease(RunUploadTarget(project, run, data_type))
+        lease.credentials()
+        return lease
+
+    def init_folders(self, project: str, run: str):
+        self._init_once((project,), self.folders.init_project_folder, project)
+        self._init_once((project, run), self.folders.init_run_folders, project, run)
+
+    def reinit_folders(self, project: str, run: str):
+        """Initialize the folders of a run again, even if they are known to exist."""
+        self.folders.forget(project, run)
+        with self._lock:
+            self._initialized_folders.discard((project,))
+            self._initialized_folders.discard((project, run))
+        self.init_folders(project, run)
+
+    def _init_once(self, key: tuple[str, ...], init: typing.Callable, *args):
+        with self._lock:
+            folder_lock = self._folder_locks.setdefault(key, threading.Lock())
+        # Concurrent jobs for the same folder wait for the first one; if it
+        # fails, the next one tries again.
+        with folder_lock:
+            if key in self._initialized_folders:
+                return
+            init(*args)
+            self._initialized_folders.add(key)
+
+    def close(self):
+        if self.hash_cache is not None:
+            self.hash_cache.close()
+
+
+class _PreparedUpload(typing.TypedDict):
+    request: UploadRequest
+    data_path: Path
+    upload_target: dict[str, str]
+    manifest: FolderManifest
+    plan: IncrementalPlan | None
 
 
 def run_upload(args: argparse.Namespace, config_catalog: ConfigCatalog) -> int:
+    try:
+        results = _run_uploads(args, config_catalog, _upload_requests(args))
+    finally:
+        close_http_clients()
+        stats = retry_stats.snapshot()
+        if stats["requests"]:
+            logger.info(
+                "HTTP requests: %(requests)d, retries: %(retries)d, failures: "
+                "%(failures)d, mean latency: %(latency_mean).2fs, max latency: "
+                "%(latency_max).2fs",
+                stats,
+            )
+    if args.manifest:
+        print(format_results_table(results), flush=True)
+    return 0 if all(result["return_code"] == 0 for result in results) else 1
+
+
+def _upload_requests(args: argparse.Namespace) -> list[UploadRequest]:
+    if args.manifest:
+        return load_upload_requests(args.manifest, DATA_TYPES)
+    return [
+        UploadRequest(
+            project=args.project,
+            run=args.run,
+            data_type=args.data_type,
+            data_path=args.data_path,
+        )
+    ]
+
+
+def _run_uploads(
+    args: argparse.Namespace,
+    config_catalog: ConfigCatalog,
+    requests: list[UploadRequest],
+) -> list[UploadResult]:
     _configure_logging(args.log)
-    data_path = _validate_data_path(args.data_path)
+    for request in requests:
+        _validate_data_path(request["data_path"])
     config = resolve_config(config_catalog, args.environment)
     settings = QSettings("Euphrosyne", "Herma")
-    access_token, refresh_token = _login(config, settings, args.email)
-    _ensure_azcopy_installed()
+    engine = _resolve_engine(args.engine)
+    if args.resume and engine != ENGINE_AZCOPY:
+        raise ValueError("--resume is only supported with the AzCopy engine.")
+    if args.resume and args.incremental:
+        raise ValueError("--resume and --incremental cannot be used together.")
+    if args.cap_mbps is not None and args.cap_mbps < 0:
+        raise ValueError("--cap-mbps cannot be negative.")
+    if args.jobs < 1:
+        raise ValueError("--jobs must be at least 1.")
 
+    manifest_store = UploadManifestStore()
+    prepared_uploads = [
+        _prepare_upload(args, config, request, manifest_store, len(requests) > 1)
+        for request in requests
+    ]
+    pending_uploads = [prepared for prepared in prepared_uploads if prepared]
+    if not pending_uploads:
+        return [_skipped_result(request) for request in requests]
+
+    client = get_http_client(config["environment"], config.get("retry"))
+    access_token, refresh_token = _login(config, settings, args.email, client)
+    if engine == ENGINE_AZCOPY:
+        _ensure_azcopy_installed(get_azcopy_release(config_catalog))
+
+    auth = EuphrosyneAuth(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        host=config["euphrosyne"]["url"],
+        settings=settings,
+    )
     tools_service = EuphrosyneToolsService(
-        host=config["euphrosyne-tools"]["url"],
-        auth=EuphrosyneAuth(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            host=config["euphrosyne"]["url"],
-            settings=settings,
-        ),
+        host=config["euphrosyne-tools"]["url"], auth=auth, client=client
+    )
+    job_count = min(args.jobs, len(pending_uploads))
+    session = _UploadSession(args, config, engine, tools_service, job_count)
+    try:
+        if len(pending_uploads) > 1:
+            targets = [
+                RunUploadTarget(
+                    prepared["request"]["project"],
+                    prepared["request"]["run"],
+                    prepared["upload_target"]["data_type"],
+                )
+                for prepared in pending_uploads
+            ]
+            known_folders = session.known_folders(targets)
+            results = asyncio.run(
+                _prepare_tools_api(config, auth, targets, known_folders)
+            )
+            session.prefetch_credentials(targets, results, known_folders)
+        cap_mbps = session.cap_mbps()
+        if cap_mbps:
+            print(f"Upload bandwidth capped at {cap_mbps:g} Mbps.", flush=True)
+
+        def _run(prepared: _PreparedUpload | None, request: UploadRequest):
+            if prepared is None:
+                return _skipped_result(request)
+            return _run_prepared_upload(session, prepared, batch=len(requests) > 1)
+
+        if job_count == 1:
+            return [_run(*pair) for pair in zip(prepared_uploads, requests)]
+        with ThreadPoolExecutor(max_workers=job_count) as executor:
+            return list(executor.map(_run, prepared_uploads, requests))
+    finally:
+        session.close()
+
+
+async def _prepare_tools_api(
+    config: Config,
+    auth: httpx.Auth,
+    targets: list[RunUploadTarget],
+    known_folders: set[tuple[str, ...]] = frozenset(),
+) -> list[SASTokenCredentials | Exception]:
+    async with create_async_http_client(config.get("retry")) as client:
+        service = AsyncEuphrosyneToolsService(
+            host=config["euphrosyne-tools"]["url"], auth=auth, client=client
+        )
+        return await service.prepare_uploads(targets, initialized=known_folders)
+
+
+def _prepare_upload(
+    args: argparse.Namespace,
+    config: Config,
+    request: UploadRequest,
+    manifest_store: UploadManifestStore,
+    batch: bool,
+) -> _PreparedUpload | None:
+    """Scan the folder of a request; None when an incremental upload has nothing to send."""
+    output = _job_output(request, batch)
+    data_path = Path(request["data_path"])
+    upload_target = {
+        "environment": config["environment"],
+        "project": request["project"],
+        "run": request["run"],
+        "data_type": DATA_TYPES[request["data_type"]],
+        "folder": str(data_path),
+    }
+    manifest = scan_folder(str(data_path))
+    output(
+        f"Found {manifest.file_count} files ({format_bytes(manifest.total_bytes)}) "
+        f"in {data_path}."
+    )
+    plan = None
+    if args.incremental:
+        plan = plan_incremental_upload(
+            manifest.snapshot(), manifest_store.load(**upload_target)
+        )
+        output(
+            f"Skipping {plan['skipped_files']} unchanged files "
+            f"({format_bytes(plan['skipped_bytes'])}); "
+            f"{len(plan['files'])} files ({format_bytes(plan['upload_bytes'])}) "
+            "to upload."
+        )
+        if not plan["files"]:
+            return None
+    return _PreparedUpload(
+        request=request,
+        data_path=data_path,
+        upload_target=upload_target,
+        manifest=manifest,
+        plan=plan,
+    )
+
+
+def _run_prepared_upload(
+    session: _UploadSession, prepared: _PreparedUpload, batch: bool = False
+) -> UploadResult:
+    request = prepared["request"]
+    output = _job_output(request, batch)
+    manifest, plan = prepared["manifest"], prepared["plan"]
+    started_at = time.monotonic()
+    error = None
+    try:
+        sas_lease = session.sas_lease(
+            request["project"],
+            request["run"],
+            prepared["upload_target"]["data_type"],
+        )
+        credentials = sas_lease.credentials()
+        if session.engine != ENGINE_AZCOPY:
+            native_engine = NativeUploadEngine(
+                limiter=session.limiter,
+                retry_policy=RetryPolicy.from_config(session.config.get("retry")),
+                put_md5=session.args.put_md5,
+                hash_cache=session.hash_cache,
+            )
+
+            def _upload() -> int:
+                return native_engine.upload(
+                    str(prepared["data_path"]),
+                    credentials["url"],
+                    sas_lease.token,
+                    on_output=output,
+                    on_progress=lambda progress: output(format_progress(progress)),
+                    only_files=plan["files"] if plan else None,
+                    manifest=manifest,
+                )
+
+            job_id = new_job_id()
+            session.job_store.record_started(
+                job_id, engine=session.engine, **prepared["upload_target"]
+            )
+            return_code = 1
+            try:
+                try:
+                    return_code = _upload()
+                except DestinationNotFoundError:
+                    # The folders were remembered as initialized but are gone.
+                    output("Upload destination is missing; initializing it again.")
+                    session.reinit_folders(request["project"], request["run"])
+                    return_code = _upload()
+            finally:
+                session.job_store.set_status(
+                    job_id, JOB_COMPLETED if return_code == 0 else JOB_FAILED
+                )
+        else:
+            return_code = _run_azcopy_upload(session, prepared, sas_lease, output)
+            if return_code != 0:
+                # AzCopy does not tell a missing destination from other
+                # failures: initialize the folders again on the next attempt.
+                session.folders.forget(request["project"], request["run"])
+    except (
+        EuphrosyneToolsConnectionError,
+        InitFoldersError,
+        SASRenewalError,
+        DestinationNotFoundError,
+        httpx.HTTPError,
+        OSError,
+    ) as exception:
+        # A single upload reports errors through main(); a batch goes on.
+        if not batch:
+            raise
+        output(f"Error: {exception}")
+        return_code, error = 1, str(exception)
+
+    if return_code == 0:
+        session.manifest_store.save(manifest.snapshot(), **prepared["upload_target"])
+    return UploadResult(
+        request=request,
+        return_code=return_code,
+        files=len(plan["files"]) if plan else manifest.file_count,
+        bytes=plan["upload_bytes"] if plan else manifest.total_bytes,
+        elapsed=time.monotonic() - started_at,
+        error=error,
     )
-    tools_service.init_folders(args.project, args.run)
-    credentials = tools_service.get_run_data_upload_shared_access_signature(
-        project_slug=args.project,
-        run_name=args.run,
-        data_type=DATA_TYPES[args.data_type],
+
+
+def _skipped_result(request: UploadRequest) -> UploadResult:
+    return UploadResult(
+        request=request, return_code=0, files=0, bytes=0, elapsed=0.0, error=None
     )
-    command = get_copy_command(str(data_path), credentials["url"], credentials["token"])
-    completed_process = subprocess.run(command)
-    return completed_process.returncode
+
+
+def _job_output(request: UploadRequest, batch: bool) -> typing.Callable[[str], None]:
+    prefix = f"[{request['project']}/{request['run']}] " if batch else ""
+
+    def _output(line: str):
+        print(f"{prefix}{line}", flush=True)
+
+    return _output
+
+
+def _run_azcopy_upload(
+    session: _UploadSession,
+    prepared: _PreparedUpload,
+    sas_lease: SASLease,
+    output: typing.Callable[[str], None],
+) -> int:
+    args = session.args
+    credentials = sas_lease.credentials()
+    manifest, plan = prepared["manifest"], prepared["plan"]
+    upload_target = prepared["upload_target"]
+    tuning = tune_azcopy(
+        (entry.size for entry in manifest.files), session.config.get("azcopy")
+    )
+    logger.info(format_tuning(tuning))
+    cap_mbps = session.cap_mbps()
+    if cap_mbps:
+        # Concurrent AzCopy processes share the cap.
+        cap_mbps /= session.job_count
+
+    job_store = session.job_store
+    resumable_job = job_store.find_resumable(**upload_target)
+    job_ids = []
+    list_of_files = None
+    if args.resume and resumable_job:
+        logger.info("Resuming AzCopy job %s", resumable_job["job_id"])
+        job_ids.append(resumable_job["job_id"])
+        command = get_resume_command(resumable_job["job_id"], credentials["token"])
+        command += get_cap_args(cap_mbps)
+    else:
+        if args.resume:
+            logger.warning("No interrupted upload to resume; starting a new one.")
+        elif resumable_job:
+            logger.info(
+                "An interrupted upload of this folder exists; "
+                "pass --resume to only send the missing files."
+            )
+        # An incremental upload copies the planned files only, so that AzCopy
+        # sends, and counts, what the plan reported.
+        list_of_files = write_list_of_files(plan["files"]) if plan else None
+        command = get_copy_command(
+            str(prepared["data_path"]),
+            credentials["url"],
+            credentials["token"],
+            list_of_files,
+        )
+        command += get_azcopy_tuning_args(tuning) + get_cap_args(cap_mbps)
+        if args.put_md5:
+            command.append("--put-md5")
+
+    def _record_job(job_id: str):
+        job_ids.append(job_id)
+        job_store.record_started(job_id, **upload_target)
+
+    try:
+        return_code = run_azcopy(
+            command,
+            on_output=output,
+            on_progress=lambda progress: output(format_progress(progress)),
+            throttle_interval=CLI_PROGRESS_INTERVAL,
+            on_job_started=_record_job,
+            env=get_azcopy_environment(tuning),
+            expected_bytes=plan["upload_bytes"] if plan else manifest.total_bytes,
+            expected_files=len(plan["files"]) if plan else manifest.file_count,
+            sas_lease=sas_lease,
+            resume_args=get_cap_args(cap_mbps),
+        )
+    finally:
+        if list_of_files is not None:
+            list_of_files.unlink(missing_ok=True)
+    for job_id in job_ids:
+        job_store.set_status(job_id, JOB_COMPLETED if return_code == 0 else JOB_FAILED)
+    return return_code
+
+
+def _check_upload_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    single_upload_args = {
+        "--project": args.project,
+        "--run": args.run,
+        "--data-type": args.data_type,
+        "--data-path": args.data_path,
+    }
+    if args.manifest:
+        given = [flag for flag, value in single_upload_args.items() if value]
+        if given:
+            parser.error(f"--manifest cannot be combined with {', '.join(given)}")
+        return
+    missing = [flag for flag, value in single_upload_args.items() if not value]
+    if missing:
+        parser.error(
+            f"the following arguments are required: {', '.join(missing)} "
+            "(or pass --manifest)"
+        )
 
 
 def main(argv: list[str] | None = None) -> int:
-    config_catalog = load_config()
+    try:
+        config_catalog = load_config()
+    except ConfigError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
     parser = build_parser(config_catalog)
     args = parser.parse_args(argv)
+    _check_upload_arguments(parser, args)
 
     try:
         return run_upload(args, config_catalog)
@@ -146,6 +713,7 @@ def main(argv: list[str] | None = None) -> int:
         FileNotFoundError,
         InitFoldersError,
         RuntimeError,
+        SASRenewalError,
         ValueError,
         httpx.HTTPError,
         OSError,
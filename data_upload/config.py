@@ -1,3 +1,4 @@
+import datetime
 import os
 import typing
 
@@ -12,25 +13,92 @@ else:
 
 ENVIRONMENT_SETTING_KEY = "environment"
 
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class ConfigError(ValueError):
+    """Raised when config.yml holds an invalid setting."""
+
 
 class EuphrosyneConfig(typing.TypedDict):
     url: str
 
 
+# Optional per-environment overrides of the automatic AzCopy tuning.
+AzCopyConfig = typing.TypedDict(
+    "AzCopyConfig",
+    {
+        "concurrency": int,
+        "buffer-gb": float,
+        "block-size-mb": float,
+    },
+    total=False,
+)
+
+
+ScheduleWindow = typing.TypedDict(
+    "ScheduleWindow",
+    {
+        "start": str,
+        "end": str,
+        "cap-mbps": typing.NotRequired[float],
+        "days": typing.NotRequired[list[str]],
+    },
+)
+
+
+# Upload bandwidth cap in megabits per second, optionally by time window.
+BandwidthConfig = typing.TypedDict(
+    "BandwidthConfig",
+    {
+        "cap-mbps": float,
+        "schedule": list[ScheduleWindow],
+    },
+    total=False,
+)
+
+
+# Retries of the Euphrosyne and tools API calls; see `data_upload.retry`.
+RetryConfig = typing.TypedDict(
+    "RetryConfig",
+    {
+        "max-attempts": int,
+        "backoff-seconds": float,
+        "max-backoff-seconds": float,
+        "budget-seconds": float,
+    },
+    total=False,
+)
+
+
 EnvironmentCatalogEntry = typing.TypedDict(
     "EnvironmentCatalogEntry",
     {
         "url": str,
         "euphro-tools-url": str,
+        "azcopy": typing.NotRequired[AzCopyConfig],
+        "bandwidth": typing.NotRequired[BandwidthConfig],
+        "retry": typing.NotRequired[RetryConfig],
     },
 )
 
 
+# An AzCopy release pinned for one platform, checked against its SHA-256.
+class AzCopyRelease(typing.TypedDict):
+    version: str
+    url: str
+    sha256: str
+
+
 ConfigCatalog = typing.TypedDict(
     "ConfigCatalog",
     {
         "default-environment": str,
         "environments": dict[str, EnvironmentCatalogEntry],
+        # By platform: "macos", "windows-64" or "windows-32".
+        "azcopy-releases": typing.NotRequired[dict[str, AzCopyRelease]],
+        # Lines the GUI transfer log shows; the log file keeps them all.
+        "log-max-lines": typing.NotRequired[int],
     },
 )
 
@@ -41,13 +109,99 @@ Config = typing.TypedDict(
         "environment": str,
         "euphrosyne": EuphrosyneConfig,
         "euphrosyne-tools": EuphrosyneConfig,
+        "azcopy": AzCopyConfig,
+        "bandwidth": BandwidthConfig,
+        "retry": RetryConfig,
     },
 )
 
 
 def load_config() -> ConfigCatalog:
     with open(DEFAULT_CONFIG_PATH, "r") as f:
-        return yaml.safe_load(f)
+        config = yaml.safe_load(f)
+    for name, environment in config["environments"].items():
+        if environment.get("bandwidth"):
+            environment["bandwidth"] = validate_bandwidth_config(
+                environment["bandwidth"], name
+            )
+    if "log-max-lines" in config:
+        config["log-max-lines"] = validate_log_max_lines(config["log-max-lines"])
+    return config
+
+
+def validate_log_max_lines(value: typing.Any) -> int:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        raise ConfigError(
+            f"The log-max-lines setting must be a number of 1 or more, got {value!r}."
+        )
+    return value
+
+
+def validate_bandwidth_config(
+    bandwidth: typing.Any, environment: str
+) -> BandwidthConfig:
+    """Check the bandwidth settings of an environment, with times as "HH:MM"."""
+    where = f"bandwidth of environment {environment}"
+    if not isinstance(bandwidth, dict):
+        raise ConfigError(f"The {where} must be a mapping.")
+    normalized = typing.cast(BandwidthConfig, dict(bandwidth))
+    if "cap-mbps" in bandwidth:
+        normalized["cap-mbps"] = _cap_mbps(bandwidth["cap-mbps"], where)
+    schedule = bandwidth.get("schedule")
+    if schedule is None:
+        return normalized
+    if not isinstance(schedule, list):
+        raise ConfigError(f"The schedule of the {where} must be a list.")
+    normalized["schedule"] = [
+        _schedule_window(window, f"schedule window {index} of the {where}")
+        for index, window in enumerate(schedule)
+    ]
+    return normalized
+
+
+def _schedule_window(window: typing.Any, where: str) -> ScheduleWindow:
+    if not isinstance(window, dict):
+        raise ConfigError(f"The {where} must be a mapping.")
+    normalized = typing.cast(ScheduleWindow, dict(window))
+    for key in ("start", "end"):
+        if key not in window:
+            raise ConfigError(f"The {where} has no {key} time.")
+        normalized[key] = _schedule_time(window[key], f"{key} of the {where}")
+    if "cap-mbps" in window:
+        normalized["cap-mbps"] = _cap_mbps(window["cap-mbps"], where)
+    if "days" in window:
+        days = window["days"]
+        if not isinstance(days, list) or not all(
+            isinstance(day, str) and day.lower()[:3] in WEEKDAYS for day in days
+        ):
+            raise ConfigError(
+                f"The days of the {where} must be a list of weekdays, "
+                f"such as [mon, tue], got {days!r}."
+            )
+    return normalized
+
+
+def _schedule_time(value: typing.Any, where: str) -> str:
+    # YAML reads an unquoted 18:30 as the base 60 integer 1110.
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 1440:
+        return "%02d:%02d" % divmod(value, 60)
+    if isinstance(value, str):
+        try:
+            datetime.time.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            return value
+    raise ConfigError(f"Invalid {where}: {value!r}, expected HH:MM.")
+
+
+def _cap_mbps(value: typing.Any, where: str) -> float:
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+        raise ConfigError(
+            f"The cap-mbps of the {where} must be a number of 0 or more, "
+            f"got {value!r}."
+        )
+    return value
 
 
 def list_environment_keys(config: ConfigCatalog) -> list[str]:
@@ -78,4 +232,7 @@ def resolve_config(config: ConfigCatalog, environment: str | None = None) -> Con
             "url": os.environ.get("EUPHROSYNE_URL", active_environment["url"])
         },
         "euphrosyne-tools": {"url": active_environment["euphro-tools-url"]},
+        "azcopy": active_environment.get("azcopy") or {},
+        "bandwidth": active_environment.get("bandwidth") or {},
+        "retry": active_environment.get("retry") or {},
     }
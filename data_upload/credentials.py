@@ -0,0 +1,136 @@
+import threading
+import time
+import typing
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+from data_upload.euphro_tools import RunUploadTarget, SASTokenCredentials
+
+# Tokens are replaced this many seconds before their `se=` expiry, so requests
+# in flight and AzCopy's shutdown never run on an expired token.
+SAS_RENEWAL_MARGIN = 5 * 60
+
+
+def parse_sas_expiry(token: str) -> float | None:
+    """Return the `se=` expiry of a SAS token as a timestamp, or None if absent."""
+    values = parse_qs(token.lstrip("?")).get("se")
+    if not values:
+        return None
+    try:
+        expiry = datetime.fromisoformat(values[0].replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry.timestamp()
+
+
+class SASRenewalError(Exception):
+    """Raised when a running upload cannot get a new SAS token."""
+
+
+class _CachedCredentials(typing.NamedTuple):
+    credentials: SASTokenCredentials
+    renew_at: float | None
+
+
+class SASCredentialManager:
+    """SAS tokens cached per (project, run, data type) until shortly before expiry.
+
+    Retries and jobs uploading several folders to the same run reuse a token
+    instead of asking the tools API again. Tokens without an `se=` expiry are
+    kept until `renew` is called.
+    """
+
+    def __init__(
+        self,
+        fetch: typing.Callable[[str, str, str], SASTokenCredentials],
+        renewal_margin: float = SAS_RENEWAL_MARGIN,
+        clock: typing.Callable[[], float] = time.time,
+    ):
+        self.fetch = fetch
+        self.renewal_margin = renewal_margin
+        self.clock = clock
+        self._cache: dict[RunUploadTarget, _CachedCredentials] = {}
+        self._lock = threading.Lock()
+        self._target_locks: dict[RunUploadTarget, threading.Lock] = {}
+
+    def get(self, target: RunUploadTarget) -> SASTokenCredentials:
+        """Return cached credentials for `target`, fetching them when due."""
+        with self._target_lock(target):
+            cached = self._cache.get(target)
+            if cached is None or self._is_due(cached):
+                cached = self._store(target, self.fetch(*target))
+            return cached.credentials
+
+    def renew(self, target: RunUploadTarget) -> SASTokenCredentials:
+        """Fetch new credentials for `target`, whatever the cached ones."""
+        with self._target_lock(target):
+            return self._store(target, self.fetch(*target)).credentials
+
+    def put(self, target: RunUploadTarget, credentials: SASTokenCredentials):
+        """Cache credentials fetched elsewhere, e.g. prepared concurrently."""
+        with self._target_lock(target):
+            self._store(target, credentials)
+
+    def renew_at(self, target: RunUploadTarget) -> float | None:
+        """Return when the current token of `target` should be replaced."""
+        self.get(target)
+        with self._lock:
+            return self._cache[target].renew_at
+
+    def lease(self, target: RunUploadTarget) -> "SASLease":
+        return SASLease(self, target)
+
+    def _store(
+        self, target: RunUploadTarget, credentials: SASTokenCredentials
+    ) -> _CachedCredentials:
+        now = self.clock()
+        expiry = parse_sas_expiry(credentials["token"])
+        renew_at = None
+        if expiry is not None:
+            # Short-lived tokens are used for half their lifetime at least,
+            # rather than renewed on every call.
+            renew_at = max(expiry - self.renewal_margin, now + (expiry - now) / 2)
+        cached = _CachedCredentials(credentials, renew_at)
+        with self._lock:
+            self._cache[target] = cached
+        return cached
+
+    def _is_due(self, cached: _CachedCredentials) -> bool:
+        return cached.renew_at is not None and self.clock() >= cached.renew_at
+
+    def _target_lock(self, target: RunUploadTarget) -> threading.Lock:
+        with self._lock:
+            return self._target_locks.setdefault(target, threading.Lock())
+
+
+class SASLease:
+    """The SAS token of one upload target, handed to an upload engine.
+
+    The native engine asks for `token()` on every request, and gets a renewed
+    one once the current token is due. AzCopy runs until `renew_at()`, then
+    resumes its job with `renew()`.
+    """
+
+    def __init__(self, manager: SASCredentialManager, target: RunUploadTarget):
+        self.manager = manager
+        self.target = target
+
+    def credentials(self) -> SASTokenCredentials:
+        return self.manager.get(self.target)
+
+    def token(self) -> str:
+        try:
+            return self.manager.get(self.target)["token"]
+        except Exception as e:
+            raise SASRenewalError(f"Could not renew the SAS token: {e}") from e
+
+    def renew_at(self) -> float | None:
+        return self.manager.renew_at(self.target)
+
+    def renew(self) -> str:
+        try:
+            return self.manager.renew(self.target)["token"]
+        except Exception as e:
+            raise SASRenewalError(f"Could not renew the SAS token: {e}") from e
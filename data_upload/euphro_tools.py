@@ -1,13 +1,30 @@
+import asyncio
 import typing
 
 import httpx
 
+from data_upload.http_client import send_request
+from data_upload.retry import IDEMPOTENT_EXTENSION
+
+# Folder init is a POST, but initializing a folder twice is harmless: the
+# second call reports that it already exists. It may be retried like a GET.
+IDEMPOTENT = {IDEMPOTENT_EXTENSION: True}
+
+# Requests in flight at once when preparing many runs for upload.
+DEFAULT_PREPARE_CONCURRENCY = 8
+
 
 class SASTokenCredentials(typing.TypedDict):
     url: str
     token: str
 
 
+class RunUploadTarget(typing.NamedTuple):
+    project_slug: str
+    run_name: str
+    data_type: str
+
+
 class InitFoldersError(Exception):
     pass
 
@@ -22,58 +39,53 @@ class EuphrosyneToolsConnectionError(Exception):
 
 
 class EuphrosyneToolsService:
-    def __init__(self, host: str, auth: httpx.Auth):
+    def __init__(self, host: str, auth: httpx.Auth, client: httpx.Client | None = None):
         self.host = host
         self.auth = auth
+        self.client = client
 
-    def init_folders(self, project_slug: str, run_name: str) -> str:
+    def init_folders(self, project_slug: str, run_name: str):
         """Initialize the project and run data folders."""
+        self.init_project_folder(project_slug)
+        self.init_run_folders(project_slug, run_name)
 
-        # Project folder
+    def init_project_folder(self, project_slug: str):
         try:
-            response = httpx.post(
+            response = send_request(
+                self.client,
+                "POST",
                 f"{self.host}/data/{project_slug}/init",
                 headers={
                     "Accept": "application/json",
                 },
                 auth=self.auth,
+                extensions=IDEMPOTENT,
             )
         except httpx.ConnectError as e:
             raise EuphrosyneToolsConnectionError() from e
-        # TODO : handle folder already created
-        if response.status_code == 400:
-            message = response.json().get("detail")
-            if not message or not "The specified resource already exists" in message:
-                raise InitFoldersError(f"Failed to initialize project folders")
-        elif response.status_code != 204:
-            raise InitFoldersError(
-                f"Failed to initialize project folders: {response.text}"
-            )
+        _check_project_init_response(response)
 
-        # Run data folders
-        response = httpx.post(
+    def init_run_folders(self, project_slug: str, run_name: str):
+        response = send_request(
+            self.client,
+            "POST",
             f"{self.host}/data/{project_slug}/runs/{run_name}/init",
             headers={
                 "Accept": "application/json",
             },
             auth=self.auth,
+            extensions=IDEMPOTENT,
         )
-        # TODO : handle folder already created
-        if response.status_code == 400:
-            message = response.json().get("detail")
-            if not message or not "The specified resource already exists" in message:
-                raise InitFoldersError(
-                    f"Failed to initialize run folders: {response.text}"
-                )
-        elif response.status_code != 204:
-            raise InitFoldersError(f"Failed to initialize run folders: {response.text}")
+        _check_run_init_response(response)
 
     def get_run_data_upload_shared_access_signature(
         self, project_slug: str, run_name: str, data_type: str
     ) -> SASTokenCredentials:
         """Return a token used to upload run data to file storage."""
         try:
-            response = httpx.get(
+            response = send_request(
+                self.client,
+                "GET",
                 f"{self.host}/data/{project_slug}/runs/{run_name}/upload/shared_access_signature?data_type={data_type}",
                 headers={
                     "Accept": "application/json",
@@ -84,3 +96,117 @@ class EuphrosyneToolsService:
             raise EuphrosyneToolsConnectionError() from e
         response.raise_for_status()
         return SASTokenCredentials(**response.json())
+
+
+class AsyncEuphrosyneToolsService:
+    """`EuphrosyneToolsService` on an `httpx.AsyncClient`, to prepare many runs at once."""
+
+    def __init__(self, host: str, auth: httpx.Auth, client: httpx.AsyncClient):
+        self.host = host
+        self.auth = auth
+        self.client = client
+
+    async def init_project_folder(self, project_slug: str):
+        response = await self._send(
+            "POST", f"/data/{project_slug}/init", extensions=IDEMPOTENT
+        )
+        _check_project_init_response(response)
+
+    async def init_run_folders(self, project_slug: str, run_name: str):
+        response = await self._send(
+            "POST", f"/data/{project_slug}/runs/{run_name}/init", extensions=IDEMPOTENT
+        )
+        _check_run_init_response(response)
+
+    async def get_run_data_upload_shared_access_signature(
+        self, project_slug: str, run_name: str, data_type: str
+    ) -> SASTokenCredentials:
+        response = await self._send(
+            "GET",
+            f"/data/{project_slug}/runs/{run_name}/upload/shared_access_signature?data_type={data_type}",
+        )
+        response.raise_for_status()
+        return SASTokenCredentials(**response.json())
+
+    async def prepare_uploads(
+        self,
+        targets: typing.Sequence[RunUploadTarget],
+        concurrency: int = DEFAULT_PREPARE_CONCURRENCY,
+        initialized: typing.Collection[tuple[str, ...]] = (),
+    ) -> list[SASTokenCredentials | Exception]:
+        """Initialize the folders of every target and fetch its SAS token.
+
+        Each project is initialized once, before its runs, and each run once, before
+        its SAS requests; folders whose `(project,)` or `(project, run)` key is in
+        `initialized` are not initialized again. At most `concurrency` requests are
+        in flight. Results are in target order, with the exception raised for a
+        target in place of its credentials.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        initializations: dict[tuple[str, ...], asyncio.Task] = {}
+
+        async def limited(call: typing.Callable[..., typing.Awaitable], *args):
+            async with semaphore:
+                return await call(*args)
+
+        async def initialize_once(key: tuple[str, ...], call: typing.Callable, *args):
+            if key in initialized:
+                return
+            if key not in initializations:
+                initializations[key] = asyncio.ensure_future(limited(call, *args))
+            await initializations[key]
+
+        async def prepare(target: RunUploadTarget) -> SASTokenCredentials:
+            project_slug, run_name, _data_type = target
+            await initialize_once(
+                (project_slug,), self.init_project_folder, project_slug
+            )
+            await initialize_once(
+                (project_slug, run_name),
+                self.init_run_folders,
+                project_slug,
+                run_name,
+            )
+            return await limited(
+                self.get_run_data_upload_shared_access_signature, *target
+            )
+
+        return await asyncio.gather(
+            *(prepare(target) for target in targets), return_exceptions=True
+        )
+
+    async def _send(
+        self, method: str, path: str, extensions: dict | None = None
+    ) -> httpx.Response:
+        try:
+            return await self.client.request(
+                method,
+                f"{self.host}{path}",
+                headers={
+                    "Accept": "application/json",
+                },
+                auth=self.auth,
+                extensions=extensions,
+            )
+        except httpx.ConnectError as e:
+            raise EuphrosyneToolsConnectionError() from e
+
+
+def _check_project_init_response(response: httpx.Response):
+    # TODO : handle folder already created
+    if response.status_code == 400:
+        message = response.json().get("detail")
+        if not message or not "The specified resource already exists" in message:
+            raise InitFoldersError(f"Failed to initialize project folders")
+    elif response.status_code != 204:
+        raise InitFoldersError(f"Failed to initialize project folders: {response.text}")
+
+
+def _check_run_init_response(response: httpx.Response):
+    # TODO : handle folder already created
+    if response.status_code == 400:
+        message = response.json().get("detail")
+        if not message or not "The specified resource already exists" in message:
+            raise InitFoldersError(f"Failed to initialize run folders: {response.text}")
+    elif response.status_code != 204:
+        raise InitFoldersError(f"Failed to initialize run folders: {response.text}")
@@ -1,5 +1,11 @@
+import asyncio
 import base64
 import json
+import threading
+import time
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from datetime import datetime, timezone
 
 import httpx
@@ -7,9 +13,15 @@ import keyring
 import sentry_sdk
 from PySide6.QtCore import QSettings
 
+from data_upload.http_client import send_request
+
 KEYRING_SERVICE = "Euphrosyne Herma"
 KEYRING_REFRESH_TOKEN_ACCOUNT = "refresh_token"
 
+# Access tokens are refreshed this many seconds before they expire, so that no
+# request is sent with a token about to be rejected.
+TOKEN_REFRESH_MARGIN = 60
+
 
 class EuphrosyneConnectionError(Exception):
     """Custom exception for Euphrosyne connection errors."""
@@ -31,43 +43,211 @@ def _capture_keyring_warning(operation: str, error: Exception):
     )
 
 
-def save_refresh_token(settings: QSettings, refresh_token: str):
+def save_keyring_refresh_token(refresh_token: str) -> bool:
+    """Store the refresh token in the keyring; return False when it failed."""
     try:
         keyring.set_password(
             KEYRING_SERVICE,
             KEYRING_REFRESH_TOKEN_ACCOUNT,
             refresh_token,
         )
-        settings.remove("refresh_token")
     except Exception as e:
         _capture_keyring_warning("save", e)
-        settings.setValue("refresh_token", refresh_token)
+        return False
+    return True
 
 
-def load_refresh_token(settings: QSettings) -> str | None:
+def load_keyring_refresh_token() -> str | None:
     try:
-        token = keyring.get_password(
+        return keyring.get_password(
             KEYRING_SERVICE,
             KEYRING_REFRESH_TOKEN_ACCOUNT,
         )
     except Exception as e:
         _capture_keyring_warning("load", e)
-        return settings.value("refresh_token", None)
-
-    return token or settings.value("refresh_token", None)
+        return None
 
 
-def clear_tokens(settings: QSettings):
+def delete_keyring_refresh_token():
     try:
         keyring.delete_password(KEYRING_SERVICE, KEYRING_REFRESH_TOKEN_ACCOUNT)
     except keyring.errors.PasswordDeleteError:
         pass
     except Exception as e:
         _capture_keyring_warning("delete", e)
+
+
+def save_refresh_token(settings: QSettings, refresh_token: str):
+    if save_keyring_refresh_token(refresh_token):
+        settings.remove("refresh_token")
+    else:
+        settings.setValue("refresh_token", refresh_token)
+
+
+def load_refresh_token(settings: QSettings) -> str | None:
+    return load_keyring_refresh_token() or settings.value("refresh_token", None)
+
+
+def clear_tokens(settings: QSettings):
+    delete_keyring_refresh_token()
     settings.remove("access_token")
     settings.remove("refresh_token")
 
 
+class TokenStore:
+    """Tokens of one `QSettings`, served from memory in front of the OS keyring.
+
+    Keyring calls can take hundreds of milliseconds or wait on a system prompt,
+    so the refresh token is loaded once, possibly on a background thread, and
+    written back on a single writer thread that keeps writes in order. Those
+    threads only call the keyring: QSettings is not thread-safe, so it is only
+    read and written by the methods of the store, on the thread calling them.
+    A refresh token the keyring failed to store falls back to QSettings, as
+    `save_refresh_token` does, on the next `save`, `clear` or `flush`. The
+    access token stays in QSettings, which is cheap to read and write.
+    """
+
+    def __init__(self, settings: QSettings):
+        self.settings = settings
+        # Reentrant: a write that is already done runs its callback at once.
+        self._lock = threading.RLock()
+        self._loaded = threading.Event()
+        self._loading = False
+        self._refresh_token: str | None = None
+        # Bumped by every write, so that a slow load does not undo it.
+        self._version = 0
+        self._writer: ThreadPoolExecutor | None = None
+        # Keyring writes in submission order, with the version they were for.
+        self._pending_writes: list[tuple[Future, int]] = []
+
+    @property
+    def access_token(self) -> str | None:
+        return self.settings.value("access_token", None)
+
+    @property
+    def refresh_token(self) -> str | None:
+        """The refresh token, loading it now if it is not loaded yet."""
+        # Tokens the keyring could not store or load are kept in QSettings.
+        return self.load() or self.settings.value("refresh_token", None)
+
+    def load(self) -> str | None:
+        """Load the refresh token from the keyring if needed, and return it.
+
+        Only the keyring is read, so any thread may call it.
+        """
+        self._start_loading()
+        self._loaded.wait()
+        return self._refresh_token
+
+    def refresh_token_loader(self) -> typing.Callable[[], str | None]:
+        """Return a function returning `refresh_token`, for another thread.
+
+        The QSettings fallback is read now; the function only waits for the keyring.
+        """
+        fallback = self.settings.value("refresh_token", None)
+        return lambda: self.load() or fallback
+
+    def load_in_background(self):
+        """Start loading the refresh token, so that it is ready when needed."""
+        self._start_loading(background=True)
+
+    def set_access_token(self, access_token: str):
+        self.settings.setValue("access_token", access_token)
+
+    def save(self, access_token: str, refresh_token: str):
+        self._apply_failed_writes()
+        self.set_access_token(access_token)
+        self.settings.remove("refresh_token")
+        with self._lock:
+            self._set_loaded(refresh_token)
+            self._submit_write(save_keyring_refresh_token, refresh_token)
+
+    def clear(self):
+        self._apply_failed_writes()
+        self.settings.remove("access_token")
+        self.settings.remove("refresh_token")
+        with self._lock:
+            self._set_loaded(None)
+            self._submit_write(delete_keyring_refresh_token)
+
+    def flush(self, timeout: float | None = None):
+        """Wait for the keyring writes submitted so far."""
+        with self._lock:
+            pending = [future for future, _version in self._pending_writes]
+        wait_futures(pending, timeout=timeout)
+        self._apply_failed_writes()
+
+    def _start_loading(self, background: bool = False):
+        with self._lock:
+            if self._loading or self._loaded.is_set():
+                return
+            self._loading = True
+            version = self._version
+        if not background:
+            self._load(version)
+            return
+        threading.Thread(
+            target=self._load, args=(version,), name="token-store-load", daemon=True
+        ).start()
+
+    def _load(self, version: int):
+        refresh_token = None
+        try:
+            refresh_token = load_keyring_refresh_token()
+        finally:
+            with self._lock:
+                if self._version == version:
+                    self._refresh_token = refresh_token
+                self._loaded.set()
+
+    def _set_loaded(self, refresh_token: str | None):
+        self._refresh_token = refresh_token
+        self._version += 1
+        self._loaded.set()
+
+    def _submit_write(self, write: typing.Callable, *args):
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="token-store-write"
+            )
+        self._pending_writes.append((self._writer.submit(write, *args), self._version))
+
+    def _apply_failed_writes(self):
+        """Keep in QSettings the latest refresh token the keyring failed to store."""
+        with self._lock:
+            done = []
+            while self._pending_writes and self._pending_writes[0][0].done():
+                done.append(self._pending_writes.pop(0))
+            refresh_token = self._refresh_token
+            failed = any(
+                version == self._version and future.result() is False
+                for future, version in done
+            )
+        if failed and refresh_token:
+            self.settings.setValue("refresh_token", refresh_token)
+
+
+_token_stores: dict[int, TokenStore] = {}
+_token_stores_lock = threading.Lock()
+
+
+def get_token_store(settings: QSettings) -> TokenStore:
+    """Return the token store shared by every user of `settings`."""
+    with _token_stores_lock:
+        store = _token_stores.get(id(settings))
+        # The store keeps its settings alive, so their id is not reused.
+        if store is None or store.settings is not settings:
+            store = _token_stores[id(settings)] = TokenStore(settings)
+        return store
+
+
+def flush_token_stores(timeout: float | None = None):
+    with _token_stores_lock:
+        stores = list(_token_stores.values())
+    for store in stores:
+        store.flush(timeout)
+
+
 def is_token_expired(token: str) -> bool:
     """
     Check if the provided JWT is valid.
@@ -78,27 +258,42 @@ def is_token_expired(token: str) -> bool:
     Returns:
         bool: True if the JWT is valid, False otherwise.
     """
-    decoded = base64.b64decode(token.split(".")[1] + "==").decode("utf-8")
-    expiration = json.loads(decoded).get("exp")
+    expiration = get_token_expiry(token)
 
     if not expiration:
         return False
     return expiration < datetime.now(timezone.utc).timestamp()
 
 
-def euphrosyne_login(host: str, email: str, password: str) -> tuple[str, str]:
+def get_token_claims(token: str) -> dict[str, typing.Any]:
+    """Decode the payload of a JWT, without verifying its signature."""
+    decoded = base64.urlsafe_b64decode(token.split(".")[1] + "==").decode("utf-8")
+    return json.loads(decoded)
+
+
+def get_token_expiry(token: str) -> float | None:
+    """Return the `exp` claim of a JWT, as a timestamp, or None when it has none."""
+    return get_token_claims(token).get("exp")
+
+
+def euphrosyne_login(
+    host: str, email: str, password: str, client: httpx.Client | None = None
+) -> tuple[str, str]:
     """
     Log in a user and return a access & refresh token pair.
     Args:
         host (str): The base URL of the authentication server.
         email (str): The user's email.
         password (str): The user's password.
+        client (httpx.Client | None): The environment's pooled client, if any.
     Returns:
         tuple[str, str]: The access and refresh tokens if login is successful.
     Raises:
         ValueError: If the login fails.
     """
-    response = httpx.post(
+    response = send_request(
+        client,
+        "POST",
         f"{host}/api/auth/long-token/",
         json={"email": email, "password": password},
     )
@@ -108,12 +303,15 @@ def euphrosyne_login(host: str, email: str, password: str) -> tuple[str, str]:
     return (data["access"], data["refresh"])
 
 
-def refresh_token(host: str, refresh_token: str) -> tuple[str, str]:
+def refresh_token(
+    host: str, refresh_token: str, client: httpx.Client | None = None
+) -> tuple[str, str]:
     """
     Refresh the access token using the provided refresh token.
 
     Args:
         refresh_token (str): The refresh token to use for obtaining a new access token.
+        client (httpx.Client | None): The environment's pooled client, if any.
 
     Returns:
         tuple[str, str]: The new access and refresh tokens.
@@ -122,7 +320,9 @@ def refresh_token(host: str, refresh_token: str) -> tuple[str, str]:
         ValueError: If the refresh fails.
     """
     try:
-        response = httpx.post(
+        response = send_request(
+            client,
+            "POST",
             f"{host}/api/auth/token/refresh/",
             json={"refresh": refresh_token},
         )
@@ -135,28 +335,97 @@ def refresh_token(host: str, refresh_token: str) -> tuple[str, str]:
 
 
 class EuphrosyneAuth(httpx.Auth):
+    """Bearer auth that refreshes the access token before it expires, or after a 401.
+
+    Refreshes are serialized: concurrent requests, from threads or from
+    coroutines, wait for the one refresh in flight and then use its token.
+    """
+
     requires_response_body = True
 
     def __init__(
-        self, access_token: str, refresh_token: str, host: str, settings: QSettings
+        self,
+        access_token: str,
+        refresh_token: str,
+        host: str,
+        settings: QSettings,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+        clock: typing.Callable[[], float] = time.time,
     ):
         self.access_token = access_token
         self.refresh_token = refresh_token
         self.host = host
         self.settings = settings
-
-    def auth_flow(self, request):
-        request.headers["Authorization"] = f"Bearer {self.access_token}"
-        response = yield request
-
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self._sync_lock = threading.Lock()
+        self._async_locks_lock = threading.Lock()
+        self._async_lock: asyncio.Lock | None = None
+        self._async_lock_loop: asyncio.AbstractEventLoop | None = None
+
+    def sync_auth_flow(self, request):
+        if self.needs_refresh():
+            with self._sync_lock:
+                # Another request may have refreshed while this one waited.
+                if self.needs_refresh():
+                    yield from self._sync_refresh()
+        access_token = self.access_token
+        response = yield self._authorize(request, access_token)
         if response.status_code == 401:
-            # If the server issues a 401 response, then issue a request to
-            # refresh tokens, and resend the request.
-            refresh_response = yield self.build_refresh_request()
-            self.update_tokens(refresh_response)
-
-            request.headers["Authorization"] = f"Bearer {self.access_token}"
-            yield request
+            # Refresh tokens, unless a concurrent request already did, and
+            # resend the request.
+            with self._sync_lock:
+                if self.access_token == access_token:
+                    yield from self._sync_refresh()
+            yield self._authorize(request, self.access_token)
+
+    async def async_auth_flow(self, request):
+        if self.needs_refresh():
+            async with self._get_async_lock():
+                if self.needs_refresh():
+                    refresh_response = yield self.build_refresh_request()
+                    await refresh_response.aread()
+                    self.update_tokens(refresh_response)
+        access_token = self.access_token
+        response = yield self._authorize(request, access_token)
+        if response.status_code == 401:
+            async with self._get_async_lock():
+                if self.access_token == access_token:
+                    refresh_response = yield self.build_refresh_request()
+                    await refresh_response.aread()
+                    self.update_tokens(refresh_response)
+            yield self._authorize(request, self.access_token)
+
+    def _sync_refresh(self):
+        refresh_response = yield self.build_refresh_request()
+        refresh_response.read()
+        self.update_tokens(refresh_response)
+
+    @staticmethod
+    def _authorize(request: httpx.Request, access_token: str) -> httpx.Request:
+        request.headers["Authorization"] = f"Bearer {access_token}"
+        return request
+
+    def needs_refresh(self) -> bool:
+        """Whether the access token expires within the refresh margin."""
+        if not self.refresh_token:
+            return False
+        try:
+            expiry = get_token_expiry(self.access_token)
+        except (AttributeError, IndexError, ValueError):
+            # Not a JWT: only a 401 tells that it expired.
+            return False
+        return bool(expiry) and expiry - self.refresh_margin <= self.clock()
+
+    def _get_async_lock(self) -> asyncio.Lock:
+        # An asyncio lock belongs to one event loop, and the CLI runs a new
+        # loop for each batch.
+        loop = asyncio.get_running_loop()
+        with self._async_locks_lock:
+            if self._async_lock is None or self._async_lock_loop is not loop:
+                self._async_lock = asyncio.Lock()
+                self._async_lock_loop = loop
+            return self._async_lock
 
     def build_refresh_request(self):
         # Return an `httpx.Request` for refreshing tokens.
@@ -1,8 +1,19 @@
-import functools
+import json
 import typing
 
 import httpx
 
+from data_upload.cache import ttl_cache
+from data_upload.http_client import stream_request
+
+# Projects and runs change on the platform while the app runs: a list is reused
+# for a few minutes at most, for a few tokens at most.
+PROJECTS_CACHE_TTL = 300
+PROJECTS_CACHE_SIZE = 8
+
+# Projects handed to the caller at a time while a response is read.
+PROJECTS_BATCH_SIZE = 50
+
 
 class ObjectSummary(typing.TypedDict):
     id: int
@@ -23,61 +34,189 @@ class Project(typing.TypedDict):
     slug: str
 
 
+class ProjectCatalog(typing.TypedDict):
+    projects: list[Project]
+    # Validators of the response, sent back to revalidate it.
+    etag: str | None
+    last_modified: str | None
+
+
 class ProjectLoadingError(Exception):
     """Raised when projects cannot be loaded or parsed."""
 
 
-def validate_projects(data: typing.Any) -> list[Project]:
-    if not isinstance(data, list):
-        raise ProjectLoadingError("Projects response must be a list.")
+def validate_project(project: typing.Any, project_index: int) -> Project:
+    if not isinstance(project, dict):
+        raise ProjectLoadingError(
+            f"Project at index {project_index} must be an object."
+        )
+    if not isinstance(project.get("name"), str) or not project["name"]:
+        raise ProjectLoadingError(
+            f"Project at index {project_index} is missing a name."
+        )
+    if not isinstance(project.get("runs"), list):
+        raise ProjectLoadingError(f"Project {project['name']} is missing a runs list.")
 
-    for project_index, project in enumerate(data):
-        if not isinstance(project, dict):
+    for run_index, run in enumerate(project["runs"]):
+        if not isinstance(run, dict):
             raise ProjectLoadingError(
-                f"Project at index {project_index} must be an object."
+                f"Run at index {run_index} in project {project['name']} must be an object."
             )
-        if not isinstance(project.get("name"), str) or not project["name"]:
+        if not isinstance(run.get("label"), str) or not run["label"]:
             raise ProjectLoadingError(
-                f"Project at index {project_index} is missing a name."
-            )
-        if not isinstance(project.get("runs"), list):
-            raise ProjectLoadingError(
-                f"Project {project['name']} is missing a runs list."
+                f"Run at index {run_index} in project {project['name']} is missing a label."
             )
 
-        for run_index, run in enumerate(project["runs"]):
-            if not isinstance(run, dict):
-                raise ProjectLoadingError(
-                    f"Run at index {run_index} in project {project['name']} must be an object."
-                )
-            if not isinstance(run.get("label"), str) or not run["label"]:
-                raise ProjectLoadingError(
-                    f"Run at index {run_index} in project {project['name']} is missing a label."
-                )
+    return typing.cast(Project, project)
 
-    return typing.cast(list[Project], data)
+
+def validate_projects(data: typing.Any) -> list[Project]:
+    if not isinstance(data, list):
+        raise ProjectLoadingError("Projects response must be a list.")
+    return [validate_project(project, index) for index, project in enumerate(data)]
 
 
 def first_project_with_runs(projects: list[Project]) -> Project | None:
     return next((project for project in projects if project["runs"]), None)
 
 
-@functools.lru_cache
-def list_projects(host: str, access_token: str) -> list[Project]:
-    try:
-        response = httpx.get(
-            f"{host}/api/lab/projects/",
-            headers={
-                "Accept": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-        )
-    except httpx.ConnectError as e:
-        raise ProjectLoadingError("Failed to connect to Euphrosyne server.") from e
+@ttl_cache(PROJECTS_CACHE_TTL, maxsize=PROJECTS_CACHE_SIZE)
+def list_projects(
+    host: str, access_token: str, client: httpx.Client | None = None
+) -> list[Project]:
+    return fetch_projects(host, access_token, client)["projects"]
+
+
+def fetch_projects(
+    host: str,
+    access_token: str,
+    client: httpx.Client | None = None,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    on_projects: typing.Callable[[list[Project]], None] | None = None,
+) -> ProjectCatalog | None:
+    """Download the projects of the user.
+
+    With the `etag` or `last_modified` of an earlier response, the request is
+    conditional: None means that the server answered 304 Not Modified.
+
+    The response is read as it arrives. A plain list is parsed item by item, and
+    a paginated one (`{"results": [...], "next": url}`) is followed page by page;
+    each project is validated on its own and handed to `on_projects` in batches,
+    so the first ones can be shown before the rest is downloaded.
+    """
+    headers = {
+        "Accept": "application/json",
+        "Authorization": f"Bearer {access_token}",
+    }
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    projects: list[Project] = []
+    validators: dict[str, str | None] = {}
+    url: str | None = f"{host}/api/lab/projects/"
+    while url:
+        try:
+            with stream_request(client, "GET", url, headers=headers) as response:
+                if response.status_code == 304:
+                    return None
+                response.raise_for_status()
+                if not validators:
+                    validators = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                items, url = _read_projects_page(response)
+                batch: list[Project] = []
+                for item in items:
+                    batch.append(validate_project(item, len(projects) + len(batch)))
+                    if len(batch) == PROJECTS_BATCH_SIZE:
+                        projects.extend(batch)
+                        _emit_projects(on_projects, batch)
+                        batch = []
+                projects.extend(batch)
+                _emit_projects(on_projects, batch)
+        except httpx.ConnectError as e:
+            raise ProjectLoadingError("Failed to connect to Euphrosyne server.") from e
+        # Validators only apply to the first page.
+        headers.pop("If-None-Match", None)
+        headers.pop("If-Modified-Since", None)
+
+    return ProjectCatalog(projects=projects, **validators)
+
+
+def _emit_projects(
+    on_projects: typing.Callable[[list[Project]], None] | None, batch: list[Project]
+):
+    if on_projects and batch:
+        on_projects(batch)
+
+
+def _read_projects_page(
+    response: httpx.Response,
+) -> tuple[typing.Iterable[typing.Any], str | None]:
+    """Return the projects of a response and the URL of the next page, if any."""
+    chunks = response.iter_text()
+    buffer = ""
+    while not buffer.strip():
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ProjectLoadingError("Projects response must be valid JSON.")
+        buffer += chunk
+
+    if buffer.lstrip().startswith("["):
+        return _iter_json_array(buffer, chunks), None
 
-    response.raise_for_status()
     try:
-        data = response.json()
+        data = json.loads(buffer + "".join(chunks))
     except ValueError as e:
         raise ProjectLoadingError("Projects response must be valid JSON.") from e
-    return validate_projects(data)
+    if not isinstance(data, dict) or not isinstance(data.get("results"), list):
+        raise ProjectLoadingError("Projects response must be a list.")
+    return data["results"], data.get("next")
+
+
+def _iter_json_array(
+    buffer: str, chunks: typing.Iterator[str]
+) -> typing.Iterator[typing.Any]:
+    """Yield the items of a JSON array as soon as each one is complete."""
+    decoder = json.JSONDecoder()
+    position = buffer.index("[") + 1
+    expects_item = True
+    is_empty = True
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position == len(buffer) or not expects_item and buffer[position] == ",":
+            if position < len(buffer):
+                position += 1
+                expects_item = True
+                continue
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ProjectLoadingError("Projects response must be valid JSON.")
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        if buffer[position] == "]" and (is_empty or not expects_item):
+            return
+        if not expects_item:
+            raise ProjectLoadingError("Projects response must be valid JSON.")
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            item, end = None, None
+        # The item may be cut by the end of the chunk: decode it again with more.
+        if end is None or end == len(buffer):
+            chunk = next(chunks, None)
+            if chunk is not None:
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            if end is None:
+                raise ProjectLoadingError("Projects response must be valid JSON.")
+        yield item
+        position = end
+        expects_item = False
+        is_empty = False
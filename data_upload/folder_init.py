@@ -0,0 +1,112 @@
+import threading
+import time
+import typing
+from pathlib import Path
+
+from data_upload.app_data import get_app_data_folder, read_json, write_json
+from data_upload.euphro_tools import EuphrosyneToolsService
+
+INITIALIZED_FOLDERS_FILE_NAME = "initialized_folders.json"
+# Folders are not expected to disappear; the TTL bounds how long a folder
+# deleted on the server side goes unnoticed before init runs again.
+INITIALIZED_FOLDERS_TTL = 7 * 24 * 3600
+
+
+class InitializedFolderStore:
+    """Project and run folders initialized through the tools API, per environment.
+
+    Like `UploadJobStore`, it expects a single process to write at a time.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        ttl: float = INITIALIZED_FOLDERS_TTL,
+        clock: typing.Callable[[], float] = time.time,
+    ):
+        self.path = path or get_app_data_folder() / INITIALIZED_FOLDERS_FILE_NAME
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(environment: str, project: str, run: str | None = None) -> str:
+        return "|".join((environment, project) + ((run,) if run is not None else ()))
+
+    def is_initialized(
+        self, environment: str, project: str, run: str | None = None
+    ) -> bool:
+        initialized_at = self._read().get(self._key(environment, project, run))
+        return (
+            isinstance(initialized_at, (int, float))
+            and self.clock() - initialized_at < self.ttl
+        )
+
+    def record(self, environment: str, project: str, run: str | None = None):
+        with self._lock:
+            folders = self._read()
+            folders[self._key(environment, project, run)] = self.clock()
+            write_json(self.path, self._unexpired(folders))
+
+    def forget(self, environment: str, project: str, run: str | None = None):
+        with self._lock:
+            folders = self._read()
+            folders.pop(self._key(environment, project, run), None)
+            write_json(self.path, self._unexpired(folders))
+
+    def _read(self) -> dict[str, float]:
+        folders = read_json(self.path, {})
+        return folders if isinstance(folders, dict) else {}
+
+    def _unexpired(self, folders: dict[str, float]) -> dict[str, float]:
+        now = self.clock()
+        return {
+            folder: initialized_at
+            for folder, initialized_at in folders.items()
+            if isinstance(initialized_at, (int, float))
+            and now - initialized_at < self.ttl
+        }
+
+
+class FolderInitializer:
+    """Initialize folders through the tools API, skipping those known to exist.
+
+    With `bypass_cache`, every folder is initialized again, and still recorded
+    in the store for later runs.
+    """
+
+    def __init__(
+        self,
+        tools_service: EuphrosyneToolsService,
+        environment: str,
+        store: InitializedFolderStore,
+        bypass_cache: bool = False,
+    ):
+        self.tools_service = tools_service
+        self.environment = environment
+        self.store = store
+        self.bypass_cache = bypass_cache
+
+    def is_initialized(self, project_slug: str, run_name: str | None = None) -> bool:
+        return not self.bypass_cache and self.store.is_initialized(
+            self.environment, project_slug, run_name
+        )
+
+    def init_folders(self, project_slug: str, run_name: str):
+        self.init_project_folder(project_slug)
+        self.init_run_folders(project_slug, run_name)
+
+    def init_project_folder(self, project_slug: str):
+        if not self.is_initialized(project_slug):
+            self.tools_service.init_project_folder(project_slug)
+            self.store.record(self.environment, project_slug)
+
+    def init_run_folders(self, project_slug: str, run_name: str):
+        if not self.is_initialized(project_slug, run_name):
+            self.tools_service.init_run_folders(project_slug, run_name)
+            self.store.record(self.environment, project_slug, run_name)
+
+    def forget(self, project_slug: str, run_name: str):
+        """Make the next init of this run, and of its project, reach the tools API."""
+        self.store.forget(self.environment, project_slug, run_name)
+        self.store.forget(self.environment, project_slug)
@@ -1,6 +1,5 @@
 import sys
 
-import httpx
 import sentry_sdk
 from PySide6.QtCore import QSettings
 from PySide6.QtGui import QIcon
@@ -14,14 +13,27 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
-from data_upload.app.init import init_access_token, init_azcopy
+from data_upload.app.init import init_access_token
 from data_upload.app.login import login_user
-from data_upload.config import ENVIRONMENT_SETTING_KEY, load_config, resolve_config
-from data_upload.euphrosyne.project import (
-    ProjectLoadingError,
-    first_project_with_runs,
-    list_projects,
+from data_upload.app.startup import StartupPipeline
+from data_upload.azcopy import get_azcopy_release
+from data_upload.config import (
+    ENVIRONMENT_SETTING_KEY,
+    Config,
+    ConfigCatalog,
+    ConfigError,
+    load_config,
+    resolve_config,
 )
+from data_upload.euphrosyne.auth import (
+    EuphrosyneConnectionError,
+    flush_token_stores,
+    get_token_store,
+)
+from data_upload.euphrosyne.project import first_project_with_runs
+from data_upload.http_client import close_http_clients
+from data_upload.project_catalog import get_cached_projects
+from data_upload.startup_timing import StartupTimer, sample_startup_traces
 from data_upload.utils import BUNDLE_DIR, IS_BUNDLED
 from data_upload.widget.data_upload import DataUploadWidget
 from data_upload.widget.text_edit_stream import TextEditStream
@@ -29,6 +41,8 @@ from data_upload.widget.theme import apply_app_theme
 
 settings = QSettings("Euphrosyne", "Herma")
 
+SENTRY_DSN = "https://3ac110bc22bfbcdc13c37d73f5be45de@sentry.incubateur.net/253"
+
 if IS_BUNDLED:
     ICON_PATH = str(BUNDLE_DIR / "assets" / "icon.png")
 else:
@@ -76,6 +90,12 @@ class StartupDialog:
         layout.addWidget(self.label)
         layout.addWidget(self.progress_bar)
 
+    def show_progress(self, done: int, total: int, message: str):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.label.setText(message)
+        self.dialog.show()
+
     def show_message(self, message: str):
         self.label.setText(message)
         self.dialog.show()
@@ -88,80 +108,119 @@ class StartupDialog:
 
 class ConverterGUI:
     @staticmethod
-    def start():
-        app = QApplication.instance() or QApplication(sys.argv)
-
-        app.setWindowIcon(QIcon(ICON_PATH))
-        app.setApplicationName("Euphrosyne Herma")
-        app.setApplicationDisplayName("Euphrosyne Herma")
-        apply_app_theme(app)
-
-        startup_dialog = StartupDialog(app)
-        startup_dialog.show_message("Loading configuration...")
-        config_catalog = load_config()
-        config = resolve_config(
-            config_catalog, settings.value(ENVIRONMENT_SETTING_KEY, None)
-        )
-
-        startup_dialog.show_message("Checking AzCopy...")
-        init_azcopy(app)
-
-        startup_dialog.show_message("Checking authentication...")
-        login_required = init_access_token(settings, config)
-
-        if login_required:
-            startup_dialog.close()
-            config = login_user(config_catalog, config, settings)
-            startup_dialog.show_message("Loading projects...")
-        else:
-            startup_dialog.show_message("Loading projects...")
+    def start(timer: StartupTimer | None = None):
+        timer = timer or StartupTimer("gui")
+        with timer.stage("create application"):
+            app = QApplication.instance() or QApplication(sys.argv)
+            app.setWindowIcon(QIcon(ICON_PATH))
+            app.setApplicationName("Euphrosyne Herma")
+            app.setApplicationDisplayName("Euphrosyne Herma")
+            apply_app_theme(app)
+            app.aboutToQuit.connect(close_http_clients)
+            app.aboutToQuit.connect(flush_token_stores)
+
+            startup_dialog = StartupDialog(app)
+            startup_dialog.show_message("Starting...")
+        tokens = get_token_store(settings)
+        # QSettings is not thread-safe: stages get the saved values, and what they
+        # return is written back here, on the GUI thread.
+        environment = settings.value(ENVIRONMENT_SETTING_KEY, None)
+        saved_access_token = tokens.access_token
+        load_refresh_token = tokens.refresh_token_loader()
+
+        def check_session(config_catalog: ConfigCatalog) -> tuple[Config, str | None]:
+            config = resolve_config(config_catalog, environment)
+            return config, init_access_token(
+                config, saved_access_token, load_refresh_token
+            )
 
+        # Stages run in the background, independent ones in parallel, while the
+        # dialog shows their progress.
+        pipeline = StartupPipeline()
+        pipeline.progress_signal.connect(startup_dialog.show_progress)
+        pipeline.add_stage(
+            "config", "Loading configuration...", timer.wrap("config", load_config)
+        )
+        # The keyring may be slow: read it while the rest of startup runs.
+        pipeline.add_stage(
+            "keyring",
+            "Reading saved credentials...",
+            timer.wrap("keyring", tokens.load),
+        )
+        pipeline.add_stage(
+            "session",
+            "Checking authentication...",
+            timer.wrap("session", check_session),
+            requires=("config",),
+        )
         try:
-            projects = list_projects(
-                host=config["euphrosyne"]["url"],
-                access_token=settings.value("access_token"),
-            )
-        except (ProjectLoadingError, httpx.HTTPError) as e:
+            results = pipeline.run()
+        except EuphrosyneConnectionError:
             startup_dialog.close()
             QMessageBox.critical(
                 None,
-                "Projects unavailable",
-                f"Could not load projects from Euphrosyne: {e}",
+                "Connection Error",
+                "Failed to connect to Euphrosyne server. Please check your connection and try again.",
             )
             sys.exit(1)
+        except ConfigError as error:
+            startup_dialog.close()
+            QMessageBox.critical(None, "Configuration Error", str(error))
+            sys.exit(1)
+        config_catalog = results["config"]
+        config, access_token = results["session"]
 
-        if not projects or first_project_with_runs(projects) is None:
+        if access_token is None:
             startup_dialog.close()
-            QMessageBox.warning(
-                None,
-                "No uploadable projects",
-                "No projects with runs are available for this account.",
-            )
-            sys.exit(0)
+            with timer.stage("login"):
+                config = login_user(config_catalog, config, settings)
+        elif access_token != saved_access_token:
+            tokens.set_access_token(access_token)
+        startup_dialog.show_message("Loading projects...")
+
+        with timer.stage("cached projects"):
+            # The last known list shows at once and the window revalidates it.
+            # Without one, or without runs in it, the window fills the list as it
+            # downloads.
+            access_token = tokens.access_token
+            projects = get_cached_projects(config, access_token) or []
+            if first_project_with_runs(projects) is None:
+                projects = []
 
         startup_dialog.show_message("Opening upload window...")
-        stdout_stream = TextEditStream()
-        sys.stdout = stdout_stream
-        sys.stderr = stdout_stream
-
-        w = DataUploadWidget(
-            config_catalog=config_catalog,
-            config=config,
-            settings=settings,
-            stdout_stream=stdout_stream,
-        )
+        with timer.stage("open window"):
+            stdout_stream = TextEditStream()
+            sys.stdout = stdout_stream
+            sys.stderr = stdout_stream
+
+            w = DataUploadWidget(
+                config_catalog=config_catalog,
+                config=config,
+                settings=settings,
+                stdout_stream=stdout_stream,
+                projects=projects,
+                revalidate_projects=True,
+            )
 
-        print("\nConfig:", config, "\n")
+            print("\nConfig:", config, "\n")
 
-        w.setWindowTitle("Euphrosyne Herma")
-        startup_dialog.close()
-        w.show()
+            w.setWindowTitle("Euphrosyne Herma")
+            startup_dialog.close()
+            w.show()
+            # Start stays disabled until AzCopy is checked, or downloaded.
+            w.init_azcopy(get_azcopy_release(config_catalog))
+        timer.finish()
         sys.exit(app.exec())
 
 
-if __name__ == "__main__":
+def init_sentry():
     sentry_sdk.init(
-        dsn="https://3ac110bc22bfbcdc13c37d73f5be45de@sentry.incubateur.net/253",
+        dsn=SENTRY_DSN,
         send_default_pii=True,
+        traces_sampler=sample_startup_traces,
     )
+
+
+if __name__ == "__main__":
+    init_sentry()
     ConverterGUI.start()
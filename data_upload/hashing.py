@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from data_upload.app_data import get_app_data_folder
+from data_upload.scanner import FolderManifest
+
+HASH_CACHE_FILE_NAME = "hash_cache.sqlite3"
+DEFAULT_HASH_ALGORITHM = "md5"
+HASH_ALGORITHMS = ("md5", "sha256")
+# Files at least this large are hashed through a memory map rather than reads.
+MMAP_THRESHOLD = 64 * 1024 * 1024
+READ_CHUNK_SIZE = 8 * 1024 * 1024
+# hashlib releases the GIL on large updates, so threads hash files in parallel.
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def hash_file(path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """Return the hexadecimal digest of a file's content."""
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+                memoryview(mapped) as view,
+            ):
+                # Slicing the view hashes the mapped pages without copying them.
+                for offset in range(0, size, READ_CHUNK_SIZE):
+                    digest.update(view[offset : offset + READ_CHUNK_SIZE])
+        else:
+            while chunk := f.read(READ_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_content_md5(hex_digest: str) -> str:
+    """Format an MD5 digest the way Azure expects it in Content-MD5 headers."""
+    return base64.b64encode(bytes.fromhex(hex_digest)).decode("ascii")
+
+
+class HashCache:
+    """Digests of local files keyed by (path, size, mtime_ns, algorithm).
+
+    A file whose size or modification time changed misses the cache and is hashed
+    again. The connection is used by one thread; `hash_manifest` hashes on a pool
+    but reads and writes the cache from the calling thread.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or get_app_data_folder() / HASH_CACHE_FILE_NAME
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT NOT NULL, algorithm TEXT NOT NULL, "
+                "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "digest TEXT NOT NULL, PRIMARY KEY (path, algorithm))"
+            )
+
+    def get_many(
+        self, keys: typing.Iterable[tuple[str, int, int]], algorithm: str
+    ) -> dict[str, str]:
+        """Return the cached digests of the (path, size, mtime_ns) still valid."""
+        found = {}
+        with self._lock:
+            for path, size, mtime_ns in keys:
+                row = self._connection.execute(
+                    "SELECT digest FROM hashes WHERE path = ? AND algorithm = ? "
+                    "AND size = ? AND mtime_ns = ?",
+                    (path, algorithm, size, mtime_ns),
+                ).fetchone()
+                if row:
+                    found[path] = row[0]
+        return found
+
+    def put_many(
+        self, entries: typing.Iterable[tuple[str, int, int, str]], algorithm: str
+    ):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO hashes "
+                "(path, algorithm, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (path, algorithm, size, mtime_ns, digest)
+                    for path, size, mtime_ns, digest in entries
+                ],
+            )
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def hash_manifest(
+    manifest: FolderManifest,
+    algorithm: str = DEFAULT_HASH_ALGORITHM,
+    cache: HashCache | None = None,
+    workers: int = DEFAULT_HASH_WORKERS,
+    on_output: typing.Callable[[str], None] | None = None,
+) -> FolderManifest:
+    """Return a copy of `manifest` with the digest of every file in `hash`.
+
+    Digests found in `cache` for an unchanged file are reused; the others are
+    computed on a thread pool and added to the cache.
+    """
+    root = Path(manifest.root)
+    # The cache is keyed by absolute path so several folders can share it.
+    keys = {
+        entry.path: (str((root / entry.path).resolve()), entry.size, entry.mtime_ns)
+        for entry in manifest.files
+    }
+    cached = cache.get_many(keys.values(), algorithm) if cache else {}
+    missing = [entry for entry in manifest.files if keys[entry.path][0] not in cached]
+    if on_output is not None:
+        on_output(
+            f"Hashing {len(missing)} files "
+            f"({len(manifest.files) - len(missing)} unchanged files cached)."
+        )
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        computed = dict(
+            zip(
+                (entry.path for entry in missing),
+                executor.map(
+                    lambda entry: hash_file(root / entry.path, algorithm), missing
+                ),
+            )
+        )
+    if cache is not None and computed:
+        cache.put_many(
+            ((*keys[path], digest) for path, digest in computed.items()), algorithm
+        )
+
+    files = [
+        entry._replace(hash=computed.get(entry.path) or cached[keys[entry.path][0]])
+        for entry in manifest.files
+    ]
+    return FolderManifest(manifest.root, manifest.directories, files)
@@ -0,0 +1,87 @@
+import contextlib
+import importlib.util
+import threading
+import typing
+
+import httpx
+
+from data_upload.config import RetryConfig
+from data_upload.retry import AsyncRetryTransport, RetryPolicy, RetryTransport
+
+# The tools API creates Azure folders synchronously, so reads get more time than
+# httpx's 5 second default.
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=16, max_keepalive_connections=8, keepalive_expiry=120.0
+)
+
+_clients: dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def is_http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(retry: RetryConfig | None = None) -> httpx.Client:
+    transport = httpx.HTTPTransport(http2=is_http2_available(), limits=HTTP_LIMITS)
+    return httpx.Client(
+        transport=RetryTransport(transport, RetryPolicy.from_config(retry)),
+        timeout=HTTP_TIMEOUT,
+    )
+
+
+def create_async_http_client(retry: RetryConfig | None = None) -> httpx.AsyncClient:
+    """Return a client for one event loop; callers close it when the loop ends."""
+    transport = httpx.AsyncHTTPTransport(http2=is_http2_available(), limits=HTTP_LIMITS)
+    return httpx.AsyncClient(
+        transport=AsyncRetryTransport(transport, RetryPolicy.from_config(retry)),
+        timeout=HTTP_TIMEOUT,
+    )
+
+
+def get_http_client(environment: str, retry: RetryConfig | None = None) -> httpx.Client:
+    """Return the long-lived client shared by every API call to `environment`.
+
+    Connections to the Euphrosyne and tools hosts are kept alive between calls,
+    so only the first request to each host pays for the TCP and TLS handshakes.
+    Transient failures are retried following the environment's `retry` config.
+    """
+    with _clients_lock:
+        client = _clients.get(environment)
+        if client is None or client.is_closed:
+            client = _clients[environment] = create_http_client(retry)
+        return client
+
+
+def close_http_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def send_request(
+    client: httpx.Client | None, method: str, url: str, **kwargs
+) -> httpx.Response:
+    """Send with `client`, or with a one-off connection when it is None."""
+    if client is None:
+        # One-off requests are not retried, so they ignore retry extensions.
+        kwargs.pop("extensions", None)
+        return httpx.request(method, url, **kwargs)
+    return client.request(method, url, **kwargs)
+
+
+@contextlib.contextmanager
+def stream_request(
+    client: httpx.Client | None, method: str, url: str, **kwargs
+) -> typing.Iterator[httpx.Response]:
+    """`send_request`, with a response whose body is read as it arrives."""
+    if client is None:
+        kwargs.pop("extensions", None)
+        with httpx.stream(method, url, **kwargs) as response:
+            yield response
+        return
+    with client.stream(method, url, **kwargs) as response:
+        yield response
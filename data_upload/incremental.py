@@ -0,0 +1,88 @@
+import threading
+import typing
+from pathlib import Path
+
+from data_upload.app_data import get_app_data_folder, read_json, write_json
+
+MANIFESTS_FILE_NAME = "upload_manifests.json"
+
+# Relative POSIX path -> (size in bytes, modification time in nanoseconds), as
+# returned by `FolderManifest.snapshot`.
+FolderSnapshot = dict[str, tuple[int, int]]
+
+
+class IncrementalPlan(typing.TypedDict):
+    files: list[str]
+    upload_bytes: int
+    skipped_files: int
+    skipped_bytes: int
+
+
+def plan_incremental_upload(
+    current: FolderSnapshot, previous: FolderSnapshot | None
+) -> IncrementalPlan:
+    """Split the files of `current` between those to send and those already uploaded.
+
+    A file is skipped when the last successful upload of the same target saw it
+    with the same size and modification time.
+    """
+    previous = previous or {}
+    files = []
+    upload_bytes = skipped_files = skipped_bytes = 0
+    for path, state in sorted(current.items()):
+        if tuple(previous.get(path, ())) == tuple(state):
+            skipped_files += 1
+            skipped_bytes += state[0]
+        else:
+            files.append(path)
+            upload_bytes += state[0]
+    return IncrementalPlan(
+        files=files,
+        upload_bytes=upload_bytes,
+        skipped_files=skipped_files,
+        skipped_bytes=skipped_bytes,
+    )
+
+
+class UploadManifestStore:
+    """Snapshot of each target folder as it was at its last successful upload.
+
+    Like `UploadJobStore`, it expects a single process to write at a time.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or get_app_data_folder() / MANIFESTS_FILE_NAME
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(environment: str, project: str, run: str, data_type: str, folder: str):
+        return "|".join((environment, project, run, data_type, str(Path(folder))))
+
+    def load(
+        self, environment: str, project: str, run: str, data_type: str, folder: str
+    ) -> FolderSnapshot | None:
+        manifests = read_json(self.path, {})
+        snapshot = manifests.get(
+            self._key(environment, project, run, data_type, folder)
+        )
+        if not isinstance(snapshot, dict):
+            return None
+        return {path: tuple(state) for path, state in snapshot.items()}
+
+    def save(
+        self,
+        snapshot: FolderSnapshot,
+        environment: str,
+        project: str,
+        run: str,
+        data_type: str,
+        folder: str,
+    ):
+        with self._lock:
+            manifests = read_json(self.path, {})
+            if not isinstance(manifests, dict):
+                manifests = {}
+            manifests[self._key(environment, project, run, data_type, folder)] = {
+                path: list(state) for path, state in snapshot.items()
+            }
+            write_json(self.path, manifests)
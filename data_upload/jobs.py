@@ -0,0 +1,136 @@
+import threading
+import typing
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from data_upload.app_data import get_app_data_folder, read_json, write_json
+from data_upload.upload_engine import ENGINE_AZCOPY
+
+JOBS_FILE_NAME = "upload_jobs.json"
+MAX_STORED_JOBS = 50
+
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_DISCARDED = "discarded"
+
+RESUMABLE_STATUSES = {JOB_RUNNING, JOB_FAILED}
+
+
+class UploadJob(typing.TypedDict):
+    job_id: str
+    engine: str
+    environment: str
+    project: str
+    run: str
+    data_type: str
+    folder: str
+    status: str
+    created_at: str
+    updated_at: str
+
+
+class UploadJobStore:
+    """Upload jobs persisted with the upload they belong to.
+
+    AzCopy keeps its own plan files for every job, so an interrupted job can be
+    resumed with `azcopy jobs resume` as long as we remember its ID. Jobs of the
+    native engine are kept for `recent_projects` only, under an ID of our own.
+
+    The lock only serializes writes within one process; the store expects a
+    single process (GUI or CLI) to write to it at a time.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or get_app_data_folder() / JOBS_FILE_NAME
+        self._lock = threading.Lock()
+
+    def list_jobs(self) -> list[UploadJob]:
+        jobs = read_json(self.path, [])
+        return jobs if isinstance(jobs, list) else []
+
+    def record_started(
+        self,
+        job_id: str,
+        environment: str,
+        project: str,
+        run: str,
+        data_type: str,
+        folder: str,
+        engine: str = ENGINE_AZCOPY,
+    ) -> UploadJob:
+        now = _now()
+        job = UploadJob(
+            job_id=job_id,
+            engine=engine,
+            environment=environment,
+            project=project,
+            run=run,
+            data_type=data_type,
+            folder=str(Path(folder)),
+            status=JOB_RUNNING,
+            created_at=now,
+            updated_at=now,
+        )
+        with self._lock:
+            jobs = [item for item in self.list_jobs() if item["job_id"] != job_id]
+            jobs.append(job)
+            write_json(self.path, jobs[-MAX_STORED_JOBS:])
+        return job
+
+    def set_status(self, job_id: str, status: str):
+        with self._lock:
+            jobs = self.list_jobs()
+            job = next((item for item in jobs if item["job_id"] == job_id), None)
+            if job is None or job["status"] == status:
+                return
+            job["status"] = status
+            job["updated_at"] = _now()
+            write_json(self.path, jobs)
+
+    def find_resumable(
+        self,
+        environment: str,
+        project: str,
+        run: str,
+        data_type: str,
+        folder: str,
+    ) -> UploadJob | None:
+        """Return the latest unfinished AzCopy job for this upload target, if any.
+
+        A later upload with the native engine supersedes it.
+        """
+        folder = str(Path(folder))
+        for job in reversed(self.list_jobs()):
+            if (
+                job["environment"] == environment
+                and job["project"] == project
+                and job["run"] == run
+                and job["data_type"] == data_type
+                and job["folder"] == folder
+            ):
+                # Jobs recorded before the engine was stored all ran AzCopy.
+                resumable = (
+                    job["status"] in RESUMABLE_STATUSES
+                    and job.get("engine", ENGINE_AZCOPY) == ENGINE_AZCOPY
+                )
+                return job if resumable else None
+        return None
+
+    def recent_projects(self, environment: str) -> list[str]:
+        """Return the projects uploaded to in `environment`, latest first."""
+        projects: dict[str, None] = {}
+        for job in reversed(self.list_jobs()):
+            if job["environment"] == environment:
+                projects.setdefault(job["project"])
+        return list(projects)
+
+
+def new_job_id() -> str:
+    """Return an ID for a job of the native engine, which has none of its own."""
+    return str(uuid.uuid4())
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -2,10 +2,19 @@ import argparse
 import logging
 import sys
 
+from data_upload.startup_timing import StartupTimer
+
 logger = logging.getLogger(__name__)
 
 
-CLI_UPLOAD_ARGS = {"--project", "--run", "--data-type", "--data-path", "--email"}
+CLI_UPLOAD_ARGS = {
+    "--project",
+    "--run",
+    "--data-type",
+    "--data-path",
+    "--email",
+    "--manifest",
+}
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -25,7 +34,10 @@ def main(argv: list[str] | None = None) -> int:
     argv = sys.argv[1:] if argv is None else argv
 
     if _is_cli_mode(argv):
-        from data_upload.cli import main as cli_main
+        timer = StartupTimer("cli")
+        with timer.stage("import cli"):
+            from data_upload.cli import main as cli_main
+        timer.finish()
 
         return cli_main(argv)
 
@@ -36,10 +48,16 @@ def main(argv: list[str] | None = None) -> int:
         parser.error(f"Invalid log level: {args.log}")
     logging.basicConfig(level=numeric_level)
 
-    from data_upload.gui import ConverterGUI
+    # Started before the GUI imports PySide6, Sentry, httpx and the keyring, so
+    # that they are timed too.
+    timer = StartupTimer("gui")
+    with timer.stage("import gui"):
+        from data_upload.gui import ConverterGUI, init_sentry
+    with timer.stage("init sentry"):
+        init_sentry()
 
     logger.debug("GUI mode")
-    ConverterGUI.start()
+    ConverterGUI.start(timer)
     return 0
 
 
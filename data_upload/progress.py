@@ -0,0 +1,178 @@
+import json
+import time
+import typing
+
+# AzCopy statuses meaning the job will not make any further progress.
+FINAL_JOB_STATUSES = {"Completed", "CompletedWithErrors", "Failed", "Cancelled"}
+
+
+class AzCopyMessage(typing.TypedDict):
+    type: str
+    content: str
+    data: dict[str, typing.Any] | None
+
+
+class TransferCounters(typing.TypedDict):
+    job_id: str | None
+    status: str
+    bytes_transferred: int
+    bytes_total: int | None
+    files_completed: int
+    files_failed: int
+    files_skipped: int
+    files_total: int
+
+
+class TransferProgress(TransferCounters):
+    throughput: float
+    eta: float | None
+    final: bool
+
+
+def parse_azcopy_message(line: str) -> AzCopyMessage | None:
+    """Parse one line of `azcopy --output-type json` output.
+
+    Returns None for lines that are not AzCopy JSON messages, so callers can
+    show them verbatim.
+    """
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or "MessageType" not in message:
+        return None
+
+    content = message.get("MessageContent") or ""
+    data = None
+    if content.startswith("{"):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            data = None
+    return AzCopyMessage(type=message["MessageType"], content=content, data=data)
+
+
+def counters_from_azcopy_summary(summary: dict[str, typing.Any]) -> TransferCounters:
+    """Map an AzCopy job summary (Progress/EndOfJob content) to transfer counters."""
+    bytes_total = _as_int(summary.get("TotalBytesExpected"))
+    return TransferCounters(
+        job_id=summary.get("JobID"),
+        status=summary.get("JobStatus") or "InProgress",
+        bytes_transferred=_as_int(summary.get("TotalBytesTransferred")),
+        # AzCopy reports 0 expected bytes until enumeration has started.
+        bytes_total=bytes_total or None,
+        files_completed=_as_int(summary.get("TransfersCompleted")),
+        files_failed=_as_int(summary.get("TransfersFailed")),
+        files_skipped=_as_int(summary.get("TransfersSkipped")),
+        files_total=_as_int(summary.get("TotalTransfers")),
+    )
+
+
+class ProgressTracker:
+    """Turn successive transfer counters into progress events with throughput and ETA."""
+
+    def __init__(
+        self,
+        smoothing: float = 0.3,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        self.smoothing = smoothing
+        self.clock = clock
+        self._started_at = clock()
+        self._last_time: float | None = None
+        self._last_bytes = 0
+        self._throughput = 0.0
+
+    def update(
+        self, counters: TransferCounters, final: bool = False
+    ) -> TransferProgress:
+        now = self.clock()
+        transferred = counters["bytes_transferred"]
+        if self._last_time is None:
+            elapsed = now - self._started_at
+            if elapsed > 0:
+                self._throughput = transferred / elapsed
+        elif now > self._last_time:
+            instant = max(transferred - self._last_bytes, 0) / (now - self._last_time)
+            # Exponential moving average keeps the reported rate readable.
+            self._throughput = (
+                self.smoothing * instant + (1 - self.smoothing) * self._throughput
+            )
+        self._last_time = now
+        self._last_bytes = transferred
+
+        final = final or counters["status"] in FINAL_JOB_STATUSES
+        eta = None
+        if final:
+            eta = 0.0
+        elif counters["bytes_total"] and self._throughput > 0:
+            eta = max(counters["bytes_total"] - transferred, 0) / self._throughput
+
+        return TransferProgress(
+            **counters, throughput=self._throughput, eta=eta, final=final
+        )
+
+
+class ProgressThrottle:
+    """Let progress through at most once per `interval` seconds, final events always."""
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.clock = clock
+        self._last_emit: float | None = None
+
+    def ready(self, final: bool = False) -> bool:
+        now = self.clock()
+        if final or self._last_emit is None or now - self._last_emit >= self.interval:
+            self._last_emit = now
+            return True
+        return False
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1000:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_progress(progress: TransferProgress) -> str:
+    parts = []
+    if progress["bytes_total"]:
+        percent = 100 * progress["bytes_transferred"] / progress["bytes_total"]
+        parts.append(
+            f"{percent:.1f}% ({format_bytes(progress['bytes_transferred'])} "
+            f"of {format_bytes(progress['bytes_total'])})"
+        )
+    else:
+        parts.append(format_bytes(progress["bytes_transferred"]))
+    files = f"{progress['files_completed']}/{progress['files_total']} files"
+    if progress["files_failed"] or progress["files_skipped"]:
+        files += (
+            f" ({progress['files_failed']} failed, "
+            f"{progress['files_skipped']} skipped)"
+        )
+    parts.append(files)
+    parts.append(f"{format_bytes(progress['throughput'])}/s")
+    if progress["eta"] is not None and not progress["final"]:
+        parts.append(f"ETA {format_duration(progress['eta'])}")
+    return " - ".join(parts)
+
+
+def _as_int(value: typing.Any) -> int:
+    # AzCopy serializes some counters as strings depending on the version.
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
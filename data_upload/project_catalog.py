@@ -0,0 +1,114 @@
+import threading
+import time
+import typing
+from pathlib import Path
+
+import httpx
+
+from data_upload.app_data import get_app_data_folder, read_json, write_json
+from data_upload.config import Config
+from data_upload.euphrosyne.auth import get_token_claims
+from data_upload.euphrosyne.project import (
+    Project,
+    ProjectCatalog,
+    ProjectLoadingError,
+    fetch_projects,
+    validate_projects,
+)
+
+PROJECT_CATALOG_FILE_NAME = "project_catalog.json"
+
+
+class CachedProjectCatalog(ProjectCatalog):
+    user: str | None
+    saved_at: float
+
+
+class ProjectCatalogStore:
+    """Last project list downloaded for each environment, to render it at once.
+
+    Projects depend on the account, so a cached list is only served to the user
+    it was downloaded for.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or get_app_data_folder() / PROJECT_CATALOG_FILE_NAME
+        self._lock = threading.Lock()
+
+    def load(self, environment: str, user: str | None) -> CachedProjectCatalog | None:
+        catalog = self._read().get(environment)
+        if not isinstance(catalog, dict) or catalog.get("user") != user:
+            return None
+        try:
+            validate_projects(catalog.get("projects"))
+        except ProjectLoadingError:
+            return None
+        return catalog
+
+    def save(self, environment: str, user: str | None, catalog: ProjectCatalog):
+        with self._lock:
+            catalogs = self._read()
+            catalogs[environment] = CachedProjectCatalog(
+                **catalog, user=user, saved_at=time.time()
+            )
+            write_json(self.path, catalogs)
+
+    def clear(self):
+        with self._lock:
+            write_json(self.path, {})
+
+    def _read(self) -> dict[str, CachedProjectCatalog]:
+        catalogs = read_json(self.path, {})
+        return catalogs if isinstance(catalogs, dict) else {}
+
+
+def get_catalog_user(access_token: str | None) -> str | None:
+    """Return the user a token belongs to, from its `user_id` claim."""
+    try:
+        user = get_token_claims(access_token).get("user_id")
+    except (AttributeError, IndexError, ValueError):
+        return None
+    return str(user) if user is not None else None
+
+
+def get_cached_projects(
+    config: Config, access_token: str, store: ProjectCatalogStore | None = None
+) -> list[Project] | None:
+    """Return the projects last downloaded for the user, if any.
+
+    They should be revalidated with `revalidate_project_catalog`.
+    """
+    store = store or ProjectCatalogStore()
+    cached = store.load(config["environment"], get_catalog_user(access_token))
+    return cached["projects"] if cached is not None else None
+
+
+def revalidate_project_catalog(
+    config: Config,
+    access_token: str,
+    client: httpx.Client | None = None,
+    store: ProjectCatalogStore | None = None,
+    on_projects: typing.Callable[[list[Project]], None] | None = None,
+) -> list[Project] | None:
+    """Download the projects again, if they changed; None when they did not.
+
+    The request is conditional on the validators of the cached response, when
+    the server sent any. Projects are handed to `on_projects` as they arrive.
+    """
+    store = store or ProjectCatalogStore()
+    user = get_catalog_user(access_token)
+    cached = store.load(config["environment"], user) or {}
+    catalog = fetch_projects(
+        config["euphrosyne"]["url"],
+        access_token,
+        client,
+        etag=cached.get("etag"),
+        last_modified=cached.get("last_modified"),
+        on_projects=on_projects,
+    )
+    if catalog is None:
+        return None
+    store.save(config["environment"], user, catalog)
+    if catalog["projects"] == cached.get("projects"):
+        return None
+    return catalog["projects"]
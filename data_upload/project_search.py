@@ -0,0 +1,139 @@
+import bisect
+import difflib
+import re
+import typing
+import unicodedata
+
+from data_upload.euphrosyne.project import Project
+
+# Query words shorter than this are not matched fuzzily: too many words are close.
+FUZZY_MIN_LENGTH = 3
+FUZZY_CUTOFF = 0.8
+FUZZY_MAX_MATCHES = 5
+
+# Points given to a project for each query word, by how the word matches.
+EXACT_MATCH_SCORE = 4
+PREFIX_MATCH_SCORE = 3
+SUBSTRING_MATCH_SCORE = 2
+FUZZY_MATCH_SCORE = 1
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_search_text(text: str) -> str:
+    """Fold case and accents, so "Étude" and "etude" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def search_words(text: str) -> list[str]:
+    return _WORD_PATTERN.findall(normalize_search_text(text))
+
+
+class ProjectSearchIndex:
+    """Words of project names and slugs, mapped to the projects they appear in.
+
+    `search` ranks projects by how well they match, then puts recent projects,
+    latest first, then projects with runs ahead of the others.
+    """
+
+    def __init__(
+        self, projects: typing.Iterable[Project] = (), recent: typing.Iterable[str] = ()
+    ):
+        self._slugs: list[str] = []
+        self._has_runs: list[bool] = []
+        self._index_by_name: dict[str, int] = {}
+        self._projects_by_word: dict[str, set[int]] = {}
+        # Sorted, to find the words starting with a prefix by bisection.
+        self._words: list[str] = []
+        self._recent_ranks: dict[str, int] = {}
+        self.extend(projects)
+        self.set_recent(recent)
+
+    def __len__(self) -> int:
+        return len(self._slugs)
+
+    def extend(self, projects: typing.Iterable[Project]):
+        """Index projects added at the end of the list."""
+        for project in projects:
+            index = len(self._slugs)
+            self._slugs.append(project["slug"])
+            self._has_runs.append(bool(project["runs"]))
+            self._index_by_name.setdefault(
+                normalize_search_text(project["name"]), index
+            )
+            for word in search_words(f"{project['name']} {project['slug']}"):
+                self._projects_by_word.setdefault(word, set()).add(index)
+        self._words = sorted(self._projects_by_word)
+
+    def set_recent(self, slugs: typing.Iterable[str]):
+        """Set the recently used projects, latest first."""
+        self._recent_ranks = {}
+        for slug in slugs:
+            self._recent_ranks.setdefault(slug, len(self._recent_ranks))
+
+    def index_of_name(self, name: str) -> int | None:
+        """Return the index of the first project named `name`, if any."""
+        return self._index_by_name.get(normalize_search_text(name))
+
+    def search(self, query: str) -> list[int]:
+        """Return the indexes of the projects matching every word of `query`.
+
+        An empty query matches every project.
+        """
+        scores: dict[int, int] | None = None
+        for word in search_words(query):
+            word_scores = self._match_word(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {
+                    index: score + word_scores[index]
+                    for index, score in scores.items()
+                    if index in word_scores
+                }
+            if not scores:
+                return []
+        if scores is None:
+            scores = dict.fromkeys(range(len(self._slugs)), 0)
+        return sorted(scores, key=lambda index: self._rank(index, scores[index]))
+
+    def _match_word(self, word: str) -> dict[int, int]:
+        scores: dict[int, int] = {}
+
+        def add(words: typing.Iterable[str], score: int):
+            for matched_word in words:
+                for index in self._projects_by_word[matched_word]:
+                    if scores.get(index, 0) < score:
+                        scores[index] = score
+
+        prefixed = self._words_starting_with(word)
+        add([other for other in self._words if word in other], SUBSTRING_MATCH_SCORE)
+        add(prefixed, PREFIX_MATCH_SCORE)
+        if word in self._projects_by_word:
+            add([word], EXACT_MATCH_SCORE)
+        # Typos are looked for when nothing else matches, among the words with
+        # the same first letter: comparing with every word is too slow per keystroke.
+        if not scores and len(word) >= FUZZY_MIN_LENGTH:
+            add(
+                difflib.get_close_matches(
+                    word,
+                    self._words_starting_with(word[0]),
+                    n=FUZZY_MAX_MATCHES,
+                    cutoff=FUZZY_CUTOFF,
+                ),
+                FUZZY_MATCH_SCORE,
+            )
+        return scores
+
+    def _words_starting_with(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self._words, prefix)
+        end = bisect.bisect_left(self._words, prefix + "\U0010ffff", lo=start)
+        return self._words[start:end]
+
+    def _rank(self, index: int, score: int) -> tuple[int, int, bool, int]:
+        recent_rank = self._recent_ranks.get(
+            self._slugs[index], len(self._recent_ranks)
+        )
+        return (-score, recent_rank, not self._has_runs[index], index)
@@ -0,0 +1,243 @@
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+import typing
+
+import httpx
+
+from data_upload.config import RetryConfig
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Set `extensions={IDEMPOTENT_EXTENSION: True}` on a request whose method is not
+# idempotent but whose endpoint is, e.g. a POST creating a folder if missing.
+IDEMPOTENT_EXTENSION = "herma_idempotent"
+
+
+class RetryPolicy(typing.NamedTuple):
+    max_attempts: int = 4
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+    # Time allowed for all attempts of one request, waits included.
+    budget: float = 30.0
+
+    @classmethod
+    def from_config(cls, config: RetryConfig | None) -> "RetryPolicy":
+        config = config or {}
+        default = cls()
+        return cls(
+            max_attempts=int(config.get("max-attempts", default.max_attempts)),
+            backoff=float(config.get("backoff-seconds", default.backoff)),
+            max_backoff=float(config.get("max-backoff-seconds", default.max_backoff)),
+            budget=float(config.get("budget-seconds", default.budget)),
+        )
+
+
+class RetryStats:
+    """Counters of the requests sent through the retry transports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "retries": 0, "failures": 0}
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def record(self, attempts: int, latency: float, failed: bool):
+        with self._lock:
+            self._counts["requests"] += 1
+            self._counts["retries"] += attempts - 1
+            self._counts["failures"] += int(failed)
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def snapshot(self) -> dict[str, float]:
+        """Return the counters and the mean and max latency, in seconds."""
+        with self._lock:
+            requests = self._counts["requests"]
+            return {
+                **self._counts,
+                "latency_mean": self._latency_total / requests if requests else 0.0,
+                "latency_max": self._latency_max,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self._counts, 0)
+            self._latency_total = self._latency_max = 0.0
+
+
+retry_stats = RetryStats()
+
+
+def is_idempotent(request: httpx.Request) -> bool:
+    explicit = request.extensions.get(IDEMPOTENT_EXTENSION)
+    if explicit is not None:
+        return bool(explicit)
+    return request.method in IDEMPOTENT_METHODS
+
+
+def get_retry_after(response: httpx.Response) -> float | None:
+    """Return the delay asked by a `Retry-After` header, in seconds."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class RetryState:
+    """The retry decisions for one request.
+
+    Shared by the transports and by callers that must rebuild the request on
+    every attempt, such as the native upload engine renewing its SAS token.
+    """
+
+    def __init__(
+        self,
+        policy: RetryPolicy,
+        request: httpx.Request,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        self.policy = policy
+        self.request = request
+        self.clock = clock
+        self.started_at = clock()
+        self.attempt = 1
+        self.idempotent = is_idempotent(request)
+
+    def delay_after_error(self, error: httpx.TransportError) -> float | None:
+        # A request that could not connect was never sent, so it is safe to
+        # send again whatever its method.
+        if not (isinstance(error, httpx.ConnectError) or self.idempotent):
+            return None
+        return self._next_delay(None)
+
+    def delay_after_response(self, response: httpx.Response) -> float | None:
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+        # 429 and 503 mean the request was not processed.
+        if not self.idempotent and response.status_code not in (429, 503):
+            return None
+        return self._next_delay(get_retry_after(response))
+
+    def finish(self, failed: bool, stats: RetryStats):
+        stats.record(self.attempt, self.clock() - self.started_at, failed)
+
+    def _next_delay(self, retry_after: float | None) -> float | None:
+        if self.attempt >= self.policy.max_attempts:
+            return None
+        if retry_after is None:
+            # Exponential backoff with full jitter.
+            ceiling = min(
+                self.policy.max_backoff, self.policy.backoff * 2 ** (self.attempt - 1)
+            )
+            retry_after = random.uniform(0, ceiling)
+        elapsed = self.clock() - self.started_at
+        if elapsed + retry_after > self.policy.budget:
+            return None
+        logger.info(
+            "Retrying %s %s in %.2fs (attempt %d of %d).",
+            self.request.method,
+            self.request.url.copy_with(query=None),
+            retry_after,
+            self.attempt + 1,
+            self.policy.max_attempts,
+        )
+        self.attempt += 1
+        return retry_after
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Retry transient failures of the wrapped transport.
+
+    Connection failures are always retried; timeouts, dropped connections and
+    5xx responses only for idempotent requests (see `is_idempotent`). 429 and
+    503 responses are retried for every request, after their `Retry-After`
+    delay when they have one.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        policy: RetryPolicy = RetryPolicy(),
+        stats: RetryStats = retry_stats,
+        clock: typing.Callable[[], float] = time.monotonic,
+        sleep: typing.Callable[[float], None] = time.sleep,
+    ):
+        self.transport = transport
+        self.policy = policy
+        self.stats = stats
+        self.clock = clock
+        self.sleep = sleep
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        state = RetryState(self.policy, request, self.clock)
+        while True:
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as error:
+                delay = state.delay_after_error(error)
+                if delay is None:
+                    state.finish(True, self.stats)
+                    raise
+            else:
+                delay = state.delay_after_response(response)
+                if delay is None:
+                    state.finish(response.status_code >= 500, self.stats)
+                    return response
+                response.close()
+            self.sleep(delay)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """`RetryTransport` for `httpx.AsyncClient`."""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        policy: RetryPolicy = RetryPolicy(),
+        stats: RetryStats = retry_stats,
+        clock: typing.Callable[[], float] = time.monotonic,
+        sleep: typing.Callable[[float], typing.Awaitable[None]] = asyncio.sleep,
+    ):
+        self.transport = transport
+        self.policy = policy
+        self.stats = stats
+        self.clock = clock
+        self.sleep = sleep
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        state = RetryState(self.policy, request, self.clock)
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as error:
+                delay = state.delay_after_error(error)
+                if delay is None:
+                    state.finish(True, self.stats)
+                    raise
+            else:
+                delay = state.delay_after_response(response)
+                if delay is None:
+                    state.finish(response.status_code >= 500, self.stats)
+                    return response
+                await response.aclose()
+            await self.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
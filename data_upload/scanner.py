@@ -0,0 +1,102 @@
+import os
+import typing
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+
+# Directory listing is I/O bound (and slow on SMB mounts), so the pool is larger
+# than the CPU count.
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+class ManifestEntry(typing.NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    hash: str | None = None
+
+
+class FolderManifest:
+    """Files and directories of a folder, with paths relative to it in POSIX form.
+
+    Directories are ordered parents first and files by path.
+    """
+
+    def __init__(self, root: str, directories: list[str], files: list[ManifestEntry]):
+        self.root = root
+        self.directories = directories
+        self.files = files
+
+    @property
+    def file_count(self) -> int:
+        return len(self.files)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self.files)
+
+    def snapshot(self) -> dict[str, tuple[int, int]]:
+        return {entry.path: (entry.size, entry.mtime_ns) for entry in self.files}
+
+
+class _DirectoryListing(typing.NamedTuple):
+    directories: list[str]
+    files: list[ManifestEntry]
+
+
+def scan_folder(
+    folder: str,
+    workers: int = DEFAULT_SCAN_WORKERS,
+    hasher: typing.Callable[[Path], str] | None = None,
+) -> FolderManifest:
+    """List every file under `folder` with its size and modification time.
+
+    Each directory is read with a single `os.scandir` call on a thread pool, and
+    subdirectories are queued as soon as they are found, so deep and wide trees
+    are listed concurrently. `hasher`, when given, is called on each file path
+    (on the same pool) to fill `ManifestEntry.hash`.
+    """
+    root = Path(folder)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Source folder {folder} does not exist.")
+
+    directories: list[str] = []
+    files: list[ManifestEntry] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: set[Future] = {executor.submit(_list_directory, root, "")}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                listing: _DirectoryListing = future.result()
+                directories.extend(listing.directories)
+                files.extend(listing.files)
+                for directory in listing.directories:
+                    pending.add(executor.submit(_list_directory, root, directory))
+
+        if hasher is not None:
+            hashes = executor.map(lambda entry: hasher(root / entry.path), files)
+            files = [entry._replace(hash=value) for entry, value in zip(files, hashes)]
+
+    # Sorting keeps parents before children and makes the manifest stable.
+    directories.sort()
+    files.sort()
+    return FolderManifest(str(root), directories, files)
+
+
+def _list_directory(root: Path, relative_path: str) -> _DirectoryListing:
+    directories = []
+    files = []
+    prefix = f"{relative_path}/" if relative_path else ""
+    with os.scandir(root / relative_path) as entries:
+        for entry in entries:
+            # Like os.walk, do not descend into symlinked directories, which
+            # could loop.
+            if entry.is_dir(follow_symlinks=False):
+                directories.append(prefix + entry.name)
+            elif entry.is_file(follow_symlinks=True):
+                # On Windows scandir already carries the stat result, which
+                # saves one round trip per file on network shares.
+                stat = entry.stat()
+                files.append(
+                    ManifestEntry(prefix + entry.name, stat.st_size, stat.st_mtime_ns)
+                )
+    return _DirectoryListing(directories, files)
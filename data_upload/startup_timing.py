@@ -0,0 +1,98 @@
+import contextlib
+import datetime
+import functools
+import logging
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+STARTUP_TRANSACTION_OP = "app.startup"
+STARTUP_STAGE_OP = "app.startup.stage"
+
+T = typing.TypeVar("T")
+
+
+class StageTiming(typing.NamedTuple):
+    name: str
+    seconds: float
+
+
+class StartupTimer:
+    """Time the stages of startup, log each one and send them to Sentry as spans.
+
+    Stages may run on several threads at once. Spans belong to one transaction,
+    built and sent by `finish`: Sentry may be imported and initialized during
+    startup, after the first stages. They go nowhere when it is not initialized.
+    """
+
+    def __init__(
+        self, name: str, clock: typing.Callable[[], float] = time.perf_counter
+    ):
+        self.name = name
+        self.clock = clock
+        self.timings: list[StageTiming] = []
+        self._started_at = clock()
+        self._started_at_wall = datetime.datetime.now(datetime.timezone.utc)
+        # Offset of each stage from the start of the timer, in seconds.
+        self._offsets: list[float] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        started_at = self.clock()
+        try:
+            yield
+        finally:
+            seconds = self.clock() - started_at
+            with self._lock:
+                self.timings.append(StageTiming(name, seconds))
+                self._offsets.append(started_at - self._started_at)
+            logger.info("Startup stage %r took %.0f ms", name, seconds * 1000)
+
+    def wrap(
+        self, name: str, function: typing.Callable[..., T]
+    ) -> typing.Callable[..., T]:
+        """Return `function`, timing each call as the stage `name`."""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs) -> T:
+            with self.stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    def finish(self) -> float:
+        """Log the startup duration, send the spans, and return the duration."""
+        seconds = self.clock() - self._started_at
+        logger.info("%s startup took %.0f ms", self.name, seconds * 1000)
+        self._send_transaction(seconds)
+        return seconds
+
+    def _send_transaction(self, seconds: float):
+        # Imported on first use: `data_upload.main` must stay quick to import.
+        import sentry_sdk
+
+        def at(offset: float) -> datetime.datetime:
+            return self._started_at_wall + datetime.timedelta(seconds=offset)
+
+        transaction = sentry_sdk.start_transaction(
+            op=STARTUP_TRANSACTION_OP,
+            name=f"{self.name} startup",
+            start_timestamp=at(0),
+        )
+        with self._lock:
+            stages = list(zip(self.timings, self._offsets))
+        for timing, offset in stages:
+            span = transaction.start_child(
+                op=STARTUP_STAGE_OP, name=timing.name, start_timestamp=at(offset)
+            )
+            span.finish(end_timestamp=at(offset + timing.seconds))
+        transaction.finish(end_timestamp=at(seconds))
+
+
+def sample_startup_traces(sampling_context: dict[str, typing.Any]) -> float:
+    """Sentry `traces_sampler` sending the startup transaction and nothing else."""
+    transaction_context = sampling_context.get("transaction_context") or {}
+    return 1.0 if transaction_context.get("op") == STARTUP_TRANSACTION_OP else 0.0
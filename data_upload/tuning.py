@@ -0,0 +1,162 @@
+import os
+import statistics
+import sys
+import typing
+
+from data_upload.config import AzCopyConfig
+
+# Azure Files accepts at most 4 MiB per range, which caps AzCopy's block size.
+MAX_BLOCK_SIZE_MB = 4
+MIN_CONCURRENCY = 8
+MAX_CONCURRENCY = 512
+MIN_BUFFER_GB = 0.25
+MAX_BUFFER_GB = 8.0
+# Share of the available memory AzCopy may use for its buffers.
+BUFFER_MEMORY_SHARE = 0.25
+# Below this median size, a folder is dominated by per-file round trips.
+SMALL_FILE_SIZE = 1024 * 1024
+
+
+class FileSizeProfile(typing.TypedDict):
+    file_count: int
+    total_bytes: int
+    median_size: int
+    max_size: int
+
+
+class AzCopyTuning(typing.TypedDict):
+    concurrency: int
+    buffer_gb: float
+    block_size_mb: float | None
+
+
+def profile_file_sizes(sizes: typing.Iterable[int]) -> FileSizeProfile:
+    sizes = list(sizes)
+    return FileSizeProfile(
+        file_count=len(sizes),
+        total_bytes=sum(sizes),
+        median_size=int(statistics.median(sizes)) if sizes else 0,
+        max_size=max(sizes, default=0),
+    )
+
+
+def get_available_memory() -> int | None:
+    """Return the memory available to new processes in bytes, None when unknown."""
+    if sys.platform == "win32":
+        return _get_windows_available_memory()
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        pass
+    try:
+        # macOS has no "available pages"; assume half of the physical memory.
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _get_windows_available_memory() -> int | None:
+    import ctypes
+
+    class MemoryStatus(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", ctypes.c_ulong),
+            ("dwMemoryLoad", ctypes.c_ulong),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    status = MemoryStatus()
+    status.dwLength = ctypes.sizeof(MemoryStatus)
+    if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+        return None
+    return status.ullAvailPhys
+
+
+def derive_azcopy_tuning(
+    cpu_count: int | None,
+    available_memory: int | None,
+    profile: FileSizeProfile,
+    overrides: AzCopyConfig | None = None,
+) -> AzCopyTuning:
+    """Pick AzCopy concurrency, buffer size and block size for this host and folder.
+
+    Folders of many small files are bound by request latency, so they get more
+    concurrent transfers per core; large files are bound by bandwidth and get
+    the largest block Azure Files accepts. Buffers take a share of the available
+    memory so small machines do not swap. `overrides` (from `config.yml`) win.
+    """
+    cpu_count = cpu_count or 1
+    per_core = 32 if profile["median_size"] < SMALL_FILE_SIZE else 16
+    concurrency = min(max(cpu_count * per_core, MIN_CONCURRENCY), MAX_CONCURRENCY)
+    if profile["file_count"]:
+        # More workers than files only adds connections.
+        concurrency = min(concurrency, max(profile["file_count"], MIN_CONCURRENCY))
+
+    if available_memory is None:
+        buffer_gb = 1.0
+    else:
+        buffer_gb = available_memory * BUFFER_MEMORY_SHARE / 1024**3
+    buffer_gb = round(min(max(buffer_gb, MIN_BUFFER_GB), MAX_BUFFER_GB), 2)
+
+    block_size_mb = None
+    if profile["max_size"] > MAX_BLOCK_SIZE_MB * 1024 * 1024:
+        block_size_mb = MAX_BLOCK_SIZE_MB
+
+    overrides = overrides or {}
+    block_size_mb = overrides.get("block-size-mb", block_size_mb)
+    if block_size_mb is not None and not 0 < block_size_mb <= MAX_BLOCK_SIZE_MB:
+        raise ValueError(
+            f"AzCopy block size must be between 0 and {MAX_BLOCK_SIZE_MB} MB "
+            "for Azure file shares."
+        )
+    return AzCopyTuning(
+        concurrency=int(overrides.get("concurrency", concurrency)),
+        buffer_gb=float(overrides.get("buffer-gb", buffer_gb)),
+        block_size_mb=block_size_mb,
+    )
+
+
+def tune_azcopy(
+    sizes: typing.Iterable[int], overrides: AzCopyConfig | None = None
+) -> AzCopyTuning:
+    return derive_azcopy_tuning(
+        os.cpu_count(), get_available_memory(), profile_file_sizes(sizes), overrides
+    )
+
+
+def get_azcopy_environment(tuning: AzCopyTuning) -> dict[str, str]:
+    """Return the process environment AzCopy should run with."""
+    return {
+        **os.environ,
+        "AZCOPY_CONCURRENCY_VALUE": str(tuning["concurrency"]),
+        "AZCOPY_BUFFER_GB": f"{tuning['buffer_gb']:g}",
+    }
+
+
+def get_azcopy_tuning_args(tuning: AzCopyTuning) -> list[str]:
+    if tuning["block_size_mb"] is None:
+        return []
+    return ["--block-size-mb", f"{tuning['block_size_mb']:g}"]
+
+
+def format_tuning(tuning: AzCopyTuning) -> str:
+    block_size = (
+        f"{tuning['block_size_mb']:g} MB" if tuning["block_size_mb"] else "default"
+    )
+    return (
+        f"AzCopy tuning: {tuning['concurrency']} concurrent transfers, "
+        f"{tuning['buffer_gb']:g} GB buffers, {block_size} blocks."
+    )
@@ -0,0 +1,452 @@
+import queue
+import threading
+import time
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+import httpx
+
+from data_upload.azcopy import get_azcopy_path
+from data_upload.bandwidth import BandwidthLimiter
+from data_upload.credentials import SASRenewalError
+from data_upload.hashing import HashCache, hash_manifest, to_content_md5
+from data_upload.progress import (
+    ProgressThrottle,
+    ProgressTracker,
+    TransferCounters,
+    TransferProgress,
+)
+from data_upload.retry import RetryPolicy, RetryState, retry_stats
+from data_upload.scanner import FolderManifest, scan_folder
+
+ENGINE_AZCOPY = "azcopy"
+ENGINE_NATIVE = "native"
+UPLOAD_ENGINES = (ENGINE_AZCOPY, ENGINE_NATIVE)
+
+# Azure Files accepts at most 4 MiB per "Put Range" request.
+MAX_RANGE_SIZE = 4 * 1024 * 1024
+AZURE_FILES_API_VERSION = "2021-08-06"
+
+
+class UploadError(Exception):
+    """Raised when a file cannot be uploaded to the destination share."""
+
+
+class DestinationNotFoundError(UploadError):
+    """Raised when the destination folder itself does not exist on the share."""
+
+
+def default_upload_engine() -> str:
+    """Return the engine to use when none is selected explicitly.
+
+    AzCopy is only distributed for the platforms handled in `data_upload.azcopy`;
+    everywhere else the native engine is the only way to upload.
+    """
+    if get_azcopy_path() is None:
+        return ENGINE_NATIVE
+    return ENGINE_AZCOPY
+
+
+class BufferPool:
+    """A fixed set of reusable buffers.
+
+    `acquire` blocks while every buffer is in use, which bounds both the memory
+    held by in-flight ranges and the number of queued upload tasks.
+    """
+
+    def __init__(self, buffer_count: int, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._buffers: queue.Queue[bytearray] = queue.Queue()
+        for _ in range(buffer_count):
+            self._buffers.put(bytearray(buffer_size))
+
+    def acquire(self) -> bytearray:
+        return self._buffers.get()
+
+    def release(self, buffer: bytearray):
+        self._buffers.put(buffer)
+
+
+class NativeUploadEngine:
+    """Upload a local folder to an Azure file share without AzCopy.
+
+    Directories are created first, then files are created and their content is
+    sent as ranged puts spread over a thread pool. Small files are handled by a
+    single task; large files are split into ranges uploaded concurrently.
+    Transient storage errors are retried following `retry_policy`, like the
+    requests to the Euphrosyne APIs.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        chunk_size: int = MAX_RANGE_SIZE,
+        buffer_count: int | None = None,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        client: httpx.Client | None = None,
+        limiter: BandwidthLimiter | None = None,
+        put_md5: bool = False,
+        hash_cache: HashCache | None = None,
+    ):
+        if not 0 < chunk_size <= MAX_RANGE_SIZE:
+            raise ValueError(
+                f"Chunk size must be between 1 and {MAX_RANGE_SIZE} bytes."
+            )
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.buffer_count = buffer_count or concurrency * 2
+        self.retry_policy = retry_policy
+        self.client = client
+        self.limiter = limiter
+        self.put_md5 = put_md5
+        self.hash_cache = hash_cache
+
+    def upload(
+        self,
+        src: str,
+        dest: str,
+        sas_token: str | typing.Callable[[], str],
+        on_output: typing.Callable[[str], None] = print,
+        on_progress: typing.Callable[[TransferProgress], None] | None = None,
+        only_files: typing.Collection[str] | None = None,
+        manifest: FolderManifest | None = None,
+    ) -> int:
+        """Upload the contents of `src` into `dest`. Return a process-like exit code.
+
+        `on_progress` receives throttled `TransferProgress` events, possibly from
+        worker threads. When `only_files` is given, only those relative paths (and
+        their parent directories) are uploaded. A `manifest` already scanned from
+        `src` saves listing the folder again. `sas_token` may be a callable, asked
+        for the token on every request so that it can be renewed mid-upload.
+        Raises `DestinationNotFoundError` when `dest` does not exist.
+        """
+        source = Path(src)
+        if not source.is_dir():
+            raise FileNotFoundError(f"Source folder {src} does not exist.")
+
+        manifest = manifest or scan_folder(src)
+        if only_files is not None:
+            manifest = _select_files(manifest, set(only_files))
+        content_md5 = {}
+        if self.put_md5:
+            manifest = hash_manifest(
+                manifest, "md5", cache=self.hash_cache, on_output=on_output
+            )
+            content_md5 = {
+                entry.path: to_content_md5(entry.hash) for entry in manifest.files
+            }
+        directories = manifest.directories
+        files = [(entry.path, entry.size) for entry in manifest.files]
+        total_bytes = sum(size for _path, size in files)
+        on_output(
+            f"Uploading {len(files)} files ({total_bytes} bytes) with "
+            f"{self.concurrency} workers."
+        )
+
+        client = self.client or httpx.Client(
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        started_at = time.monotonic()
+        try:
+            session = _UploadSession(
+                self, client, dest.rstrip("/"), sas_token, on_progress, content_md5
+            )
+            for directory in directories:
+                session.create_directory(directory)
+            failures = session.upload_files(source, files)
+            if session.destination_missing:
+                raise DestinationNotFoundError(
+                    f"The destination folder {dest} does not exist."
+                )
+        except DestinationNotFoundError:
+            raise
+        except (UploadError, SASRenewalError, httpx.HTTPError) as error:
+            on_output(f"Upload aborted: {error}")
+            return 1
+        finally:
+            if self.client is None:
+                client.close()
+
+        for path, error in failures:
+            on_output(f"Failed to upload {path}: {error}")
+        elapsed = time.monotonic() - started_at
+        on_output(
+            f"Uploaded {len(files) - len(failures)} of {len(files)} files "
+            f"in {elapsed:.1f}s."
+        )
+        return 1 if failures else 0
+
+
+class _UploadSession:
+    def __init__(
+        self,
+        engine: NativeUploadEngine,
+        client: httpx.Client,
+        dest: str,
+        sas_token: str | typing.Callable[[], str],
+        on_progress: typing.Callable[[TransferProgress], None] | None = None,
+        content_md5: dict[str, str] | None = None,
+    ):
+        self.engine = engine
+        self.client = client
+        self.dest = dest
+        self.sas_token = sas_token if callable(sas_token) else lambda: sas_token
+        self.on_progress = on_progress
+        self.content_md5 = content_md5 or {}
+        self.buffers = BufferPool(engine.buffer_count, engine.chunk_size)
+        self._lock = threading.Lock()
+        self._failures: dict[str, str] = {}
+        self.destination_missing = False
+        self._pending_tasks: dict[str, int] = {}
+        self._tracker = ProgressTracker()
+        self._throttle = ProgressThrottle()
+        self._counters = TransferCounters(
+            job_id=None,
+            status="InProgress",
+            bytes_transferred=0,
+            bytes_total=0,
+            files_completed=0,
+            files_failed=0,
+            files_skipped=0,
+            files_total=0,
+        )
+
+    def upload_files(
+        self, source: Path, files: list[tuple[str, int]]
+    ) -> list[tuple[str, str]]:
+        self._counters["files_total"] = len(files)
+        self._counters["bytes_total"] = sum(size for _path, size in files)
+        with ThreadPoolExecutor(max_workers=self.engine.concurrency) as executor:
+            for relative_path, size in files:
+                local_path = source / relative_path
+                self._pending_tasks[relative_path] = max(
+                    -(-size // self.engine.chunk_size), 1
+                )
+                if size <= self.engine.chunk_size:
+                    self._submit(
+                        executor,
+                        relative_path,
+                        size,
+                        self._upload_small_file,
+                        local_path,
+                        relative_path,
+                        size,
+                    )
+                    continue
+
+                try:
+                    self.create_file(relative_path, size)
+                except (UploadError, SASRenewalError, httpx.HTTPError) as error:
+                    self._record_failure(relative_path, error)
+                    continue
+                for offset in range(0, size, self.engine.chunk_size):
+                    length = min(self.engine.chunk_size, size - offset)
+                    self._submit(
+                        executor,
+                        relative_path,
+                        length,
+                        self._upload_range,
+                        local_path,
+                        relative_path,
+                        offset,
+                        length,
+                    )
+        self._counters["status"] = (
+            "CompletedWithErrors" if self._failures else "Completed"
+        )
+        self._report(final=True)
+        return sorted(self._failures.items())
+
+    def create_directory(self, relative_path: str):
+        response = self._send(
+            "PUT",
+            relative_path,
+            params={"restype": "directory"},
+            headers={"Content-Length": "0"},
+        )
+        self._check_parent_found(relative_path, response)
+        # 409 means the directory is already there, which is what we want.
+        if response.status_code not in (201, 409):
+            raise UploadError(
+                f"Could not create directory {relative_path}: "
+                f"HTTP {response.status_code}"
+            )
+
+    def create_file(self, relative_path: str, size: int):
+        headers = {
+            "x-ms-type": "file",
+            "x-ms-content-length": str(size),
+            "Content-Length": "0",
+        }
+        if relative_path in self.content_md5:
+            # Stored as the file's Content-MD5 property, next to the data.
+            headers["x-ms-content-md5"] = self.content_md5[relative_path]
+        response = self._send("PUT", relative_path, headers=headers)
+        self._check_parent_found(relative_path, response)
+        if response.status_code != 201:
+            raise UploadError(
+                f"Could not create file {relative_path}: HTTP {response.status_code}"
+            )
+
+    @staticmethod
+    def _check_parent_found(relative_path: str, response: httpx.Response):
+        # Parents below the destination are created first, so a missing parent
+        # of a top-level entry means the destination itself is missing.
+        if response.status_code == 404 and "/" not in relative_path:
+            raise DestinationNotFoundError(
+                f"Could not create {relative_path}: the destination does not exist."
+            )
+
+    def _submit(
+        self,
+        executor: ThreadPoolExecutor,
+        relative_path: str,
+        length: int,
+        task: typing.Callable[..., None],
+        *args,
+    ):
+        """Run `task(*args, buffer)` on the pool once a buffer is available.
+
+        `length` is the number of bytes the task uploads, used for progress.
+        """
+        buffer = self.buffers.acquire()
+        future = executor.submit(task, *args, buffer)
+
+        def _done(completed: Future):
+            self.buffers.release(buffer)
+            error = completed.exception()
+            if error is not None:
+                self._record_failure(relative_path, error)
+                return
+            with self._lock:
+                self._counters["bytes_transferred"] += length
+                self._pending_tasks[relative_path] -= 1
+                if (
+                    self._pending_tasks[relative_path] == 0
+                    and relative_path not in self._failures
+                ):
+                    self._counters["files_completed"] += 1
+            self._report()
+
+        future.add_done_callback(_done)
+
+    def _report(self, final: bool = False):
+        if self.on_progress is None:
+            return
+        with self._lock:
+            if not self._throttle.ready(final):
+                return
+            progress = self._tracker.update(dict(self._counters), final=final)
+        self.on_progress(progress)
+
+    def _upload_small_file(
+        self, local_path: Path, relative_path: str, size: int, buffer: bytearray
+    ):
+        self.create_file(relative_path, size)
+        if size:
+            self._upload_range(local_path, relative_path, 0, size, buffer)
+
+    def _upload_range(
+        self,
+        local_path: Path,
+        relative_path: str,
+        offset: int,
+        length: int,
+        buffer: bytearray,
+    ):
+        view = memoryview(buffer)[:length]
+        with open(local_path, "rb") as f:
+            f.seek(offset)
+            read = f.readinto(view)
+        if read != length:
+            raise UploadError(f"{relative_path} changed size during upload.")
+        if self.engine.limiter is not None:
+            self.engine.limiter.consume(length)
+
+        response = self._send(
+            "PUT",
+            relative_path,
+            params={"comp": "range"},
+            headers={
+                "x-ms-range": f"bytes={offset}-{offset + length - 1}",
+                "x-ms-write": "update",
+                "Content-Length": str(length),
+            },
+            content=view,
+        )
+        if response.status_code != 201:
+            raise UploadError(
+                f"Could not upload range {offset}-{offset + length - 1} of "
+                f"{relative_path}: HTTP {response.status_code}"
+            )
+
+    def _send(
+        self,
+        method: str,
+        relative_path: str,
+        params: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: memoryview | None = None,
+    ) -> httpx.Response:
+        # The SAS token is already URL-encoded, so the query is built by hand
+        # rather than through httpx `params`, which would replace it.
+        params = urlencode(params) if params else None
+        headers = {"x-ms-version": AZURE_FILES_API_VERSION, **(headers or {})}
+        state = None
+        while True:
+            # Read on every attempt, so a retry picks up a renewed token.
+            sas_token = self.sas_token()
+            query = f"{params}&{sas_token}" if params else sas_token
+            url = f"{self.dest}/{quote(relative_path)}?{query}"
+            # A fresh iterator per attempt lets the pooled buffer be sent
+            # without copying it, and again on retry.
+            request = self.client.build_request(
+                method,
+                url,
+                headers=headers,
+                content=None if content is None else iter((content,)),
+            )
+            if state is None:
+                state = RetryState(self.engine.retry_policy, request)
+            try:
+                response = self.client.send(request)
+            except httpx.TransportError as error:
+                delay = state.delay_after_error(error)
+                if delay is None:
+                    state.finish(True, retry_stats)
+                    raise
+            else:
+                delay = state.delay_after_response(response)
+                if delay is None:
+                    state.finish(response.status_code >= 500, retry_stats)
+                    return response
+                response.close()
+            time.sleep(delay)
+
+    def _record_failure(self, relative_path: str, error: BaseException):
+        with self._lock:
+            if isinstance(error, DestinationNotFoundError):
+                self.destination_missing = True
+            if relative_path not in self._failures:
+                self._failures[relative_path] = str(error)
+                self._counters["files_failed"] += 1
+
+
+def _select_files(manifest: FolderManifest, selected: set[str]) -> FolderManifest:
+    files = [entry for entry in manifest.files if entry.path in selected]
+    needed = {
+        parent.as_posix()
+        for entry in files
+        for parent in Path(entry.path).parents
+        if parent != Path(".")
+    }
+    directories = [
+        directory for directory in manifest.directories if directory in needed
+    ]
+    return FolderManifest(manifest.root, directories, files)
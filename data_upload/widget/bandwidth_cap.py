@@ -0,0 +1,55 @@
+import re
+
+from PySide6.QtGui import QValidator
+from PySide6.QtWidgets import QSpinBox
+
+MAX_CAP_MBPS = 100_000
+ENVIRONMENT_DEFAULT = -1
+NO_CAP_TEXT = "No cap"
+# A number of Mbps, with the unit or part of it while it is typed.
+_CAP_PATTERN = re.compile(r"(\d+)\s*(m(b(ps?)?)?)?")
+
+
+class BandwidthCapBox(QSpinBox):
+    """Bandwidth cap of one upload, in Mbps.
+
+    "Environment default" keeps the cap and schedule configured for the
+    environment; "No cap" lifts them, as `--cap-mbps 0` does.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setRange(ENVIRONMENT_DEFAULT, MAX_CAP_MBPS)
+        self.setSpecialValueText("Environment default")
+        self.setValue(ENVIRONMENT_DEFAULT)
+
+    @property
+    def cap_override(self) -> float | None:
+        """The `override` of `resolve_cap_mbps`: None for the environment default."""
+        value = self.value()
+        return None if value == ENVIRONMENT_DEFAULT else value
+
+    def textFromValue(self, value: int) -> str:
+        return NO_CAP_TEXT if value == 0 else f"{value} Mbps"
+
+    def valueFromText(self, text: str) -> int:
+        text = text.strip()
+        if text.casefold() == NO_CAP_TEXT.casefold():
+            return 0
+        if text == self.specialValueText():
+            return ENVIRONMENT_DEFAULT
+        match = _CAP_PATTERN.fullmatch(text.casefold())
+        return int(match[1]) if match else ENVIRONMENT_DEFAULT
+
+    def validate(self, text: str, pos: int) -> object:
+        stripped = text.strip().casefold()
+        match = _CAP_PATTERN.fullmatch(stripped)
+        if stripped in (NO_CAP_TEXT.casefold(), self.specialValueText().casefold()):
+            state = QValidator.Acceptable
+        elif NO_CAP_TEXT.casefold().startswith(stripped):
+            state = QValidator.Intermediate
+        elif match and int(match[1]) <= MAX_CAP_MBPS:
+            state = QValidator.Acceptable
+        else:
+            state = QValidator.Invalid
+        return state, text, pos
@@ -1,7 +1,8 @@
-from PySide6.QtCore import QSettings, Qt, QThread, Slot
-from PySide6.QtGui import QIcon
+from PySide6.QtCore import QSettings, Qt, QThread, QThreadPool, QTimer, Slot
+from PySide6.QtGui import QCloseEvent, QIcon
 from PySide6.QtWidgets import (
     QApplication,
+    QCheckBox,
     QComboBox,
     QCompleter,
     QFrame,
@@ -9,35 +10,69 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSizePolicy,
-    QTextEdit,
     QVBoxLayout,
     QWidget,
 )
 
 from data_upload.app.azcopy import ProcessWorker
+from data_upload.app.init import AzCopyInitTask
 from data_upload.app.login import login_user
-from data_upload.config import Config, ConfigCatalog
+from data_upload.app.projects import ProjectRevalidationTask
+from data_upload.app.scanner import FolderScanTask
+from data_upload.bandwidth import resolve_cap_mbps
+from data_upload.config import AzCopyRelease, Config, ConfigCatalog
+from data_upload.credentials import SASCredentialManager, SASLease
 from data_upload.euphro_tools import (
     EuphrosyneToolsConnectionError,
     EuphrosyneToolsService,
+    RunUploadTarget,
+    SASTokenCredentials,
 )
 from data_upload.euphrosyne.auth import (
     EuphrosyneAuth,
     EuphrosyneAuthenticationError,
-    clear_tokens,
-    load_refresh_token,
+    get_token_store,
 )
 from data_upload.euphrosyne.project import (
     Project,
     first_project_with_runs,
     list_projects,
 )
+from data_upload.folder_init import FolderInitializer, InitializedFolderStore
+from data_upload.http_client import get_http_client
+from data_upload.incremental import UploadManifestStore, plan_incremental_upload
+from data_upload.jobs import (
+    JOB_COMPLETED,
+    JOB_DISCARDED,
+    JOB_FAILED,
+    UploadJob,
+    UploadJobStore,
+)
+from data_upload.progress import TransferProgress, format_bytes, format_progress
+from data_upload.project_catalog import ProjectCatalogStore
+from data_upload.project_search import ProjectSearchIndex
+from data_upload.retry import RetryPolicy
+from data_upload.scanner import FolderManifest
+from data_upload.tuning import AzCopyTuning, format_tuning, tune_azcopy
+from data_upload.upload_engine import (
+    ENGINE_AZCOPY,
+    UPLOAD_ENGINES,
+    default_upload_engine,
+)
+from data_upload.widget.bandwidth_cap import BandwidthCapBox
 from data_upload.widget.data_location import DataLocationInputLayout
 from data_upload.widget.data_type import DataTypeCheckboxesLayout
+from data_upload.widget.log_view import LOG_MAX_LINES, TransferLog
+from data_upload.widget.project_search import ProjectSearchProxyModel
 from data_upload.widget.text_edit_stream import TextEditStream
 
+UPLOAD_ENGINE_SETTING_KEY = "upload_engine"
+# Delay before scanning a typed folder, so each keystroke does not start a scan.
+FOLDER_SCAN_DELAY_MS = 400
+
 
 class DataUploadWidget(QWidget):
     """A widget to download a http file to a destination file"""
@@ -52,18 +87,48 @@ class DataUploadWidget(QWidget):
         config: Config,
         settings: QSettings,
         stdout_stream: TextEditStream | None = None,
+        projects: list[Project] | None = None,
+        revalidate_projects: bool = False,
     ):
         super().__init__()
         self.setObjectName("DataUploadWidget")
         self.config_catalog = config_catalog
         self.config = config
         self.settings = settings
+        self.tokens = get_token_store(settings)
         self._upload_in_progress = False
+        self.job_store = UploadJobStore()
+        self._current_job_id: str | None = None
+        # The engine the current upload runs with, recorded with its job.
+        self._current_engine = ENGINE_AZCOPY
+        self._current_upload: dict[str, str] = {}
+        self.manifest_store = UploadManifestStore()
+        self._current_manifest: FolderManifest | None = None
+        self._folder_summary: tuple[str, str] | None = None
+        self._scan_task: FolderScanTask | None = None
+        self._upload_scan_task: FolderScanTask | None = None
+        # Credentials, their lease and the job to resume, while the folder of an
+        # upload being started is scanned.
+        self._pending_upload: (
+            tuple[SASTokenCredentials, SASLease, UploadJob | None] | None
+        ) = None
+        self._project_task: ProjectRevalidationTask | None = None
+        # Whether AzCopy is being checked or downloaded, and why it could not be
+        # installed.
+        self._azcopy_task: AzCopyInitTask | None = None
+        self._checking_azcopy = False
+        self._azcopy_error: str | None = None
+        self._manual_project_refresh = False
+        self._streaming_projects = False
+        self._folder_scan_timer = QTimer(self)
+        self._folder_scan_timer.setSingleShot(True)
+        self._folder_scan_timer.setInterval(FOLDER_SCAN_DELAY_MS)
+        self._folder_scan_timer.timeout.connect(self._start_folder_scan)
 
-        self.context_box = QTextEdit()
+        self.context_box = TransferLog(
+            max_lines=config_catalog.get("log-max-lines", LOG_MAX_LINES)
+        )
         self.context_box.setObjectName("TransferLog")
-        self.context_box.setReadOnly(True)
-        self.context_box.setLineWrapMode(QTextEdit.NoWrap)
 
         if stdout_stream:
             stdout_stream.connect(self.context_box)
@@ -76,10 +141,26 @@ class DataUploadWidget(QWidget):
         )
 
         self.tools_service = self._build_tools_service()
+        # Reads `self.tools_service` on each fetch: it is rebuilt after a new login.
+        self.sas_credentials = SASCredentialManager(
+            lambda *target: self.tools_service.get_run_data_upload_shared_access_signature(
+                *target
+            )
+        )
 
-        self.projects = projects = list_projects(
-            host=self.config["euphrosyne"]["url"],
-            access_token=settings.value("access_token"),
+        self.folder_store = InitializedFolderStore()
+
+        if projects is None:
+            projects = list_projects(
+                host=self.config["euphrosyne"]["url"],
+                access_token=self.tokens.access_token,
+                client=get_http_client(
+                    self.config["environment"], self.config.get("retry")
+                ),
+            )
+        self.projects = projects
+        self.project_search_index = ProjectSearchIndex(
+            projects, self._recent_projects()
         )
         initial_project = first_project_with_runs(projects)
         self.selectedProject = (
@@ -96,6 +177,7 @@ class DataUploadWidget(QWidget):
         self.start_button.setDisabled(True)
         self.logout_button = QPushButton("Sign out")
         self.logout_button.setObjectName("DangerButton")
+        self.refresh_projects_button = QPushButton("Refresh projects")
 
         def _generate_q_combo_box(items: list[str], placeholder: str):
             combo_box = QComboBox()
@@ -163,9 +245,23 @@ class DataUploadWidget(QWidget):
 
         self.data_folder_input_layout = DataLocationInputLayout()
         self.data_folder_input_layout.data_path_box.textChanged.connect(
-            lambda _text: self._validate_form()
+            self.on_data_folder_changed
         )
         form_layout.addLayout(self.data_folder_input_layout, 3, 0, 1, 2)
+        self.incremental_checkbox = QCheckBox(
+            "Only upload files that are new or changed since the last upload"
+        )
+        form_layout.addWidget(self.incremental_checkbox, 4, 1)
+        self.checksum_checkbox = QCheckBox(
+            "Store MD5 checksums with the uploaded files"
+        )
+        form_layout.addWidget(self.checksum_checkbox, 5, 1)
+        self.bandwidth_cap_box = BandwidthCapBox()
+        bandwidth_label = QLabel("Bandwidth cap")
+        bandwidth_label.setObjectName("FieldLabel")
+        bandwidth_label.setBuddy(self.bandwidth_cap_box)
+        form_layout.addWidget(bandwidth_label, 6, 0)
+        form_layout.addWidget(self.bandwidth_cap_box, 6, 1)
         setup_layout.addLayout(form_layout)
 
         self.status_panel = QFrame()
@@ -178,8 +274,12 @@ class DataUploadWidget(QWidget):
         self.status_message_label = QLabel()
         self.status_message_label.setObjectName("StatusMessage")
         self.status_message_label.setWordWrap(True)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
         status_layout.addWidget(self.status_title_label)
         status_layout.addWidget(self.status_message_label)
+        status_layout.addWidget(self.progress_bar)
 
         action_layout = QHBoxLayout()
         action_layout.addStretch()
@@ -202,7 +302,10 @@ class DataUploadWidget(QWidget):
 
         self.start_button.clicked.connect(self.on_start)
         self.logout_button.clicked.connect(self.on_logout)
+        self.refresh_projects_button.clicked.connect(self.on_refresh_projects)
         self._validate_form()
+        if revalidate_projects:
+            self.revalidate_projects()
 
     def _build_header(self) -> QHBoxLayout:
         icon_label = QLabel()
@@ -225,18 +328,26 @@ class DataUploadWidget(QWidget):
         header_layout.setSpacing(12)
         header_layout.addWidget(icon_label)
         header_layout.addLayout(text_layout, 1)
+        header_layout.addWidget(self.refresh_projects_button)
         header_layout.addWidget(self.logout_button)
         return header_layout
 
+    def closeEvent(self, event: QCloseEvent):
+        self.context_box.close_log_file()
+        super().closeEvent(event)
+
     def _build_tools_service(self) -> EuphrosyneToolsService:
         return EuphrosyneToolsService(
             host=self.config["euphrosyne-tools"]["url"],
             auth=EuphrosyneAuth(
-                access_token=self.settings.value("access_token"),
-                refresh_token=load_refresh_token(self.settings),
+                access_token=self.tokens.access_token,
+                refresh_token=self.tokens.refresh_token,
                 host=self.config["euphrosyne"]["url"],
                 settings=self.settings,
             ),
+            client=get_http_client(
+                self.config["environment"], self.config.get("retry")
+            ),
         )
 
     def _configure_searchable_project_select(self):
@@ -245,16 +356,26 @@ class DataUploadWidget(QWidget):
         if self.project_select_box.lineEdit():
             self.project_select_box.lineEdit().setPlaceholderText("Search projects...")
 
-        completer = QCompleter(self.project_select_box.model(), self.project_select_box)
+        # The model filters and ranks the projects: the completer shows them as is.
+        self.project_search_model = ProjectSearchProxyModel(
+            self.project_search_index, self
+        )
+        self.project_search_model.setSourceModel(self.project_select_box.model())
+        completer = QCompleter(self.project_search_model, self.project_select_box)
         completer.setCompletionColumn(self.project_select_box.modelColumn())
         completer.setCaseSensitivity(Qt.CaseInsensitive)
-        completer.setFilterMode(Qt.MatchContains)
-        completer.setCompletionMode(QCompleter.PopupCompletion)
+        completer.setModelSorting(QCompleter.UnsortedModel)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
         self.project_select_box.setCompleter(completer)
 
+    def _recent_projects(self) -> list[str]:
+        return self.job_store.recent_projects(self.config["environment"])
+
     @Slot()
     def on_logout(self):
-        clear_tokens(self.settings)
+        self.tokens.clear()
+        ProjectCatalogStore().clear()
+        list_projects.cache_clear()
         self.context_box.append(
             "Logged out. Please restart the application to log in again."
         )
@@ -271,7 +392,7 @@ class DataUploadWidget(QWidget):
         )
 
         try:
-            self.tools_service.init_folders(
+            self._folder_initializer().init_folders(
                 self.selectedProject,
                 self.selectedRun,
             )
@@ -302,14 +423,12 @@ class DataUploadWidget(QWidget):
             self._sync_start_button()
             raise e
 
+        data_type = self.data_type_box.selected_data_type.name.lower()
+        sas_lease = self.sas_credentials.lease(
+            RunUploadTarget(self.selectedProject, self.selectedRun, data_type)
+        )
         try:
-            credentials = (
-                self.tools_service.get_run_data_upload_shared_access_signature(
-                    project_slug=self.selectedProject,
-                    run_name=self.selectedRun,
-                    data_type=self.data_type_box.selected_data_type.name.lower(),
-                )
-            )
+            credentials = sas_lease.credentials()
         except EuphrosyneAuthenticationError as e:
             self._handle_authentication_error(e)
             return
@@ -326,18 +445,115 @@ class DataUploadWidget(QWidget):
             self._sync_start_button()
             raise e
 
+        self._current_job_id = None
+        self._current_engine = self.upload_engine
+        self._current_upload = {
+            "environment": self.config["environment"],
+            "project": self.selectedProject,
+            "run": self.selectedRun,
+            "data_type": data_type,
+            "folder": self.data_folder_input_layout.data_folder,
+        }
+        resumable_job = None
+        if self._current_engine == ENGINE_AZCOPY:
+            resumable_job = self.job_store.find_resumable(**self._current_upload)
+
+        self._set_status("Scanning data folder", "Listing the files to upload.")
+        # Scanned again at start, as the preview scan may predate recent changes;
+        # the upload goes on in `on_upload_folder_scanned`.
+        self._pending_upload = (credentials, sas_lease, resumable_job)
+        self._upload_scan_task = FolderScanTask(self._current_upload["folder"])
+        self._upload_scan_task.signals.finished_signal.connect(
+            self.on_upload_folder_scanned
+        )
+        self._upload_scan_task.signals.failed_signal.connect(
+            self.on_upload_folder_scan_failed
+        )
+        QThreadPool.globalInstance().start(self._upload_scan_task)
+
+    @Slot(str, object)
+    def on_upload_folder_scanned(self, folder: str, manifest: FolderManifest):
+        if self._pending_upload is None:
+            return
+        credentials, sas_lease, resumable_job = self._pending_upload
+        self._pending_upload = None
+        self._current_manifest = manifest
         self._set_status(
             "Uploading data",
             "AzCopy is transferring the selected folder. Keep this window open.",
         )
+        if resumable_job and self._confirm_resume(resumable_job):
+            self._current_job_id = resumable_job["job_id"]
+            self.context_box.append(
+                f"Resuming AzCopy job {resumable_job['job_id']}, "
+                "only missing files will be sent."
+            )
+            self._start_azcopy(
+                src=folder,
+                dest=credentials["url"],
+                sas_token=credentials["token"],
+                resume_job_id=resumable_job["job_id"],
+                sas_lease=sas_lease,
+            )
+            return
+
+        if resumable_job:
+            self.job_store.set_status(resumable_job["job_id"], JOB_DISCARDED)
+        only_files = None
+        if self.incremental_checkbox.isChecked():
+            plan = plan_incremental_upload(
+                self._current_manifest.snapshot(),
+                self.manifest_store.load(**self._current_upload),
+            )
+            self.context_box.append(
+                f"Skipping {plan['skipped_files']} unchanged files "
+                f"({format_bytes(plan['skipped_bytes'])}); "
+                f"{len(plan['files'])} files ({format_bytes(plan['upload_bytes'])}) "
+                "to upload."
+            )
+            if not plan["files"]:
+                self._upload_in_progress = False
+                self._set_status(
+                    "Nothing to upload",
+                    "Every file was already uploaded and has not changed since.",
+                )
+                self._sync_start_button()
+                return
+            only_files = plan["files"]
         self._start_azcopy(
-            src=self.data_folder_input_layout.data_folder,
+            src=folder,
             dest=credentials["url"],
             sas_token=credentials["token"],
+            only_files=only_files,
+            sas_lease=sas_lease,
         )
 
+    @Slot(str, str)
+    def on_upload_folder_scan_failed(self, folder: str, error: str):
+        if self._pending_upload is None:
+            return
+        self._pending_upload = None
+        self._upload_in_progress = False
+        message = f"Could not read the data folder {folder}: {error}"
+        self.context_box.append(message)
+        self._set_status("Upload failed", message)
+        self._sync_start_button()
+        QMessageBox.critical(self, "Upload failed", message)
+
+    def _confirm_resume(self, job: UploadJob) -> bool:
+        answer = QMessageBox.question(
+            self,
+            "Resume upload",
+            "A previous upload of this folder was interrupted "
+            f"(started {job['created_at'][:16].replace('T', ' ')} UTC). "
+            "Resume it and only send the missing files?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes,
+        )
+        return answer == QMessageBox.Yes
+
     def _handle_authentication_error(self, error: EuphrosyneAuthenticationError):
-        clear_tokens(self.settings)
+        self.tokens.clear()
         QMessageBox.warning(
             self,
             "Session expired",
@@ -361,7 +577,17 @@ class DataUploadWidget(QWidget):
     @Slot(int)
     def on_data_upload_completed(self, return_code: int):
         self._upload_in_progress = False
+        self.progress_bar.setVisible(False)
+        if self._current_job_id:
+            self.job_store.set_status(
+                self._current_job_id,
+                JOB_COMPLETED if return_code == 0 else JOB_FAILED,
+            )
         if return_code == 0:
+            if self._current_manifest is not None:
+                self.manifest_store.save(
+                    self._current_manifest.snapshot(), **self._current_upload
+                )
             self.context_box.append("Done.")
             self._set_status(
                 "Upload complete",
@@ -370,6 +596,7 @@ class DataUploadWidget(QWidget):
             self._sync_start_button()
             return
 
+        self._forget_initialized_folders()
         message = (
             f"Upload failed. AzCopy exited with code {return_code}. "
             "Check the output above for details."
@@ -382,11 +609,144 @@ class DataUploadWidget(QWidget):
     @Slot()
     def on_conversion_failure(self, error: Exception):
         self._upload_in_progress = False
+        self._forget_initialized_folders()
         self._set_status("Upload failed", f"{error} ({type(error).__name__})")
         self._sync_start_button()
         self.context_box.append(f"An error occured : {error} ({type(error).__name__})")
         raise type(error) from error
 
+    def _folder_initializer(self) -> FolderInitializer:
+        # Built on each use: `self.tools_service` is rebuilt after a new login.
+        return FolderInitializer(
+            self.tools_service, self.config["environment"], self.folder_store
+        )
+
+    def _forget_initialized_folders(self):
+        # The destination may be what failed: initialize it again next time.
+        if self._current_upload:
+            self._folder_initializer().forget(
+                self._current_upload["project"], self._current_upload["run"]
+            )
+
+    @Slot()
+    def on_refresh_projects(self):
+        list_projects.cache_clear()
+        self.revalidate_projects(manual=True)
+
+    def revalidate_projects(self, manual: bool = False):
+        """Check for project changes in the background; the list updates if any.
+
+        An empty list is filled as the projects arrive.
+        """
+        self.refresh_projects_button.setDisabled(True)
+        self._manual_project_refresh = manual
+        self._streaming_projects = not self.projects
+        # Keep a reference so the signals object outlives the pool's run.
+        self._project_task = ProjectRevalidationTask(
+            self.config,
+            self.tokens.access_token,
+            get_http_client(self.config["environment"], self.config.get("retry")),
+        )
+        self._project_task.signals.projects_signal.connect(self.on_projects_received)
+        self._project_task.signals.finished_signal.connect(self.on_projects_revalidated)
+        self._project_task.signals.failed_signal.connect(
+            self.on_project_revalidation_failed
+        )
+        QThreadPool.globalInstance().start(self._project_task)
+
+    @Slot(object)
+    def on_projects_received(self, projects: list[Project]):
+        if self._streaming_projects:
+            self.append_projects(projects)
+
+    @Slot(object)
+    def on_projects_revalidated(self, projects: list[Project] | None):
+        self.refresh_projects_button.setDisabled(False)
+        streamed, self._streaming_projects = self._streaming_projects, False
+        if streamed:
+            if projects is not None and projects != self.projects:
+                self.update_projects(projects)
+            if first_project_with_runs(self.projects) is None:
+                QMessageBox.warning(
+                    self,
+                    "No uploadable projects",
+                    "No projects with runs are available for this account.",
+                )
+        elif projects is not None:
+            self.update_projects(projects)
+            self.context_box.append("The project list was updated.")
+        elif self._manual_project_refresh:
+            self.context_box.append("The project list is up to date.")
+
+    @Slot(str)
+    def on_project_revalidation_failed(self, error: str):
+        self.refresh_projects_button.setDisabled(False)
+        self._streaming_projects = False
+        if not self.projects:
+            QMessageBox.critical(
+                self,
+                "Projects unavailable",
+                f"Could not load projects from Euphrosyne: {error}",
+            )
+            return
+        self.context_box.append(f"Could not refresh the project list: {error}")
+
+    def append_projects(self, projects: list[Project]):
+        """Add projects at the end of the list, as they are downloaded.
+
+        The first one with runs is selected, unless a project is selected or
+        being searched for.
+        """
+        offset = len(self.projects)
+        self.projects = self.projects + projects
+        self.project_search_index.extend(projects)
+        self.project_select_box.blockSignals(True)
+        self.project_select_box.addItems([project["name"] for project in projects])
+        if offset == 0:
+            # The first item added to an empty box becomes the current one.
+            self.project_select_box.setCurrentIndex(-1)
+        self.project_select_box.blockSignals(False)
+        self.project_search_model.refresh()
+
+        initial_project = first_project_with_runs(projects)
+        if (
+            initial_project is None
+            or self.selectedProject is not None
+            or self.project_select_box.currentText()
+        ):
+            return
+        index = offset + projects.index(initial_project)
+        self.project_select_box.blockSignals(True)
+        self.project_select_box.setCurrentIndex(index)
+        self.project_select_box.blockSignals(False)
+        self._select_project_at_index(index)
+
+    def update_projects(self, projects: list[Project]):
+        """Show a new project list, keeping the selected project and run."""
+        selected_project, selected_run = self.selectedProject, self.selectedRun
+        self.projects = projects
+        self.project_search_index = ProjectSearchIndex(
+            projects, self._recent_projects()
+        )
+        slugs = [project["slug"] for project in projects]
+        if selected_project in slugs:
+            index = slugs.index(selected_project)
+        else:
+            initial_project = first_project_with_runs(projects)
+            index = projects.index(initial_project) if initial_project else -1
+
+        self.project_select_box.blockSignals(True)
+        self.project_select_box.clear()
+        self.project_select_box.addItems([project["name"] for project in projects])
+        self.project_select_box.setCurrentIndex(index)
+        self.project_select_box.blockSignals(False)
+        self.project_search_model.set_index(self.project_search_index)
+        self._select_project_at_index(index)
+
+        run_index = self.run_select_box.findText(selected_run or "")
+        if index >= 0 and slugs[index] == selected_project and run_index >= 0:
+            self.run_select_box.setCurrentIndex(run_index)
+
     @Slot()
     def on_project_change(self, index: int):
         print(f"Project changed to {self.project_select_box.currentText()}")
@@ -394,7 +754,8 @@ class DataUploadWidget(QWidget):
 
     @Slot(str)
     def on_project_search_text_changed(self, text: str):
-        project_index = self._project_index_for_name(text)
+        self.project_search_model.set_query(text)
+        project_index = self.project_search_index.index_of_name(text)
         if project_index is None:
             self._clear_project_selection()
             return
@@ -404,13 +765,6 @@ class DataUploadWidget(QWidget):
         else:
             self._select_project_at_index(project_index)
 
-    def _project_index_for_name(self, name: str) -> int | None:
-        normalized_name = name.strip().casefold()
-        for index, project in enumerate(self.projects):
-            if project["name"].casefold() == normalized_name:
-                return index
-        return None
-
     def _clear_project_selection(self):
         self.run_select_box.clear()
         self.selectedProject = None
@@ -444,9 +798,93 @@ class DataUploadWidget(QWidget):
         self.selectedRun = self.run_select_box.currentText() if index >= 0 else None
         self._validate_form()
 
+    @Slot(str)
+    def on_data_folder_changed(self, _text: str):
+        self._folder_summary = None
+        self._validate_form()
+        if self.data_folder_input_layout.has_valid_data_folder:
+            self._folder_scan_timer.start()
+
+    @Slot()
+    def _start_folder_scan(self):
+        folder = self.data_folder_input_layout.data_folder
+        if not self.data_folder_input_layout.has_valid_data_folder:
+            return
+        # Keep a reference so the signals object outlives the pool's run.
+        self._scan_task = FolderScanTask(folder)
+        self._scan_task.signals.finished_signal.connect(self.on_folder_scanned)
+        self._scan_task.signals.failed_signal.connect(self.on_folder_scan_failed)
+        QThreadPool.globalInstance().start(self._scan_task)
+
+    @Slot(str, object)
+    def on_folder_scanned(self, folder: str, manifest: FolderManifest):
+        if folder != self.data_folder_input_layout.data_folder:
+            return
+        self._folder_summary = (
+            folder,
+            f"{manifest.file_count} files, {format_bytes(manifest.total_bytes)}",
+        )
+        self._validate_form()
+
+    @Slot(str, str)
+    def on_folder_scan_failed(self, folder: str, error: str):
+        if folder != self.data_folder_input_layout.data_folder:
+            return
+        self._folder_summary = None
+        self.context_box.append(f"Could not scan the data folder {folder}: {error}")
+        self._validate_form()
+
     @Slot(str)
     def append_azcopy_output(self, line):
-        self.context_box.append(line)
+        self.context_box.queue(line)
+
+    @Slot(str)
+    def on_upload_job_started(self, job_id: str):
+        self._current_job_id = job_id
+        self.job_store.record_started(
+            job_id, engine=self._current_engine, **self._current_upload
+        )
+        self.project_search_index.set_recent(self._recent_projects())
+        self.project_search_model.refresh()
+
+    def init_azcopy(self, release: AzCopyRelease | None = None):
+        """Check AzCopy, downloading it if needed, off the GUI thread.
+
+        Start stays disabled until it is done.
+        """
+        self._checking_azcopy = True
+        self._azcopy_error = None
+        self._azcopy_task = AzCopyInitTask(release)
+        self._azcopy_task.signals.download_signal.connect(self.on_azcopy_download)
+        self._azcopy_task.signals.finished_signal.connect(self.on_azcopy_ready)
+        self._azcopy_task.signals.failed_signal.connect(self.on_azcopy_failed)
+        self._validate_form()
+        QThreadPool.globalInstance().start(self._azcopy_task)
+
+    @Slot()
+    def on_azcopy_download(self):
+        print("Downloading AzCopy...")
+
+    @Slot()
+    def on_azcopy_ready(self):
+        self._checking_azcopy = False
+        self._validate_form()
+
+    @Slot(str)
+    def on_azcopy_failed(self, error: str):
+        self._checking_azcopy = False
+        self._azcopy_error = error
+        print(f"Could not install AzCopy: {error}")
+        self._validate_form()
+
+    @Slot(object)
+    def on_upload_progress(self, progress: TransferProgress):
+        if progress["bytes_total"]:
+            self.progress_bar.setValue(
+                int(100 * progress["bytes_transferred"] / progress["bytes_total"])
+            )
+        self.progress_bar.setVisible(True)
+        self._set_status("Uploading data", format_progress(progress))
 
     def _validate_form(self, *_args):
         self._sync_start_button()
@@ -478,11 +916,24 @@ class DataUploadWidget(QWidget):
                 "Invalid data folder",
                 "The selected data folder does not exist or is not a folder.",
             )
-        else:
+        elif self._checking_azcopy:
             self._set_status(
-                "Ready to upload",
-                "Review the selected project, run, data type, and folder, then start the upload.",
+                "Preparing AzCopy",
+                "The upload can start once AzCopy is checked or downloaded.",
             )
+        elif not self._is_engine_ready:
+            self._set_status(
+                "AzCopy unavailable",
+                f"AzCopy could not be installed: {self._azcopy_error}",
+            )
+        else:
+            message = "Review the selected project, run, data type, and folder, then start the upload."
+            if (
+                self._folder_summary
+                and self._folder_summary[0] == self.data_folder_input_layout.data_folder
+            ):
+                message = f"The folder contains {self._folder_summary[1]}. {message}"
+            self._set_status("Ready to upload", message)
 
     def _set_status(self, title: str, message: str):
         self.status_title_label.setText(title)
@@ -490,9 +941,18 @@ class DataUploadWidget(QWidget):
 
     def _sync_start_button(self):
         self.start_button.setEnabled(
-            self._is_form_valid and not self._upload_in_progress
+            self._is_form_valid
+            and self._is_engine_ready
+            and not self._upload_in_progress
         )
 
+    @property
+    def _is_engine_ready(self) -> bool:
+        if self._checking_azcopy:
+            return False
+        # Without AzCopy, the native engine can still upload.
+        return self._azcopy_error is None or self.upload_engine != ENGINE_AZCOPY
+
     @property
     def _is_form_valid(self) -> bool:
         if (
@@ -504,11 +964,67 @@ class DataUploadWidget(QWidget):
             return True
         return False
 
-    def _start_azcopy(self, src: str, dest: str, sas_token: str):
+    @property
+    def upload_engine(self) -> str:
+        engine = self.settings.value(UPLOAD_ENGINE_SETTING_KEY, None)
+        if engine in UPLOAD_ENGINES:
+            return engine
+        return default_upload_engine()
+
+    def _tune_azcopy(self, manifest: FolderManifest) -> AzCopyTuning:
+        sizes = [entry.size for entry in manifest.files]
+        try:
+            tuning = tune_azcopy(sizes, self.config.get("azcopy"))
+        except ValueError as error:
+            self.context_box.append(
+                f"Ignoring the AzCopy settings of config.yml: {error}"
+            )
+            tuning = tune_azcopy(sizes)
+        self.context_box.append(format_tuning(tuning))
+        return tuning
+
+    def _start_azcopy(
+        self,
+        src: str,
+        dest: str,
+        sas_token: str,
+        resume_job_id: str | None = None,
+        only_files: list[str] | None = None,
+        sas_lease: SASLease | None = None,
+    ):
+        engine = ENGINE_AZCOPY if resume_job_id else self.upload_engine
+        tuning = None
+        if engine == ENGINE_AZCOPY and self._current_manifest is not None:
+            tuning = self._tune_azcopy(self._current_manifest)
+        # Read once here: the native engine re-evaluates the cap from its thread.
+        bandwidth = self.config.get("bandwidth")
+        override = self.bandwidth_cap_box.cap_override
+
+        def _cap_mbps() -> float | None:
+            return resolve_cap_mbps(bandwidth, override=override)
+
+        cap_mbps = _cap_mbps()
+        if cap_mbps:
+            self.context_box.append(f"Upload bandwidth capped at {cap_mbps:g} Mbps.")
         self.thread = QThread()
-        self.worker = ProcessWorker(src, dest, sas_token)
+        self.worker = ProcessWorker(
+            src,
+            dest,
+            sas_token,
+            engine=engine,
+            resume_job_id=resume_job_id,
+            only_files=only_files,
+            tuning=tuning,
+            manifest=self._current_manifest,
+            cap_mbps=_cap_mbps,
+            put_md5=self.checksum_checkbox.isChecked(),
+            sas_lease=sas_lease,
+            retry_policy=RetryPolicy.from_config(self.config.get("retry")),
+        )
         self.worker.moveToThread(self.thread)
         self.worker.output_signal.connect(self.append_azcopy_output)
+        self.worker.progress_signal.connect(self.on_upload_progress)
+        self.worker.job_started_signal.connect(self.on_upload_job_started)
         self.worker.finished_signal.connect(self.thread.quit)
         self.worker.finished_signal.connect(self.on_data_upload_completed)
         self.thread.started.connect(self.worker.run)
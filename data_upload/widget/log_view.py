@@ -0,0 +1,103 @@
+import logging
+import logging.handlers
+from pathlib import Path
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QPlainTextEdit
+
+from data_upload.app_data import get_app_data_folder
+
+# Lines shown in the transfer log, unless config.yml sets `log-max-lines`; older
+# ones are dropped from the view but are kept in the log file.
+LOG_MAX_LINES = 5000
+# Lines written in between are rendered together, at most this often.
+LOG_FLUSH_INTERVAL_MS = 100
+
+LOG_FILE_NAME = "transfer.log"
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+
+
+def get_log_file_path() -> Path:
+    folder = get_app_data_folder() / "logs"
+    folder.mkdir(exist_ok=True)
+    return folder / LOG_FILE_NAME
+
+
+class _LogFileHandler(logging.handlers.RotatingFileHandler):
+    def handleError(self, record: logging.LogRecord):
+        # The report would go to stderr, which is shown in the log: drop it.
+        pass
+
+
+class TransferLog(QPlainTextEdit):
+    """Read-only plain text log keeping the last `max_lines` lines.
+
+    `append` shows a message at once. `queue` and `write`, for AzCopy output and
+    `print`, hold lines back to render them in one batch every
+    `flush_interval_ms`. Every line also goes to a rotating log file, `log_path`.
+    """
+
+    def __init__(
+        self,
+        max_lines: int = LOG_MAX_LINES,
+        flush_interval_ms: int = LOG_FLUSH_INTERVAL_MS,
+        log_path: Path | None = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setMaximumBlockCount(max_lines)
+        self._pending: list[str] = []
+        self._partial_line = ""
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+        self._file_handler = _LogFileHandler(
+            log_path or get_log_file_path(),
+            maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUP_COUNT,
+            encoding="utf-8",
+            delay=True,
+        )
+        self._file_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def append(self, text: str):
+        self.flush()
+        self._show([text])
+
+    def queue(self, text: str):
+        """Show `text` on a new line with the next batch."""
+        self._pending.append(text)
+        self._schedule_flush()
+
+    def write(self, text: str):
+        lines = (self._partial_line + text).split("\n")
+        self._partial_line = lines.pop()
+        if lines:
+            self._pending.extend(lines)
+            self._schedule_flush()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if self._pending:
+            lines, self._pending = self._pending, []
+            self._show(lines)
+
+    def close_log_file(self):
+        if self._partial_line:
+            self._pending.append(self._partial_line)
+            self._partial_line = ""
+        self.flush()
+        self._file_handler.close()
+
+    def _schedule_flush(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _show(self, lines: list[str]):
+        # Lines beyond the cap would be dropped by the view at once.
+        self.appendPlainText("\n".join(lines[-self.maximumBlockCount() :]))
+        self._file_handler.handle(logging.makeLogRecord({"msg": "\n".join(lines)}))
@@ -0,0 +1,55 @@
+import sys
+
+from PySide6.QtCore import QModelIndex, QPersistentModelIndex, QSortFilterProxyModel
+
+from data_upload.project_search import ProjectSearchIndex
+
+
+class ProjectSearchProxyModel(QSortFilterProxyModel):
+    """The rows of a project list matching a search, best matches first.
+
+    Row `i` of the source model shows project `i` of the search index.
+    """
+
+    def __init__(self, index: ProjectSearchIndex, parent=None):
+        super().__init__(parent)
+        self._index = index
+        self._query = ""
+        # Rank in the search results of each matching source row.
+        self._ranks: dict[int, int] = {}
+        self.refresh()
+        self.sort(0)
+
+    @property
+    def query(self) -> str:
+        return self._query
+
+    def set_index(self, index: ProjectSearchIndex):
+        self._index = index
+        self.refresh()
+
+    def set_query(self, query: str):
+        if query != self._query:
+            self._query = query
+            self.refresh()
+
+    def refresh(self):
+        """Search again, after the index or its projects changed."""
+        self._ranks = {
+            row: rank for rank, row in enumerate(self._index.search(self._query))
+        }
+        self.invalidate()
+
+    def filterAcceptsRow(
+        self, source_row: int, source_parent: QModelIndex | QPersistentModelIndex
+    ) -> bool:
+        return source_row in self._ranks
+
+    def lessThan(
+        self,
+        source_left: QModelIndex | QPersistentModelIndex,
+        source_right: QModelIndex | QPersistentModelIndex,
+    ) -> bool:
+        return self._ranks.get(source_left.row(), sys.maxsize) < self._ranks.get(
+            source_right.row(), sys.maxsize
+        )
@@ -1,14 +1,14 @@
 from PySide6.QtCore import QObject, Signal
-from PySide6.QtGui import QTextCursor
-from PySide6.QtWidgets import QTextEdit
+
+from data_upload.widget.log_view import TransferLog
 
 
 class TextEditStream(QObject):
     write_signal = Signal(str)
-    text_edit: QTextEdit | None = None
+    text_edit: TransferLog | None = None
 
-    def connect(self, text_edit: QTextEdit):
-        """Connect the QTextEdit to this stream."""
+    def connect(self, text_edit: TransferLog):
+        """Connect the transfer log to this stream."""
         self.text_edit = text_edit
         self.write_signal.connect(self._append_text)
 
@@ -21,5 +21,4 @@ class TextEditStream(QObject):
     def _append_text(self, text):
         if not self.text_edit:
             raise ValueError("TextEdit must be connected to a stream before writing.")
-        self.text_edit.moveCursor(QTextCursor.End)
-        self.text_edit.insertPlainText(text)
+        self.text_edit.write(text)
@@ -62,7 +62,8 @@ QLabel#StatusMessage {
 
 QLineEdit,
 QComboBox,
-QTextEdit {
+QTextEdit,
+QPlainTextEdit {
     background: #ffffff;
     border: 1px solid #cfc6ba;
     border-radius: 6px;
@@ -72,18 +73,20 @@ QTextEdit {
 
 QLineEdit:focus,
 QComboBox:focus,
-QTextEdit:focus {
+QTextEdit:focus,
+QPlainTextEdit:focus {
     border: 1px solid #9c6420;
 }
 
 QLineEdit:disabled,
 QComboBox:disabled,
-QTextEdit:disabled {
+QTextEdit:disabled,
+QPlainTextEdit:disabled {
     background: #eee9e2;
     color: #8a7d71;
 }
 
-QTextEdit#TransferLog {
+QPlainTextEdit#TransferLog {
     background: #211b17;
     border: 1px solid #3f342d;
     color: #f8efe4;
@@ -5,8 +5,27 @@ os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 import pytest
 from PySide6.QtWidgets import QApplication
 
+from bench.fake_storage import start_fake_storage
+
+
+@pytest.fixture(autouse=True)
+def app_data_folder(monkeypatch, tmp_path):
+    """Keep local state (jobs, caches, manifests) out of the user's profile."""
+    folder = tmp_path / "app-data"
+    monkeypatch.setenv("HERMA_DATA_DIR", str(folder))
+    return folder
+
 
 @pytest.fixture(scope="session")
 def qapp():
     app = QApplication.instance() or QApplication([])
     return app
+
+
+@pytest.fixture
+def fake_storage():
+    share, server = start_fake_storage(sas_token="fake-signature")
+    try:
+        yield share
+    finally:
+        server.shutdown()
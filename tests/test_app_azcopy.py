@@ -1,45 +1,172 @@
-import subprocess
-
 import pytest
 
 from data_upload.app import azcopy as app_azcopy
 
 
-class FakeStdout:
-    def __init__(self, lines):
-        self.lines = lines
-        self.closed = False
+@pytest.mark.parametrize("returncode", [0, 1])
+def test_process_worker_emits_output_progress_and_return_code(monkeypatch, returncode):
+    run_calls = []
+    progress = {"bytes_transferred": 10, "bytes_total": 20, "final": False}
+
+    def fake_run_azcopy(
+        command, on_output, on_progress, on_job_started, env, sas_lease, resume_args
+    ):
+        run_calls.append(command)
+        on_job_started("job-1")
+        on_output("first line")
+        on_progress(progress)
+        on_output("second line")
+        return returncode
 
-    def __iter__(self):
-        return iter(self.lines)
+    monkeypatch.setattr(
+        app_azcopy, "get_copy_command", lambda src, dest, sas_token: ["azcopy", "copy"]
+    )
+    monkeypatch.setattr(app_azcopy, "run_azcopy", fake_run_azcopy)
+    emitted_output = []
+    emitted_progress = []
+    emitted_job_ids = []
+    emitted_return_codes = []
 
-    def close(self):
-        self.closed = True
+    worker = app_azcopy.ProcessWorker(
+        src="/tmp/source",
+        dest="https://storage.example/share",
+        sas_token="sas-token",
+    )
+    worker.output_signal.connect(emitted_output.append)
+    worker.progress_signal.connect(emitted_progress.append)
+    worker.job_started_signal.connect(emitted_job_ids.append)
+    worker.finished_signal.connect(emitted_return_codes.append)
 
+    worker.run()
 
-class FakeProcess:
-    def __init__(self, returncode):
-        self.stdout = FakeStdout(["first line\n", "second line\n"])
-        self.returncode = returncode
-        self.wait_called = False
+    assert emitted_output == ["first line", "second line"]
+    assert emitted_progress == [progress]
+    assert emitted_job_ids == ["job-1"]
+    assert emitted_return_codes == [returncode]
+    assert run_calls == [["azcopy", "copy"]]
 
-    def wait(self):
-        self.wait_called = True
 
+def test_process_worker_resumes_azcopy_job(monkeypatch):
+    monkeypatch.setattr(
+        app_azcopy,
+        "get_copy_command",
+        lambda src, dest, sas_token: pytest.fail("a new copy should not start"),
+    )
+    monkeypatch.setattr(
+        app_azcopy,
+        "get_resume_command",
+        lambda job_id, sas_token: ["azcopy", "jobs", "resume", job_id, sas_token],
+    )
 
-@pytest.mark.parametrize("returncode", [0, 1])
-def test_process_worker_emits_output_and_return_code(monkeypatch, returncode):
-    process = FakeProcess(returncode)
-    popen_calls = []
+    worker = app_azcopy.ProcessWorker(
+        src="/tmp/source",
+        dest="https://storage.example/share",
+        sas_token="fresh-sas",
+        resume_job_id="job-1",
+    )
+
+    assert worker.cmd == ["azcopy", "jobs", "resume", "job-1", "fresh-sas"]
+
+
+def test_process_worker_copies_listed_files_for_incremental_upload(monkeypatch):
+    monkeypatch.setattr(
+        app_azcopy,
+        "get_copy_command",
+        lambda src, dest, sas_token, list_of_files=None: [
+            "azcopy",
+            "copy",
+            src,
+            f"--list-of-files={list_of_files}",
+        ],
+    )
+    listed = []
+    monkeypatch.setattr(
+        app_azcopy,
+        "run_azcopy",
+        lambda command, **kwargs: listed.append(
+            worker.list_of_files.read_text().splitlines()
+        )
+        or 0,
+    )
+
+    worker = app_azcopy.ProcessWorker(
+        src="/tmp/source",
+        dest="https://storage.example/share",
+        sas_token="sas-token",
+        only_files=["changed.txt", "spectra/new.bin"],
+    )
+    assert worker.cmd == [
+        "azcopy",
+        "copy",
+        "/tmp/source",
+        f"--list-of-files={worker.list_of_files}",
+    ]
+    worker.run()
+
+    assert listed == [["changed.txt", "spectra/new.bin"]]
+    assert not worker.list_of_files.exists()
+
+
+def test_process_worker_passes_tuning_to_azcopy(monkeypatch):
+    run_calls = []
+    monkeypatch.setattr(
+        app_azcopy, "get_copy_command", lambda src, dest, sas_token: ["azcopy", "copy"]
+    )
+    monkeypatch.setattr(
+        app_azcopy,
+        "run_azcopy",
+        lambda command, env, **kwargs: run_calls.append((command, env)) or 0,
+    )
+
+    worker = app_azcopy.ProcessWorker(
+        src="/tmp/source",
+        dest="https://storage.example/share",
+        sas_token="sas-token",
+        tuning={"concurrency": 32, "buffer_gb": 0.5, "block_size_mb": 4},
+    )
+    worker.run()
+
+    command, env = run_calls[0]
+    assert command == ["azcopy", "copy", "--block-size-mb", "4"]
+    assert env["AZCOPY_CONCURRENCY_VALUE"] == "32"
 
-    def fake_popen(*args, **kwargs):
-        popen_calls.append((args, kwargs))
-        return process
 
+def test_process_worker_caps_bandwidth_and_stores_md5(monkeypatch):
     monkeypatch.setattr(
         app_azcopy, "get_copy_command", lambda src, dest, sas_token: ["azcopy", "copy"]
     )
-    monkeypatch.setattr(app_azcopy.subprocess, "Popen", fake_popen)
+
+    worker = app_azcopy.ProcessWorker(
+        src="/tmp/source",
+        dest="https://storage.example/share",
+        sas_token="sas-token",
+        cap_mbps=lambda: 25,
+        put_md5=True,
+    )
+
+    assert worker.cmd == ["azcopy", "copy", "--put-md5", "--cap-mbps", "25"]
+
+
+def test_process_worker_runs_native_engine_without_azcopy(monkeypatch):
+    upload_calls = []
+
+    class FakeNativeUploadEngine:
+        def __init__(self, **options):
+            self.options = options
+
+        def upload(
+            self, src, dest, sas_token, on_output, on_progress, only_files, manifest
+        ):
+            upload_calls.append((src, dest, sas_token))
+            on_output("Uploaded 1 of 1 files in 0.1s.")
+            return 0
+
+    monkeypatch.setattr(
+        app_azcopy,
+        "get_copy_command",
+        lambda src, dest, sas_token: pytest.fail("AzCopy should not be used"),
+    )
+    monkeypatch.setattr(app_azcopy, "NativeUploadEngine", FakeNativeUploadEngine)
     emitted_output = []
     emitted_return_codes = []
 
@@ -47,24 +174,55 @@ def test_process_worker_emits_output_and_return_code(monkeypatch, returncode):
         src="/tmp/source",
         dest="https://storage.example/share",
         sas_token="sas-token",
+        engine="native",
     )
+    emitted_job_ids = []
     worker.output_signal.connect(emitted_output.append)
+    worker.job_started_signal.connect(emitted_job_ids.append)
     worker.finished_signal.connect(emitted_return_codes.append)
 
     worker.run()
 
-    assert emitted_output == ["first line", "second line"]
-    assert emitted_return_codes == [returncode]
-    assert process.stdout.closed is True
-    assert process.wait_called is True
-    assert popen_calls == [
-        (
-            (["azcopy", "copy"],),
-            {
-                "stdout": subprocess.PIPE,
-                "stderr": subprocess.STDOUT,
-                "text": True,
-                "bufsize": 1,
-            },
-        )
+    assert upload_calls == [
+        ("/tmp/source", "https://storage.example/share", "sas-token")
     ]
+    assert emitted_output == ["Uploaded 1 of 1 files in 0.1s."]
+    # Recorded as a job, so that the project is listed among recent ones.
+    assert len(emitted_job_ids) == 1
+    assert emitted_return_codes == [0]
+
+
+def test_process_worker_closes_hash_cache_after_native_upload(monkeypatch):
+    events = []
+
+    class FakeHashCache:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            events.append("closed")
+
+    class FakeNativeUploadEngine:
+        def __init__(self, **options):
+            assert isinstance(options["hash_cache"], FakeHashCache)
+
+        def upload(self, src, dest, sas_token, **kwargs):
+            events.append("uploaded")
+            raise OSError("disk error")
+
+    monkeypatch.setattr(app_azcopy, "HashCache", FakeHashCache)
+    monkeypatch.setattr(app_azcopy, "NativeUploadEngine", FakeNativeUploadEngine)
+    emitted_return_codes = []
+
+    worker = app_azcopy.ProcessWorker(
+        src="/tmp/source",
+        dest="https://storage.example/share",
+        sas_token="sas-token",
+        engine="native",
+        put_md5=True,
+    )
+    worker.finished_signal.connect(emitted_return_codes.append)
+    worker.run()
+
+    assert events == ["uploaded", "closed"]
+    assert emitted_return_codes == [1]
@@ -1,53 +1,27 @@
+import pytest
+
 from data_upload import azcopy as azcopy_module
 from data_upload.app import init as init_module
 
-
-class FakeProgressDialog:
-    NoButton = 0
-    instances = []
-
-    def __init__(self):
-        self.window_title = None
-        self.text = None
-        self.standard_buttons = None
-        self.modal = None
-        self.show_count = 0
-        self.close_count = 0
-        FakeProgressDialog.instances.append(self)
-
-    def setWindowTitle(self, title):
-        self.window_title = title
-
-    def setText(self, text):
-        self.text = text
-
-    def setStandardButtons(self, buttons):
-        self.standard_buttons = buttons
-
-    def setModal(self, modal):
-        self.modal = modal
-
-    def show(self):
-        self.show_count += 1
-
-    def close(self):
-        self.close_count += 1
+CONFIG = {
+    "environment": "euphrosyne",
+    "euphrosyne": {"url": "https://euphrosyne.example"},
+}
 
 
 def test_init_azcopy_uses_writable_app_data_path_for_bundled_macos(
-    qapp, monkeypatch, tmp_path
+    monkeypatch, tmp_path
 ):
-    FakeProgressDialog.instances = []
     bundle_dir = tmp_path / "Euphrosyne Herma.app" / "Contents" / "Frameworks"
     app_data_dir = tmp_path / "app-data"
     download_calls = []
+    reports = []
 
-    monkeypatch.setattr(init_module, "QMessageBox", FakeProgressDialog)
-    monkeypatch.setattr(init_module, "is_azcopy_installed", lambda: False)
+    monkeypatch.setattr(init_module, "is_azcopy_installed", lambda release: False)
     monkeypatch.setattr(
         init_module,
         "download_azcopy",
-        lambda: download_calls.append(azcopy_module.get_azcopy_path()),
+        lambda release: download_calls.append(azcopy_module.get_azcopy_path()),
     )
 
     monkeypatch.setattr(azcopy_module, "IS_BUNDLED", True)
@@ -60,9 +34,94 @@ def test_init_azcopy_uses_writable_app_data_path_for_bundled_macos(
         lambda location: str(app_data_dir),
     )
 
-    init_module.init_azcopy(qapp)
+    init_module.init_azcopy(on_download=lambda: reports.append("download"))
 
     assert download_calls == [app_data_dir / "bin" / "azcopy" / "azcopy"]
     assert download_calls[0] != bundle_dir / "bin" / "azcopy" / "azcopy"
-    assert len(FakeProgressDialog.instances) == 1
-    assert FakeProgressDialog.instances[0].close_count == 1
+    assert reports == ["download"]
+
+
+def test_init_azcopy_replaces_installed_azcopy_with_pinned_release(monkeypatch):
+    release = {"version": "10.0.0", "url": "https://example/azcopy.zip", "sha256": ""}
+    downloads = []
+    monkeypatch.setattr(init_module, "get_azcopy_path", lambda: "azcopy")
+    monkeypatch.setattr(
+        init_module, "is_azcopy_installed", lambda release: release is None
+    )
+    monkeypatch.setattr(init_module, "download_azcopy", downloads.append)
+
+    init_module.init_azcopy(release)
+
+    assert downloads == [release]
+
+
+def test_init_azcopy_skips_platforms_without_azcopy_distribution(monkeypatch):
+    monkeypatch.setattr(init_module, "get_azcopy_path", lambda: None)
+    monkeypatch.setattr(
+        init_module,
+        "download_azcopy",
+        lambda release: pytest.fail("download_azcopy should not be called"),
+    )
+
+    init_module.init_azcopy(on_download=lambda: pytest.fail("nothing to download"))
+
+
+def test_init_access_token_refreshes_expired_token(monkeypatch):
+    refreshed_with = []
+    monkeypatch.setattr(init_module, "is_token_expired", lambda token: True)
+    monkeypatch.setattr(
+        init_module,
+        "refresh_token",
+        lambda host, refresh_token, client: refreshed_with.append(refresh_token)
+        or "fresh",
+    )
+
+    access_token = init_module.init_access_token(
+        CONFIG, "expired", lambda: "refresh-token"
+    )
+
+    assert access_token == "fresh"
+    assert refreshed_with == ["refresh-token"]
+
+
+def test_init_access_token_keeps_valid_token_without_reading_refresh_token(
+    monkeypatch,
+):
+    monkeypatch.setattr(init_module, "is_token_expired", lambda token: False)
+
+    access_token = init_module.init_access_token(
+        CONFIG, "valid", lambda: pytest.fail("refresh token should not be read")
+    )
+
+    assert access_token == "valid"
+
+
+@pytest.mark.parametrize("saved_access_token", [None, "expired"])
+def test_init_access_token_requires_login_without_usable_token(
+    monkeypatch, saved_access_token
+):
+    monkeypatch.setattr(init_module, "is_token_expired", lambda token: True)
+    monkeypatch.setattr(
+        init_module, "refresh_token", lambda host, refresh_token, client: None
+    )
+
+    assert (
+        init_module.init_access_token(CONFIG, saved_access_token, lambda: None) is None
+    )
+
+
+def test_azcopy_init_task_reports_download_and_failure(qapp, monkeypatch):
+    def failing_init_azcopy(release, on_download):
+        on_download()
+        raise azcopy_module.AzCopyDownloadError("checksum mismatch")
+
+    monkeypatch.setattr(init_module, "init_azcopy", failing_init_azcopy)
+    events = []
+    task = init_module.AzCopyInitTask()
+    task.signals.download_signal.connect(lambda: events.append("download"))
+    task.signals.finished_signal.connect(lambda: events.append("finished"))
+    task.signals.failed_signal.connect(events.append)
+
+    task.run()
+
+    assert events == ["download", "checksum mismatch"]
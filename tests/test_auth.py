@@ -1,5 +1,8 @@
+import asyncio
 import base64
 import json
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 
 import httpx
@@ -11,8 +14,10 @@ from data_upload.euphrosyne.auth import (
     EuphrosyneAuth,
     EuphrosyneAuthenticationError,
     EuphrosyneConnectionError,
+    TokenStore,
     clear_tokens,
     euphrosyne_login,
+    get_token_store,
     is_token_expired,
     load_refresh_token,
     refresh_token,
@@ -136,7 +141,7 @@ def test_refresh_token_wraps_connection_errors(httpx_mock):
         refresh_token("https://euphrosyne.example", "refresh-token")
 
 
-def test_auth_flow_refreshes_after_unauthorized_response():
+def test_sync_auth_flow_refreshes_after_unauthorized_response():
     settings = FakeSettings()
     auth = EuphrosyneAuth(
         access_token="old-access-token",
@@ -146,7 +151,7 @@ def test_auth_flow_refreshes_after_unauthorized_response():
     )
     original_request = httpx.Request("GET", "https://tools.example/data")
 
-    flow = auth.auth_flow(original_request)
+    flow = auth.sync_auth_flow(original_request)
     first_request = next(flow)
     first_authorization = first_request.headers["Authorization"]
     refresh_request = flow.send(httpx.Response(401, request=first_request))
@@ -166,7 +171,7 @@ def test_auth_flow_refreshes_after_unauthorized_response():
     assert retry_request.headers["Authorization"] == "Bearer new-access-token"
 
 
-def test_auth_flow_raises_when_refresh_response_fails():
+def test_sync_auth_flow_raises_when_refresh_response_fails():
     settings = FakeSettings()
     auth = EuphrosyneAuth(
         access_token="old-access-token",
@@ -176,7 +181,7 @@ def test_auth_flow_raises_when_refresh_response_fails():
     )
     original_request = httpx.Request("GET", "https://tools.example/data")
 
-    flow = auth.auth_flow(original_request)
+    flow = auth.sync_auth_flow(original_request)
     first_request = next(flow)
     refresh_request = flow.send(httpx.Response(401, request=first_request))
 
@@ -191,6 +196,213 @@ def test_auth_flow_raises_when_refresh_response_fails():
     assert settings.values == {}
 
 
+def test_sync_auth_flow_does_not_refresh_again_after_concurrent_refresh():
+    auth = EuphrosyneAuth(
+        access_token="old-access-token",
+        refresh_token="refresh-token",
+        host="https://euphrosyne.example",
+        settings=FakeSettings(),
+    )
+
+    flow = auth.sync_auth_flow(httpx.Request("GET", "https://tools.example/data"))
+    first_request = next(flow)
+    # Another request refreshed the token while this one was in flight.
+    auth.access_token = "new-access-token"
+    retry_request = flow.send(httpx.Response(401, request=first_request))
+
+    assert retry_request.url == "https://tools.example/data"
+    assert retry_request.headers["Authorization"] == "Bearer new-access-token"
+
+
+def _expiring_auth(expires_in: float, **kwargs) -> EuphrosyneAuth:
+    return EuphrosyneAuth(
+        access_token=_jwt_with_payload({"exp": time.time() + expires_in}),
+        refresh_token="refresh-token",
+        host="https://euphrosyne.example",
+        settings=FakeSettings(),
+        **kwargs,
+    )
+
+
+def _add_refresh_callback(httpx_mock, refreshes: list, delay: float = 0.0):
+    def refresh(request):
+        refreshes.append(request)
+        time.sleep(delay)
+        return httpx.Response(200, json={"access": "new-access-token"})
+
+    httpx_mock.add_callback(
+        refresh,
+        method="POST",
+        url="https://euphrosyne.example/api/auth/token/refresh/",
+        is_reusable=True,
+    )
+
+
+def test_needs_refresh_within_margin_of_expiry():
+    assert _expiring_auth(30, refresh_margin=60).needs_refresh() is True
+    assert _expiring_auth(120, refresh_margin=60).needs_refresh() is False
+    assert (
+        EuphrosyneAuth("not-a-jwt", "refresh-token", "https://e", FakeSettings())
+    ).needs_refresh() is False
+    assert (
+        EuphrosyneAuth(
+            _jwt_with_payload({"exp": 0}), None, "https://e", FakeSettings()
+        ).needs_refresh()
+        is False
+    )
+
+
+def test_sync_client_refreshes_token_before_it_expires(httpx_mock):
+    refreshes = []
+    _add_refresh_callback(httpx_mock, refreshes)
+    httpx_mock.add_response(url="https://tools.example/data", is_reusable=True)
+    auth = _expiring_auth(30)
+
+    with httpx.Client(auth=auth) as client:
+        client.get("https://tools.example/data")
+
+    assert len(refreshes) == 1
+    request = httpx_mock.get_request(url="https://tools.example/data")
+    assert request.headers["Authorization"] == "Bearer new-access-token"
+    assert auth.settings.values == {"access_token": "new-access-token"}
+
+
+def test_sync_client_shares_one_refresh_between_threads(httpx_mock):
+    refreshes = []
+    _add_refresh_callback(httpx_mock, refreshes, delay=0.05)
+    httpx_mock.add_response(url="https://tools.example/data", is_reusable=True)
+    auth = _expiring_auth(30)
+
+    with httpx.Client(auth=auth) as client:
+        threads = [
+            threading.Thread(target=client.get, args=("https://tools.example/data",))
+            for _index in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(refreshes) == 1
+    requests = httpx_mock.get_requests(url="https://tools.example/data")
+    assert [request.headers["Authorization"] for request in requests] == [
+        "Bearer new-access-token"
+    ] * 5
+
+
+def test_async_client_shares_one_refresh_between_tasks(httpx_mock):
+    refreshes = []
+    _add_refresh_callback(httpx_mock, refreshes)
+    httpx_mock.add_response(url="https://tools.example/data", is_reusable=True)
+    auth = _expiring_auth(30)
+
+    async def run():
+        async with httpx.AsyncClient(auth=auth) as client:
+            await asyncio.gather(
+                *(client.get("https://tools.example/data") for _index in range(5))
+            )
+
+    asyncio.run(run())
+    # A later event loop gets a lock of its own.
+    auth.access_token = _jwt_with_payload({"exp": time.time() + 30})
+    asyncio.run(run())
+
+    assert len(refreshes) == 2
+    requests = httpx_mock.get_requests(url="https://tools.example/data")
+    assert [request.headers["Authorization"] for request in requests] == [
+        "Bearer new-access-token"
+    ] * 10
+
+
+def _add_data_callback(httpx_mock):
+    # Rejects the old token; every request is in flight when the first 401 comes.
+    barrier = threading.Barrier(5, timeout=5)
+
+    def data(request):
+        if request.headers["Authorization"] == "Bearer old-access-token":
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            return httpx.Response(401)
+        return httpx.Response(200)
+
+    httpx_mock.add_callback(data, url="https://tools.example/data", is_reusable=True)
+
+
+def _unauthorized_auth() -> EuphrosyneAuth:
+    return EuphrosyneAuth(
+        access_token="old-access-token",
+        refresh_token="refresh-token",
+        host="https://euphrosyne.example",
+        settings=FakeSettings(),
+    )
+
+
+def test_sync_client_shares_one_refresh_after_concurrent_401s(httpx_mock):
+    refreshes = []
+    _add_refresh_callback(httpx_mock, refreshes, delay=0.05)
+    _add_data_callback(httpx_mock)
+    responses = []
+
+    with httpx.Client(auth=_unauthorized_auth()) as client:
+        threads = [
+            threading.Thread(
+                target=lambda: responses.append(
+                    client.get("https://tools.example/data").status_code
+                )
+            )
+            for _index in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(refreshes) == 1
+    assert responses == [200] * 5
+
+
+def test_async_client_shares_one_refresh_after_concurrent_401s(httpx_mock):
+    refreshes = []
+    _add_refresh_callback(httpx_mock, refreshes)
+    httpx_mock.add_response(
+        url="https://tools.example/data",
+        match_headers={"Authorization": "Bearer old-access-token"},
+        status_code=401,
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        url="https://tools.example/data",
+        match_headers={"Authorization": "Bearer new-access-token"},
+        is_reusable=True,
+    )
+
+    async def run():
+        async with httpx.AsyncClient(auth=_unauthorized_auth()) as client:
+            return await asyncio.gather(
+                *(client.get("https://tools.example/data") for _index in range(5))
+            )
+
+    responses = asyncio.run(run())
+
+    assert len(refreshes) == 1
+    assert [response.status_code for response in responses] == [200] * 5
+
+
+def test_failed_proactive_refresh_requires_login_again(httpx_mock):
+    httpx_mock.add_response(
+        method="POST",
+        url="https://euphrosyne.example/api/auth/token/refresh/",
+        status_code=401,
+        json={"detail": "token_not_valid"},
+    )
+
+    with httpx.Client(auth=_expiring_auth(30)) as client:
+        with pytest.raises(EuphrosyneAuthenticationError, match="Session expired"):
+            client.get("https://tools.example/data")
+
+
 def test_update_tokens_stores_new_access_token():
     settings = FakeSettings()
     auth = EuphrosyneAuth(
@@ -414,3 +626,159 @@ def test_clear_tokens_removes_settings_tokens_and_warns_when_keyring_delete_fail
             {"level": "warning"},
         )
     ]
+
+
+def _fake_keyring_helpers(monkeypatch, stored=None):
+    calls = []
+
+    def fake_load():
+        calls.append("load")
+        return stored
+
+    def fake_save(token):
+        calls.append(("save", token))
+        return True
+
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.load_keyring_refresh_token", fake_load
+    )
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.save_keyring_refresh_token", fake_save
+    )
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.delete_keyring_refresh_token",
+        lambda: calls.append("clear"),
+    )
+    return calls
+
+
+def test_token_store_loads_refresh_token_once(monkeypatch):
+    calls = _fake_keyring_helpers(monkeypatch, stored="refresh-token")
+    store = TokenStore(FakeSettings())
+
+    assert store.refresh_token == "refresh-token"
+    assert store.refresh_token == "refresh-token"
+    assert calls == ["load"]
+
+
+def test_token_store_loads_in_background(monkeypatch):
+    release = threading.Event()
+
+    def slow_load():
+        release.wait(5)
+        return "refresh-token"
+
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.load_keyring_refresh_token", slow_load
+    )
+    store = TokenStore(FakeSettings())
+
+    store.load_in_background()
+    threading.Timer(0.05, release.set).start()
+
+    assert store.refresh_token == "refresh-token"
+
+
+def test_token_store_keeps_tokens_saved_while_loading(monkeypatch):
+    release = threading.Event()
+
+    def slow_load():
+        release.wait(5)
+        return "stale-token"
+
+    calls = _fake_keyring_helpers(monkeypatch)
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.load_keyring_refresh_token", slow_load
+    )
+    store = TokenStore(FakeSettings())
+    store.load_in_background()
+
+    store.save("access-token", "new-refresh-token")
+    release.set()
+    store.flush()
+
+    assert store.refresh_token == "new-refresh-token"
+    assert calls == [("save", "new-refresh-token")]
+
+
+def test_token_store_writes_back_in_order_without_blocking(monkeypatch):
+    calls = _fake_keyring_helpers(monkeypatch)
+    release = threading.Event()
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.save_keyring_refresh_token",
+        lambda token: release.wait(5) and calls.append(("save", token)),
+    )
+    settings = FakeSettings()
+    store = TokenStore(settings)
+
+    store.save("access-token", "refresh-token")
+
+    assert settings.values == {"access_token": "access-token"}
+    assert store.refresh_token == "refresh-token"
+    assert calls == []
+
+    store.clear()
+    assert store.access_token is None
+    assert store.refresh_token is None
+    release.set()
+    store.flush()
+
+    assert calls == [("save", "refresh-token"), "clear"]
+
+
+def test_token_store_keeps_access_token_saved_after_a_slow_clear(monkeypatch):
+    calls = _fake_keyring_helpers(monkeypatch)
+    release = threading.Event()
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.delete_keyring_refresh_token",
+        lambda: release.wait(5) and calls.append("clear"),
+    )
+    settings = FakeSettings()
+    settings.values = {"access_token": "old", "refresh_token": "legacy"}
+    store = TokenStore(settings)
+
+    store.clear()
+    store.save("new-access-token", "new-refresh-token")
+    release.set()
+    store.flush()
+
+    assert calls == ["clear", ("save", "new-refresh-token")]
+    assert settings.values == {"access_token": "new-access-token"}
+    assert store.refresh_token == "new-refresh-token"
+
+
+def test_token_store_touches_settings_only_on_the_calling_thread(monkeypatch):
+    _fake_keyring_helpers(monkeypatch)
+    monkeypatch.setattr(
+        "data_upload.euphrosyne.auth.save_keyring_refresh_token", lambda token: False
+    )
+    caller = threading.current_thread()
+    settings = FakeSettings()
+    settings_threads = set()
+    for method in ("setValue", "value", "remove"):
+        original = getattr(settings, method)
+
+        def record(*args, original=original):
+            settings_threads.add(threading.current_thread())
+            return original(*args)
+
+        setattr(settings, method, record)
+    store = TokenStore(settings)
+
+    store.load_in_background()
+    store.save("access-token", "refresh-token")
+    store.flush()
+
+    assert settings_threads == {caller}
+    # The keyring failed to store the token: it is kept in QSettings instead.
+    assert settings.values == {
+        "access_token": "access-token",
+        "refresh_token": "refresh-token",
+    }
+
+
+def test_get_token_store_is_shared_per_settings():
+    settings = FakeSettings()
+
+    assert get_token_store(settings) is get_token_store(settings)
+    assert get_token_store(settings) is not get_token_store(FakeSettings())
@@ -1,4 +1,8 @@
+import hashlib
+import json
 import subprocess
+import threading
+import time
 from pathlib import Path
 
 import httpx
@@ -26,6 +30,8 @@ def test_get_copy_command_builds_recursive_command(monkeypatch, tmp_path):
         f"{source}/*",
         "https://storage.example/share?sas-token",
         "--recursive",
+        "--output-type",
+        "json",
     ]
 
 
@@ -55,20 +61,24 @@ def test_is_azcopy_installed_returns_false_when_path_is_not_configured(monkeypat
     assert azcopy.is_azcopy_installed() is False
 
 
+def _fake_version_run(calls, output="azcopy version 10.27.1\n"):
+    def fake_run(command, check, capture_output, text):
+        calls.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout=output)
+
+    return fake_run
+
+
 def test_is_azcopy_installed_runs_version_check(monkeypatch, tmp_path):
     binary = tmp_path / "azcopy"
     binary.write_text("binary")
     calls = []
 
-    def fake_run(command, check):
-        calls.append((command, check))
-        return subprocess.CompletedProcess(command, 0)
-
     monkeypatch.setattr(azcopy, "get_azcopy_path", lambda: binary)
-    monkeypatch.setattr(azcopy.subprocess, "run", fake_run)
+    monkeypatch.setattr(azcopy.subprocess, "run", _fake_version_run(calls))
 
     assert azcopy.is_azcopy_installed() is True
-    assert calls == [([binary, "--version"], True)]
+    assert calls == [[binary, "--version"]]
 
 
 def test_is_azcopy_installed_returns_false_when_version_check_fails(
@@ -77,7 +87,7 @@ def test_is_azcopy_installed_returns_false_when_version_check_fails(
     binary = tmp_path / "azcopy"
     binary.write_text("binary")
 
-    def fake_run(command, check):
+    def fake_run(command, check, capture_output, text):
         raise subprocess.CalledProcessError(1, command)
 
     monkeypatch.setattr(azcopy, "get_azcopy_path", lambda: binary)
@@ -86,6 +96,62 @@ def test_is_azcopy_installed_returns_false_when_version_check_fails(
     assert azcopy.is_azcopy_installed() is False
 
 
+def test_probe_azcopy_trusts_metadata_while_binary_is_unchanged(tmp_path, monkeypatch):
+    binary = tmp_path / "azcopy"
+    binary.write_text("binary")
+    store = azcopy.AzCopyMetadataStore(tmp_path / "azcopy.json")
+    calls = []
+    monkeypatch.setattr(azcopy.subprocess, "run", _fake_version_run(calls))
+
+    first = azcopy.probe_azcopy(binary, store)
+    second = azcopy.probe_azcopy(binary, store)
+    binary.write_text("another binary")
+    third = azcopy.probe_azcopy(binary, store)
+
+    assert first == second
+    assert first["version"] == "10.27.1"
+    assert first["sha256"] == hashlib.sha256(b"binary").hexdigest()
+    assert third["sha256"] == hashlib.sha256(b"another binary").hexdigest()
+    assert len(calls) == 2
+
+
+def test_is_azcopy_installed_checks_pinned_version(monkeypatch, tmp_path):
+    binary = tmp_path / "azcopy"
+    binary.write_text("binary")
+    monkeypatch.setattr(azcopy, "get_azcopy_path", lambda: binary)
+    monkeypatch.setattr(azcopy.subprocess, "run", _fake_version_run([]))
+
+    assert azcopy.is_azcopy_installed({"version": "10.27.1"}) is True
+    assert azcopy.is_azcopy_installed({"version": "10.28.0"}) is False
+
+
+@pytest.mark.parametrize(
+    "windows, macos, is_64bits, key",
+    [
+        (True, False, True, "windows-64"),
+        (True, False, False, "windows-32"),
+        (False, True, True, "macos"),
+        (False, False, True, None),
+    ],
+)
+def test_get_azcopy_release_picks_the_platform_release(
+    monkeypatch, windows, macos, is_64bits, key
+):
+    monkeypatch.setattr(azcopy, "_is_windows", windows)
+    monkeypatch.setattr(azcopy, "_is_macos", macos)
+    monkeypatch.setattr(azcopy, "_is_64bits", is_64bits)
+    releases = {
+        name: {"version": "10.27.1", "url": name, "sha256": ""}
+        for name in ("windows-64", "windows-32", "macos")
+    }
+
+    assert azcopy.get_platform_key() == key
+    assert azcopy.get_azcopy_release({"azcopy-releases": releases}) == (
+        releases.get(key)
+    )
+    assert azcopy.get_azcopy_release({}) is None
+
+
 def test_get_bin_folder_uses_app_data_for_bundled_macos(monkeypatch, tmp_path):
     app_data_dir = tmp_path / "app-data"
     bundle_dir = tmp_path / "Euphrosyne Herma.app" / "Contents" / "Frameworks"
@@ -113,28 +179,20 @@ def test_get_bin_folder_uses_repo_bin_for_non_bundled_runs(monkeypatch):
     )
 
 
-def test_download_azcopy_downloads_unzips_and_marks_macos_binary_executable(
-    monkeypatch, tmp_path
-):
-    bin_folder = tmp_path / "bin"
-    archive = tmp_path / "azcopy.zip"
-    chmod_calls = []
+def _patch_macos_download(monkeypatch, bin_folder, archive_content=b"zip"):
+    downloads = []
 
-    def fake_download_mac_azcopy(target_dir):
-        assert target_dir == bin_folder
-        archive.write_text("zip")
-        return archive
+    def fake_download_binary(url, dest_path):
+        downloads.append(url)
+        dest_path.write_bytes(archive_content)
+        return hashlib.sha256(archive_content).hexdigest()
 
     def fake_unzip_azcopy(zip_path, target_dir):
-        assert zip_path == archive
+        assert zip_path == bin_folder / "azcopy.zip"
         assert target_dir == bin_folder
         (bin_folder / "azcopy").mkdir(parents=True)
         (bin_folder / "azcopy" / "azcopy").write_text("binary")
-        archive.unlink()
-
-    def fake_run(command, check):
-        chmod_calls.append((command, check))
-        return subprocess.CompletedProcess(command, 0)
+        zip_path.unlink()
 
     monkeypatch.setattr(azcopy, "_get_bin_folder", lambda: bin_folder)
     monkeypatch.setattr(
@@ -143,18 +201,76 @@ def test_download_azcopy_downloads_unzips_and_marks_macos_binary_executable(
     monkeypatch.setattr(azcopy, "_is_macos", True)
     monkeypatch.setattr(azcopy, "_is_windows", False)
     monkeypatch.setattr(azcopy, "_os", "Darwin")
-    monkeypatch.setattr(azcopy, "_download_mac_azcopy", fake_download_mac_azcopy)
+    monkeypatch.setattr(azcopy, "_download_binary", fake_download_binary)
     monkeypatch.setattr(azcopy, "_unzip_azcopy", fake_unzip_azcopy)
+    return downloads
+
+
+def test_download_azcopy_downloads_unzips_and_marks_macos_binary_executable(
+    monkeypatch, tmp_path
+):
+    bin_folder = tmp_path / "bin"
+    downloads = _patch_macos_download(monkeypatch, bin_folder)
+    calls = []
+
+    def fake_run(command, check, **kwargs):
+        calls.append((command, check))
+        return subprocess.CompletedProcess(command, 0, stdout="azcopy 10.27.1")
+
     monkeypatch.setattr(azcopy.subprocess, "run", fake_run)
 
     azcopy.download_azcopy()
 
-    assert chmod_calls == [
+    assert downloads == ["https://aka.ms/downloadazcopy-v10-mac"]
+    assert calls == [
         (["chmod", "+x", str(bin_folder / "azcopy" / "azcopy")], True),
         ([bin_folder / "azcopy" / "azcopy", "--version"], True),
     ]
 
 
+def test_download_azcopy_installs_pinned_release_over_another_version(
+    monkeypatch, tmp_path
+):
+    bin_folder = tmp_path / "bin"
+    downloads = _patch_macos_download(monkeypatch, bin_folder)
+    (bin_folder / "azcopy").mkdir(parents=True)
+    (bin_folder / "azcopy" / "azcopy").write_text("old binary")
+
+    def fake_run(command, check, **kwargs):
+        if command[0] == "chmod":
+            return subprocess.CompletedProcess(command, 0)
+        version = "10.27.1" if command[0].read_text() == "binary" else "10.20.0"
+        return subprocess.CompletedProcess(command, 0, stdout=version)
+
+    monkeypatch.setattr(azcopy.subprocess, "run", fake_run)
+    release = {
+        "version": "10.27.1",
+        "url": "https://download.example/azcopy_darwin_10.27.1.zip",
+        "sha256": hashlib.sha256(b"zip").hexdigest().upper(),
+    }
+
+    azcopy.download_azcopy(release)
+
+    assert downloads == [release["url"]]
+    assert (bin_folder / "azcopy" / "azcopy").read_text() == "binary"
+    assert azcopy.is_azcopy_installed(release) is True
+
+
+def test_download_azcopy_rejects_archive_with_wrong_checksum(monkeypatch, tmp_path):
+    bin_folder = tmp_path / "bin"
+    _patch_macos_download(monkeypatch, bin_folder, archive_content=b"tampered")
+    release = {
+        "version": "10.27.1",
+        "url": "https://download.example/azcopy_darwin_10.27.1.zip",
+        "sha256": hashlib.sha256(b"zip").hexdigest(),
+    }
+
+    with pytest.raises(azcopy.AzCopyDownloadError, match="checksum"):
+        azcopy.download_azcopy(release)
+    assert not (bin_folder / "azcopy.zip").exists()
+    assert not (bin_folder / "azcopy").exists()
+
+
 def test_download_azcopy_raises_for_unsupported_os(monkeypatch):
     monkeypatch.setattr(azcopy, "_is_macos", False)
     monkeypatch.setattr(azcopy, "_is_windows", False)
@@ -191,9 +307,10 @@ def test_download_binary_streams_response_to_file(monkeypatch, tmp_path):
 
     monkeypatch.setattr(azcopy.httpx, "stream", fake_stream)
 
-    azcopy._download_binary("https://download.example/azcopy.zip", destination)
+    sha256 = azcopy._download_binary("https://download.example/azcopy.zip", destination)
 
     assert destination.read_bytes() == b"abcdef"
+    assert sha256 == hashlib.sha256(b"abcdef").hexdigest()
 
 
 def test_download_binary_raises_http_errors(monkeypatch, tmp_path):
@@ -221,3 +338,284 @@ def test_download_binary_raises_http_errors(monkeypatch, tmp_path):
 
     with pytest.raises(httpx.HTTPStatusError):
         azcopy._download_binary("https://download.example/azcopy.zip", destination)
+
+
+def test_resolve_latest_azcopy_release_follows_link_to_versioned_archive(
+    httpx_mock,
+):
+    archive_url = (
+        "https://azcopy.example/releases/release-10.27.1-20241113/"
+        "azcopy_darwin_amd64_10.27.1.zip"
+    )
+    httpx_mock.add_response(
+        url=azcopy.LATEST_AZCOPY_URLS["macos"],
+        status_code=301,
+        headers={"Location": archive_url},
+    )
+    httpx_mock.add_response(url=archive_url, content=b"archive")
+
+    release = azcopy.resolve_latest_azcopy_release("macos")
+
+    assert release == {
+        "version": "10.27.1",
+        "url": archive_url,
+        "sha256": hashlib.sha256(b"archive").hexdigest(),
+    }
+
+
+def test_resolve_latest_azcopy_release_needs_a_versioned_archive(httpx_mock):
+    httpx_mock.add_response(url=azcopy.LATEST_AZCOPY_URLS["macos"], content=b"zip")
+
+    with pytest.raises(azcopy.AzCopyDownloadError, match="AzCopy version"):
+        azcopy.resolve_latest_azcopy_release("macos")
+
+
+def _azcopy_json(message_type, content):
+    if isinstance(content, dict):
+        content = json.dumps(content)
+    return json.dumps({"MessageType": message_type, "MessageContent": content}) + "\n"
+
+
+class FakeStdout:
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeProcess:
+    def __init__(self, lines, returncode):
+        self.stdout = FakeStdout(lines)
+        self.returncode = returncode
+        self.wait_called = False
+
+    def wait(self):
+        self.wait_called = True
+
+
+def test_run_azcopy_parses_json_messages_into_progress_events(monkeypatch):
+    summary = {
+        "JobID": "job-1",
+        "JobStatus": "InProgress",
+        "TotalBytesTransferred": "50",
+        "TotalBytesExpected": "100",
+        "TransfersCompleted": "1",
+        "TransfersFailed": "0",
+        "TransfersSkipped": "0",
+        "TotalTransfers": "2",
+    }
+    process = FakeProcess(
+        [
+            _azcopy_json("Init", {"JobID": "job-1", "LogFileLocation": "/tmp"}),
+            _azcopy_json("Progress", summary),
+            _azcopy_json("Progress", {**summary, "TotalBytesTransferred": "60"}),
+            "plain text line\n",
+            _azcopy_json("Info", "Scanning files"),
+            _azcopy_json(
+                "EndOfJob",
+                {
+                    **summary,
+                    "JobStatus": "Completed",
+                    "TotalBytesTransferred": "100",
+                    "TransfersCompleted": "2",
+                },
+            ),
+        ],
+        returncode=0,
+    )
+    popen_calls = []
+
+    def fake_popen(*args, **kwargs):
+        popen_calls.append((args, kwargs))
+        return process
+
+    monkeypatch.setattr(azcopy.subprocess, "Popen", fake_popen)
+    output = []
+    progress = []
+    job_ids = []
+
+    return_code = azcopy.run_azcopy(
+        ["azcopy", "copy"],
+        output.append,
+        progress.append,
+        throttle_interval=60,
+        on_job_started=job_ids.append,
+    )
+
+    assert return_code == 0
+    assert job_ids == ["job-1"]
+    assert output == ["AzCopy job job-1 started.", "plain text line", "Scanning files"]
+    # The second progress message falls inside the throttle interval.
+    assert [event["bytes_transferred"] for event in progress] == [50, 100]
+    assert progress[0]["job_id"] == "job-1"
+    assert progress[0]["final"] is False
+    assert progress[-1]["final"] is True
+    assert progress[-1]["files_completed"] == 2
+    assert process.stdout.closed is True
+    assert process.wait_called is True
+    assert popen_calls == [
+        (
+            (["azcopy", "copy"],),
+            {
+                "stdout": subprocess.PIPE,
+                "stderr": subprocess.STDOUT,
+                "text": True,
+                "bufsize": 1,
+                "env": None,
+            },
+        )
+    ]
+
+
+def test_get_resume_command_passes_fresh_sas_token(monkeypatch, tmp_path):
+    binary = tmp_path / "azcopy"
+    monkeypatch.setattr(azcopy, "get_azcopy_path", lambda: binary)
+    monkeypatch.setattr(azcopy, "is_azcopy_installed", lambda: True)
+
+    assert azcopy.get_resume_command("job-1", "fresh-sas") == [
+        str(binary),
+        "jobs",
+        "resume",
+        "job-1",
+        "--destination-sas",
+        "fresh-sas",
+        "--output-type",
+        "json",
+    ]
+
+
+def test_get_copy_command_copies_listed_files_only(monkeypatch, tmp_path):
+    binary = tmp_path / "azcopy"
+    monkeypatch.setattr(azcopy, "get_azcopy_path", lambda: binary)
+    monkeypatch.setattr(azcopy, "is_azcopy_installed", lambda: True)
+    list_of_files = azcopy.write_list_of_files(["new.txt", "spectra/changed.bin"])
+
+    try:
+        command = azcopy.get_copy_command(
+            str(tmp_path), "https://share", "sas", list_of_files
+        )
+
+        assert list_of_files.read_text(encoding="utf-8") == (
+            "new.txt\nspectra/changed.bin\n"
+        )
+    finally:
+        list_of_files.unlink()
+    assert command == [
+        str(binary),
+        "copy",
+        str(tmp_path),
+        "https://share?sas",
+        "--recursive",
+        "--output-type",
+        "json",
+        f"--list-of-files={list_of_files}",
+    ]
+
+
+def test_run_azcopy_uses_expected_totals_until_azcopy_reports_them(monkeypatch):
+    lines = [
+        _azcopy_json(
+            "Progress",
+            {"JobStatus": "InProgress", "TotalBytesTransferred": "10"},
+        ),
+    ]
+    monkeypatch.setattr(
+        azcopy.subprocess, "Popen", lambda *args, **kwargs: FakeProcess(lines, 0)
+    )
+    progress = []
+
+    azcopy.run_azcopy(
+        ["azcopy", "copy"],
+        lambda line: None,
+        progress.append,
+        expected_bytes=40,
+        expected_files=3,
+    )
+
+    assert progress[0]["bytes_total"] == 40
+    assert progress[0]["files_total"] == 3
+
+
+class BlockingProcess(FakeProcess):
+    """Prints its lines, then runs until terminated."""
+
+    def __init__(self, lines):
+        super().__init__(lines, returncode=None)
+        self.terminated = threading.Event()
+
+        def _lines():
+            yield from lines
+            self.terminated.wait(5)
+
+        self.stdout = FakeStdout(_lines())
+
+    def terminate(self):
+        self.returncode = -15
+        self.terminated.set()
+
+
+class FakeLease:
+    def __init__(self):
+        self.renew_times = [time.time(), None]
+        self.renewed = 0
+
+    def renew_at(self):
+        return self.renew_times.pop(0)
+
+    def renew(self):
+        self.renewed += 1
+        return "new-sas"
+
+
+def test_run_azcopy_resumes_job_with_renewed_sas_token(monkeypatch):
+    binary = Path("/opt/azcopy")
+    monkeypatch.setattr(azcopy, "get_azcopy_path", lambda: binary)
+    monkeypatch.setattr(azcopy, "is_azcopy_installed", lambda: True)
+    processes = [
+        BlockingProcess([_azcopy_json("Init", {"JobID": "job-1"})]),
+        FakeProcess([_azcopy_json("EndOfJob", {"JobStatus": "Completed"})], 0),
+    ]
+    commands = []
+
+    def fake_popen(command, **kwargs):
+        commands.append(command)
+        return processes.pop(0)
+
+    monkeypatch.setattr(azcopy.subprocess, "Popen", fake_popen)
+    output = []
+    job_ids = []
+    lease = FakeLease()
+
+    return_code = azcopy.run_azcopy(
+        ["azcopy", "copy"],
+        output.append,
+        lambda progress: None,
+        on_job_started=job_ids.append,
+        sas_lease=lease,
+        resume_args=["--cap-mbps", "10"],
+    )
+
+    assert return_code == 0
+    assert lease.renewed == 1
+    assert commands[1] == [
+        str(binary),
+        "jobs",
+        "resume",
+        "job-1",
+        "--destination-sas",
+        "new-sas",
+        "--output-type",
+        "json",
+        "--cap-mbps",
+        "10",
+    ]
+    assert job_ids == ["job-1"]
+    assert (
+        "The SAS token expires soon; resuming AzCopy job job-1 with a new one."
+        in output
+    )
@@ -0,0 +1,112 @@
+import datetime
+
+import pytest
+
+from data_upload.bandwidth import (
+    BandwidthLimiter,
+    TokenBucket,
+    get_cap_args,
+    is_in_window,
+    mbps_to_bytes_per_second,
+    resolve_cap_mbps,
+)
+
+BEAM_TIME = {
+    "cap-mbps": 200,
+    "schedule": [
+        {"start": "08:00", "end": "20:00", "cap-mbps": 20, "days": ["mon", "tue"]},
+        {"start": "22:00", "end": "06:00"},
+    ],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_mbps_are_megabits():
+    assert mbps_to_bytes_per_second(8) == 1_000_000
+
+
+def test_schedule_windows_apply_by_time_and_day():
+    monday_noon = datetime.datetime(2024, 1, 1, 12, 0)
+    wednesday_noon = datetime.datetime(2024, 1, 3, 12, 0)
+    tuesday_night = datetime.datetime(2024, 1, 2, 23, 30)
+    wednesday_dawn = datetime.datetime(2024, 1, 3, 5, 0)
+
+    assert resolve_cap_mbps(BEAM_TIME, monday_noon) == 20
+    assert resolve_cap_mbps(BEAM_TIME, wednesday_noon) == 200
+    # A window without cap runs at full speed.
+    assert resolve_cap_mbps(BEAM_TIME, tuesday_night) is None
+    assert resolve_cap_mbps(BEAM_TIME, wednesday_dawn) is None
+
+
+def test_window_spanning_midnight_uses_the_start_day():
+    window = {"start": "22:00", "end": "02:00", "days": ["fri"]}
+
+    assert is_in_window(window, datetime.datetime(2024, 1, 5, 23, 0)) is True
+    assert is_in_window(window, datetime.datetime(2024, 1, 6, 1, 0)) is True
+    assert is_in_window(window, datetime.datetime(2024, 1, 7, 1, 0)) is False
+
+
+def test_job_override_wins_and_zero_removes_cap():
+    now = datetime.datetime(2024, 1, 1, 12, 0)
+
+    assert resolve_cap_mbps(BEAM_TIME, now, override=5) == 5
+    assert resolve_cap_mbps(BEAM_TIME, now, override=0) is None
+    assert resolve_cap_mbps(None, now) is None
+
+
+def test_invalid_schedule_time_is_reported():
+    with pytest.raises(ValueError, match="HH:MM"):
+        resolve_cap_mbps({"schedule": [{"start": "8h", "end": "20:00"}]})
+
+
+def test_cap_args():
+    assert get_cap_args(12.5) == ["--cap-mbps", "12.5"]
+    assert get_cap_args(None) == []
+
+
+def test_token_bucket_sleeps_off_debt_beyond_one_second_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock, sleep=clock.sleep)
+
+    bucket.consume(1000)
+    bucket.consume(500)
+    bucket.consume(500)
+
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_token_bucket_without_rate_never_sleeps():
+    clock = FakeClock()
+    bucket = TokenBucket(None, clock=clock, sleep=clock.sleep)
+
+    bucket.consume(10**9)
+
+    assert clock.sleeps == []
+
+
+def test_bandwidth_limiter_follows_cap_changes():
+    clock = FakeClock()
+    caps = [0.008]
+    limiter = BandwidthLimiter(
+        lambda: caps[-1], refresh_interval=10, clock=clock, sleep=clock.sleep
+    )
+
+    limiter.consume(2000)
+    assert clock.sleeps == [1.0]
+
+    caps.append(None)
+    clock.now += 10
+    limiter.consume(10**9)
+    assert clock.sleeps == [1.0]
@@ -0,0 +1,115 @@
+import pytest
+
+from data_upload.batch import ManifestError, format_results_table, load_upload_requests
+
+DATA_TYPES = ("processed-data", "raw-data")
+
+
+def test_load_yaml_manifest_resolves_relative_paths(tmp_path):
+    manifest = tmp_path / "uploads.yml"
+    manifest.write_text(
+        """
+jobs:
+  - project: Project A
+    run: Run 1
+    data-type: raw-data
+    data-path: run-1
+  - project: Project B
+    run: Run 2
+    data_type: processed-data
+    data_path: /data/run-2
+""".lstrip()
+    )
+
+    assert load_upload_requests(str(manifest), DATA_TYPES) == [
+        {
+            "project": "Project A",
+            "run": "Run 1",
+            "data_type": "raw-data",
+            "data_path": str(tmp_path / "run-1"),
+        },
+        {
+            "project": "Project B",
+            "run": "Run 2",
+            "data_type": "processed-data",
+            "data_path": "/data/run-2",
+        },
+    ]
+
+
+def test_load_csv_manifest(tmp_path):
+    manifest = tmp_path / "uploads.csv"
+    manifest.write_text(
+        "project,run,data-type,data-path\nProject A,Run 1,raw-data,/data/run-1\n"
+    )
+
+    assert load_upload_requests(str(manifest), DATA_TYPES) == [
+        {
+            "project": "Project A",
+            "run": "Run 1",
+            "data_type": "raw-data",
+            "data_path": "/data/run-1",
+        }
+    ]
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        ("[]", "does not list any upload job"),
+        ("- project: A\n  run: R\n  data-type: raw-data\n", "missing data_path"),
+        (
+            "- {project: A, run: R, data-type: images, data-path: /d}\n",
+            "invalid data type 'images'",
+        ),
+        ("- just a string\n", "is not a mapping"),
+    ],
+)
+def test_load_manifest_reports_invalid_jobs(tmp_path, content, message):
+    manifest = tmp_path / "uploads.yml"
+    manifest.write_text(content)
+
+    with pytest.raises(ManifestError, match=message):
+        load_upload_requests(str(manifest), DATA_TYPES)
+
+
+def test_load_manifest_reports_missing_file(tmp_path):
+    with pytest.raises(ManifestError, match="Could not read manifest"):
+        load_upload_requests(str(tmp_path / "missing.yml"), DATA_TYPES)
+
+
+def test_format_results_table_aligns_columns():
+    request = {
+        "project": "Project A",
+        "run": "Run 1",
+        "data_type": "raw-data",
+        "data_path": "/d",
+    }
+
+    table = format_results_table(
+        [
+            {
+                "request": request,
+                "return_code": 0,
+                "files": 12,
+                "bytes": 2000,
+                "elapsed": 61,
+                "error": None,
+            },
+            {
+                "request": {**request, "run": "Run 10"},
+                "return_code": 1,
+                "files": 3,
+                "bytes": 10,
+                "elapsed": 1,
+                "error": "HTTP 500",
+            },
+        ]
+    )
+
+    assert table.splitlines() == [
+        "Project    Run     Data type  Files  Size    Time      Result",
+        "---------  ------  ---------  -----  ------  --------  ----------------",
+        "Project A  Run 1   raw-data   12     2.0 KB  00:01:01  OK",
+        "Project A  Run 10  raw-data   3      10 B    00:00:01  FAILED: HTTP 500",
+    ]
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from bench.__main__ import main
+from bench.datasets import dataset_spec, generate_dataset
+from bench.fake_storage import start_fake_storage
+from bench.fake_tools import start_fake_tools
+from bench.runner import compare_reports, run_upload
+
+
+def test_generate_dataset_is_deterministic(tmp_path):
+    spec = generate_dataset("deep-tree", tmp_path / "a", scale=0.01)
+    generate_dataset("deep-tree", tmp_path / "b", scale=0.01)
+
+    files_a = sorted(
+        p.relative_to(tmp_path / "a") for p in (tmp_path / "a").rglob("*.bin")
+    )
+    files_b = sorted(
+        p.relative_to(tmp_path / "b") for p in (tmp_path / "b").rglob("*.bin")
+    )
+    assert files_a == files_b
+    assert len(files_a) == spec.file_count
+    assert max(len(path.parts) for path in files_a) == spec.depth + 1
+    assert (tmp_path / "a" / files_a[3]).read_bytes() == (
+        tmp_path / "b" / files_b[3]
+    ).read_bytes()
+
+
+def test_dataset_spec_rejects_unknown_dataset():
+    with pytest.raises(ValueError, match="unknown"):
+        dataset_spec("unknown")
+
+
+def test_run_upload_against_fake_servers(tmp_path):
+    generate_dataset("tiny-files", tmp_path, scale=0.005)
+    share, storage_server = start_fake_storage()
+    api, tools_url, tools_server = start_fake_tools(share)
+    try:
+        result = run_upload("tiny-files", str(tmp_path), tools_url, concurrency=4)
+    finally:
+        tools_server.shutdown()
+        storage_server.shutdown()
+
+    assert result["return_code"] == 0
+    assert result["files"] == 25
+    assert result["bytes"] == 25 * 2048
+    assert share.bytes_received == 25 * 2048
+    assert [method for method, _path in api.requests] == ["POST", "POST", "GET"]
+    assert result["wall_time"] > 0
+
+
+def test_compare_reports_uses_median_wall_time():
+    def result(dataset, wall_time):
+        return {"dataset": dataset, "wall_time": wall_time, "peak_rss": 100}
+
+    baseline = {"results": [result("tiny-files", 2.0), result("tiny-files", 4.0)]}
+    current = {
+        "results": [result("tiny-files", 3.0), result("deep-tree", 1.0)],
+    }
+
+    assert compare_reports(baseline, current) == [
+        "tiny-files: wall time -25.0%, peak RSS +0.0%",
+        "deep-tree: no baseline",
+    ]
+
+
+def test_main_writes_report(tmp_path):
+    output = tmp_path / "report.json"
+
+    code = main(
+        ["--dataset", "huge-files", "--scale", "0.0001", "--output", str(output)]
+    )
+
+    report = json.loads(output.read_text())
+    assert code == 0
+    assert report["version"] == 1
+    [result] = report["results"]
+    assert result["dataset"] == "huge-files"
+    assert result["files"] == 4
+    assert result["peak_rss"] > 0
@@ -0,0 +1,74 @@
+import pytest
+
+from data_upload.cache import TTLCache, ttl_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("key", "value")
+
+    clock.now = 9.9
+    assert cache.get("key") == "value"
+    clock.now = 10
+    assert cache.get("key", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(ttl=10, maxsize=2, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_ttl_cache_decorator_caches_calls_per_arguments():
+    calls = []
+
+    @ttl_cache(ttl=60)
+    def double(value, factor=2):
+        calls.append(value)
+        return value * factor
+
+    assert double(1) == 2
+    assert double(1) == 2
+    assert double(1, factor=3) == 3
+    assert calls == [1, 1]
+
+    double.cache_invalidate(1)
+    assert double(1) == 2
+    assert double(1, factor=3) == 3
+    assert calls == [1, 1, 1]
+
+    double.cache_clear()
+    double(1, factor=3)
+    assert calls == [1, 1, 1, 1]
+
+
+def test_ttl_cache_decorator_does_not_cache_exceptions():
+    calls = []
+
+    @ttl_cache(ttl=60)
+    def flaky():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("unavailable")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        flaky()
+    assert flaky() == "ok"
+    assert flaky() == "ok"
+    assert len(calls) == 2
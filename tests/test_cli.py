@@ -1,8 +1,9 @@
-import subprocess
-
+import httpx
 import pytest
 
 from data_upload import cli as cli_module
+from data_upload.config import ConfigError
+from data_upload.folder_init import InitializedFolderStore
 
 
 class FakeSettings:
@@ -92,13 +93,20 @@ def test_cli_uploads_data_and_normalizes_data_type(
         "sas": [],
         "copy": [],
         "run": [],
+        "env": [],
+        "expected": [],
+        "clients": [],
     }
 
     class FakeToolsService:
-        def __init__(self, host, auth):
+        def __init__(self, host, auth, client=None):
             calls["service"].append((host, auth.access_token, auth.refresh_token))
+            calls["clients"].append(client)
+
+        def init_project_folder(self, project_slug):
+            calls["init"].append(project_slug)
 
-        def init_folders(self, project_slug, run_name):
+        def init_run_folders(self, project_slug, run_name):
             calls["init"].append((project_slug, run_name))
 
         def get_run_data_upload_shared_access_signature(
@@ -107,20 +115,24 @@ def test_cli_uploads_data_and_normalizes_data_type(
             calls["sas"].append((project_slug, run_name, data_type))
             return {"url": "https://storage.example/share", "token": "sas-token"}
 
-    def fake_login(host, email, password):
+    def fake_login(host, email, password, client=None):
         calls["login"].append((host, email, password))
+        calls["clients"].append(client)
         return ("access-token", "refresh-token")
 
     def fake_save_refresh_token(saved_settings, refresh_token):
         calls["saved_refresh"].append((saved_settings, refresh_token))
 
-    def fake_get_copy_command(src, dest, sas_token):
+    def fake_get_copy_command(src, dest, sas_token, list_of_files=None):
         calls["copy"].append((src, dest, sas_token))
         return ["azcopy", "copy"]
 
-    def fake_run(command):
-        calls["run"].append(command)
-        return subprocess.CompletedProcess(command, 0)
+    def fake_run_azcopy(command, on_output, on_progress, throttle_interval, **kwargs):
+        calls["run"].append((command, throttle_interval))
+        calls["env"].append(kwargs["env"])
+        calls["expected"].append((kwargs["expected_bytes"], kwargs["expected_files"]))
+        kwargs["on_job_started"]("job-1")
+        return 0
 
     monkeypatch.setattr(cli_module, "load_config", lambda: CONFIG_CATALOG)
     monkeypatch.setattr(cli_module, "QSettings", lambda org, app: settings)
@@ -132,15 +144,15 @@ def test_cli_uploads_data_and_normalizes_data_type(
     )
     monkeypatch.setattr(cli_module, "euphrosyne_login", fake_login)
     monkeypatch.setattr(cli_module, "save_refresh_token", fake_save_refresh_token)
-    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda: True)
+    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda release=None: True)
     monkeypatch.setattr(
         cli_module,
         "download_azcopy",
-        lambda: pytest.fail("download_azcopy should not be called"),
+        lambda release=None: pytest.fail("download_azcopy should not be called"),
     )
     monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
     monkeypatch.setattr(cli_module, "get_copy_command", fake_get_copy_command)
-    monkeypatch.setattr(cli_module.subprocess, "run", fake_run)
+    monkeypatch.setattr(cli_module, "run_azcopy", fake_run_azcopy)
 
     exit_code = cli_module.main(
         [
@@ -165,12 +177,19 @@ def test_cli_uploads_data_and_normalizes_data_type(
     assert calls["service"] == [
         ("https://tools.example", "access-token", "refresh-token")
     ]
-    assert calls["init"] == [("Project A", "Run 1")]
+    assert calls["init"] == ["Project A", ("Project A", "Run 1")]
     assert calls["sas"] == [("Project A", "Run 1", tools_data_type)]
     assert calls["copy"] == [
         (str(data_path), "https://storage.example/share", "sas-token")
     ]
-    assert calls["run"] == [["azcopy", "copy"]]
+    assert calls["run"] == [(["azcopy", "copy"], cli_module.CLI_PROGRESS_INTERVAL)]
+    assert "AZCOPY_CONCURRENCY_VALUE" in calls["env"][0]
+    assert "AZCOPY_BUFFER_GB" in calls["env"][0]
+    assert calls["expected"] == [(0, 0)]
+    # Login and tools calls share one pooled client, closed once uploads end.
+    login_client, service_client = calls["clients"]
+    assert login_client is service_client
+    assert isinstance(login_client, httpx.Client) and login_client.is_closed
 
 
 def test_cli_uses_provided_email_without_prompting(monkeypatch, tmp_path):
@@ -180,10 +199,13 @@ def test_cli_uses_provided_email_without_prompting(monkeypatch, tmp_path):
     login_calls = []
 
     class FakeToolsService:
-        def __init__(self, host, auth):
+        def __init__(self, host, auth, client=None):
             pass
 
-        def init_folders(self, project_name, run_name):
+        def init_project_folder(self, project_slug):
+            pass
+
+        def init_run_folders(self, project_slug, run_name):
             pass
 
         def get_run_data_upload_shared_access_signature(
@@ -201,20 +223,20 @@ def test_cli_uses_provided_email_without_prompting(monkeypatch, tmp_path):
     monkeypatch.setattr(
         cli_module,
         "euphrosyne_login",
-        lambda host, email, password: login_calls.append((host, email, password))
+        lambda host, email, password, client=None: login_calls.append(
+            (host, email, password)
+        )
         or ("access-token", "refresh-token"),
     )
     monkeypatch.setattr(cli_module, "save_refresh_token", lambda settings, token: None)
-    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda: True)
+    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda release=None: True)
     monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
     monkeypatch.setattr(
-        cli_module, "get_copy_command", lambda src, dest, token: ["azcopy"]
-    )
-    monkeypatch.setattr(
-        cli_module.subprocess,
-        "run",
-        lambda command: subprocess.CompletedProcess(command, 0),
+        cli_module,
+        "get_copy_command",
+        lambda src, dest, token, list_of_files=None: ["azcopy"],
     )
+    monkeypatch.setattr(cli_module, "run_azcopy", lambda command, **kwargs: 0)
 
     exit_code = cli_module.main(
         [
@@ -245,10 +267,13 @@ def test_cli_accepts_environment_flag_and_uses_selected_hosts(monkeypatch, tmp_p
     service_calls = []
 
     class FakeToolsService:
-        def __init__(self, host, auth):
+        def __init__(self, host, auth, client=None):
             service_calls.append((host, auth.host))
 
-        def init_folders(self, project_name, run_name):
+        def init_project_folder(self, project_slug):
+            pass
+
+        def init_run_folders(self, project_slug, run_name):
             pass
 
         def get_run_data_upload_shared_access_signature(
@@ -263,20 +288,20 @@ def test_cli_accepts_environment_flag_and_uses_selected_hosts(monkeypatch, tmp_p
     monkeypatch.setattr(
         cli_module,
         "euphrosyne_login",
-        lambda host, email, password: login_calls.append((host, email, password))
+        lambda host, email, password, client=None: login_calls.append(
+            (host, email, password)
+        )
         or ("access-token", "refresh-token"),
     )
     monkeypatch.setattr(cli_module, "save_refresh_token", lambda settings, token: None)
-    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda: True)
+    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda release=None: True)
     monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
     monkeypatch.setattr(
-        cli_module, "get_copy_command", lambda src, dest, token: ["azcopy"]
-    )
-    monkeypatch.setattr(
-        cli_module.subprocess,
-        "run",
-        lambda command: subprocess.CompletedProcess(command, 0),
+        cli_module,
+        "get_copy_command",
+        lambda src, dest, token, list_of_files=None: ["azcopy"],
     )
+    monkeypatch.setattr(cli_module, "run_azcopy", lambda command, **kwargs: 0)
 
     exit_code = cli_module.main(
         [
@@ -333,7 +358,7 @@ def test_cli_returns_error_when_login_fails(monkeypatch, tmp_path, capsys):
     monkeypatch.setattr("builtins.input", lambda prompt: "user@example.com")
     monkeypatch.setattr(cli_module.getpass, "getpass", lambda prompt: "secret")
     monkeypatch.setattr(
-        cli_module, "euphrosyne_login", lambda host, email, password: None
+        cli_module, "euphrosyne_login", lambda host, email, password, client=None: None
     )
 
     exit_code = cli_module.main(
@@ -351,3 +376,606 @@ def test_cli_returns_error_when_login_fails(monkeypatch, tmp_path, capsys):
 
     assert exit_code == 1
     assert "Login failed" in capsys.readouterr().err
+
+
+def test_cli_native_engine_uploads_without_azcopy(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    upload_calls = []
+
+    class FakeToolsService:
+        def __init__(self, host, auth, client=None):
+            pass
+
+        def init_project_folder(self, project_slug):
+            pass
+
+        def init_run_folders(self, project_slug, run_name):
+            pass
+
+        def get_run_data_upload_shared_access_signature(
+            self, project_slug, run_name, data_type
+        ):
+            return {"url": "https://storage.example/share", "token": "sas-token"}
+
+    class FakeNativeUploadEngine:
+        def __init__(self, **options):
+            self.options = options
+
+        def upload(
+            self, src, dest, sas_token, on_output, on_progress, only_files, manifest
+        ):
+            # A callable, so that the token can be renewed mid-upload.
+            upload_calls.append((src, dest, sas_token()))
+            return 0
+
+    monkeypatch.setattr(cli_module, "load_config", lambda: CONFIG_CATALOG)
+    monkeypatch.setattr(cli_module, "QSettings", lambda org, app: FakeSettings())
+    monkeypatch.setattr(cli_module.getpass, "getpass", lambda prompt: "secret")
+    monkeypatch.setattr(
+        cli_module,
+        "euphrosyne_login",
+        lambda host, email, password, client=None: ("access-token", "refresh-token"),
+    )
+    monkeypatch.setattr(cli_module, "save_refresh_token", lambda settings, token: None)
+    monkeypatch.setattr(
+        cli_module,
+        "is_azcopy_installed",
+        lambda: pytest.fail("AzCopy should not be probed"),
+    )
+    monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
+    monkeypatch.setattr(cli_module, "NativeUploadEngine", FakeNativeUploadEngine)
+
+    exit_code = cli_module.main(
+        [
+            "--project",
+            "Project A",
+            "--run",
+            "Run 1",
+            "--data-type",
+            "raw-data",
+            "--data-path",
+            str(data_path),
+            "--email",
+            "user@example.com",
+            "--engine",
+            "native",
+        ]
+    )
+
+    assert exit_code == 0
+    assert upload_calls == [
+        (str(data_path), "https://storage.example/share", "sas-token")
+    ]
+    job_store = cli_module.UploadJobStore()
+    job = job_store.list_jobs()[-1]
+    assert job["engine"] == "native"
+    assert job["status"] == "completed"
+    assert job_store.recent_projects("euphrosyne") == ["Project A"]
+
+
+def test_cli_native_engine_initializes_missing_destination_again(
+    monkeypatch, tmp_path, fake_storage, capsys
+):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "data.txt").write_bytes(b"data")
+    # Remembered from an earlier upload, but since deleted on the share.
+    store = InitializedFolderStore()
+    store.record("euphrosyne", "Project A")
+    store.record("euphrosyne", "Project A", "Run 1")
+    init_calls = []
+
+    class FakeToolsService:
+        def __init__(self, host, auth, client=None):
+            pass
+
+        def init_project_folder(self, project_slug):
+            init_calls.append(project_slug)
+
+        def init_run_folders(self, project_slug, run_name):
+            init_calls.append((project_slug, run_name))
+            fake_storage.make_directories("project-a/run-1")
+
+        def get_run_data_upload_shared_access_signature(
+            self, project_slug, run_name, data_type
+        ):
+            return {
+                "url": f"{fake_storage.url}/project-a/run-1/",
+                "token": "sig=fake-signature",
+            }
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), None)
+    monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
+
+    exit_code = cli_module.main(_upload_argv(data_path, "--engine", "native"))
+
+    assert exit_code == 0
+    assert init_calls == ["Project A", ("Project A", "Run 1")]
+    assert bytes(fake_storage.files["project-a/run-1/data.txt"]) == b"data"
+    assert "initializing it again" in capsys.readouterr().out
+    assert store.is_initialized("euphrosyne", "Project A", "Run 1")
+
+
+def test_cli_skips_folder_init_remembered_from_earlier_uploads(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    init_calls = []
+
+    class FakeToolsService:
+        def __init__(self, host, auth, client=None):
+            pass
+
+        def init_project_folder(self, project_slug):
+            init_calls.append(project_slug)
+
+        def init_run_folders(self, project_slug, run_name):
+            init_calls.append((project_slug, run_name))
+
+        def get_run_data_upload_shared_access_signature(
+            self, project_slug, run_name, data_type
+        ):
+            return {"url": "https://storage.example/share", "token": "fresh-sas"}
+
+    return_codes = [0, 0, 1, 0]
+    _patch_azcopy_upload(
+        monkeypatch, FakeSettings(), lambda command, **kwargs: return_codes.pop(0)
+    )
+    monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
+
+    for _attempt in range(4):
+        cli_module.main(_upload_argv(data_path))
+
+    # A failed AzCopy upload makes the next one initialize the folders again.
+    assert init_calls == [
+        "Project A",
+        ("Project A", "Run 1"),
+        "Project A",
+        ("Project A", "Run 1"),
+    ]
+
+
+def test_cli_no_cache_initializes_remembered_folders_again(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    store = InitializedFolderStore()
+    store.record("euphrosyne", "Project A")
+    store.record("euphrosyne", "Project A", "Run 1")
+    store.record("euphrosyne-staging", "Project B")
+    init_calls = []
+
+    class FakeToolsService:
+        def __init__(self, host, auth, client=None):
+            pass
+
+        def init_project_folder(self, project_slug):
+            init_calls.append(project_slug)
+
+        def init_run_folders(self, project_slug, run_name):
+            init_calls.append((project_slug, run_name))
+
+        def get_run_data_upload_shared_access_signature(
+            self, project_slug, run_name, data_type
+        ):
+            return {"url": "https://storage.example/share", "token": "fresh-sas"}
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), lambda command, **kwargs: 0)
+    monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
+
+    assert cli_module.main(_upload_argv(data_path)) == 0
+    assert init_calls == []
+    assert cli_module.main(_upload_argv(data_path, "--no-cache")) == 0
+    assert init_calls == ["Project A", ("Project A", "Run 1")]
+    # The folders initialized again are remembered, and other ones are kept.
+    assert set(store._read()) == {
+        "euphrosyne|Project A",
+        "euphrosyne|Project A|Run 1",
+        "euphrosyne-staging|Project B",
+    }
+    assert store.is_initialized("euphrosyne", "Project A", "Run 1")
+
+
+def _patch_azcopy_upload(monkeypatch, settings, run_azcopy):
+    class FakeToolsService:
+        def __init__(self, host, auth, client=None):
+            pass
+
+        def init_project_folder(self, project_slug):
+            pass
+
+        def init_run_folders(self, project_slug, run_name):
+            pass
+
+        def get_run_data_upload_shared_access_signature(
+            self, project_slug, run_name, data_type
+        ):
+            return {"url": "https://storage.example/share", "token": "fresh-sas"}
+
+    monkeypatch.setattr(cli_module, "load_config", lambda: CONFIG_CATALOG)
+    monkeypatch.setattr(cli_module, "QSettings", lambda org, app: settings)
+    monkeypatch.setattr(cli_module.getpass, "getpass", lambda prompt: "secret")
+    monkeypatch.setattr(
+        cli_module,
+        "euphrosyne_login",
+        lambda host, email, password, client=None: ("access-token", "refresh-token"),
+    )
+    monkeypatch.setattr(cli_module, "save_refresh_token", lambda settings, token: None)
+    monkeypatch.setattr(cli_module, "is_azcopy_installed", lambda release=None: True)
+    monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
+
+    def fake_get_copy_command(src, dest, token, list_of_files=None):
+        if list_of_files is None:
+            return ["azcopy", "copy"]
+        listed = list_of_files.read_text().splitlines()
+        return ["azcopy", "copy", "--list-of-files", *listed]
+
+    monkeypatch.setattr(cli_module, "get_copy_command", fake_get_copy_command)
+    monkeypatch.setattr(
+        cli_module,
+        "get_resume_command",
+        lambda job_id, token: ["azcopy", "jobs", "resume", job_id, token],
+    )
+    monkeypatch.setattr(cli_module, "run_azcopy", run_azcopy)
+
+
+def _upload_argv(data_path, *extra):
+    return [
+        "--project",
+        "Project A",
+        "--run",
+        "Run 1",
+        "--data-type",
+        "raw-data",
+        "--data-path",
+        str(data_path),
+        "--email",
+        "user@example.com",
+        *extra,
+    ]
+
+
+def test_cli_records_interrupted_job_and_resumes_it_with_fresh_sas(
+    monkeypatch, tmp_path
+):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    commands = []
+
+    def interrupted_run_azcopy(command, on_job_started, **kwargs):
+        commands.append(command)
+        on_job_started("job-1")
+        return 1
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), interrupted_run_azcopy)
+
+    assert cli_module.main(_upload_argv(data_path)) == 1
+
+    def resumed_run_azcopy(command, on_job_started, **kwargs):
+        commands.append(command)
+        return 0
+
+    monkeypatch.setattr(cli_module, "run_azcopy", resumed_run_azcopy)
+
+    assert cli_module.main(_upload_argv(data_path, "--resume")) == 0
+    assert commands == [
+        ["azcopy", "copy"],
+        ["azcopy", "jobs", "resume", "job-1", "fresh-sas"],
+    ]
+    job = cli_module.UploadJobStore().list_jobs()[-1]
+    assert job["job_id"] == "job-1"
+    assert job["project"] == "Project A"
+    assert job["data_type"] == "raw_data"
+    assert job["status"] == "completed"
+
+
+def test_cli_resume_without_interrupted_job_starts_new_copy(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    commands = []
+
+    def fake_run_azcopy(command, on_job_started, **kwargs):
+        commands.append(command)
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+
+    assert cli_module.main(_upload_argv(data_path, "--resume")) == 0
+    assert commands == [["azcopy", "copy"]]
+
+
+def test_cli_rejects_resume_with_native_engine(monkeypatch, tmp_path, capsys):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    monkeypatch.setattr(cli_module, "load_config", lambda: CONFIG_CATALOG)
+    monkeypatch.setattr(cli_module, "QSettings", lambda org, app: FakeSettings())
+    monkeypatch.setattr(
+        cli_module.getpass,
+        "getpass",
+        lambda prompt: pytest.fail("password should not be prompted"),
+    )
+
+    exit_code = cli_module.main(
+        _upload_argv(data_path, "--engine", "native", "--resume")
+    )
+
+    assert exit_code == 1
+    assert "--resume is only supported with the AzCopy engine" in (
+        capsys.readouterr().err
+    )
+
+
+def test_cli_incremental_upload_copies_planned_files_and_skips_unchanged_folder(
+    monkeypatch, tmp_path, capsys
+):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "spectrum.txt").write_bytes(b"x" * 2000)
+    commands = []
+    expected_totals = []
+
+    def fake_run_azcopy(command, on_job_started, **kwargs):
+        commands.append(command)
+        expected_totals.append((kwargs["expected_files"], kwargs["expected_bytes"]))
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+    lists = []
+    write_list_of_files = cli_module.write_list_of_files
+    monkeypatch.setattr(
+        cli_module,
+        "write_list_of_files",
+        lambda paths: lists.append(write_list_of_files(paths)) or lists[-1],
+    )
+
+    assert cli_module.main(_upload_argv(data_path)) == 0
+    (data_path / "new.txt").write_bytes(b"new")
+    assert cli_module.main(_upload_argv(data_path, "--incremental")) == 0
+    assert "Skipping 1 unchanged files (2.0 KB); 1 files (3 B)" in (
+        capsys.readouterr().out
+    )
+    assert cli_module.main(_upload_argv(data_path, "--incremental")) == 0
+
+    assert commands == [
+        ["azcopy", "copy"],
+        ["azcopy", "copy", "--list-of-files", "new.txt"],
+    ]
+    assert expected_totals == [(1, 2000), (1, 3)]
+    assert "Skipping 2 unchanged files" in capsys.readouterr().out
+    assert lists and not any(path.exists() for path in lists)
+
+
+def test_cli_rejects_resume_with_incremental(monkeypatch, tmp_path, capsys):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    _patch_azcopy_upload(
+        monkeypatch,
+        FakeSettings(),
+        lambda command, **kwargs: pytest.fail("AzCopy should not run"),
+    )
+
+    exit_code = cli_module.main(_upload_argv(data_path, "--resume", "--incremental"))
+
+    assert exit_code == 1
+    assert "cannot be used together" in capsys.readouterr().err
+
+
+def test_cli_applies_environment_azcopy_overrides(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    runs = []
+
+    def fake_run_azcopy(command, on_job_started, env, **kwargs):
+        runs.append((command, env))
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+    catalog = {
+        **CONFIG_CATALOG,
+        "environments": {
+            **CONFIG_CATALOG["environments"],
+            "euphrosyne-staging": {
+                **CONFIG_CATALOG["environments"]["euphrosyne-staging"],
+                "azcopy": {"concurrency": 12, "buffer-gb": 1.5, "block-size-mb": 2},
+            },
+        },
+    }
+    monkeypatch.setattr(cli_module, "load_config", lambda: catalog)
+
+    exit_code = cli_module.main(
+        _upload_argv(data_path, "--environment", "euphrosyne-staging")
+    )
+
+    assert exit_code == 0
+    command, env = runs[0]
+    assert command == ["azcopy", "copy", "--block-size-mb", "2"]
+    assert env["AZCOPY_CONCURRENCY_VALUE"] == "12"
+    assert env["AZCOPY_BUFFER_GB"] == "1.5"
+
+
+def test_cli_caps_azcopy_bandwidth_from_flag(monkeypatch, tmp_path, capsys):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    commands = []
+
+    def fake_run_azcopy(command, **kwargs):
+        commands.append(command)
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+
+    assert cli_module.main(_upload_argv(data_path, "--cap-mbps", "50")) == 0
+    assert commands == [["azcopy", "copy", "--cap-mbps", "50"]]
+    assert "Upload bandwidth capped at 50 Mbps." in capsys.readouterr().out
+
+
+def test_cli_zero_cap_overrides_environment_bandwidth(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    commands = []
+
+    def fake_run_azcopy(command, **kwargs):
+        commands.append(command)
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+    catalog = {
+        **CONFIG_CATALOG,
+        "environments": {
+            **CONFIG_CATALOG["environments"],
+            "euphrosyne": {
+                **CONFIG_CATALOG["environments"]["euphrosyne"],
+                "bandwidth": {"cap-mbps": 100},
+            },
+        },
+    }
+    monkeypatch.setattr(cli_module, "load_config", lambda: catalog)
+
+    assert cli_module.main(_upload_argv(data_path)) == 0
+    assert cli_module.main(_upload_argv(data_path, "--cap-mbps", "0")) == 0
+    assert commands == [["azcopy", "copy", "--cap-mbps", "100"], ["azcopy", "copy"]]
+
+
+def test_cli_put_md5_asks_azcopy_to_store_checksums(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    commands = []
+
+    def fake_run_azcopy(command, **kwargs):
+        commands.append(command)
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+
+    assert cli_module.main(_upload_argv(data_path, "--put-md5")) == 0
+    assert commands == [["azcopy", "copy", "--put-md5"]]
+
+
+def test_cli_closes_hash_cache_when_uploads_end(monkeypatch, tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    closed = []
+
+    class FakeHashCache:
+        def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(cli_module, "HashCache", FakeHashCache)
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), lambda command, **kwargs: 1)
+
+    assert cli_module.main(_upload_argv(data_path, "--put-md5")) == 1
+    assert closed == [True]
+
+
+def test_cli_manifest_mode_shares_login_and_reports_each_job(
+    monkeypatch, tmp_path, capsys
+):
+    for name in ("run-1", "run-2", "run-3"):
+        (tmp_path / name).mkdir()
+    manifest = tmp_path / "uploads.yml"
+    manifest.write_text(
+        """
+- {project: Project A, run: Run 1, data-type: raw-data, data-path: run-1}
+- {project: Project A, run: Run 2, data-type: raw-data, data-path: run-2}
+- {project: Project B, run: Run 3, data-type: processed-data, data-path: run-3}
+""".lstrip()
+    )
+    calls = {"login": 0, "service": 0, "init": [], "prefetch": [], "run": []}
+
+    class FakeAsyncToolsService:
+        def __init__(self, host, auth, client):
+            assert isinstance(client, httpx.AsyncClient)
+
+        async def prepare_uploads(self, targets, initialized=()):
+            calls["prefetch"].extend(targets)
+            return [
+                (
+                    httpx.ConnectError("storage unreachable")
+                    if target.run_name == "Run 3"
+                    else {
+                        "url": f"https://storage.example/{target.run_name}",
+                        "token": "sas",
+                    }
+                )
+                for target in targets
+            ]
+
+    class FakeToolsService:
+        def __init__(self, host, auth, client=None):
+            calls["service"] += 1
+
+        def init_project_folder(self, project_slug):
+            calls["init"].append(project_slug)
+
+        def init_run_folders(self, project_slug, run_name):
+            calls["init"].append((project_slug, run_name))
+
+        def get_run_data_upload_shared_access_signature(
+            self, project_slug, run_name, data_type
+        ):
+            assert run_name == "Run 3", "prefetched credentials must be reused"
+            raise httpx.ConnectError("storage unreachable")
+
+    def fake_login(host, email, password, client=None):
+        calls["login"] += 1
+        return ("access-token", "refresh-token")
+
+    def fake_run_azcopy(command, **kwargs):
+        calls["run"].append(command[2])
+        return 0
+
+    _patch_azcopy_upload(monkeypatch, FakeSettings(), fake_run_azcopy)
+    monkeypatch.setattr(cli_module, "euphrosyne_login", fake_login)
+    monkeypatch.setattr(cli_module, "EuphrosyneToolsService", FakeToolsService)
+    monkeypatch.setattr(
+        cli_module, "AsyncEuphrosyneToolsService", FakeAsyncToolsService
+    )
+    monkeypatch.setattr(
+        cli_module,
+        "get_copy_command",
+        lambda src, dest, token, list_of_files=None: ["azcopy", "copy", dest],
+    )
+
+    exit_code = cli_module.main(
+        ["--manifest", str(manifest), "--jobs", "2", "--email", "user@example.com"]
+    )
+
+    output = capsys.readouterr().out
+    assert exit_code == 1
+    assert calls["login"] == 1
+    assert calls["service"] == 1
+    assert sorted(calls["run"]) == [
+        "https://storage.example/Run 1",
+        "https://storage.example/Run 2",
+    ]
+    assert [target.run_name for target in calls["prefetch"]] == [
+        "Run 1",
+        "Run 2",
+        "Run 3",
+    ]
+    # Only the job whose preparation failed initializes its folders again.
+    assert calls["init"] == ["Project B", ("Project B", "Run 3")]
+    assert "[Project B/Run 3] Error: storage unreachable" in output
+    table = output[output.index("Project    Run") :].splitlines()
+    assert table[2].startswith("Project A  Run 1  raw-data")
+    assert table[2].endswith("OK")
+    assert table[4].endswith("FAILED: storage unreachable")
+
+
+def test_cli_manifest_cannot_be_combined_with_single_upload_args(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli_module.main(["--manifest", "uploads.yml", "--project", "Project A"])
+
+    assert exit_info.value.code == 2
+    assert "--manifest cannot be combined with --project" in capsys.readouterr().err
+
+
+def test_cli_reports_invalid_config_without_traceback(monkeypatch, capsys):
+    def invalid_config():
+        raise ConfigError("Invalid start of the schedule window 0.")
+
+    monkeypatch.setattr(cli_module, "load_config", invalid_config)
+
+    assert cli_module.main([]) == 1
+    assert capsys.readouterr().err == (
+        "Error: Invalid start of the schedule window 0.\n"
+    )
@@ -1,3 +1,5 @@
+import pytest
+
 from data_upload import config as config_module
 
 
@@ -55,6 +57,9 @@ environments:
         "environment": "euphrosyne",
         "euphrosyne": {"url": "https://euphrosyne.example"},
         "euphrosyne-tools": {"url": "https://tools.example"},
+        "azcopy": {},
+        "bandwidth": {},
+        "retry": {},
     }
 
 
@@ -72,6 +77,8 @@ environments:
   euphrosyne-staging:
     url: "https://staging.euphrosyne.example"
     euphro-tools-url: "https://staging.tools.example"
+    azcopy:
+      concurrency: 64
 """.lstrip()
     )
     monkeypatch.setattr(config_module, "DEFAULT_CONFIG_PATH", str(config_path))
@@ -83,4 +90,130 @@ environments:
         "environment": "euphrosyne-staging",
         "euphrosyne": {"url": "https://override.example"},
         "euphrosyne-tools": {"url": "https://staging.tools.example"},
+        "azcopy": {"concurrency": 64},
+        "bandwidth": {},
+        "retry": {},
+    }
+
+
+def _write_bandwidth_config(monkeypatch, tmp_path, bandwidth_yaml):
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(
+        """
+default-environment: euphrosyne
+environments:
+  euphrosyne:
+    url: "https://euphrosyne.example"
+    euphro-tools-url: "https://tools.example"
+    bandwidth:
+""".lstrip()
+        + bandwidth_yaml
+    )
+    monkeypatch.setattr(config_module, "DEFAULT_CONFIG_PATH", str(config_path))
+
+
+def test_load_config_normalizes_unquoted_schedule_times(monkeypatch, tmp_path):
+    _write_bandwidth_config(
+        monkeypatch,
+        tmp_path,
+        """
+      cap-mbps: 500
+      schedule:
+        - start: 08:00
+          end: "18:30"
+          days: [mon, Tuesday]
+          cap-mbps: 50
+        - start: 18:30
+          end: 00:00
+""",
+    )
+
+    bandwidth = config_module.load_config()["environments"]["euphrosyne"]["bandwidth"]
+
+    assert bandwidth == {
+        "cap-mbps": 500,
+        "schedule": [
+            {
+                "start": "08:00",
+                "end": "18:30",
+                "days": ["mon", "Tuesday"],
+                "cap-mbps": 50,
+            },
+            {"start": "18:30", "end": "00:00"},
+        ],
     }
+
+
+@pytest.mark.parametrize(
+    ("bandwidth_yaml", "message"),
+    [
+        (
+            """
+      schedule:
+        - start: "8h"
+          end: "18:00"
+""",
+            "Invalid start of the schedule window 0 of the bandwidth of environment "
+            "euphrosyne: '8h', expected HH:MM.",
+        ),
+        (
+            """
+      schedule:
+        - start: "08:00"
+""",
+            "The schedule window 0 of the bandwidth of environment euphrosyne has no "
+            "end time.",
+        ),
+        (
+            """
+      schedule:
+        - start: "08:00"
+          end: "18:00"
+          days: [someday]
+""",
+            "The days of the schedule window 0",
+        ),
+        (
+            """
+      cap-mbps: -5
+""",
+            "The cap-mbps of the bandwidth of environment euphrosyne must be a number "
+            "of 0 or more, got -5.",
+        ),
+        (
+            """
+      schedule: "08:00-18:00"
+""",
+            "must be a list",
+        ),
+    ],
+)
+def test_load_config_rejects_invalid_bandwidth_settings(
+    monkeypatch, tmp_path, bandwidth_yaml, message
+):
+    _write_bandwidth_config(monkeypatch, tmp_path, bandwidth_yaml)
+
+    with pytest.raises(config_module.ConfigError) as error_info:
+        config_module.load_config()
+
+    assert message in str(error_info.value)
+
+
+def test_load_config_reads_log_max_lines(monkeypatch, tmp_path):
+    _write_bandwidth_config(monkeypatch, tmp_path, "      cap-mbps: 500\n")
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(config_path.read_text() + "log-max-lines: 200\n")
+
+    assert config_module.load_config()["log-max-lines"] == 200
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "many", "true"])
+def test_load_config_rejects_invalid_log_max_lines(monkeypatch, tmp_path, value):
+    _write_bandwidth_config(monkeypatch, tmp_path, "      cap-mbps: 500\n")
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(config_path.read_text() + f"log-max-lines: {value}\n")
+
+    with pytest.raises(config_module.ConfigError) as error_info:
+        config_module.load_config()
+
+    assert "log-max-lines" in str(error_info.value)
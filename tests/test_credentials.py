@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from data_upload.credentials import (
+    SASCredentialManager,
+    SASRenewalError,
+    parse_sas_expiry,
+)
+from data_upload.euphro_tools import RunUploadTarget
+
+TARGET = RunUploadTarget("project-a", "Run 1", "raw_data")
+NOON = datetime(2026, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+
+
+def _token(expiry: str) -> str:
+    return f"sv=2021-08-06&se={expiry}&sp=rcwl&sig=abc"
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeFetch:
+    def __init__(self, *tokens):
+        self.tokens = list(tokens)
+        self.calls = []
+
+    def __call__(self, project_slug, run_name, data_type):
+        self.calls.append((project_slug, run_name, data_type))
+        return {"url": "https://storage.example/run", "token": self.tokens.pop(0)}
+
+
+@pytest.mark.parametrize(
+    "token,expected",
+    [
+        (_token("2026-01-01T13:00:00Z"), NOON + 3600),
+        (_token("2026-01-01T13%3A00%3A00Z"), NOON + 3600),
+        ("?" + _token("2026-01-01T13:00:00Z"), NOON + 3600),
+        (_token("2026-01-01T13:00:00"), NOON + 3600),
+        ("sv=2021-08-06&sig=abc", None),
+        (_token("tomorrow"), None),
+    ],
+)
+def test_parse_sas_expiry(token, expected):
+    assert parse_sas_expiry(token) == expected
+
+
+def test_manager_reuses_token_until_shortly_before_expiry():
+    clock = FakeClock(NOON)
+    fetch = FakeFetch(_token("2026-01-01T13:00:00Z"), _token("2026-01-01T14:00:00Z"))
+    manager = SASCredentialManager(fetch, renewal_margin=300, clock=clock)
+
+    first = manager.get(TARGET)
+    clock.now = NOON + 3600 - 301
+    assert manager.get(TARGET) is first
+    assert manager.renew_at(TARGET) == NOON + 3600 - 300
+
+    clock.now = NOON + 3600 - 300
+    renewed = manager.get(TARGET)
+
+    assert renewed["token"] == _token("2026-01-01T14:00:00Z")
+    assert fetch.calls == [tuple(TARGET), tuple(TARGET)]
+
+
+def test_manager_uses_short_lived_tokens_for_half_their_lifetime():
+    clock = FakeClock(NOON)
+    fetch = FakeFetch(_token("2026-01-01T12:02:00Z"))
+    manager = SASCredentialManager(fetch, renewal_margin=300, clock=clock)
+
+    assert manager.renew_at(TARGET) == NOON + 60
+
+
+def test_manager_keeps_tokens_without_expiry_until_renewed():
+    clock = FakeClock(NOON)
+    fetch = FakeFetch("sig=first", "sig=second")
+    manager = SASCredentialManager(fetch, clock=clock)
+
+    manager.get(TARGET)
+    clock.now += 365 * 24 * 3600
+    assert manager.get(TARGET)["token"] == "sig=first"
+    assert manager.renew(TARGET)["token"] == "sig=second"
+
+
+def test_manager_caches_prefetched_credentials_per_target():
+    fetch = FakeFetch("sig=fetched")
+    manager = SASCredentialManager(fetch, clock=FakeClock(NOON))
+    manager.put(TARGET, {"url": "https://storage.example/run", "token": "sig=put"})
+
+    assert manager.get(TARGET)["token"] == "sig=put"
+    assert manager.get(TARGET._replace(data_type="processed_data"))["token"] == (
+        "sig=fetched"
+    )
+
+
+def test_lease_reports_renewal_failures():
+    def fail(*target):
+        raise ConnectionError("tools API unreachable")
+
+    lease = SASCredentialManager(fail).lease(TARGET)
+
+    with pytest.raises(SASRenewalError, match="tools API unreachable"):
+        lease.token()
+    with pytest.raises(SASRenewalError):
+        lease.renew()
@@ -1,7 +1,16 @@
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QComboBox, QCompleter
+import threading
 
+import pytest
+import shiboken6
+from PySide6.QtCore import QRunnable, Qt, QThreadPool
+from PySide6.QtWidgets import QApplication, QComboBox, QCompleter, QMessageBox
+
+from data_upload.app import init as init_task_module
+from data_upload.app import scanner as scanner_task_module
+from data_upload.app.projects import ProjectRevalidationSignals
+from data_upload.euphrosyne import auth as auth_module
 from data_upload.euphrosyne.auth import EuphrosyneAuthenticationError
+from data_upload.scanner import scan_folder
 from data_upload.widget import data_upload as data_upload_module
 from data_upload.widget.data_type import DataTypeCheckboxesLayout, ExtractionType
 from data_upload.widget.data_upload import DataUploadWidget
@@ -55,29 +64,59 @@ CONFIG = {
 }
 
 
-def _widget(monkeypatch, projects):
-    monkeypatch.setattr(
-        data_upload_module, "list_projects", lambda host, access_token: projects
-    )
+def _widget(monkeypatch, projects, config_catalog=CONFIG_CATALOG):
+    def fake_list_projects(host, access_token, client=None):
+        return projects
+
+    fake_list_projects.cache_clear = lambda: None
+    monkeypatch.setattr(data_upload_module, "list_projects", fake_list_projects)
     monkeypatch.setattr(
-        data_upload_module, "load_refresh_token", lambda settings: "refresh-token"
+        auth_module, "load_keyring_refresh_token", lambda: "refresh-token"
     )
     widget = DataUploadWidget(
-        config_catalog=CONFIG_CATALOG,
+        config_catalog=config_catalog,
         config=CONFIG,
         settings=FakeSettings(),
     )
     return widget
 
 
+def _close_widget(widget):
+    """Close the widget and delete it now, on the main thread.
+
+    Widgets are in reference cycles: left to the garbage collector, they could be
+    destroyed on a worker thread that triggers a collection.
+    """
+    widget.close()
+    shiboken6.delete(widget)
+
+
+def _log_text(widget) -> str:
+    """The transfer log, with the lines still waiting for the next batch."""
+    widget.context_box.flush()
+    return widget.context_box.toPlainText()
+
+
+def _start_upload(widget):
+    """Press Start, and let the folder scan it starts report back."""
+    widget.on_start()
+    QThreadPool.globalInstance().waitForDone()
+    QApplication.processEvents()
+
+
 class FakeToolsService:
     def __init__(self, init_error=None, sas_error=None):
         self.init_error = init_error
         self.sas_error = sas_error
+        self.initialized = []
 
-    def init_folders(self, project_name, run_name):
+    def init_project_folder(self, project_name):
         if self.init_error:
             raise self.init_error
+        self.initialized.append(project_name)
+
+    def init_run_folders(self, project_name, run_name):
+        self.initialized.append((project_name, run_name))
 
     def get_run_data_upload_shared_access_signature(
         self, project_slug, run_name, data_type
@@ -96,7 +135,7 @@ def test_empty_project_list_does_not_crash_and_keeps_start_disabled(qapp, monkey
         assert widget.run_select_box.count() == 0
         assert widget.start_button.isEnabled() is False
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_data_type_selector_emits_extraction_type_on_index_change(qapp):
@@ -110,7 +149,7 @@ def test_data_type_selector_emits_extraction_type_on_index_change(qapp):
         assert emitted_values == [ExtractionType.PROCESSED_DATA]
         assert widget.selected_data_type == ExtractionType.PROCESSED_DATA
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_upload_completion_success_appends_done_updates_status_and_reenables_start(
@@ -128,10 +167,72 @@ def test_upload_completion_success_appends_done_updates_status_and_reenables_sta
 
         assert widget.start_button.isEnabled() is True
         assert widget.status_title_label.text() == "Upload complete"
-        assert "Done." in widget.context_box.toPlainText()
-        assert "Upload failed" not in widget.context_box.toPlainText()
+        assert "Done." in _log_text(widget)
+        assert "Upload failed" not in _log_text(widget)
     finally:
-        widget.close()
+        _close_widget(widget)
+
+
+def test_start_waits_for_azcopy_checked_in_background(
+    qapp, monkeypatch, tmp_path, capsys
+):
+    release = threading.Event()
+    init_threads = []
+
+    def slow_init_azcopy(release_config, on_download):
+        init_threads.append(threading.current_thread())
+        on_download()
+        release.wait(5)
+
+    monkeypatch.setattr(init_task_module, "init_azcopy", slow_init_azcopy)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.init_azcopy()
+
+        assert widget.start_button.isEnabled() is False
+        assert widget.status_title_label.text() == "Preparing AzCopy"
+
+        release.set()
+        QThreadPool.globalInstance().waitForDone()
+        QApplication.processEvents()
+
+        assert init_threads[0] is not threading.current_thread()
+        assert widget.start_button.isEnabled() is True
+        assert "Downloading AzCopy..." in capsys.readouterr().out
+    finally:
+        release.set()
+        _close_widget(widget)
+
+
+@pytest.mark.parametrize("engine, start_enabled", [("azcopy", False), ("native", True)])
+def test_failed_azcopy_install_only_keeps_the_native_engine(
+    qapp, monkeypatch, tmp_path, capsys, engine, start_enabled
+):
+    def failing_init_azcopy(release_config, on_download):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(init_task_module, "init_azcopy", failing_init_azcopy)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.settings.values["upload_engine"] = engine
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.init_azcopy()
+        QThreadPool.globalInstance().waitForDone()
+        QApplication.processEvents()
+
+        assert widget.start_button.isEnabled() is start_enabled
+        assert "Could not install AzCopy: disk full" in capsys.readouterr().out
+        if not start_enabled:
+            assert widget.status_title_label.text() == "AzCopy unavailable"
+    finally:
+        _close_widget(widget)
 
 
 def test_upload_completion_failure_appends_error_updates_status_and_reenables_start(
@@ -156,26 +257,24 @@ def test_upload_completion_failure_appends_error_updates_status_and_reenables_st
         assert widget.start_button.isEnabled() is True
         assert widget.status_title_label.text() == "Upload failed"
         assert widget.status_message_label.text() == expected_message
-        assert expected_message in widget.context_box.toPlainText()
-        assert "Done." not in widget.context_box.toPlainText()
+        assert expected_message in _log_text(widget)
+        assert "Done." not in _log_text(widget)
         assert len(FakeMessageBox.critical_calls) == 1
         assert FakeMessageBox.critical_calls[0][1:] == (
             "Upload failed",
             expected_message,
         )
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_logout_clears_tokens_appends_message_and_closes_window(qapp, monkeypatch):
-    cleared_settings = []
-
-    def fake_clear_tokens(settings):
-        cleared_settings.append(settings)
-        settings.remove("access_token")
-        settings.remove("refresh_token")
-
-    monkeypatch.setattr(data_upload_module, "clear_tokens", fake_clear_tokens)
+    keyring_deletes = []
+    monkeypatch.setattr(
+        auth_module,
+        "delete_keyring_refresh_token",
+        lambda: keyring_deletes.append(True),
+    )
     widget = _widget(
         monkeypatch,
         [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
@@ -186,12 +285,12 @@ def test_logout_clears_tokens_appends_message_and_closes_window(qapp, monkeypatc
     assert widget.logout_button.objectName() == "DangerButton"
 
     widget.on_logout()
+    widget.tokens.flush()
 
-    assert cleared_settings == [widget.settings]
+    assert keyring_deletes == [True]
     assert widget.settings.values == {}
-    assert (
-        "Logged out. Please restart the application to log in again."
-        in widget.context_box.toPlainText()
+    assert "Logged out. Please restart the application to log in again." in _log_text(
+        widget
     )
     assert widget.isVisible() is False
 
@@ -222,17 +321,18 @@ def test_auth_failure_during_folder_init_clears_tokens_prompts_login_and_stops(
         )
         widget.start_button.setDisabled(True)
 
-        widget.on_start()
+        _start_upload(widget)
+        widget.tokens.flush()
 
         assert widget.settings.values == {}
         assert login_calls == [(CONFIG_CATALOG, CONFIG, widget.settings, False)]
         assert len(FakeMessageBox.warning_calls) == 1
         assert FakeMessageBox.warning_calls[0][1] == "Session expired"
         assert widget.status_title_label.text() == "Session expired"
-        assert "Please retry the upload." in widget.context_box.toPlainText()
+        assert "Please retry the upload." in _log_text(widget)
         assert widget.start_button.isEnabled() is False
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_auth_failure_during_sas_request_clears_tokens_prompts_login_and_stops(
@@ -261,17 +361,18 @@ def test_auth_failure_during_sas_request_clears_tokens_prompts_login_and_stops(
         )
         widget.start_button.setDisabled(True)
 
-        widget.on_start()
+        _start_upload(widget)
+        widget.tokens.flush()
 
         assert widget.settings.values == {}
         assert login_calls == [(CONFIG_CATALOG, CONFIG, widget.settings, False)]
         assert len(FakeMessageBox.warning_calls) == 1
         assert FakeMessageBox.warning_calls[0][1] == "Session expired"
         assert widget.status_title_label.text() == "Session expired"
-        assert "Please retry the upload." in widget.context_box.toPlainText()
+        assert "Please retry the upload." in _log_text(widget)
         assert widget.start_button.isEnabled() is False
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_project_without_runs_does_not_crash_and_keeps_start_disabled(
@@ -289,7 +390,7 @@ def test_project_without_runs_does_not_crash_and_keeps_start_disabled(
         assert widget.start_button.isEnabled() is False
         assert widget.status_title_label.text() == "Select a run"
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_typed_existing_data_folder_enables_start(qapp, monkeypatch, tmp_path):
@@ -303,9 +404,9 @@ def test_typed_existing_data_folder_enables_start(qapp, monkeypatch, tmp_path):
         assert widget.start_button.isEnabled() is True
         assert widget.start_button.text() == "Start upload"
         assert widget.status_title_label.text() == "Ready to upload"
-        assert "Ready ?" not in widget.context_box.toPlainText()
+        assert "Ready ?" not in _log_text(widget)
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_changing_data_type_keeps_valid_form_enabled(qapp, monkeypatch, tmp_path):
@@ -322,7 +423,7 @@ def test_changing_data_type_keeps_valid_form_enabled(qapp, monkeypatch, tmp_path
         assert widget.start_button.isEnabled() is True
         assert widget.status_title_label.text() == "Ready to upload"
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_typed_missing_data_folder_keeps_start_disabled(qapp, monkeypatch, tmp_path):
@@ -336,7 +437,7 @@ def test_typed_missing_data_folder_keeps_start_disabled(qapp, monkeypatch, tmp_p
         assert widget.start_button.isEnabled() is False
         assert widget.status_title_label.text() == "Invalid data folder"
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_first_project_with_runs_is_selected_initially(qapp, monkeypatch):
@@ -357,7 +458,203 @@ def test_first_project_with_runs_is_selected_initially(qapp, monkeypatch):
         assert widget.run_select_box.currentText() == "Run 1"
         assert widget.selectedRun == "Run 1"
     finally:
-        widget.close()
+        _close_widget(widget)
+
+
+def test_revalidated_projects_update_list_and_keep_selection(qapp, monkeypatch):
+    widget = _widget(
+        monkeypatch,
+        [
+            {"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]},
+            {
+                "name": "Project B",
+                "slug": "project-b",
+                "runs": [{"label": "Run 1"}, {"label": "Run 2"}],
+            },
+        ],
+    )
+    try:
+        widget.project_select_box.setCurrentIndex(1)
+        widget.run_select_box.setCurrentIndex(1)
+
+        widget.on_projects_revalidated(None)
+        widget.on_projects_revalidated(
+            [
+                {"name": "Project 0", "slug": "project-0", "runs": []},
+                {
+                    "name": "Project B",
+                    "slug": "project-b",
+                    "runs": [{"label": "Run 1"}, {"label": "Run 2"}],
+                },
+            ]
+        )
+
+        combo = widget.project_select_box
+        assert [combo.itemText(index) for index in range(combo.count())] == [
+            "Project 0",
+            "Project B",
+        ]
+        assert combo.currentText() == "Project B"
+        assert widget.selectedProject == "project-b"
+        assert widget.selectedRun == "Run 2"
+    finally:
+        _close_widget(widget)
+
+
+def test_revalidated_projects_select_first_uploadable_project_when_selection_is_gone(
+    qapp, monkeypatch
+):
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.on_projects_revalidated(
+            [
+                {"name": "Project 0", "slug": "project-0", "runs": []},
+                {"name": "Project C", "slug": "project-c", "runs": [{"label": "X"}]},
+            ]
+        )
+
+        assert widget.project_select_box.currentText() == "Project C"
+        assert (widget.selectedProject, widget.selectedRun) == ("project-c", "X")
+
+        widget.on_project_revalidation_failed("server error")
+        assert "Could not refresh the project list: server error" in (_log_text(widget))
+    finally:
+        _close_widget(widget)
+
+
+def test_refresh_projects_button_revalidates_in_background(qapp, monkeypatch):
+    class FakeRevalidationTask(QRunnable):
+        def __init__(self, config, access_token, client=None):
+            super().__init__()
+            self.signals = ProjectRevalidationSignals()
+
+        def run(self):
+            self.signals.finished_signal.emit(None)
+
+    monkeypatch.setattr(
+        data_upload_module, "ProjectRevalidationTask", FakeRevalidationTask
+    )
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    cache_clears = []
+    data_upload_module.list_projects.cache_clear = lambda: cache_clears.append(1)
+    try:
+        widget.refresh_projects_button.click()
+        assert widget.refresh_projects_button.isEnabled() is False
+
+        QThreadPool.globalInstance().waitForDone()
+        qapp.processEvents()
+
+        assert cache_clears == [1]
+        assert widget.refresh_projects_button.isEnabled() is True
+        assert "The project list is up to date." in _log_text(widget)
+    finally:
+        _close_widget(widget)
+
+
+def _patch_project_task(monkeypatch, batches, result=None, error=None):
+    class FakeRevalidationTask(QRunnable):
+        def __init__(self, config, access_token, client=None):
+            super().__init__()
+            self.signals = ProjectRevalidationSignals()
+
+        def run(self):
+            for batch in batches:
+                self.signals.projects_signal.emit(batch)
+            if error:
+                self.signals.failed_signal.emit(error)
+            else:
+                self.signals.finished_signal.emit(result)
+
+    monkeypatch.setattr(
+        data_upload_module, "ProjectRevalidationTask", FakeRevalidationTask
+    )
+
+
+def test_empty_project_list_fills_as_projects_arrive(qapp, monkeypatch):
+    project_0 = {"name": "Project 0", "slug": "project-0", "runs": []}
+    project_a = {"name": "Project A", "slug": "project-a", "runs": [{"label": "R"}]}
+    project_b = {"name": "Project B", "slug": "project-b", "runs": [{"label": "S"}]}
+    _patch_project_task(
+        monkeypatch,
+        [[project_0], [project_a, project_b]],
+        result=[project_0, project_a, project_b],
+    )
+    widget = _widget(monkeypatch, [])
+    try:
+        widget.revalidate_projects()
+        QThreadPool.globalInstance().waitForDone()
+        qapp.processEvents()
+
+        combo = widget.project_select_box
+        assert [combo.itemText(index) for index in range(combo.count())] == [
+            "Project 0",
+            "Project A",
+            "Project B",
+        ]
+        assert combo.currentText() == "Project A"
+        assert (widget.selectedProject, widget.selectedRun) == ("project-a", "R")
+        assert widget.refresh_projects_button.isEnabled() is True
+    finally:
+        _close_widget(widget)
+
+
+def test_appended_projects_keep_the_current_selection(qapp, monkeypatch):
+    widget = _widget(monkeypatch, [])
+    try:
+        widget.append_projects(
+            [{"name": "Project A", "slug": "project-a", "runs": [{"label": "R"}]}]
+        )
+        widget.append_projects(
+            [{"name": "Project B", "slug": "project-b", "runs": [{"label": "S"}]}]
+        )
+
+        assert widget.project_select_box.count() == 2
+        assert widget.project_select_box.currentText() == "Project A"
+        assert widget.selectedProject == "project-a"
+    finally:
+        _close_widget(widget)
+
+
+def test_empty_project_list_warns_when_no_project_has_runs(qapp, monkeypatch):
+    FakeMessageBox.warning_calls = []
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+    project_0 = {"name": "Project 0", "slug": "project-0", "runs": []}
+    _patch_project_task(monkeypatch, [[project_0]], result=[project_0])
+    widget = _widget(monkeypatch, [])
+    try:
+        widget.revalidate_projects()
+        QThreadPool.globalInstance().waitForDone()
+        qapp.processEvents()
+
+        assert widget.selectedProject is None
+        assert len(FakeMessageBox.warning_calls) == 1
+        assert FakeMessageBox.warning_calls[0][1] == "No uploadable projects"
+    finally:
+        _close_widget(widget)
+
+
+def test_empty_project_list_reports_loading_failure(qapp, monkeypatch):
+    FakeMessageBox.critical_calls = []
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+    _patch_project_task(monkeypatch, [], error="Projects response must be a list.")
+    widget = _widget(monkeypatch, [])
+    try:
+        widget.revalidate_projects()
+        QThreadPool.globalInstance().waitForDone()
+        qapp.processEvents()
+
+        assert len(FakeMessageBox.critical_calls) == 1
+        assert FakeMessageBox.critical_calls[0][1] == "Projects unavailable"
+        assert "must be a list" in FakeMessageBox.critical_calls[0][2]
+        assert widget.refresh_projects_button.isEnabled() is True
+    finally:
+        _close_widget(widget)
 
 
 def test_project_dropdown_is_searchable(qapp, monkeypatch):
@@ -379,21 +676,75 @@ def test_project_dropdown_is_searchable(qapp, monkeypatch):
     try:
         combo = widget.project_select_box
         completer = combo.completer()
-        completer.setCompletionPrefix("upload")
-        matches = [
-            completer.completionModel().index(row, 0).data()
-            for row in range(completer.completionModel().rowCount())
-        ]
+        widget.on_project_search_text_changed("upload")
 
         assert combo.isEditable() is True
         assert combo.insertPolicy() == QComboBox.NoInsert
         assert combo.lineEdit().placeholderText() == "Search projects..."
-        assert completer.caseSensitivity() == Qt.CaseInsensitive
-        assert completer.filterMode() == Qt.MatchContains
-        assert completer.completionMode() == QCompleter.PopupCompletion
-        assert matches == ["Beta Upload"]
+        assert completer.completionMode() == QCompleter.UnfilteredPopupCompletion
+        assert completer.model() is widget.project_search_model
+        assert _completions(widget) == ["Beta Upload"]
+    finally:
+        _close_widget(widget)
+
+
+def _completions(widget):
+    model = widget.project_select_box.completer().model()
+    return [model.index(row, 0).data() for row in range(model.rowCount())]
+
+
+def test_project_search_ignores_accents_and_ranks_recent_projects_first(
+    qapp, monkeypatch
+):
+    widget = _widget(
+        monkeypatch,
+        [
+            {"name": "Étude Alpha", "slug": "etude-alpha", "runs": [{"label": "R"}]},
+            {"name": "Études Beta", "slug": "etudes-beta", "runs": [{"label": "R"}]},
+            {"name": "Gamma", "slug": "gamma", "runs": []},
+        ],
+    )
+    try:
+        widget._current_upload = {
+            "environment": "euphrosyne",
+            "project": "etudes-beta",
+            "run": "R",
+            "data_type": "raw_data",
+            "folder": "/data",
+        }
+        widget.on_upload_job_started("job-1")
+
+        widget.on_project_search_text_changed("etu")
+        assert _completions(widget) == ["Études Beta", "Étude Alpha"]
+
+        widget.on_project_search_text_changed("")
+        assert _completions(widget) == ["Études Beta", "Étude Alpha", "Gamma"]
+
+        widget.on_project_search_text_changed("gamam")
+        assert _completions(widget) == ["Gamma"]
+    finally:
+        _close_widget(widget)
+
+
+def test_project_search_covers_appended_and_updated_projects(qapp, monkeypatch):
+    widget = _widget(monkeypatch, [])
+    try:
+        widget.append_projects(
+            [{"name": "Delta", "slug": "delta", "runs": [{"label": "R"}]}]
+        )
+        widget.on_project_search_text_changed("del")
+        assert _completions(widget) == ["Delta"]
+
+        widget.update_projects(
+            [
+                {"name": "Epsilon", "slug": "epsilon", "runs": [{"label": "R"}]},
+                {"name": "Delta Two", "slug": "delta-two", "runs": [{"label": "R"}]},
+            ]
+        )
+        widget.on_project_search_text_changed("delta")
+        assert _completions(widget) == ["Delta Two"]
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_typing_existing_project_name_selects_project_and_updates_runs(
@@ -422,7 +773,7 @@ def test_typing_existing_project_name_selects_project_and_updates_runs(
         assert widget.run_select_box.count() == 1
         assert widget.run_select_box.currentText() == "Run 2"
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_typing_unknown_project_clears_selection_without_adding_project(
@@ -451,7 +802,7 @@ def test_typing_unknown_project_clears_selection_without_adding_project(
         assert widget.start_button.isEnabled() is False
         assert widget.status_title_label.text() == "Select a project"
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_switching_to_project_without_runs_clears_run_and_disables_start(
@@ -478,9 +829,9 @@ def test_switching_to_project_without_runs_clears_run_and_disables_start(
         assert widget.run_select_box.count() == 0
         assert widget.start_button.isEnabled() is False
         assert widget.status_title_label.text() == "Select a run"
-        assert "Project Project A has no runs." in widget.context_box.toPlainText()
+        assert "Project Project A has no runs." in _log_text(widget)
     finally:
-        widget.close()
+        _close_widget(widget)
 
 
 def test_start_upload_disables_button_and_sets_uploading_status(
@@ -494,11 +845,11 @@ def test_start_upload_disables_button_and_sets_uploading_status(
     try:
         widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
         widget.tools_service = FakeToolsService()
-        widget._start_azcopy = lambda src, dest, sas_token: started_uploads.append(
+        widget._start_azcopy = lambda src, dest, sas_token, only_files=None, sas_lease=None: started_uploads.append(
             (src, dest, sas_token)
         )
 
-        widget.on_start()
+        _start_upload(widget)
 
         assert widget.start_button.isEnabled() is False
         assert widget.status_title_label.text() == "Uploading data"
@@ -506,7 +857,37 @@ def test_start_upload_disables_button_and_sets_uploading_status(
             (str(tmp_path), "https://storage.example/share", "sas-token")
         ]
     finally:
-        widget.close()
+        _close_widget(widget)
+
+
+def test_start_upload_skips_folder_init_until_an_upload_fails(
+    qapp, monkeypatch, tmp_path
+):
+    FakeMessageBox.critical_calls = []
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.tools_service = tools_service = FakeToolsService()
+        widget._start_azcopy = lambda *args, **kwargs: None
+
+        _start_upload(widget)
+        widget.on_data_upload_completed(0)
+        _start_upload(widget)
+        widget.on_data_upload_completed(1)
+        _start_upload(widget)
+
+        assert tools_service.initialized == [
+            "project-a",
+            ("project-a", "Run 1"),
+            "project-a",
+            ("project-a", "Run 1"),
+        ]
+    finally:
+        _close_widget(widget)
 
 
 def test_auth_failure_revalidates_valid_form_after_login(qapp, monkeypatch, tmp_path):
@@ -527,9 +908,348 @@ def test_auth_failure_revalidates_valid_form_after_login(qapp, monkeypatch, tmp_
             init_error=EuphrosyneAuthenticationError("Session expired.")
         )
 
-        widget.on_start()
+        _start_upload(widget)
 
         assert widget.status_title_label.text() == "Session expired"
         assert widget.start_button.isEnabled() is True
     finally:
-        widget.close()
+        _close_widget(widget)
+
+
+def test_upload_progress_updates_status_and_progress_bar(qapp, monkeypatch):
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.on_upload_progress(
+            {
+                "job_id": "job-1",
+                "status": "InProgress",
+                "bytes_transferred": 500,
+                "bytes_total": 1000,
+                "files_completed": 1,
+                "files_failed": 0,
+                "files_skipped": 0,
+                "files_total": 2,
+                "throughput": 100.0,
+                "eta": 5.0,
+                "final": False,
+            }
+        )
+
+        assert widget.progress_bar.value() == 50
+        assert widget.progress_bar.isHidden() is False
+        assert widget.status_title_label.text() == "Uploading data"
+        assert widget.status_message_label.text() == (
+            "50.0% (500 B of 1.0 KB) - 1/2 files - 100 B/s - ETA 00:00:05"
+        )
+
+        widget.on_data_upload_completed(0)
+
+        assert widget.progress_bar.isHidden() is True
+    finally:
+        _close_widget(widget)
+
+
+def test_start_upload_offers_to_resume_interrupted_azcopy_job(
+    qapp, monkeypatch, tmp_path
+):
+    question_calls = []
+
+    class ResumeMessageBox(FakeMessageBox):
+        Yes = QMessageBox.Yes
+        No = QMessageBox.No
+
+        @classmethod
+        def question(cls, *args):
+            question_calls.append(args)
+            return QMessageBox.Yes
+
+    monkeypatch.setattr(data_upload_module, "QMessageBox", ResumeMessageBox)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    started_uploads = []
+    try:
+        widget.settings.values["upload_engine"] = "azcopy"
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.tools_service = FakeToolsService()
+        widget.job_store.record_started(
+            "job-1",
+            environment="euphrosyne",
+            project="project-a",
+            run="Run 1",
+            data_type="raw_data",
+            folder=str(tmp_path),
+        )
+        widget._start_azcopy = (
+            lambda src, dest, sas_token, resume_job_id=None, sas_lease=None: (
+                started_uploads.append((src, sas_token, resume_job_id))
+            )
+        )
+
+        _start_upload(widget)
+        widget.on_data_upload_completed(0)
+
+        assert len(question_calls) == 1
+        assert question_calls[0][1] == "Resume upload"
+        assert started_uploads == [(str(tmp_path), "sas-token", "job-1")]
+        assert widget.job_store.list_jobs()[-1]["status"] == "completed"
+        assert "Resuming AzCopy job job-1" in _log_text(widget)
+    finally:
+        _close_widget(widget)
+
+
+def test_azcopy_job_started_is_recorded_for_later_resume(qapp, monkeypatch, tmp_path):
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.settings.values["upload_engine"] = "azcopy"
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.tools_service = FakeToolsService()
+        widget._start_azcopy = (
+            lambda src, dest, sas_token, only_files=None, sas_lease=None: None
+        )
+
+        _start_upload(widget)
+        widget.on_upload_job_started("job-2")
+        widget.on_data_upload_completed(1)
+
+        job = widget.job_store.find_resumable(
+            environment="euphrosyne",
+            project="project-a",
+            run="Run 1",
+            data_type="raw_data",
+            folder=str(tmp_path),
+        )
+        assert job["job_id"] == "job-2"
+        assert job["status"] == "failed"
+    finally:
+        _close_widget(widget)
+
+
+def test_native_upload_job_is_recorded_as_recent_but_not_resumable(
+    qapp, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.settings.values["upload_engine"] = "native"
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.tools_service = FakeToolsService()
+        widget._start_azcopy = (
+            lambda src, dest, sas_token, only_files=None, sas_lease=None: None
+        )
+
+        _start_upload(widget)
+        widget.on_upload_job_started("native-job")
+        widget.on_data_upload_completed(1)
+
+        job = widget.job_store.list_jobs()[-1]
+        assert job["engine"] == "native"
+        assert job["status"] == "failed"
+        assert widget._recent_projects() == ["project-a"]
+        assert (
+            widget.job_store.find_resumable(
+                environment="euphrosyne",
+                project="project-a",
+                run="Run 1",
+                data_type="raw_data",
+                folder=str(tmp_path),
+            )
+            is None
+        )
+    finally:
+        _close_widget(widget)
+
+
+def test_incremental_upload_only_sends_changed_files(qapp, monkeypatch, tmp_path):
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "unchanged.txt").write_bytes(b"a" * 10)
+    (data_path / "changed.txt").write_bytes(b"b" * 5)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    started_uploads = []
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(data_path))
+        widget.tools_service = FakeToolsService()
+        widget._start_azcopy = (
+            lambda src, dest, sas_token, only_files=None, sas_lease=None: (
+                started_uploads.append(only_files)
+            )
+        )
+
+        _start_upload(widget)
+        widget.on_data_upload_completed(0)
+        (data_path / "changed.txt").write_bytes(b"b" * 6)
+        widget.incremental_checkbox.setChecked(True)
+        _start_upload(widget)
+
+        assert started_uploads == [None, ["changed.txt"]]
+        assert "Skipping 1 unchanged files (10 B)" in _log_text(widget)
+
+        widget.on_data_upload_completed(0)
+        _start_upload(widget)
+
+        assert len(started_uploads) == 2
+        assert widget.status_title_label.text() == "Nothing to upload"
+        assert widget.start_button.isEnabled() is True
+    finally:
+        _close_widget(widget)
+
+
+def test_start_upload_scans_the_folder_off_the_gui_thread(qapp, monkeypatch, tmp_path):
+    scan_threads = []
+
+    def fake_scan_folder(folder):
+        scan_threads.append(threading.current_thread())
+        return real_scan_folder(folder)
+
+    real_scan_folder = scan_folder
+    monkeypatch.setattr(scanner_task_module, "scan_folder", fake_scan_folder)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    started_uploads = []
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.tools_service = FakeToolsService()
+        widget._start_azcopy = lambda src, dest, sas_token, only_files=None, sas_lease=None: started_uploads.append(
+            src
+        )
+
+        widget.on_start()
+
+        assert widget.status_title_label.text() == "Scanning data folder"
+        assert widget.start_button.isEnabled() is False
+
+        QThreadPool.globalInstance().waitForDone()
+        QApplication.processEvents()
+
+        assert started_uploads == [str(tmp_path)]
+        assert scan_threads and threading.main_thread() not in scan_threads
+    finally:
+        _close_widget(widget)
+
+
+def test_start_upload_reports_folder_scan_failure(qapp, monkeypatch, tmp_path):
+    FakeMessageBox.critical_calls = []
+    monkeypatch.setattr(data_upload_module, "QMessageBox", FakeMessageBox)
+
+    def failing_scan_folder(folder):
+        raise PermissionError("access denied")
+
+    monkeypatch.setattr(scanner_task_module, "scan_folder", failing_scan_folder)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    started_uploads = []
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.tools_service = FakeToolsService()
+        widget._start_azcopy = lambda *args, **kwargs: started_uploads.append(args)
+
+        _start_upload(widget)
+
+        assert started_uploads == []
+        assert widget.status_title_label.text() == "Upload failed"
+        assert "access denied" in widget.status_message_label.text()
+        assert widget.start_button.isEnabled() is True
+        assert FakeMessageBox.critical_calls[0][1] == "Upload failed"
+    finally:
+        _close_widget(widget)
+
+
+def test_folder_scan_failure_is_reported_in_the_log(qapp, monkeypatch, tmp_path):
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+        widget.on_folder_scan_failed("/stale/folder", "gone")
+        widget.on_folder_scan_failed(str(tmp_path), "access denied")
+        widget.context_box.flush()
+
+        log = _log_text(widget)
+        assert "gone" not in log
+        assert f"Could not scan the data folder {tmp_path}: access denied" in log
+        assert widget.status_title_label.text() == "Ready to upload"
+    finally:
+        _close_widget(widget)
+
+
+def test_scanned_folder_summary_is_shown_when_ready(qapp, monkeypatch, tmp_path):
+    (tmp_path / "a.bin").write_bytes(b"a" * 1500)
+    (tmp_path / "b.bin").write_bytes(b"b" * 500)
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path))
+
+        assert widget._folder_scan_timer.isActive() is True
+
+        widget._folder_scan_timer.stop()
+        widget.on_folder_scanned(str(tmp_path), scan_folder(str(tmp_path)))
+
+        assert widget.status_title_label.text() == "Ready to upload"
+        assert widget.status_message_label.text().startswith(
+            "The folder contains 2 files, 2.0 KB."
+        )
+
+        widget.on_folder_scanned("/stale/folder", scan_folder(str(tmp_path)))
+        widget.data_folder_input_layout.data_path_box.setText(str(tmp_path / "x"))
+
+        assert "contains" not in widget.status_message_label.text()
+    finally:
+        _close_widget(widget)
+
+
+def test_bandwidth_cap_box_can_keep_or_lift_the_environment_cap(qapp, monkeypatch):
+    widget = _widget(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+    )
+    try:
+        box = widget.bandwidth_cap_box
+
+        assert box.text() == "Environment default"
+        assert box.cap_override is None
+
+        box.stepUp()
+        assert box.text() == "No cap"
+        assert box.cap_override == 0
+
+        box.lineEdit().setText("50 Mbps")
+        box.interpretText()
+        assert box.cap_override == 50
+        assert box.text() == "50 Mbps"
+    finally:
+        _close_widget(widget)
+
+
+def test_transfer_log_keeps_configured_number_of_lines(qapp, monkeypatch):
+    widget = _widget(monkeypatch, [], {**CONFIG_CATALOG, "log-max-lines": 3})
+    try:
+        for index in range(5):
+            widget.context_box.append(f"line {index}")
+
+        assert _log_text(widget).splitlines() == ["line 2", "line 3", "line 4"]
+    finally:
+        _close_widget(widget)
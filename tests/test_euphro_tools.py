@@ -1,10 +1,14 @@
+import asyncio
+
 import httpx
 import pytest
 
 from data_upload.euphro_tools import (
+    AsyncEuphrosyneToolsService,
     EuphrosyneToolsConnectionError,
     EuphrosyneToolsService,
     InitFoldersError,
+    RunUploadTarget,
 )
 
 
@@ -141,3 +145,159 @@ def test_get_run_data_upload_shared_access_signature_wraps_connection_errors(
         service.get_run_data_upload_shared_access_signature(
             "project-a", "Run 1", "raw_data"
         )
+
+
+def _prepare(service, targets, **kwargs):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            service.client = client
+            return await service.prepare_uploads(targets, **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_prepare_uploads_initializes_each_folder_once(httpx_mock):
+    service = AsyncEuphrosyneToolsService(
+        "https://tools.example", auth=None, client=None
+    )
+    httpx_mock.add_response(
+        method="POST", url="https://tools.example/data/project-a/init", status_code=204
+    )
+    for run in ("Run 1", "Run 2"):
+        httpx_mock.add_response(
+            method="POST",
+            url=f"https://tools.example/data/project-a/runs/{run}/init",
+            status_code=204,
+        )
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200,
+            json={
+                "url": f"https://storage.example/{request.url.path.split('/')[4]}/"
+                f"{request.url.params['data_type']}",
+                "token": "sig=abc",
+            },
+        ),
+        method="GET",
+        is_reusable=True,
+    )
+
+    results = _prepare(
+        service,
+        [
+            RunUploadTarget("project-a", "Run 1", "raw_data"),
+            RunUploadTarget("project-a", "Run 1", "processed_data"),
+            RunUploadTarget("project-a", "Run 2", "raw_data"),
+        ],
+    )
+
+    assert [result["url"] for result in results] == [
+        "https://storage.example/Run 1/raw_data",
+        "https://storage.example/Run 1/processed_data",
+        "https://storage.example/Run 2/raw_data",
+    ]
+    paths = [request.url.path for request in httpx_mock.get_requests(method="POST")]
+    assert paths == [
+        "/data/project-a/init",
+        "/data/project-a/runs/Run 1/init",
+        "/data/project-a/runs/Run 2/init",
+    ]
+
+
+def test_prepare_uploads_skips_initialized_folders(httpx_mock):
+    service = AsyncEuphrosyneToolsService(
+        "https://tools.example", auth=None, client=None
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://tools.example/data/project-a/runs/Run 2/init",
+        status_code=204,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        json={"url": "https://storage.example", "token": "sig=abc"},
+        is_reusable=True,
+    )
+
+    _prepare(
+        service,
+        [
+            RunUploadTarget("project-a", "Run 1", "raw_data"),
+            RunUploadTarget("project-a", "Run 2", "raw_data"),
+        ],
+        initialized={("project-a",), ("project-a", "Run 1")},
+    )
+
+    paths = [request.url.path for request in httpx_mock.get_requests(method="POST")]
+    assert paths == ["/data/project-a/runs/Run 2/init"]
+
+
+def test_prepare_uploads_limits_requests_in_flight(httpx_mock):
+    service = AsyncEuphrosyneToolsService(
+        "https://tools.example", auth=None, client=None
+    )
+    in_flight = {"current": 0, "max": 0}
+
+    async def respond(request):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        if request.method == "POST":
+            return httpx.Response(204)
+        return httpx.Response(
+            200, json={"url": "https://storage.example", "token": "t"}
+        )
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+
+    results = _prepare(
+        service,
+        [
+            RunUploadTarget("project-a", f"Run {index}", "raw_data")
+            for index in range(10)
+        ],
+        concurrency=3,
+    )
+
+    assert len(results) == 10
+    assert in_flight["max"] == 3
+
+
+def test_prepare_uploads_reports_failures_per_target(httpx_mock):
+    service = AsyncEuphrosyneToolsService(
+        "https://tools.example", auth=None, client=None
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://tools.example/data/project-a/init",
+        status_code=500,
+        text="boom",
+    )
+    httpx_mock.add_response(
+        method="POST", url="https://tools.example/data/project-b/init", status_code=204
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url="https://tools.example/data/project-b/runs/Run 1/init",
+        status_code=204,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://tools.example/data/project-b/runs/Run 1/upload/"
+        "shared_access_signature?data_type=raw_data",
+        json={"url": "https://storage.example", "token": "sig=abc"},
+    )
+
+    failed_1, failed_2, prepared = _prepare(
+        service,
+        [
+            RunUploadTarget("project-a", "Run 1", "raw_data"),
+            RunUploadTarget("project-a", "Run 2", "raw_data"),
+            RunUploadTarget("project-b", "Run 1", "raw_data"),
+        ],
+    )
+
+    assert isinstance(failed_1, InitFoldersError)
+    assert failed_2 is failed_1
+    assert prepared == {"url": "https://storage.example", "token": "sig=abc"}
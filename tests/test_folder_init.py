@@ -0,0 +1,122 @@
+from data_upload.folder_init import FolderInitializer, InitializedFolderStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeToolsService:
+    def __init__(self):
+        self.calls = []
+
+    def init_project_folder(self, project_slug):
+        self.calls.append(project_slug)
+
+    def init_run_folders(self, project_slug, run_name):
+        self.calls.append((project_slug, run_name))
+
+
+def test_store_remembers_folders_per_environment(tmp_path):
+    store = InitializedFolderStore(tmp_path / "folders.json")
+
+    store.record("euphrosyne", "project-a")
+    store.record("euphrosyne", "project-a", "Run 1")
+
+    reloaded = InitializedFolderStore(tmp_path / "folders.json")
+    assert reloaded.is_initialized("euphrosyne", "project-a")
+    assert reloaded.is_initialized("euphrosyne", "project-a", "Run 1")
+    assert not reloaded.is_initialized("euphrosyne", "project-a", "Run 2")
+    assert not reloaded.is_initialized("euphrosyne-staging", "project-a")
+
+
+def test_store_expires_folders_after_ttl(tmp_path):
+    clock = FakeClock()
+    store = InitializedFolderStore(tmp_path / "folders.json", ttl=60, clock=clock)
+    store.record("euphrosyne", "project-a")
+
+    clock.now += 59
+    assert store.is_initialized("euphrosyne", "project-a")
+    clock.now += 1
+    assert not store.is_initialized("euphrosyne", "project-a")
+
+    store.record("euphrosyne", "project-b")
+    assert store._read() == {"euphrosyne|project-b": clock.now}
+
+
+def test_store_ignores_corrupted_file(tmp_path):
+    path = tmp_path / "folders.json"
+    path.write_text("[1, 2]")
+
+    assert not InitializedFolderStore(path).is_initialized("euphrosyne", "project-a")
+
+
+def test_initializer_skips_known_folders(tmp_path):
+    tools_service = FakeToolsService()
+    store = InitializedFolderStore(tmp_path / "folders.json")
+    store.record("euphrosyne", "project-a")
+
+    initializer = FolderInitializer(tools_service, "euphrosyne", store)
+    initializer.init_folders("project-a", "Run 1")
+    initializer.init_folders("project-a", "Run 1")
+
+    assert tools_service.calls == [("project-a", "Run 1")]
+    assert store.is_initialized("euphrosyne", "project-a", "Run 1")
+
+
+def test_initializer_bypassing_cache_initializes_and_records_known_folders(
+    tmp_path,
+):
+    tools_service = FakeToolsService()
+    store = InitializedFolderStore(tmp_path / "folders.json")
+    store.record("euphrosyne", "project-a")
+    store.record("euphrosyne", "project-a", "Run 1")
+
+    initializer = FolderInitializer(
+        tools_service, "euphrosyne", store, bypass_cache=True
+    )
+    initializer.init_folders("project-a", "Run 1")
+
+    assert tools_service.calls == ["project-a", ("project-a", "Run 1")]
+    assert store.is_initialized("euphrosyne", "project-a")
+    assert store.is_initialized("euphrosyne", "project-a", "Run 1")
+
+
+def test_initializer_does_not_record_failed_init(tmp_path):
+    class FailingToolsService(FakeToolsService):
+        def init_run_folders(self, project_slug, run_name):
+            raise RuntimeError("tools API unavailable")
+
+    store = InitializedFolderStore(tmp_path / "folders.json")
+    initializer = FolderInitializer(FailingToolsService(), "euphrosyne", store)
+
+    try:
+        initializer.init_folders("project-a", "Run 1")
+    except RuntimeError:
+        pass
+
+    assert store.is_initialized("euphrosyne", "project-a")
+    assert not store.is_initialized("euphrosyne", "project-a", "Run 1")
+
+
+def test_initializer_forget_initializes_run_and_project_again(tmp_path):
+    tools_service = FakeToolsService()
+    store = InitializedFolderStore(tmp_path / "folders.json")
+    initializer = FolderInitializer(tools_service, "euphrosyne", store)
+    initializer.init_folders("project-a", "Run 1")
+    initializer.init_folders("project-a", "Run 2")
+
+    initializer.forget("project-a", "Run 1")
+    initializer.init_folders("project-a", "Run 1")
+    initializer.init_folders("project-a", "Run 2")
+
+    assert tools_service.calls == [
+        "project-a",
+        ("project-a", "Run 1"),
+        ("project-a", "Run 2"),
+        "project-a",
+        ("project-a", "Run 1"),
+    ]
@@ -1,10 +1,12 @@
 import sys
+import threading
 
-import httpx
 import pytest
 
 from data_upload import gui as gui_module
-from data_upload.euphrosyne.project import ProjectLoadingError
+from data_upload.config import ConfigError
+from data_upload.euphrosyne import auth as auth_module
+from data_upload.euphrosyne.auth import EuphrosyneConnectionError
 
 CONFIG_CATALOG = {
     "default-environment": "euphrosyne",
@@ -24,54 +26,76 @@ DEFAULT_CONFIG = {
     "environment": "euphrosyne",
     "euphrosyne": {"url": "https://euphrosyne.example"},
     "euphrosyne-tools": {"url": "https://tools.example"},
+    "azcopy": {},
+    "bandwidth": {},
+    "retry": {},
 }
 
 STAGING_CONFIG = {
     "environment": "euphrosyne-staging",
     "euphrosyne": {"url": "https://staging.euphrosyne.example"},
     "euphrosyne-tools": {"url": "https://staging.tools.example"},
+    "azcopy": {},
+    "bandwidth": {},
+    "retry": {},
 }
 
 
-class FakeMessageBox:
-    critical_calls = []
-    warning_calls = []
-
-    @classmethod
-    def critical(cls, *args):
-        cls.critical_calls.append(args)
-
-    @classmethod
-    def warning(cls, *args):
-        cls.warning_calls.append(args)
-
-
 class FakeStartupDialog:
     instances = []
 
     def __init__(self, app):
         self.app = app
         self.messages = []
+        self.progress = []
         self.close_count = 0
         FakeStartupDialog.instances.append(self)
 
     def show_message(self, message):
         self.messages.append(message)
 
+    def show_progress(self, done, total, message):
+        self.progress.append((done, total, message))
+
     def close(self):
         self.close_count += 1
 
 
+class FakeTokenStore:
+    access_token = "access-token"
+    refresh_token = "refresh-token"
+
+    def load(self):
+        return self.refresh_token
+
+    def refresh_token_loader(self):
+        return self.load
+
+    def set_access_token(self, access_token):
+        self.access_token = access_token
+
+
 class FakeDataUploadWidget:
     instances = []
 
-    def __init__(self, config_catalog, config, settings, stdout_stream=None):
+    def __init__(
+        self,
+        config_catalog,
+        config,
+        settings,
+        stdout_stream=None,
+        projects=None,
+        revalidate_projects=False,
+    ):
         self.config_catalog = config_catalog
         self.config = config
         self.settings = settings
         self.stdout_stream = stdout_stream
+        self.projects = projects
+        self.revalidate_projects = revalidate_projects
         self.window_title = None
         self.show_count = 0
+        self.azcopy_releases = []
         FakeDataUploadWidget.instances.append(self)
 
     def setWindowTitle(self, title):
@@ -80,6 +104,9 @@ class FakeDataUploadWidget:
     def show(self):
         self.show_count += 1
 
+    def init_azcopy(self, release=None):
+        self.azcopy_releases.append(release)
+
 
 class FakeSettings:
     def __init__(self, values=None):
@@ -94,25 +121,26 @@ class FakeSettings:
 
 def _patch_startup_dependencies(
     monkeypatch,
-    projects_or_error,
+    cached_projects,
     login_required=False,
     settings=None,
 ):
-    FakeMessageBox.critical_calls = []
-    FakeMessageBox.warning_calls = []
     FakeStartupDialog.instances = []
     FakeDataUploadWidget.instances = []
     settings = settings or FakeSettings()
     monkeypatch.setattr(sys, "argv", ["euphrosyne-herma"])
     monkeypatch.setattr(gui_module, "settings", settings)
-    monkeypatch.setattr(gui_module, "QMessageBox", FakeMessageBox)
     monkeypatch.setattr(gui_module, "StartupDialog", FakeStartupDialog)
     monkeypatch.setattr(gui_module, "load_config", lambda: CONFIG_CATALOG)
-    monkeypatch.setattr(gui_module, "init_azcopy", lambda app: None)
+    monkeypatch.setattr(
+        gui_module, "get_token_store", lambda settings: FakeTokenStore()
+    )
     monkeypatch.setattr(
         gui_module,
         "init_access_token",
-        lambda settings, config: login_required,
+        lambda config, access_token, load_refresh_token: (
+            None if login_required else access_token
+        ),
     )
     monkeypatch.setattr(
         gui_module,
@@ -121,12 +149,11 @@ def _patch_startup_dependencies(
     )
     monkeypatch.setattr(gui_module, "DataUploadWidget", FakeDataUploadWidget)
 
-    def fake_list_projects(host, access_token):
-        if isinstance(projects_or_error, Exception):
-            raise projects_or_error
-        return projects_or_error
-
-    monkeypatch.setattr(gui_module, "list_projects", fake_list_projects)
+    monkeypatch.setattr(
+        gui_module,
+        "get_cached_projects",
+        lambda config, access_token, store=None: cached_projects,
+    )
 
 
 def test_startup_dialog_is_modeless_and_has_no_message_box_buttons(qapp):
@@ -154,17 +181,68 @@ def test_startup_feedback_is_shown_and_updated_before_main_window(qapp, monkeypa
 
     assert exit_info.value.code == 0
     assert FakeStartupDialog.instances[0].messages == [
-        "Loading configuration...",
-        "Checking AzCopy...",
-        "Checking authentication...",
+        "Starting...",
         "Loading projects...",
         "Opening upload window...",
     ]
+    progress = FakeStartupDialog.instances[0].progress
+    assert progress[0][:2] == (0, 3)
+    assert any("Checking authentication..." in message for *_, message in progress)
+    assert progress[-1] == (3, 3, "")
     assert FakeStartupDialog.instances[0].close_count == 1
     assert FakeDataUploadWidget.instances[0].show_count == 1
+    # AzCopy is checked once the window is open.
+    assert FakeDataUploadWidget.instances[0].azcopy_releases == [None]
     assert FakeDataUploadWidget.instances[0].config == DEFAULT_CONFIG
 
 
+def test_startup_shows_critical_dialog_and_exits_when_server_is_unreachable(
+    qapp, monkeypatch
+):
+    critical_calls = []
+    _patch_startup_dependencies(monkeypatch, None)
+
+    def unreachable(config, access_token, load_refresh_token):
+        raise EuphrosyneConnectionError()
+
+    monkeypatch.setattr(gui_module, "init_access_token", unreachable)
+    monkeypatch.setattr(
+        gui_module.QMessageBox, "critical", lambda *args: critical_calls.append(args)
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        gui_module.ConverterGUI.start()
+
+    assert exit_info.value.code == 1
+    assert critical_calls[0][1] == "Connection Error"
+    assert FakeDataUploadWidget.instances == []
+
+
+def test_startup_shows_critical_dialog_and_exits_when_config_is_invalid(
+    qapp, monkeypatch
+):
+    critical_calls = []
+    _patch_startup_dependencies(monkeypatch, None)
+
+    def invalid_config():
+        raise ConfigError("Invalid start of the schedule window 0.")
+
+    monkeypatch.setattr(gui_module, "load_config", invalid_config)
+    monkeypatch.setattr(
+        gui_module.QMessageBox, "critical", lambda *args: critical_calls.append(args)
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        gui_module.ConverterGUI.start()
+
+    assert exit_info.value.code == 1
+    assert critical_calls[0][1:] == (
+        "Configuration Error",
+        "Invalid start of the schedule window 0.",
+    )
+    assert FakeDataUploadWidget.instances == []
+
+
 def test_startup_feedback_closes_before_login_and_reopens_after_success(
     qapp, monkeypatch
 ):
@@ -192,9 +270,7 @@ def test_startup_feedback_closes_before_login_and_reopens_after_success(
     assert login_calls[0][0] == CONFIG_CATALOG
     assert login_calls[0][1] == DEFAULT_CONFIG
     assert FakeStartupDialog.instances[0].messages == [
-        "Loading configuration...",
-        "Checking AzCopy...",
-        "Checking authentication...",
+        "Starting...",
         "Loading projects...",
         "Opening upload window...",
     ]
@@ -238,63 +314,81 @@ def test_startup_uses_login_returned_environment_for_upload_window(qapp, monkeyp
     assert FakeDataUploadWidget.instances[0].config == STAGING_CONFIG
 
 
-def test_startup_shows_critical_dialog_and_exits_when_project_loading_fails(
-    qapp, monkeypatch
-):
-    _patch_startup_dependencies(
-        monkeypatch,
-        ProjectLoadingError("Projects response must be a list."),
-    )
-
-    with pytest.raises(SystemExit) as exit_info:
-        gui_module.ConverterGUI.start()
-
-    assert exit_info.value.code == 1
-    assert len(FakeMessageBox.critical_calls) == 1
-    assert FakeMessageBox.critical_calls[0][1] == "Projects unavailable"
-    assert "Projects response must be a list." in FakeMessageBox.critical_calls[0][2]
-    assert FakeStartupDialog.instances[0].close_count == 1
-
-
-def test_startup_shows_critical_dialog_and_exits_when_project_api_fails(
-    qapp, monkeypatch
-):
-    _patch_startup_dependencies(
-        monkeypatch,
-        httpx.HTTPStatusError(
-            "server error",
-            request=httpx.Request(
-                "GET", "https://euphrosyne.example/api/lab/projects/"
-            ),
-            response=httpx.Response(500),
-        ),
-    )
+def test_startup_shows_cached_projects_and_asks_window_to_revalidate(qapp, monkeypatch):
+    projects = [{"name": "Project A", "slug": "project-a", "runs": [{"label": "R"}]}]
+    _patch_startup_dependencies(monkeypatch, projects)
+    monkeypatch.setattr(qapp, "exec", lambda: 0)
 
-    with pytest.raises(SystemExit) as exit_info:
+    with pytest.raises(SystemExit):
         gui_module.ConverterGUI.start()
 
-    assert exit_info.value.code == 1
-    assert len(FakeMessageBox.critical_calls) == 1
-    assert FakeMessageBox.critical_calls[0][1] == "Projects unavailable"
-    assert FakeStartupDialog.instances[0].close_count == 1
+    assert FakeDataUploadWidget.instances[0].projects == projects
+    assert FakeDataUploadWidget.instances[0].revalidate_projects is True
 
 
 @pytest.mark.parametrize(
-    "projects",
+    "cached_projects",
     [
+        None,
         [],
         [{"name": "Project A", "slug": "project-a", "runs": []}],
     ],
 )
-def test_startup_shows_warning_dialog_and_exits_when_no_runs_are_available(
-    qapp, monkeypatch, projects
+def test_startup_opens_window_to_download_projects_without_usable_cache(
+    qapp, monkeypatch, cached_projects
 ):
-    _patch_startup_dependencies(monkeypatch, projects)
+    _patch_startup_dependencies(monkeypatch, cached_projects)
+    monkeypatch.setattr(qapp, "exec", lambda: 0)
 
     with pytest.raises(SystemExit) as exit_info:
         gui_module.ConverterGUI.start()
 
     assert exit_info.value.code == 0
-    assert len(FakeMessageBox.warning_calls) == 1
-    assert FakeMessageBox.warning_calls[0][1] == "No uploadable projects"
+    assert FakeDataUploadWidget.instances[0].projects == []
+    assert FakeDataUploadWidget.instances[0].revalidate_projects is True
     assert FakeStartupDialog.instances[0].close_count == 1
+
+
+def test_startup_only_touches_settings_on_the_gui_thread(qapp, monkeypatch):
+    main_thread = threading.current_thread()
+    settings_threads = []
+
+    class RecordingSettings(FakeSettings):
+        def value(self, key, default=None):
+            settings_threads.append(threading.current_thread())
+            return super().value(key, default)
+
+        def setValue(self, key, value):
+            settings_threads.append(threading.current_thread())
+            super().setValue(key, value)
+
+        def remove(self, key):
+            settings_threads.append(threading.current_thread())
+            self.values.pop(key, None)
+
+    settings = RecordingSettings({"access_token": "expired"})
+    _patch_startup_dependencies(
+        monkeypatch,
+        [{"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}],
+        settings=settings,
+    )
+    monkeypatch.setattr(gui_module, "get_token_store", auth_module.TokenStore)
+    monkeypatch.setattr(
+        auth_module, "load_keyring_refresh_token", lambda: "refresh-token"
+    )
+    monkeypatch.setattr(
+        gui_module,
+        "init_access_token",
+        lambda config, access_token, load_refresh_token: (
+            "fresh" if load_refresh_token() == "refresh-token" else None
+        ),
+    )
+    monkeypatch.setattr(qapp, "exec", lambda: 0)
+
+    with pytest.raises(SystemExit) as exit_info:
+        gui_module.ConverterGUI.start()
+
+    assert exit_info.value.code == 0
+    assert settings.values["access_token"] == "fresh"
+    assert settings_threads
+    assert all(thread is main_thread for thread in settings_threads)
@@ -0,0 +1,67 @@
+import hashlib
+
+from data_upload import hashing
+from data_upload.hashing import HashCache, hash_file, hash_manifest, to_content_md5
+from data_upload.scanner import scan_folder
+
+
+def test_hash_file_matches_hashlib_with_and_without_mmap(tmp_path, monkeypatch):
+    path = tmp_path / "data.bin"
+    content = bytes(range(256)) * 1000
+    path.write_bytes(content)
+
+    assert hash_file(path) == hashlib.md5(content).hexdigest()
+
+    monkeypatch.setattr(hashing, "MMAP_THRESHOLD", 1)
+    monkeypatch.setattr(hashing, "READ_CHUNK_SIZE", 1000)
+
+    assert hash_file(path, "sha256") == hashlib.sha256(content).hexdigest()
+
+
+def test_to_content_md5_is_base64_of_raw_digest():
+    assert to_content_md5(hashlib.md5(b"abc").hexdigest()) == "kAFQmDzST7DWlj99KOF/cg=="
+
+
+def test_hash_manifest_reuses_cached_digests_of_unchanged_files(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_bytes(b"a")
+    (data / "b.txt").write_bytes(b"b")
+    cache = HashCache(tmp_path / "hashes.sqlite3")
+    hashed = []
+    original_hash_file = hashing.hash_file
+
+    def counting_hash_file(path, algorithm):
+        hashed.append(path.name)
+        return original_hash_file(path, algorithm)
+
+    monkeypatch.setattr(hashing, "hash_file", counting_hash_file)
+
+    first = hash_manifest(scan_folder(str(data)), cache=cache)
+    (data / "b.txt").write_bytes(b"changed")
+    output = []
+    second = hash_manifest(scan_folder(str(data)), cache=cache, on_output=output.append)
+
+    assert sorted(hashed) == ["a.txt", "b.txt", "b.txt"]
+    assert [entry.hash for entry in first.files] == [
+        hashlib.md5(b"a").hexdigest(),
+        hashlib.md5(b"b").hexdigest(),
+    ]
+    assert second.files[1].hash == hashlib.md5(b"changed").hexdigest()
+    assert output == ["Hashing 1 files (1 unchanged files cached)."]
+
+
+def test_hash_cache_persists_across_instances(tmp_path):
+    HashCache(tmp_path / "hashes.sqlite3").put_many([("/a", 1, 2, "digest")], "md5")
+
+    cache = HashCache(tmp_path / "hashes.sqlite3")
+
+    assert cache.get_many([("/a", 1, 2)], "md5") == {"/a": "digest"}
+    assert cache.get_many([("/a", 1, 3)], "md5") == {}
+    assert cache.get_many([("/a", 1, 2)], "sha256") == {}
+
+
+def test_hash_cache_defaults_to_app_data_folder(app_data_folder):
+    HashCache().close()
+
+    assert (app_data_folder / hashing.HASH_CACHE_FILE_NAME).exists()
@@ -0,0 +1,87 @@
+import httpx
+import pytest
+
+from data_upload import http_client
+from data_upload.euphro_tools import EuphrosyneToolsService
+from data_upload.euphrosyne.auth import euphrosyne_login
+from data_upload.http_client import (
+    HTTP_TIMEOUT,
+    close_http_clients,
+    get_http_client,
+    send_request,
+    stream_request,
+)
+
+
+@pytest.fixture(autouse=True)
+def _close_clients():
+    yield
+    close_http_clients()
+
+
+def test_get_http_client_reuses_one_client_per_environment():
+    client = get_http_client("euphrosyne")
+
+    assert get_http_client("euphrosyne") is client
+    assert get_http_client("euphrosyne-staging") is not client
+    assert client.timeout == HTTP_TIMEOUT
+
+
+def test_close_http_clients_closes_and_forgets_clients():
+    client = get_http_client("euphrosyne")
+
+    close_http_clients()
+
+    assert client.is_closed
+    assert get_http_client("euphrosyne") is not client
+
+
+def test_http2_is_only_enabled_when_h2_is_installed(monkeypatch):
+    monkeypatch.setattr(http_client.importlib.util, "find_spec", lambda name: None)
+
+    assert http_client.is_http2_available() is False
+    assert http_client.create_http_client() is not None
+
+
+def test_send_request_without_client_uses_a_one_off_request(httpx_mock):
+    httpx_mock.add_response(url="https://euphrosyne.example/ping", text="pong")
+
+    response = send_request(None, "GET", "https://euphrosyne.example/ping")
+
+    assert response.text == "pong"
+
+
+def test_stream_request_without_client_streams_a_one_off_request(httpx_mock):
+    httpx_mock.add_response(url="https://euphrosyne.example/ping", text="pong")
+
+    with stream_request(None, "GET", "https://euphrosyne.example/ping") as response:
+        assert "".join(response.iter_text()) == "pong"
+
+
+def test_services_send_through_the_shared_client(httpx_mock, monkeypatch):
+    def fail_one_off_request(*args, **kwargs):
+        raise AssertionError("module-level httpx.request must not be used")
+
+    monkeypatch.setattr(httpx, "request", fail_one_off_request)
+    httpx_mock.add_response(
+        method="POST",
+        url="https://euphrosyne.example/api/auth/long-token/",
+        json={"access": "access-token", "refresh": "refresh-token"},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://tools.example/data/project-a/runs/Run 1/upload/"
+        "shared_access_signature?data_type=raw_data",
+        json={"url": "https://storage.example/run", "token": "sig=abc"},
+    )
+    client = get_http_client("euphrosyne")
+
+    tokens = euphrosyne_login(
+        "https://euphrosyne.example", "user@example.com", "secret", client=client
+    )
+    credentials = EuphrosyneToolsService(
+        "https://tools.example", auth=None, client=client
+    ).get_run_data_upload_shared_access_signature("project-a", "Run 1", "raw_data")
+
+    assert tokens == ("access-token", "refresh-token")
+    assert credentials["token"] == "sig=abc"
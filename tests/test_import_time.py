@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds for a cold import in a fresh interpreter, with room for slow CI runners.
+# `data_upload.main` only parses arguments before importing the GUI or the CLI.
+IMPORT_TIME_BUDGETS = {
+    "data_upload.main": 0.3,
+    "data_upload.cli": 3.0,
+    "data_upload.gui": 3.0,
+}
+
+_MEASURE = """
+import json, sys, time
+started_at = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started_at, "modules": list(sys.modules)}}))
+"""
+
+
+def _cold_import(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE.format(module=module)],
+        cwd=REPO_ROOT,
+        env={**os.environ, "QT_QPA_PLATFORM": "offscreen"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module, budget", IMPORT_TIME_BUDGETS.items())
+def test_cold_import_stays_within_budget(module, budget):
+    seconds = _cold_import(module)["seconds"]
+
+    assert seconds <= budget, f"Importing {module} took {seconds:.2f}s (> {budget}s)"
+
+
+def test_main_defers_heavy_imports():
+    modules = _cold_import("data_upload.main")["modules"]
+
+    for heavy in ("PySide6", "httpx", "sentry_sdk", "keyring", "yaml"):
+        assert heavy not in modules
@@ -0,0 +1,38 @@
+from data_upload.incremental import UploadManifestStore, plan_incremental_upload
+
+TARGET = {
+    "environment": "euphrosyne",
+    "project": "project-a",
+    "run": "Run 1",
+    "data_type": "raw_data",
+    "folder": "/data/run-1",
+}
+
+
+def test_plan_incremental_upload_skips_unchanged_files():
+    previous = {"same.txt": (10, 1), "touched.txt": (5, 1), "removed.txt": (1, 1)}
+    current = {"same.txt": (10, 1), "touched.txt": (5, 2), "new.txt": (7, 3)}
+
+    plan = plan_incremental_upload(current, previous)
+
+    assert plan == {
+        "files": ["new.txt", "touched.txt"],
+        "upload_bytes": 12,
+        "skipped_files": 1,
+        "skipped_bytes": 10,
+    }
+
+
+def test_plan_incremental_upload_sends_everything_without_previous_upload():
+    plan = plan_incremental_upload({"a.txt": (1, 1)}, None)
+
+    assert plan["files"] == ["a.txt"]
+    assert plan["skipped_files"] == 0
+
+
+def test_manifest_store_round_trips_snapshot_per_target(app_data_folder):
+    store = UploadManifestStore()
+    store.save({"a.txt": (1, 2)}, **TARGET)
+
+    assert UploadManifestStore().load(**TARGET) == {"a.txt": (1, 2)}
+    assert UploadManifestStore().load(**{**TARGET, "run": "Run 2"}) is None
@@ -0,0 +1,123 @@
+import json
+
+from data_upload.jobs import (
+    JOB_COMPLETED,
+    JOB_DISCARDED,
+    JOB_FAILED,
+    MAX_STORED_JOBS,
+    UploadJobStore,
+)
+from data_upload.upload_engine import ENGINE_NATIVE
+
+TARGET = {
+    "environment": "euphrosyne",
+    "project": "project-a",
+    "run": "Run 1",
+    "data_type": "raw_data",
+    "folder": "/data/run-1",
+}
+
+
+def test_job_store_persists_started_jobs_across_instances(tmp_path):
+    UploadJobStore(tmp_path / "jobs.json").record_started("job-1", **TARGET)
+
+    job = UploadJobStore(tmp_path / "jobs.json").find_resumable(**TARGET)
+
+    assert job["job_id"] == "job-1"
+    assert job["status"] == "running"
+    assert {key: job[key] for key in TARGET} == TARGET
+
+
+def test_job_store_uses_app_data_folder_by_default(app_data_folder):
+    UploadJobStore().record_started("job-1", **TARGET)
+
+    assert (app_data_folder / "upload_jobs.json").exists()
+
+
+def test_find_resumable_returns_failed_job_for_same_target_only(tmp_path):
+    store = UploadJobStore(tmp_path / "jobs.json")
+    store.record_started("job-1", **TARGET)
+    store.set_status("job-1", JOB_FAILED)
+
+    assert store.find_resumable(**TARGET)["job_id"] == "job-1"
+    assert store.find_resumable(**{**TARGET, "run": "Run 2"}) is None
+    assert store.find_resumable(**{**TARGET, "data_type": "processed_data"}) is None
+
+
+def test_find_resumable_ignores_finished_or_discarded_latest_job(tmp_path):
+    store = UploadJobStore(tmp_path / "jobs.json")
+    store.record_started("job-1", **TARGET)
+    store.record_started("job-2", **TARGET)
+    store.set_status("job-2", JOB_COMPLETED)
+
+    assert store.find_resumable(**TARGET) is None
+
+    store.record_started("job-3", **TARGET)
+    store.set_status("job-3", JOB_DISCARDED)
+
+    assert store.find_resumable(**TARGET) is None
+
+
+def test_find_resumable_ignores_native_engine_jobs(tmp_path):
+    store = UploadJobStore(tmp_path / "jobs.json")
+    store.record_started("job-1", **TARGET)
+    store.set_status("job-1", JOB_FAILED)
+    store.record_started("native-1", engine=ENGINE_NATIVE, **TARGET)
+    store.set_status("native-1", JOB_FAILED)
+
+    # The native upload is not an AzCopy job, and supersedes the failed one.
+    assert store.find_resumable(**TARGET) is None
+    assert store.recent_projects("euphrosyne") == ["project-a"]
+
+
+def test_find_resumable_treats_jobs_without_engine_as_azcopy_jobs(tmp_path):
+    path = tmp_path / "jobs.json"
+    store = UploadJobStore(path)
+    store.record_started("job-1", **TARGET)
+    jobs = json.loads(path.read_text())
+    del jobs[0]["engine"]
+    path.write_text(json.dumps(jobs))
+
+    assert store.find_resumable(**TARGET)["job_id"] == "job-1"
+
+
+def test_job_store_keeps_only_recent_jobs(tmp_path):
+    store = UploadJobStore(tmp_path / "jobs.json")
+
+    for index in range(MAX_STORED_JOBS + 5):
+        store.record_started(f"job-{index}", **TARGET)
+
+    jobs = store.list_jobs()
+    assert len(jobs) == MAX_STORED_JOBS
+    assert jobs[-1]["job_id"] == f"job-{MAX_STORED_JOBS + 4}"
+
+
+def test_job_store_treats_corrupt_file_as_empty(tmp_path):
+    path = tmp_path / "jobs.json"
+    path.write_text("not json")
+
+    assert UploadJobStore(path).list_jobs() == []
+
+
+def test_set_status_does_not_rewrite_store_for_unknown_or_unchanged_job(tmp_path):
+    store = UploadJobStore(tmp_path / "jobs.json")
+    store.record_started("job-1", **TARGET)
+    inode = store.path.stat().st_ino
+
+    store.set_status("unknown-job", JOB_FAILED)
+    store.set_status("job-1", "running")
+
+    # Writes go through an atomic replace, so a rewrite would change the inode.
+    assert store.path.stat().st_ino == inode
+
+
+def test_recent_projects_lists_projects_of_environment_latest_first(tmp_path):
+    store = UploadJobStore(tmp_path / "jobs.json")
+    store.record_started("job-1", **TARGET)
+    store.record_started("job-2", **{**TARGET, "project": "project-b"})
+    store.record_started("job-3", **{**TARGET, "environment": "staging"})
+    store.record_started("job-4", **TARGET)
+
+    assert store.recent_projects("euphrosyne") == ["project-a", "project-b"]
+    assert store.recent_projects("staging") == ["project-a"]
+    assert store.recent_projects("other") == []
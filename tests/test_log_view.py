@@ -0,0 +1,69 @@
+from data_upload.widget.log_view import TransferLog
+
+
+def _lines(log: TransferLog) -> list[str]:
+    log.flush()
+    return log.toPlainText().splitlines()
+
+
+def test_append_shows_text_at_once(qapp, tmp_path):
+    log = TransferLog(log_path=tmp_path / "transfer.log")
+
+    log.append("Done.")
+
+    assert log.document().toPlainText() == "Done."
+    log.close_log_file()
+
+
+def test_queued_lines_are_rendered_together(qapp, tmp_path):
+    log = TransferLog(log_path=tmp_path / "transfer.log")
+
+    log.queue("line 1")
+    log.write("line 2\nline")
+    log.write(" 3\n")
+
+    assert log.document().toPlainText() == ""
+    assert log._flush_timer.isActive()
+    assert _lines(log) == ["line 1", "line 2", "line 3"]
+    log.close_log_file()
+
+
+def test_append_keeps_queued_lines_in_order(qapp, tmp_path):
+    log = TransferLog(log_path=tmp_path / "transfer.log")
+
+    log.queue("AzCopy output")
+    log.append("Done.")
+
+    assert _lines(log) == ["AzCopy output", "Done."]
+    log.close_log_file()
+
+
+def test_view_keeps_last_lines_and_file_keeps_all(qapp, tmp_path):
+    log_path = tmp_path / "transfer.log"
+    log = TransferLog(max_lines=3, log_path=log_path)
+
+    for index in range(10):
+        log.queue(f"line {index}")
+    log.flush()
+    log.append("line 10")
+    log.write("partial")
+    log.close_log_file()
+
+    assert _lines(log) == ["line 9", "line 10", "partial"]
+    assert log_path.read_text(encoding="utf-8").splitlines() == [
+        *(f"line {index}" for index in range(11)),
+        "partial",
+    ]
+
+
+def test_log_file_rotates(qapp, tmp_path, monkeypatch):
+    monkeypatch.setattr("data_upload.widget.log_view.LOG_FILE_MAX_BYTES", 100)
+    log_path = tmp_path / "transfer.log"
+    log = TransferLog(log_path=log_path)
+
+    for index in range(10):
+        log.append("x" * 40)
+    log.close_log_file()
+
+    assert (tmp_path / "transfer.log.1").exists()
+    assert len(log_path.read_text(encoding="utf-8")) <= 100
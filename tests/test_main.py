@@ -9,14 +9,21 @@ def test_main_launches_gui_without_upload_args(monkeypatch):
     monkeypatch.setattr(
         gui_module.ConverterGUI,
         "start",
-        lambda: gui_calls.append("started"),
+        lambda timer: gui_calls.append(timer),
     )
     monkeypatch.setattr(cli_module, "main", lambda argv: cli_calls.append(argv))
+    sentry_calls = []
+    monkeypatch.setattr(gui_module, "init_sentry", lambda: sentry_calls.append(True))
 
     exit_code = main_module.main([])
 
     assert exit_code == 0
-    assert gui_calls == ["started"]
+    assert len(gui_calls) == 1
+    assert [timing.name for timing in gui_calls[0].timings] == [
+        "import gui",
+        "init sentry",
+    ]
+    assert sentry_calls == [True]
     assert cli_calls == []
 
 
@@ -40,3 +47,11 @@ def test_main_delegates_to_cli_when_upload_args_are_present(monkeypatch, tmp_pat
 
     assert exit_code == 7
     assert cli_calls == [argv]
+
+
+def test_main_delegates_manifest_uploads_to_cli(monkeypatch):
+    cli_calls = []
+    monkeypatch.setattr(cli_module, "main", lambda args: cli_calls.append(args) or 0)
+
+    assert main_module.main(["--manifest", "uploads.yml"]) == 0
+    assert cli_calls == [["--manifest", "uploads.yml"]]
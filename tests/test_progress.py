@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+from data_upload.progress import (
+    ProgressThrottle,
+    ProgressTracker,
+    counters_from_azcopy_summary,
+    format_progress,
+    parse_azcopy_message,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _counters(bytes_transferred, bytes_total=1000, status="InProgress"):
+    return {
+        "job_id": "job-1",
+        "status": status,
+        "bytes_transferred": bytes_transferred,
+        "bytes_total": bytes_total,
+        "files_completed": 1,
+        "files_failed": 0,
+        "files_skipped": 0,
+        "files_total": 4,
+    }
+
+
+def test_parse_azcopy_message_decodes_nested_json_content():
+    line = json.dumps(
+        {
+            "TimeStamp": "2025-01-01T00:00:00Z",
+            "MessageType": "Progress",
+            "MessageContent": json.dumps({"JobID": "job-1"}),
+        }
+    )
+
+    assert parse_azcopy_message(line) == {
+        "type": "Progress",
+        "content": '{"JobID": "job-1"}',
+        "data": {"JobID": "job-1"},
+    }
+
+
+def test_parse_azcopy_message_keeps_text_content():
+    line = json.dumps({"MessageType": "Error", "MessageContent": "failed to copy"})
+
+    assert parse_azcopy_message(line) == {
+        "type": "Error",
+        "content": "failed to copy",
+        "data": None,
+    }
+
+
+@pytest.mark.parametrize("line", ["INFO: plain text", "[1, 2]", '{"other": 1}'])
+def test_parse_azcopy_message_ignores_non_azcopy_lines(line):
+    assert parse_azcopy_message(line) is None
+
+
+def test_counters_from_azcopy_summary_accepts_string_and_numeric_counters():
+    counters = counters_from_azcopy_summary(
+        {
+            "JobID": "job-1",
+            "JobStatus": "InProgress",
+            "TotalBytesTransferred": "1024",
+            "TotalBytesExpected": 0,
+            "TransfersCompleted": 3,
+            "TransfersFailed": "1",
+            "TransfersSkipped": "2",
+            "TotalTransfers": "10",
+        }
+    )
+
+    assert counters == {
+        "job_id": "job-1",
+        "status": "InProgress",
+        "bytes_transferred": 1024,
+        "bytes_total": None,
+        "files_completed": 3,
+        "files_failed": 1,
+        "files_skipped": 2,
+        "files_total": 10,
+    }
+
+
+def test_progress_tracker_computes_throughput_and_eta():
+    clock = FakeClock()
+    tracker = ProgressTracker(smoothing=1.0, clock=clock)
+
+    clock.now = 1.0
+    first = tracker.update(_counters(100))
+    clock.now = 2.0
+    second = tracker.update(_counters(300))
+
+    assert first["throughput"] == 100
+    assert first["eta"] == 9
+    assert second["throughput"] == 200
+    assert second["eta"] == 3.5
+    assert second["final"] is False
+
+
+def test_progress_tracker_marks_terminal_statuses_as_final():
+    tracker = ProgressTracker(clock=FakeClock())
+
+    progress = tracker.update(_counters(1000, status="CompletedWithErrors"))
+
+    assert progress["final"] is True
+    assert progress["eta"] == 0
+
+
+def test_progress_throttle_limits_rate_but_lets_final_event_through():
+    clock = FakeClock()
+    throttle = ProgressThrottle(interval=1.0, clock=clock)
+
+    assert throttle.ready() is True
+    clock.now = 0.5
+    assert throttle.ready() is False
+    assert throttle.ready(final=True) is True
+    clock.now = 1.6
+    assert throttle.ready() is True
+
+
+def test_format_progress_reports_percentage_files_throughput_and_eta():
+    progress = {
+        **_counters(250_000_000, bytes_total=1_000_000_000),
+        "files_failed": 1,
+        "throughput": 12_500_000,
+        "eta": 60,
+        "final": False,
+    }
+
+    assert format_progress(progress) == (
+        "25.0% (250.0 MB of 1.0 GB) - 1/4 files (1 failed, 0 skipped) - "
+        "12.5 MB/s - ETA 00:01:00"
+    )
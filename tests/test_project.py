@@ -1,5 +1,8 @@
+import json
+
 import httpx
 import pytest
+from pytest_httpx import IteratorStream
 
 from data_upload.euphrosyne import project
 from data_upload.euphrosyne.project import ProjectLoadingError
@@ -52,6 +55,26 @@ def test_list_projects_caches_by_host_and_access_token(httpx_mock):
     assert len(httpx_mock.get_requests()) == 1
 
 
+def test_list_projects_cache_expires_and_is_bounded(httpx_mock, monkeypatch):
+    httpx_mock.add_response(
+        method="GET",
+        url="https://euphrosyne.example/api/lab/projects/",
+        json=[],
+        is_reusable=True,
+    )
+    now = [0.0]
+    monkeypatch.setattr(project.list_projects.cache, "clock", lambda: now[0])
+
+    project.list_projects("https://euphrosyne.example", "access-token")
+    now[0] = project.PROJECTS_CACHE_TTL
+    project.list_projects("https://euphrosyne.example", "access-token")
+    for index in range(project.PROJECTS_CACHE_SIZE + 1):
+        project.list_projects("https://euphrosyne.example", f"token-{index}")
+
+    assert len(httpx_mock.get_requests()) == project.PROJECTS_CACHE_SIZE + 3
+    assert len(project.list_projects.cache) == project.PROJECTS_CACHE_SIZE
+
+
 def test_list_projects_raises_for_non_200_responses(httpx_mock):
     httpx_mock.add_response(
         method="GET",
@@ -108,6 +131,134 @@ def test_list_projects_raises_for_invalid_json(httpx_mock):
         project.list_projects("https://euphrosyne.example", "access-token")
 
 
+def test_fetch_projects_returns_response_validators(httpx_mock):
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/",
+        json=[{"name": "Project A", "slug": "project-a", "runs": []}],
+        headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+
+    catalog = project.fetch_projects("https://euphrosyne.example", "access-token")
+
+    assert catalog == {
+        "projects": [{"name": "Project A", "slug": "project-a", "runs": []}],
+        "etag": '"v1"',
+        "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+    }
+    assert "If-None-Match" not in httpx_mock.get_request().headers
+
+
+def test_fetch_projects_returns_none_when_not_modified(httpx_mock):
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/", status_code=304
+    )
+
+    catalog = project.fetch_projects(
+        "https://euphrosyne.example",
+        "access-token",
+        etag='"v1"',
+        last_modified="Wed, 01 Jan 2025 00:00:00 GMT",
+    )
+
+    assert catalog is None
+    request = httpx_mock.get_request()
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert request.headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def _project(index: int) -> dict:
+    return {"name": f"Project {index}", "slug": f"project-{index}", "runs": []}
+
+
+def test_fetch_projects_follows_pages(httpx_mock):
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/",
+        json={
+            "results": [_project(1)],
+            "next": "https://euphrosyne.example/api/lab/projects/?page=2",
+        },
+        headers={"ETag": '"v1"'},
+    )
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/?page=2",
+        json={"results": [_project(2)], "next": None},
+    )
+    batches = []
+
+    catalog = project.fetch_projects(
+        "https://euphrosyne.example",
+        "access-token",
+        etag='"v0"',
+        on_projects=batches.append,
+    )
+
+    assert catalog["projects"] == [_project(1), _project(2)]
+    assert catalog["etag"] == '"v1"'
+    assert batches == [[_project(1)], [_project(2)]]
+    first, second = httpx_mock.get_requests()
+    assert first.headers["If-None-Match"] == '"v0"'
+    assert "If-None-Match" not in second.headers
+    assert second.headers["Authorization"] == "Bearer access-token"
+
+
+def test_fetch_projects_streams_list_in_batches(httpx_mock, monkeypatch):
+    monkeypatch.setattr(project, "PROJECTS_BATCH_SIZE", 2)
+    body = json.dumps([_project(index) for index in range(5)]).encode()
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/",
+        stream=IteratorStream([body[i : i + 7] for i in range(0, len(body), 7)]),
+    )
+    batches = []
+
+    catalog = project.fetch_projects(
+        "https://euphrosyne.example", "access-token", on_projects=batches.append
+    )
+
+    assert catalog["projects"] == [_project(index) for index in range(5)]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_fetch_projects_hands_out_projects_before_an_invalid_one(httpx_mock):
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/",
+        json={
+            "results": [_project(1)],
+            "next": "https://euphrosyne.example/api/lab/projects/?page=2",
+        },
+    )
+    httpx_mock.add_response(
+        url="https://euphrosyne.example/api/lab/projects/?page=2",
+        json={"results": [{"runs": []}], "next": None},
+    )
+    batches = []
+
+    with pytest.raises(ProjectLoadingError, match="index 1 is missing a name"):
+        project.fetch_projects(
+            "https://euphrosyne.example", "access-token", on_projects=batches.append
+        )
+    assert batches == [[_project(1)]]
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        (["[]"], []),
+        ([" [ 1", "2 , ", '"a,]"', ", {", '"b": [1]}', " ] "], [12, "a,]", {"b": [1]}]),
+        (["[", "1", ",", "2", "]"], [1, 2]),
+    ],
+)
+def test_iter_json_array_yields_items_across_chunks(chunks, expected):
+    items = project._iter_json_array(chunks[0], iter(chunks[1:]))
+
+    assert list(items) == expected
+
+
+@pytest.mark.parametrize("chunks", [["[1"], ["[1 2]"], ["[1,", "]"], ['[{"a": ']])
+def test_iter_json_array_rejects_invalid_arrays(chunks):
+    with pytest.raises(ProjectLoadingError, match="valid JSON"):
+        list(project._iter_json_array(chunks[0], iter(chunks[1:])))
+
+
 def test_first_project_with_runs_returns_first_uploadable_project():
     projects = [
         {"name": "Project A", "slug": "a", "runs": []},
@@ -0,0 +1,110 @@
+import base64
+import json
+
+from data_upload.project_catalog import (
+    ProjectCatalogStore,
+    get_cached_projects,
+    get_catalog_user,
+    revalidate_project_catalog,
+)
+
+CONFIG = {
+    "environment": "euphrosyne",
+    "euphrosyne": {"url": "https://euphrosyne.example"},
+}
+PROJECTS_URL = "https://euphrosyne.example/api/lab/projects/"
+PROJECT_A = {"name": "Project A", "slug": "project-a", "runs": [{"label": "Run 1"}]}
+PROJECT_B = {"name": "Project B", "slug": "project-b", "runs": []}
+
+
+def _token(user_id) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"user_id": user_id}).encode())
+    return f"header.{payload.decode().rstrip('=')}.signature"
+
+
+def _catalog(projects, etag=None):
+    return {"projects": projects, "etag": etag, "last_modified": None}
+
+
+def test_get_catalog_user_reads_user_id_claim():
+    assert get_catalog_user(_token(42)) == "42"
+    assert get_catalog_user("not-a-jwt") is None
+    assert get_catalog_user(None) is None
+
+
+def test_store_keeps_one_catalog_per_environment_and_user(tmp_path):
+    store = ProjectCatalogStore(tmp_path / "catalog.json")
+    store.save("euphrosyne", "42", _catalog([PROJECT_A], etag='"v1"'))
+    store.save("euphrosyne-staging", "42", _catalog([PROJECT_B]))
+
+    reloaded = ProjectCatalogStore(tmp_path / "catalog.json")
+    assert reloaded.load("euphrosyne", "42")["projects"] == [PROJECT_A]
+    assert reloaded.load("euphrosyne", "42")["etag"] == '"v1"'
+    assert reloaded.load("euphrosyne-staging", "42")["projects"] == [PROJECT_B]
+    assert reloaded.load("euphrosyne", "7") is None
+
+    reloaded.clear()
+    assert reloaded.load("euphrosyne", "42") is None
+
+
+def test_store_ignores_invalid_cached_projects(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"euphrosyne": {"user": None, "projects": [{}]}}))
+
+    assert ProjectCatalogStore(path).load("euphrosyne", None) is None
+
+
+def test_get_cached_projects_serves_the_last_download(httpx_mock, tmp_path):
+    store = ProjectCatalogStore(tmp_path / "catalog.json")
+    httpx_mock.add_response(url=PROJECTS_URL, json=[PROJECT_A])
+
+    assert get_cached_projects(CONFIG, _token(42), store=store) is None
+    revalidate_project_catalog(CONFIG, _token(42), store=store)
+
+    assert get_cached_projects(CONFIG, _token(42), store=store) == [PROJECT_A]
+    assert get_cached_projects(CONFIG, _token(7), store=store) is None
+
+
+def test_revalidate_project_catalog_sends_validators(httpx_mock, tmp_path):
+    store = ProjectCatalogStore(tmp_path / "catalog.json")
+    store.save("euphrosyne", "42", _catalog([PROJECT_A], etag='"v1"'))
+    httpx_mock.add_response(url=PROJECTS_URL, status_code=304)
+
+    assert revalidate_project_catalog(CONFIG, _token(42), store=store) is None
+    assert httpx_mock.get_request().headers["If-None-Match"] == '"v1"'
+
+
+def test_revalidate_project_catalog_saves_changed_projects(httpx_mock, tmp_path):
+    store = ProjectCatalogStore(tmp_path / "catalog.json")
+    store.save("euphrosyne", "42", _catalog([PROJECT_A], etag='"v1"'))
+    httpx_mock.add_response(
+        url=PROJECTS_URL, json=[PROJECT_A, PROJECT_B], headers={"ETag": '"v2"'}
+    )
+
+    projects = revalidate_project_catalog(CONFIG, _token(42), store=store)
+
+    assert projects == [PROJECT_A, PROJECT_B]
+    assert store.load("euphrosyne", "42")["etag"] == '"v2"'
+
+
+def test_revalidate_project_catalog_ignores_unchanged_projects(httpx_mock, tmp_path):
+    # Servers without validators send the whole list again.
+    store = ProjectCatalogStore(tmp_path / "catalog.json")
+    store.save("euphrosyne", "42", _catalog([PROJECT_A]))
+    httpx_mock.add_response(url=PROJECTS_URL, json=[PROJECT_A])
+
+    assert revalidate_project_catalog(CONFIG, _token(42), store=store) is None
+    assert "If-None-Match" not in httpx_mock.get_request().headers
+
+
+def test_revalidate_project_catalog_streams_projects(httpx_mock, tmp_path):
+    store = ProjectCatalogStore(tmp_path / "catalog.json")
+    httpx_mock.add_response(url=PROJECTS_URL, json=[PROJECT_A, PROJECT_B])
+    batches = []
+
+    projects = revalidate_project_catalog(
+        CONFIG, _token(42), store=store, on_projects=batches.append
+    )
+
+    assert projects == [PROJECT_A, PROJECT_B]
+    assert batches == [[PROJECT_A, PROJECT_B]]
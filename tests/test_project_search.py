@@ -0,0 +1,67 @@
+from data_upload.project_search import (
+    ProjectSearchIndex,
+    normalize_search_text,
+    search_words,
+)
+
+PROJECTS = [
+    {"name": "Étude des Pigments", "slug": "etude-pigments", "runs": []},
+    {"name": "Pigment Survey", "slug": "pigment-survey", "runs": [{"label": "R"}]},
+    {"name": "Bronze Age", "slug": "bronze-age", "runs": [{"label": "R"}]},
+    {"name": "Bronze Statues", "slug": "bronze-statues", "runs": []},
+]
+
+
+def test_normalize_search_text_folds_case_accents_and_spaces():
+    assert normalize_search_text("  Étude   DES ﬁbres ") == "etude des fibres"
+    assert search_words("Ça-va, Lab_1") == ["ca", "va", "lab_1"]
+
+
+def test_index_of_name_ignores_case_accents_and_surrounding_spaces():
+    index = ProjectSearchIndex(PROJECTS)
+
+    assert index.index_of_name(" etude des pigments") == 0
+    assert index.index_of_name("BRONZE AGE") == 2
+    assert index.index_of_name("Bronze") is None
+
+
+def test_search_ranks_exact_then_prefix_then_substring_matches():
+    index = ProjectSearchIndex(PROJECTS)
+
+    assert index.search("pigment") == [1, 0]
+    assert index.search("pig") == [1, 0]
+    assert index.search("ronz") == [2, 3]
+
+
+def test_search_requires_every_query_word():
+    index = ProjectSearchIndex(PROJECTS)
+
+    assert index.search("bronze stat") == [3]
+    assert index.search("bronze pigment") == []
+
+
+def test_search_matches_slugs_and_typos():
+    index = ProjectSearchIndex(PROJECTS)
+
+    assert index.search("survey") == [1]
+    assert index.search("bronez") == [2, 3]
+    assert index.search("xyz") == []
+
+
+def test_search_ranks_recent_then_uploadable_projects_first():
+    index = ProjectSearchIndex(PROJECTS, recent=["bronze-statues"])
+
+    assert index.search("") == [3, 1, 2, 0]
+    assert index.search("bronze") == [3, 2]
+
+    index.set_recent([])
+    assert index.search("bronze") == [2, 3]
+
+
+def test_extend_indexes_projects_after_existing_ones():
+    index = ProjectSearchIndex(PROJECTS[:2])
+    index.extend(PROJECTS[2:])
+
+    assert len(index) == 4
+    assert index.search("bronze") == [2, 3]
+    assert index.index_of_name("Bronze Statues") == 3
@@ -0,0 +1,218 @@
+import asyncio
+
+import httpx
+import pytest
+
+from data_upload.euphro_tools import EuphrosyneToolsService
+from data_upload.http_client import create_http_client
+from data_upload.retry import (
+    IDEMPOTENT_EXTENSION,
+    AsyncRetryTransport,
+    RetryPolicy,
+    RetryStats,
+    RetryTransport,
+    get_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _client(outcomes, policy=RetryPolicy(), stats=None):
+    """A client whose transport returns or raises `outcomes` in turn."""
+    clock = FakeClock()
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    transport = RetryTransport(
+        httpx.MockTransport(handler),
+        policy,
+        stats=stats or RetryStats(),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    return httpx.Client(transport=transport), requests, clock
+
+
+def test_retries_idempotent_requests_after_server_errors():
+    client, requests, clock = _client(
+        [httpx.Response(502), httpx.Response(504), httpx.Response(200)]
+    )
+
+    response = client.get("https://tools.example/data")
+
+    assert response.status_code == 200
+    assert len(requests) == 3
+    assert len(clock.sleeps) == 2
+    # Full jitter below an exponential ceiling.
+    assert 0 <= clock.sleeps[0] <= 0.5 and 0 <= clock.sleeps[1] <= 1.0
+
+
+def test_returns_last_response_after_max_attempts():
+    client, requests, _clock = _client(
+        [httpx.Response(500) for _ in range(2)], RetryPolicy(max_attempts=2)
+    )
+
+    assert client.get("https://tools.example/data").status_code == 500
+    assert len(requests) == 2
+
+
+def test_does_not_retry_non_idempotent_requests_after_server_errors():
+    client, requests, _clock = _client([httpx.Response(502)])
+
+    response = client.post("https://euphrosyne.example/api/auth/token/refresh/")
+
+    assert response.status_code == 502
+    assert len(requests) == 1
+
+
+def test_retries_explicitly_idempotent_post():
+    client, requests, _clock = _client([httpx.Response(502), httpx.Response(204)])
+
+    response = client.post(
+        "https://tools.example/data/project/init",
+        extensions={IDEMPOTENT_EXTENSION: True},
+    )
+
+    assert response.status_code == 204
+    assert len(requests) == 2
+
+
+def test_retries_connect_errors_whatever_the_method():
+    client, requests, _clock = _client(
+        [httpx.ConnectError("refused"), httpx.Response(200)]
+    )
+
+    assert client.post("https://euphrosyne.example/login").status_code == 200
+    assert len(requests) == 2
+
+
+def test_does_not_retry_read_errors_of_non_idempotent_requests():
+    client, requests, _clock = _client([httpx.ReadError("reset")])
+
+    with pytest.raises(httpx.ReadError):
+        client.post("https://euphrosyne.example/login")
+    assert len(requests) == 1
+
+
+def test_waits_for_retry_after_even_for_post():
+    client, _requests, clock = _client(
+        [httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200)]
+    )
+
+    assert client.post("https://euphrosyne.example/login").status_code == 200
+    assert clock.sleeps == [3.0]
+
+
+def test_gives_up_when_the_time_budget_would_be_exceeded():
+    client, requests, clock = _client(
+        [
+            httpx.Response(503, headers={"Retry-After": "4"}),
+            httpx.Response(503, headers={"Retry-After": "4"}),
+            httpx.Response(200),
+        ],
+        RetryPolicy(budget=5.0),
+    )
+
+    assert client.get("https://tools.example/data").status_code == 503
+    assert clock.sleeps == [4.0]
+    assert len(requests) == 2
+
+
+def test_get_retry_after_parses_seconds_and_http_dates():
+    assert get_retry_after(httpx.Response(503, headers={"Retry-After": "2"})) == 2
+    assert (
+        get_retry_after(
+            httpx.Response(
+                503, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+            )
+        )
+        == 0
+    )
+    assert get_retry_after(httpx.Response(503, headers={"Retry-After": "soon"})) is None
+    assert get_retry_after(httpx.Response(503)) is None
+
+
+def test_stats_count_requests_retries_and_failures():
+    stats = RetryStats()
+    client, _requests, _clock = _client(
+        [
+            httpx.Response(502),
+            httpx.Response(200),
+            httpx.ConnectError("refused"),
+            httpx.ConnectError("refused"),
+        ],
+        RetryPolicy(max_attempts=2),
+        stats=stats,
+    )
+
+    client.get("https://tools.example/a")
+    with pytest.raises(httpx.ConnectError):
+        client.get("https://tools.example/b")
+
+    snapshot = stats.snapshot()
+    assert (snapshot["requests"], snapshot["retries"], snapshot["failures"]) == (
+        2,
+        2,
+        1,
+    )
+    assert snapshot["latency_max"] >= snapshot["latency_mean"] >= 0
+
+
+def test_policy_from_config():
+    assert RetryPolicy.from_config(
+        {"max-attempts": 2, "budget-seconds": 5}
+    ) == RetryPolicy(max_attempts=2, budget=5.0)
+    assert RetryPolicy.from_config(None) == RetryPolicy()
+
+
+def test_async_transport_retries():
+    responses = [httpx.Response(503), httpx.Response(200)]
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    async def run():
+        transport = AsyncRetryTransport(
+            httpx.MockTransport(lambda request: responses.pop(0)),
+            stats=RetryStats(),
+            sleep=sleep,
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://tools.example/data")
+
+    assert asyncio.run(run()).status_code == 200
+    assert len(sleeps) == 1
+
+
+def test_tools_service_init_is_retried_through_pooled_client(httpx_mock):
+    httpx_mock.add_response(
+        method="POST", url="https://tools.example/data/project-a/init", status_code=502
+    )
+    httpx_mock.add_response(
+        method="POST", url="https://tools.example/data/project-a/init", status_code=204
+    )
+
+    with create_http_client({"backoff-seconds": 0}) as client:
+        EuphrosyneToolsService(
+            "https://tools.example", auth=None, client=client
+        ).init_project_folder("project-a")
+
+    assert len(httpx_mock.get_requests()) == 2
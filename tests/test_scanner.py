@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from data_upload.scanner import ManifestEntry, scan_folder
+
+
+def _write_tree(root):
+    (root / "spectra" / "detector-1").mkdir(parents=True)
+    (root / "spectra" / "detector-2").mkdir()
+    (root / "empty").mkdir()
+    (root / "notes.txt").write_bytes(b"run notes")
+    (root / "spectra" / "detector-1" / "a.bin").write_bytes(b"a" * 100)
+    (root / "spectra" / "detector-2" / "b.bin").write_bytes(b"b" * 50)
+    os.utime(root / "notes.txt", ns=(1, 2_000_000_000))
+
+
+def test_scan_folder_lists_nested_files_with_size_and_mtime(tmp_path):
+    _write_tree(tmp_path)
+
+    manifest = scan_folder(str(tmp_path), workers=4)
+
+    assert manifest.directories == [
+        "empty",
+        "spectra",
+        "spectra/detector-1",
+        "spectra/detector-2",
+    ]
+    assert [(entry.path, entry.size) for entry in manifest.files] == [
+        ("notes.txt", 9),
+        ("spectra/detector-1/a.bin", 100),
+        ("spectra/detector-2/b.bin", 50),
+    ]
+    assert manifest.files[0] == ManifestEntry("notes.txt", 9, 2_000_000_000)
+    assert manifest.file_count == 3
+    assert manifest.total_bytes == 159
+    assert manifest.snapshot()["notes.txt"] == (9, 2_000_000_000)
+
+
+def test_scan_folder_hashes_files_when_asked(tmp_path):
+    _write_tree(tmp_path)
+
+    manifest = scan_folder(str(tmp_path), hasher=lambda path: path.name.upper())
+
+    assert [entry.hash for entry in manifest.files] == [
+        "NOTES.TXT",
+        "A.BIN",
+        "B.BIN",
+    ]
+
+
+def test_scan_folder_does_not_follow_directory_symlinks(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "file.txt").write_bytes(b"x")
+    try:
+        (tmp_path / "data" / "loop").symlink_to(tmp_path / "data")
+    except OSError:
+        pytest.skip("symlinks are not available")
+
+    manifest = scan_folder(str(tmp_path / "data"))
+
+    assert [entry.path for entry in manifest.files] == ["file.txt"]
+
+
+def test_scan_folder_raises_when_folder_does_not_exist(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        scan_folder(str(tmp_path / "missing"))
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from data_upload.app.startup import StartupPipeline
+
+
+def test_stages_run_in_parallel_and_receive_required_results(qapp):
+    both_started = threading.Barrier(2, timeout=5)
+    pipeline = StartupPipeline()
+
+    def independent(value):
+        both_started.wait()
+        return value
+
+    pipeline.add_stage("config", "Loading configuration...", lambda: independent(1))
+    pipeline.add_stage("azcopy", "Checking AzCopy...", lambda: independent(2))
+    pipeline.add_stage(
+        "session",
+        "Checking authentication...",
+        lambda config, azcopy: config + azcopy,
+        requires=("config", "azcopy"),
+    )
+
+    assert pipeline.run() == {"config": 1, "azcopy": 2, "session": 3}
+
+
+def test_progress_reports_done_stages_and_running_messages(qapp):
+    pipeline = StartupPipeline()
+    progress = []
+    pipeline.progress_signal.connect(
+        lambda done, total, message: progress.append((done, total, message))
+    )
+    pipeline.add_stage(
+        "azcopy",
+        "Checking AzCopy...",
+        lambda: pipeline.report("azcopy", "Downloading AzCopy..."),
+    )
+    pipeline.add_stage(
+        "session", "Checking authentication...", lambda _: None, ("azcopy",)
+    )
+
+    pipeline.run()
+
+    assert progress == [
+        (0, 2, "Checking AzCopy..."),
+        (0, 2, "Downloading AzCopy..."),
+        (1, 2, "Checking authentication..."),
+        (2, 2, ""),
+    ]
+
+
+def test_failed_stage_skips_dependents_and_raises_after_running_ones(qapp):
+    pipeline = StartupPipeline()
+    finished = []
+
+    def slow():
+        finished.append("azcopy")
+
+    def fail():
+        raise ConnectionError("unreachable")
+
+    pipeline.add_stage("azcopy", "Checking AzCopy...", slow)
+    pipeline.add_stage("config", "Loading configuration...", fail)
+    pipeline.add_stage(
+        "session",
+        "Checking authentication...",
+        lambda config: pytest.fail("depends on a failed stage"),
+        requires=("config",),
+    )
+
+    with pytest.raises(ConnectionError, match="unreachable"):
+        pipeline.run()
+    assert finished == ["azcopy"]
+
+
+def test_stages_must_require_known_stages():
+    pipeline = StartupPipeline()
+
+    with pytest.raises(ValueError, match="unknown stages"):
+        pipeline.add_stage("session", "Checking authentication...", print, ("config",))
@@ -0,0 +1,121 @@
+import logging
+import threading
+from datetime import timedelta
+
+import pytest
+import sentry_sdk
+
+from data_upload.startup_timing import (
+    STARTUP_TRANSACTION_OP,
+    StageTiming,
+    StartupTimer,
+    sample_startup_traces,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stages_are_timed_and_logged(caplog):
+    clock = FakeClock()
+    timer = StartupTimer("gui", clock=clock)
+
+    with caplog.at_level(logging.INFO, logger="data_upload.startup_timing"):
+        with timer.stage("config"):
+            clock.now += 0.25
+        clock.now += 0.5
+        assert timer.finish() == 0.75
+
+    assert timer.timings == [StageTiming("config", 0.25)]
+    assert "Startup stage 'config' took 250 ms" in caplog.text
+    assert "gui startup took 750 ms" in caplog.text
+
+
+def test_failing_stage_is_still_timed():
+    clock = FakeClock()
+    timer = StartupTimer("gui", clock=clock)
+
+    with pytest.raises(ValueError):
+        with timer.stage("session"):
+            clock.now += 1
+            raise ValueError("refresh failed")
+
+    assert timer.timings == [StageTiming("session", 1)]
+
+
+def test_wrapped_functions_are_timed_from_any_thread():
+    timer = StartupTimer("gui")
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda name=name: results.append(timer.wrap(name, len)(name))
+        )
+        for name in ("azcopy", "keyring")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [6, 7]
+    assert sorted(timing.name for timing in timer.timings) == ["azcopy", "keyring"]
+
+
+def test_spans_are_sent_at_finish_with_their_own_timestamps(monkeypatch):
+    clock = FakeClock()
+    transactions = []
+
+    class FakeSpan:
+        def __init__(self, op, name, start_timestamp):
+            self.op = op
+            self.name = name
+            self.start_timestamp = start_timestamp
+            self.end_timestamp = None
+            self.children = []
+
+        def start_child(self, op, name, start_timestamp):
+            child = FakeSpan(op, name, start_timestamp)
+            self.children.append(child)
+            return child
+
+        def finish(self, end_timestamp):
+            self.end_timestamp = end_timestamp
+
+    def fake_start_transaction(op, name, start_timestamp):
+        transactions.append(FakeSpan(op, name, start_timestamp))
+        return transactions[-1]
+
+    monkeypatch.setattr(sentry_sdk, "start_transaction", fake_start_transaction)
+    timer = StartupTimer("gui", clock=clock)
+    clock.now += 1
+    with timer.stage("import gui"):
+        clock.now += 2
+    # Sentry is only initialized once the first stages are done.
+    assert transactions == []
+    clock.now += 0.5
+
+    timer.finish()
+
+    transaction = transactions[0]
+    assert (transaction.op, transaction.name) == (STARTUP_TRANSACTION_OP, "gui startup")
+    assert transaction.end_timestamp - transaction.start_timestamp == timedelta(
+        seconds=3.5
+    )
+    span = transaction.children[0]
+    assert span.name == "import gui"
+    assert span.start_timestamp - transaction.start_timestamp == timedelta(seconds=1)
+    assert span.end_timestamp - span.start_timestamp == timedelta(seconds=2)
+
+
+def test_sentry_samples_the_startup_transaction_only():
+    assert (
+        sample_startup_traces({"transaction_context": {"op": STARTUP_TRANSACTION_OP}})
+        == 1.0
+    )
+    assert sample_startup_traces({"transaction_context": {"op": "http.client"}}) == 0
+    assert sample_startup_traces({}) == 0
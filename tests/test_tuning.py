@@ -0,0 +1,79 @@
+import pytest
+
+from data_upload import tuning as tuning_module
+from data_upload.tuning import (
+    derive_azcopy_tuning,
+    get_azcopy_environment,
+    get_azcopy_tuning_args,
+    profile_file_sizes,
+)
+
+GB = 1024**3
+MB = 1024**2
+
+
+def test_profile_file_sizes_summarizes_distribution():
+    assert profile_file_sizes([1, 5, 10]) == {
+        "file_count": 3,
+        "total_bytes": 16,
+        "median_size": 5,
+        "max_size": 10,
+    }
+    assert profile_file_sizes([])["median_size"] == 0
+
+
+def test_many_small_files_get_more_concurrency_per_core():
+    small = derive_azcopy_tuning(4, 8 * GB, profile_file_sizes([1000] * 10_000))
+    large = derive_azcopy_tuning(4, 8 * GB, profile_file_sizes([2 * GB] * 100))
+
+    assert small["concurrency"] == 128
+    assert large["concurrency"] == 64
+    assert small["block_size_mb"] is None
+    assert large["block_size_mb"] == 4
+
+
+def test_concurrency_is_bounded_by_file_count_and_maximum():
+    assert derive_azcopy_tuning(32, 8 * GB, profile_file_sizes([10] * 3))[
+        "concurrency"
+    ] == (tuning_module.MIN_CONCURRENCY)
+    assert derive_azcopy_tuning(64, 8 * GB, profile_file_sizes([10] * 100_000))[
+        "concurrency"
+    ] == (tuning_module.MAX_CONCURRENCY)
+
+
+def test_buffer_size_follows_available_memory():
+    profile = profile_file_sizes([MB])
+
+    assert derive_azcopy_tuning(4, 2 * GB, profile)["buffer_gb"] == 0.5
+    assert derive_azcopy_tuning(4, 256 * GB, profile)["buffer_gb"] == 8.0
+    assert derive_azcopy_tuning(4, 100 * MB, profile)["buffer_gb"] == 0.25
+    assert derive_azcopy_tuning(4, None, profile)["buffer_gb"] == 1.0
+
+
+def test_config_overrides_win():
+    tuning = derive_azcopy_tuning(
+        4,
+        8 * GB,
+        profile_file_sizes([MB]),
+        {"concurrency": 16, "buffer-gb": 2, "block-size-mb": 1},
+    )
+
+    assert tuning == {"concurrency": 16, "buffer_gb": 2.0, "block_size_mb": 1}
+
+
+def test_block_size_larger_than_azure_files_limit_is_rejected():
+    with pytest.raises(ValueError, match="block size"):
+        derive_azcopy_tuning(4, 8 * GB, profile_file_sizes([MB]), {"block-size-mb": 8})
+
+
+def test_tuning_is_passed_through_environment_and_arguments(monkeypatch):
+    monkeypatch.setenv("PATH", "/usr/bin")
+    tuning = {"concurrency": 64, "buffer_gb": 0.5, "block_size_mb": 4}
+
+    environment = get_azcopy_environment(tuning)
+
+    assert environment["AZCOPY_CONCURRENCY_VALUE"] == "64"
+    assert environment["AZCOPY_BUFFER_GB"] == "0.5"
+    assert environment["PATH"] == "/usr/bin"
+    assert get_azcopy_tuning_args(tuning) == ["--block-size-mb", "4"]
+    assert get_azcopy_tuning_args({**tuning, "block_size_mb": None}) == []
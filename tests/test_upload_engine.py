@@ -0,0 +1,292 @@
+import base64
+import hashlib
+
+import httpx
+import pytest
+
+from data_upload import hashing, upload_engine
+from data_upload.retry import RetryPolicy, RetryStats
+from data_upload.upload_engine import (
+    ENGINE_AZCOPY,
+    ENGINE_NATIVE,
+    BufferPool,
+    DestinationNotFoundError,
+    NativeUploadEngine,
+)
+
+
+def _write_run_folder(root):
+    (root / "spectra" / "detector-1").mkdir(parents=True)
+    (root / "empty.txt").write_bytes(b"")
+    (root / "notes.txt").write_bytes(b"run notes")
+    (root / "spectra" / "detector-1" / "large.bin").write_bytes(bytes(range(256)) * 40)
+    return {
+        "empty.txt": b"",
+        "notes.txt": b"run notes",
+        "spectra/detector-1/large.bin": bytes(range(256)) * 40,
+    }
+
+
+def test_native_engine_uploads_folder_tree_to_file_share(fake_storage, tmp_path):
+    expected_files = _write_run_folder(tmp_path)
+    output = []
+
+    return_code = NativeUploadEngine(concurrency=4, chunk_size=1024).upload(
+        str(tmp_path), fake_storage.url, "sv=2021&sig=fake-signature", output.append
+    )
+
+    assert return_code == 0
+    assert {
+        path: bytes(content) for path, content in fake_storage.files.items()
+    } == expected_files
+    assert fake_storage.directories == {"", "spectra", "spectra/detector-1"}
+    range_requests = [
+        query for method, path, query in fake_storage.requests if query.get("comp")
+    ]
+    # 10 KiB split in 1 KiB ranges, plus the single range of notes.txt.
+    assert len(range_requests) == 11
+    assert output[-1].startswith("Uploaded 3 of 3 files")
+
+
+def test_native_engine_uploads_into_destination_subfolder(fake_storage, tmp_path):
+    fake_storage.directories.add("projects/run-1")
+    fake_storage.directories.add("projects")
+    (tmp_path / "data.txt").write_bytes(b"data")
+
+    return_code = NativeUploadEngine().upload(
+        str(tmp_path),
+        f"{fake_storage.url}/projects/run-1/",
+        "sig=fake-signature",
+        lambda line: None,
+    )
+
+    assert return_code == 0
+    assert bytes(fake_storage.files["projects/run-1/data.txt"]) == b"data"
+
+
+def test_native_engine_only_uploads_selected_files(fake_storage, tmp_path):
+    expected_files = _write_run_folder(tmp_path)
+
+    return_code = NativeUploadEngine(chunk_size=1024).upload(
+        str(tmp_path),
+        fake_storage.url,
+        "sig=fake-signature",
+        lambda line: None,
+        only_files=["spectra/detector-1/large.bin"],
+    )
+
+    assert return_code == 0
+    assert list(fake_storage.files) == ["spectra/detector-1/large.bin"]
+    assert bytes(fake_storage.files["spectra/detector-1/large.bin"]) == (
+        expected_files["spectra/detector-1/large.bin"]
+    )
+    assert fake_storage.directories == {"", "spectra", "spectra/detector-1"}
+
+
+def test_native_engine_consumes_limiter_per_range(fake_storage, tmp_path):
+    _write_run_folder(tmp_path)
+    consumed = []
+
+    class FakeLimiter:
+        def consume(self, amount):
+            consumed.append(amount)
+
+    return_code = NativeUploadEngine(chunk_size=4096, limiter=FakeLimiter()).upload(
+        str(tmp_path), fake_storage.url, "sig=fake-signature", lambda line: None
+    )
+
+    assert return_code == 0
+    assert sorted(consumed) == [9, 2048, 4096, 4096]
+
+
+def test_native_engine_stores_content_md5_of_each_file(fake_storage, tmp_path):
+    expected_files = _write_run_folder(tmp_path)
+
+    return_code = NativeUploadEngine(chunk_size=1024, put_md5=True).upload(
+        str(tmp_path), fake_storage.url, "sig=fake-signature", lambda line: None
+    )
+
+    assert return_code == 0
+    assert fake_storage.content_md5 == {
+        path: base64.b64encode(hashlib.md5(content).digest()).decode()
+        for path, content in expected_files.items()
+    }
+
+
+def test_native_engine_only_hashes_selected_files(fake_storage, tmp_path, monkeypatch):
+    _write_run_folder(tmp_path)
+    hashed = []
+    original_hash_file = hashing.hash_file
+
+    def recording_hash_file(path, algorithm):
+        hashed.append(path.name)
+        return original_hash_file(path, algorithm)
+
+    monkeypatch.setattr(hashing, "hash_file", recording_hash_file)
+
+    return_code = NativeUploadEngine(chunk_size=1024, put_md5=True).upload(
+        str(tmp_path),
+        fake_storage.url,
+        "sig=fake-signature",
+        lambda line: None,
+        only_files=["notes.txt"],
+    )
+
+    assert return_code == 0
+    assert hashed == ["notes.txt"]
+    assert list(fake_storage.content_md5) == ["notes.txt"]
+
+
+def test_native_engine_retries_transient_storage_errors(
+    fake_storage, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(upload_engine.time, "sleep", lambda seconds: None)
+    (tmp_path / "data.txt").write_bytes(b"data")
+    fake_storage.fail_next = [503, 500]
+
+    return_code = NativeUploadEngine().upload(
+        str(tmp_path), fake_storage.url, "sig=fake-signature", lambda line: None
+    )
+
+    assert return_code == 0
+    assert bytes(fake_storage.files["data.txt"]) == b"data"
+
+
+def test_native_engine_follows_retry_policy_and_retry_after(tmp_path, monkeypatch):
+    (tmp_path / "data.txt").write_bytes(b"data")
+    delays = []
+    monkeypatch.setattr(upload_engine.time, "sleep", delays.append)
+    stats = RetryStats()
+    monkeypatch.setattr(upload_engine, "retry_stats", stats)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503, headers={"Retry-After": "7"})
+
+    engine = NativeUploadEngine(
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        retry_policy=RetryPolicy(max_attempts=2, budget=60.0),
+    )
+    return_code = engine.upload(
+        str(tmp_path), "https://storage.example/share", "sig=x", lambda line: None
+    )
+
+    assert return_code == 1
+    assert len(requests) == 2
+    assert delays == [7.0]
+    assert stats.snapshot()["requests"] == 1
+    assert stats.snapshot()["retries"] == 1
+    assert stats.snapshot()["failures"] == 1
+
+
+def test_native_engine_reports_failed_files(fake_storage, tmp_path):
+    (tmp_path / "data.txt").write_bytes(b"data")
+    output = []
+
+    return_code = NativeUploadEngine().upload(
+        str(tmp_path), fake_storage.url, "sig=wrong-signature", output.append
+    )
+
+    assert return_code == 1
+    assert "Failed to upload data.txt: Could not create file data.txt: HTTP 403" in (
+        output
+    )
+
+
+@pytest.mark.parametrize("subfolder", [False, True])
+def test_native_engine_raises_when_destination_is_missing(
+    fake_storage, tmp_path, subfolder
+):
+    if subfolder:
+        (tmp_path / "spectra").mkdir()
+        (tmp_path / "spectra" / "data.txt").write_bytes(b"data")
+    else:
+        (tmp_path / "data.txt").write_bytes(b"data")
+
+    with pytest.raises(DestinationNotFoundError):
+        NativeUploadEngine().upload(
+            str(tmp_path),
+            f"{fake_storage.url}/projects/run-1/",
+            "sig=fake-signature",
+            lambda line: None,
+        )
+
+
+def test_native_engine_raises_when_source_does_not_exist(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        NativeUploadEngine().upload(
+            str(tmp_path / "missing"), "https://storage.example/share", "sig=sas"
+        )
+
+
+def test_native_engine_rejects_ranges_larger_than_azure_limit():
+    with pytest.raises(ValueError, match="Chunk size"):
+        NativeUploadEngine(chunk_size=upload_engine.MAX_RANGE_SIZE + 1)
+
+
+def test_buffer_pool_reuses_released_buffers():
+    pool = BufferPool(buffer_count=1, buffer_size=8)
+
+    buffer = pool.acquire()
+    pool.release(buffer)
+
+    assert pool.acquire() is buffer
+    assert len(buffer) == 8
+
+
+@pytest.mark.parametrize(
+    ("azcopy_path", "engine"),
+    [(None, ENGINE_NATIVE), ("/bin/azcopy", ENGINE_AZCOPY)],
+)
+def test_default_upload_engine_falls_back_to_native_without_azcopy(
+    monkeypatch, azcopy_path, engine
+):
+    monkeypatch.setattr(upload_engine, "get_azcopy_path", lambda: azcopy_path)
+
+    assert upload_engine.default_upload_engine() == engine
+
+
+def test_native_engine_reports_final_progress(fake_storage, tmp_path):
+    _write_run_folder(tmp_path)
+    progress = []
+
+    NativeUploadEngine(chunk_size=1024).upload(
+        str(tmp_path),
+        fake_storage.url,
+        "sig=fake-signature",
+        lambda line: None,
+        on_progress=progress.append,
+    )
+
+    assert progress[-1]["final"] is True
+    assert progress[-1]["status"] == "Completed"
+    assert progress[-1]["bytes_transferred"] == progress[-1]["bytes_total"] == 10249
+    assert progress[-1]["files_completed"] == progress[-1]["files_total"] == 3
+
+
+def test_native_engine_reads_a_callable_token_on_every_attempt(
+    fake_storage, tmp_path, monkeypatch
+):
+    expected_files = _write_run_folder(tmp_path)
+    monkeypatch.setattr(upload_engine.time, "sleep", lambda seconds: None)
+    # The first request is refused before its expired token is even checked;
+    # its retry must use the renewed token.
+    fake_storage.fail_next = [503]
+    tokens = iter(["sig=expired"])
+
+    return_code = NativeUploadEngine(concurrency=2, chunk_size=1024).upload(
+        str(tmp_path),
+        fake_storage.url,
+        lambda: next(tokens, "sig=fake-signature"),
+        lambda line: None,
+    )
+
+    assert return_code == 0
+    assert {
+        path: bytes(content) for path, content in fake_storage.files.items()
+    } == expected_files
+    assert [query["sig"] for _method, _path, query in fake_storage.requests[:2]] == [
+        "expired",
+        "fake-signature",
+    ]